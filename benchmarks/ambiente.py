@@ -0,0 +1,81 @@
+"""
+Utilitários comuns dos benchmarks - Smart Paws
+
+Cada benchmark roda contra um banco de teste descartável (o mesmo que o
+``manage.py test`` cria), nunca contra o db.sqlite3 de desenvolvimento.
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def configurar_django():
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartpaws.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def banco_temporario(arquivo=None):
+    """
+    Cria o banco de teste com as migrações aplicadas e o destrói no final.
+    No SQLite o banco de teste fica em memória; ``arquivo`` grava num
+    arquivo, para benchmarks com várias threads escrevendo ao mesmo tempo.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    nome_original = connection.settings_dict['NAME']
+    if arquivo and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = str(arquivo)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        teardown_test_environment()
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa a função N vezes e devolve as durações em milissegundos"""
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    return duracoes
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def resumo(duracoes):
+    return {
+        'p50_ms': round(percentil(duracoes, 50), 3),
+        'p95_ms': round(percentil(duracoes, 95), 3),
+        'media_ms': round(statistics.fmean(duracoes), 3) if duracoes else 0.0,
+        'amostras': len(duracoes),
+    }
+
+
+def imprimir_linha(nome, estatisticas):
+    print(
+        f"  {nome:<40} p50={estatisticas['p50_ms']:>9.3f}ms  "
+        f"p95={estatisticas['p95_ms']:>9.3f}ms  n={estatisticas['amostras']}"
+    )
@@ -0,0 +1,97 @@
+"""
+Benchmark da busca de produtos - Smart Paws
+
+Compara a busca antiga (três icontains com OR) com o índice textual de
+produtos/busca.py sobre um catálogo sintético.
+
+Uso:
+    python -m benchmarks.busca --produtos 100000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.ambiente import configurar_django, banco_temporario, cronometrar, resumo, imprimir_linha
+
+configurar_django()
+
+from decimal import Decimal  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.utils.text import slugify  # noqa: E402
+from produtos import busca  # noqa: E402
+from produtos.models import CategoriaProduto, Produto  # noqa: E402
+
+
+TIPOS = ['Ração', 'Petisco', 'Brinquedo', 'Coleira', 'Caminha', 'Shampoo', 'Moletom', 'Gaiola', 'Aquário', 'Areia']
+ANIMAIS = ['Cães', 'Gatos', 'Filhotes', 'Pássaros', 'Peixes', 'Coelhos', 'Hamsters', 'Répteis']
+ADJETIVOS = ['Premium', 'Natural', 'Light', 'Sênior', 'Macio', 'Resistente', 'Azul', 'Sabor Carne', 'Sabor Frango', 'Hipoalergênico']
+PALAVRAS = ['nutritivo', 'confortável', 'durável', 'atóxico', 'lavável', 'vitaminas', 'proteína', 'pelagem', 'diversão', 'higiene']
+
+CONSULTAS = ['racao', 'rações para cães', 'brinquedo resistente', 'coleira azul', 'gat', 'shampoo hipoalergenico', 'aquario', 'premium filhotes']
+
+
+def popular(total, rng):
+    categorias = [
+        CategoriaProduto.objects.create(nome=nome, slug=slugify(nome), tipo='outros')
+        for nome in ['Alimentos', 'Brinquedos', 'Acessórios', 'Higiene', 'Habitat']
+    ]
+    lote = []
+    for i in range(total):
+        nome = f'{rng.choice(TIPOS)} para {rng.choice(ANIMAIS)} {rng.choice(ADJETIVOS)}'
+        lote.append(Produto(
+            nome=nome,
+            slug=f'{slugify(nome)}-{i}',
+            categoria=rng.choice(categorias),
+            descricao=' '.join(rng.choices(PALAVRAS, k=12)),
+            preco_original=Decimal(rng.randint(500, 50000)) / 100,
+            estoque=rng.randint(0, 200),
+            destaque=rng.random() < 0.05,
+        ))
+        if len(lote) == 5000:
+            Produto.objects.bulk_create(lote)
+            lote = []
+    Produto.objects.bulk_create(lote)
+
+
+def busca_antiga(termo):
+    queryset = Produto.objects.filter(ativo=True).filter(
+        Q(nome__icontains=termo) |
+        Q(descricao__icontains=termo) |
+        Q(categoria__nome__icontains=termo)
+    ).order_by('-destaque', '-created_at')
+    queryset.count()
+    list(queryset[:20])
+
+
+def busca_indexada(termo):
+    queryset = busca.filtrar_queryset(Produto.objects.filter(ativo=True), termo)
+    queryset = queryset.order_by('relevancia_busca')
+    queryset.count()
+    list(queryset[:20])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--produtos', type=int, default=100_000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    with banco_temporario() as connection:
+        print(f'\nBanco: {connection.vendor} | índice: {type(busca.obter_indice()).__name__}')
+        print(f'Populando {args.produtos} produtos...')
+        popular(args.produtos, random.Random(args.semente))
+
+        inicio = time.perf_counter()
+        busca.reindexar()
+        print(f'Índice construído em {time.perf_counter() - inicio:.2f}s\n')
+
+        for termo in CONSULTAS:
+            print(f'"{termo}"')
+            imprimir_linha('icontains (antiga)', resumo(cronometrar(lambda: busca_antiga(termo), args.repeticoes)))
+            imprimir_linha('índice textual', resumo(cronometrar(lambda: busca_indexada(termo), args.repeticoes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark do checkout - Smart Paws
+
+Mede a latência de transformar um carrinho em pedido com 1, 10 e 100 linhas,
+comparando a montagem antiga (um INSERT por item, propriedades recalculadas
+a cada acesso) com carrinho/checkout.py.
+
+Uso:
+    python -m benchmarks.checkout --repeticoes 30
+"""
+
+import argparse
+
+from benchmarks.ambiente import configurar_django, banco_temporario, cronometrar, resumo, imprimir_linha
+
+configurar_django()
+
+from decimal import Decimal  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from carrinho.checkout import finalizar_carrinho, payload_pix  # noqa: E402
+from carrinho.models import Carrinho, ItemCarrinho, ItemPedido, Pedido  # noqa: E402
+from produtos.models import CategoriaProduto, Produto  # noqa: E402
+
+
+TAMANHOS = (1, 10, 100)
+
+
+def preparar(total_produtos):
+    usuario = get_user_model().objects.create_user(
+        username='benchmark', email='benchmark@smartpaws.com', password='benchmark'
+    )
+    categoria = CategoriaProduto.objects.create(nome='Benchmark', slug='benchmark')
+    Produto.objects.bulk_create([
+        Produto(
+            nome=f'Produto {i}',
+            slug=f'produto-{i}',
+            categoria=categoria,
+            descricao='',
+            preco_original=Decimal('19.90'),
+            estoque=10_000_000,
+        )
+        for i in range(total_produtos)
+    ])
+    carrinho = Carrinho.objects.create(usuario=usuario)
+    return carrinho, list(Produto.objects.values_list('pk', flat=True))
+
+
+def encher(carrinho, produto_ids, linhas):
+    ItemCarrinho.objects.bulk_create([
+        ItemCarrinho(carrinho=carrinho, produto_id=pk, quantidade=2, preco_unitario=Decimal('19.90'))
+        for pk in produto_ids[:linhas]
+    ])
+    carrinho.recalcular_totais()
+
+
+def finalizar_legado(carrinho):
+    """Reprodução do finalizar_pedido anterior, para comparação"""
+    with transaction.atomic():
+        itens = carrinho.itens.select_related('produto').all()
+        subtotal = sum(item.total for item in itens)
+        frete = Decimal('0.00') if subtotal >= 200 else Decimal('15.00')
+        pedido = Pedido.objects.create(
+            usuario_id=carrinho.usuario_id,
+            subtotal=subtotal,
+            desconto=Decimal('0.00'),
+            frete=frete,
+            total=subtotal + frete,
+            endereco_entrega='Rua do Benchmark, 1',
+            forma_pagamento='pix',
+        )
+        for item in itens:
+            ItemPedido.objects.create(
+                pedido=pedido,
+                produto=item.produto,
+                nome_produto=item.produto.nome,
+                quantidade=item.quantidade,
+                preco_unitario=item.preco_unitario,
+                subtotal=item.total,
+            )
+            item.produto.estoque -= item.quantidade
+            item.produto.save()
+        pedido.qr_code_pix = payload_pix(pedido)
+        pedido.save()
+        for item in itens:
+            item.delete()
+
+
+def medir(nome, carrinho, produto_ids, linhas, finalizar, repeticoes):
+    duracoes = []
+    comandos = 0
+    for _ in range(repeticoes):
+        encher(carrinho, produto_ids, linhas)
+        connection.queries_log.clear()  # o log guarda no máximo 9000 comandos
+        with CaptureQueriesContext(connection) as consultas:
+            duracoes.extend(cronometrar(lambda: finalizar(carrinho), 1))
+        comandos = len(consultas)
+    estatisticas = resumo(duracoes)
+    imprimir_linha(nome, estatisticas)
+    print(f'  {"":<40} {comandos} comandos SQL por checkout')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=30)
+    args = parser.parse_args()
+
+    with banco_temporario() as conexao:
+        print(f'\nBanco: {conexao.vendor}')
+        carrinho, produto_ids = preparar(max(TAMANHOS))
+
+        for linhas in TAMANHOS:
+            print(f'\nCarrinho com {linhas} linha(s)')
+            medir('antigo (um INSERT/UPDATE por item)', carrinho, produto_ids, linhas,
+                  finalizar_legado, args.repeticoes)
+            medir('pipeline (em lote)', carrinho, produto_ids, linhas,
+                  lambda c: finalizar_carrinho(c, 'Rua do Benchmark, 1', 'pix'), args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
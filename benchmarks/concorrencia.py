@@ -0,0 +1,168 @@
+"""
+Benchmark de concorrência dos endpoints JSON do carrinho - Smart Paws
+
+Simula N clientes simultâneos (padrão 200), cada um logado com o próprio
+carrinho, fazendo R chamadas seguidas ao mesmo endpoint:
+
+- WSGI: views síncronas (carrinho/views.py) atendidas por um pool de
+  ``--threads`` threads, como um servidor WSGI com threads - os demais
+  clientes esperam na fila;
+- ASGI: views assíncronas (carrinho/api.py) pelo ASGIHandler, todos os
+  clientes no mesmo loop de eventos.
+
+Mede requisições por segundo e a latência de cada requisição (da fila até a
+resposta, para o WSGI). O banco é um arquivo SQLite temporário com WAL
+(SQLITE_PRAGMAS), já que várias threads escrevem ao mesmo tempo; o
+busy_timeout sobe para 60 s porque, com dezenas de escritores na fila, a
+espera pela trava de escrita passa dos 5 s do padrão.
+
+Uso:
+    python -m benchmarks.concorrencia --clientes 200 --requisicoes 5 --threads 32
+"""
+
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.ambiente import banco_temporario, configurar_django, imprimir_linha, resumo
+
+configurar_django()
+
+from decimal import Decimal  # noqa: E402
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from carrinho.models import Carrinho  # noqa: E402
+from produtos.models import CategoriaProduto, Produto  # noqa: E402
+
+
+AJAX = {'X-Requested-With': 'XMLHttpRequest'}
+
+ENDPOINTS = {
+    # nome: (rota síncrona, rota assíncrona, método, precisa do produto)
+    'contador': ('carrinho:count', 'carrinho:api_contador', 'get', False),
+    'adicionar': ('carrinho:adicionar', 'carrinho:api_adicionar', 'post', True),
+}
+
+
+def preparar(clientes):
+    """Usuários com carrinho e o cookie de sessão de cada um"""
+    categoria = CategoriaProduto.objects.create(nome='Benchmark', slug='benchmark')
+    produto = Produto.objects.create(
+        nome='Produto', slug='produto', categoria=categoria, descricao='',
+        preco_original=Decimal('10.00'), estoque=10**6,
+    )
+    Usuario = get_user_model()
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(username=f'cliente{i}', email=f'cliente{i}@smartpaws.com') for i in range(clientes)
+    ])
+    Carrinho.objects.bulk_create([Carrinho(usuario=usuario) for usuario in usuarios])
+
+    sessoes = []
+    for usuario in usuarios:
+        cliente = Client()
+        cliente.force_login(usuario)
+        sessoes.append(cliente.cookies[settings.SESSION_COOKIE_NAME].value)
+    return produto, sessoes
+
+
+def _url(endpoint, assincrono, produto):
+    sincrona, assincrona, _, com_produto = ENDPOINTS[endpoint]
+    return reverse(assincrona if assincrono else sincrona, args=[produto.pk] if com_produto else [])
+
+
+def wsgi(endpoint, produto, sessoes, requisicoes, threads):
+    url = _url(endpoint, False, produto)
+    metodo = ENDPOINTS[endpoint][2]
+    duracoes, trava = [], threading.Lock()
+
+    def cliente(sessao, enfileirado):
+        navegador = Client()
+        navegador.cookies[settings.SESSION_COOKIE_NAME] = sessao
+        proprias = []
+        try:
+            for _ in range(requisicoes):
+                resposta = getattr(navegador, metodo)(url, headers=AJAX)
+                assert resposta.status_code == 200, resposta.status_code
+                agora = time.perf_counter()
+                proprias.append((agora - enfileirado) * 1000)
+                enfileirado = agora
+        finally:
+            connections.close_all()
+        with trava:
+            duracoes.extend(proprias)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for futuro in [executor.submit(cliente, sessao, inicio) for sessao in sessoes]:
+            futuro.result()
+    return time.perf_counter() - inicio, duracoes
+
+
+def asgi(endpoint, produto, sessoes, requisicoes):
+    url = _url(endpoint, True, produto)
+    metodo = ENDPOINTS[endpoint][2]
+    duracoes = []
+
+    async def cliente(sessao):
+        navegador = AsyncClient()
+        navegador.cookies[settings.SESSION_COOKIE_NAME] = sessao
+        for _ in range(requisicoes):
+            antes = time.perf_counter()
+            resposta = await getattr(navegador, metodo)(url, headers=AJAX)
+            assert resposta.status_code == 200, resposta.status_code
+            duracoes.append((time.perf_counter() - antes) * 1000)
+
+    async def todos():
+        await asyncio.gather(*(cliente(sessao) for sessao in sessoes))
+        await sync_to_async(connections.close_all)()
+
+    inicio = time.perf_counter()
+    asyncio.run(todos())
+    return time.perf_counter() - inicio, duracoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clientes', type=int, default=200)
+    parser.add_argument('--requisicoes', type=int, default=5, help='por cliente')
+    parser.add_argument('--threads', type=int, default=32, help='threads do servidor WSGI')
+    parser.add_argument('--endpoint', choices=[*ENDPOINTS, 'todos'], default='todos')
+    args = parser.parse_args()
+
+    endpoints = list(ENDPOINTS) if args.endpoint == 'todos' else [args.endpoint]
+    total = args.clientes * args.requisicoes
+    pragmas = {**getattr(settings, 'SQLITE_PRAGMAS', {}), 'busy_timeout': 60_000}
+    with (
+        tempfile.TemporaryDirectory() as pasta,
+        override_settings(SQLITE_PRAGMAS=pragmas),
+        banco_temporario(Path(pasta) / 'concorrencia.sqlite3'),
+    ):
+        produto, sessoes = preparar(args.clientes)
+        connections.close_all()
+
+        for endpoint in endpoints:
+            print(f'\n{endpoint}: {args.clientes} clientes x {args.requisicoes} requisições')
+            resultados = {
+                f'WSGI (síncrona, {args.threads} threads)': wsgi(
+                    endpoint, produto, sessoes, args.requisicoes, args.threads
+                ),
+                'ASGI (assíncrona)': asgi(endpoint, produto, sessoes, args.requisicoes),
+            }
+            for nome, (segundos, duracoes) in resultados.items():
+                imprimir_linha(nome, resumo(duracoes))
+                print(f'  {"":<40} {total / segundos:,.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark do custo de conexão por requisição - Smart Paws
+
+Simula N requisições (``request_started`` -> consultas -> ``request_finished``,
+como o handler do Django) e mede cada uma em três cenários:
+
+- antes: ``CONN_MAX_AGE=0`` e sem PRAGMAs - conexão nova a cada requisição
+  e um fsync por commit (journal padrão, synchronous=FULL);
+- persistente: ``CONN_MAX_AGE`` > 0 - a conexão é reaproveitada;
+- persistente + WAL: o perfil novo no SQLite (``SQLITE_PRAGMAS``).
+
+Cada requisição faz uma leitura e uma escrita numa tabela própria do
+benchmark, num arquivo SQLite temporário por cenário (o modo WAL fica
+gravado no arquivo). Com ``DB_ENGINE=postgresql`` (e as demais variáveis
+DB_*) compara no PostgreSQL: sem persistência, persistente e pool
+(``DB_POOL``, requer psycopg 3).
+
+Uso:
+    python -m benchmarks.conexoes --requisicoes 500
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks.ambiente import (
+    BASE_DIR, configurar_django, cronometrar, imprimir_linha, resumo,
+)
+
+configurar_django()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from core import banco  # noqa: E402
+
+ALIAS = 'benchmark_conexoes'
+
+
+def requisicao(conexao):
+    request_started.send(sender=None)
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM benchmark_visita')
+            cursor.fetchone()
+            cursor.execute('INSERT INTO benchmark_visita (caminho) VALUES (%s)', ['/produtos/'])
+    finally:
+        request_finished.send(sender=None)
+
+
+def medir(configuracao, requisicoes, pragmas=None):
+    """Registra o alias com ``configuracao`` e cronometra as requisições"""
+    connections.settings[ALIAS] = configuracao
+    connections.configure_settings(connections.settings)
+    try:
+        with override_settings(SQLITE_PRAGMAS=pragmas or {}):
+            conexao = connections[ALIAS]
+            with conexao.cursor() as cursor:
+                cursor.execute(
+                    'CREATE TABLE IF NOT EXISTS benchmark_visita '
+                    '(id INTEGER PRIMARY KEY, caminho VARCHAR(200))'
+                    if conexao.vendor == 'sqlite' else
+                    'CREATE TABLE IF NOT EXISTS benchmark_visita '
+                    '(id SERIAL PRIMARY KEY, caminho VARCHAR(200))'
+                )
+            conexao.close()
+            duracoes = cronometrar(lambda: requisicao(conexao), requisicoes)
+            with conexao.cursor() as cursor:
+                cursor.execute('DROP TABLE benchmark_visita')
+            conexao.close()
+            if hasattr(conexao, 'close_pool'):
+                conexao.close_pool()
+            return resumo(duracoes)
+    finally:
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+
+
+def cenarios_sqlite(pasta, conn_max_age):
+    ambiente = {'DB_ENGINE': 'sqlite'}
+    pragmas = banco.pragmas_sqlite({})
+
+    def arquivo(nome, idade):
+        return banco.configuracao_banco(
+            BASE_DIR, dict(ambiente, DB_NAME=str(Path(pasta) / f'{nome}.sqlite3'), DB_CONN_MAX_AGE=idade),
+        )
+
+    return [
+        ('antes (CONN_MAX_AGE=0, sem PRAGMAs)', arquivo('antes', 0), None),
+        (f'persistente (CONN_MAX_AGE={conn_max_age})', arquivo('persistente', conn_max_age), None),
+        ('persistente + WAL/NORMAL/busy_timeout', arquivo('wal', conn_max_age), pragmas),
+    ]
+
+
+def cenarios_postgresql(conn_max_age):
+    ambiente = dict(os.environ, DB_ENGINE='postgresql')
+    ambiente.pop('DB_POOL', None)
+    return [
+        ('antes (CONN_MAX_AGE=0)', banco.configuracao_banco(BASE_DIR, dict(ambiente, DB_CONN_MAX_AGE='0')), None),
+        (f'persistente (CONN_MAX_AGE={conn_max_age})',
+         banco.configuracao_banco(BASE_DIR, dict(ambiente, DB_CONN_MAX_AGE=str(conn_max_age))), None),
+        ('pool do psycopg 3', banco.configuracao_banco(BASE_DIR, dict(ambiente, DB_POOL='1')), None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requisicoes', type=int, default=500)
+    parser.add_argument('--conn-max-age', type=int, default=600)
+    args = parser.parse_args()
+
+    engine = os.environ.get('DB_ENGINE', 'sqlite')
+    print(f'\n{args.requisicoes} requisições ({engine}):')
+    with tempfile.TemporaryDirectory() as pasta:
+        if engine == 'postgresql':
+            cenarios = cenarios_postgresql(args.conn_max_age)
+        else:
+            cenarios = cenarios_sqlite(pasta, args.conn_max_age)
+
+        resultados = {}
+        for nome, configuracao, pragmas in cenarios:
+            resultados[nome] = medir(configuracao, args.requisicoes, pragmas)
+            imprimir_linha(nome, resultados[nome])
+
+    base = next(iter(resultados.values()))['media_ms']
+    for nome, estatisticas in list(resultados.items())[1:]:
+        if estatisticas['media_ms']:
+            print(f'  {nome}: {base / estatisticas["media_ms"]:.1f}x mais rápido que antes (média)')
+
+
+if __name__ == '__main__':
+    main()
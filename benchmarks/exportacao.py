@@ -0,0 +1,88 @@
+"""
+Benchmark da exportação de pedidos - Smart Paws
+
+Popula um banco descartável com pedidos (core/semeadura.py, ~2,5 itens por
+pedido) e mede a exportação em CSV e XLSX de carrinho/exportacao.py:
+tempo, linhas/s e pico de memória alocada (tracemalloc, numa segunda
+execução, porque o rastreamento deixa o Python mais lento). O pico é medido
+com 1/10 e com todos os pedidos: na exportação em streaming os dois devem
+ficar próximos.
+
+Uso:
+    python -m benchmarks.exportacao --itens 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.ambiente import configurar_django, banco_temporario
+
+configurar_django()
+
+from django.conf import settings  # noqa: E402
+from carrinho import exportacao  # noqa: E402
+from carrinho.models import ItemPedido, Pedido  # noqa: E402
+from core import semeadura  # noqa: E402
+
+ITENS_POR_PEDIDO = sum(semeadura.ITENS_POR_PEDIDO) / 2
+
+
+def exportar(formato, pedidos, pasta, lote):
+    caminho = os.path.join(pasta, f'pedidos.{formato}')
+    if formato == 'csv':
+        with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            total = exportacao.escrever_csv(pedidos, arquivo, lote)
+    else:
+        total = exportacao.escrever_xlsx(pedidos, caminho, lote)
+    return total, os.path.getsize(caminho)
+
+
+def pico_memoria(formato, pedidos, pasta, lote):
+    tracemalloc.start()
+    try:
+        exportar(formato, pedidos, pasta, lote)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--itens', type=int, default=200_000, help='itens de pedido aproximados (padrão: 200.000)')
+    parser.add_argument('--lote', type=int, default=exportacao.LOTE)
+    parser.add_argument('--formatos', nargs='+', default=['csv', 'xlsx'], choices=list(exportacao.FORMATOS))
+    parser.add_argument('--sem-memoria', action='store_true', help='não mede o pico de memória')
+    args = parser.parse_args()
+
+    # Com DEBUG o Django guarda o SQL de cada consulta
+    settings.DEBUG = False
+    with banco_temporario(), tempfile.TemporaryDirectory() as pasta:
+        geracao = semeadura.Semeadura(escala=0.1)
+        geracao.quantidades['pedidos'] = max(1, round(args.itens / ITENS_POR_PEDIDO))
+        print(f"\nPopulando {geracao.quantidades['pedidos']} pedidos...")
+        geracao.executar()
+        todos = Pedido.objects.all()
+        total_pedidos = todos.count()
+        print(f'  {total_pedidos} pedidos, {ItemPedido.objects.count()} itens')
+        decimo = Pedido.objects.filter(pk__lte=todos.order_by('pk').values_list('pk', flat=True)[total_pedidos // 10])
+
+        print(f'\nExportação (lote={args.lote}):')
+        for formato in args.formatos:
+            inicio = time.perf_counter()
+            linhas, tamanho = exportar(formato, todos, pasta, args.lote)
+            duracao = time.perf_counter() - inicio
+            print(
+                f'  {formato:<5} {linhas:>10} linhas em {duracao:>7.2f}s  '
+                f'({linhas / max(duracao, 1e-9):>9,.0f} linhas/s, {tamanho / 2**20:,.1f} MB)'
+            )
+            if not args.sem_memoria:
+                pequeno = pico_memoria(formato, decimo, pasta, args.lote)
+                grande = pico_memoria(formato, todos, pasta, args.lote)
+                print(f'        pico de memória: {pequeno / 2**20:.1f} MB (1/10) -> {grande / 2**20:.1f} MB (tudo)')
+
+
+if __name__ == '__main__':
+    main()
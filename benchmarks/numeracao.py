@@ -0,0 +1,63 @@
+"""
+Benchmark da numeração de pedidos - Smart Paws
+
+Gera N números com core/numeracao.py, mede a vazão e confere que são únicos,
+crescentes e com dígito verificador válido. Com --processos > 1, cada
+processo usa um worker id diferente e a unicidade é conferida no conjunto.
+
+Uso:
+    python -m benchmarks.numeracao --quantidade 100000 --processos 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.ambiente import configurar_django
+
+configurar_django()
+
+from core.numeracao import GeradorNumeros, validar  # noqa: E402
+
+
+def gerar(worker_id, quantidade):
+    gerador = GeradorNumeros(worker_id=worker_id)
+    inicio = time.perf_counter()
+    numeros = [gerador.proximo() for _ in range(quantidade)]
+    return numeros, time.perf_counter() - inicio
+
+
+def conferir(numeros):
+    assert all(validar(numero) for numero in numeros), 'dígito verificador inválido'
+    assert all(a < b for a, b in zip(numeros, numeros[1:])), 'números fora de ordem'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--quantidade', type=int, default=100_000)
+    parser.add_argument('--processos', type=int, default=1)
+    args = parser.parse_args()
+
+    numeros, duracao = gerar(1, args.quantidade)
+    conferir(numeros)
+    assert len(set(numeros)) == len(numeros), 'números repetidos'
+    print(f'\n1 processo: {args.quantidade} números em {duracao * 1000:.1f}ms '
+          f'({args.quantidade / duracao:,.0f}/s) - únicos, crescentes e válidos')
+    print(f'  primeiro={numeros[0]}  último={numeros[-1]}')
+
+    if args.processos > 1:
+        with ProcessPoolExecutor(max_workers=args.processos) as executor:
+            resultados = list(executor.map(
+                gerar, range(args.processos), [args.quantidade] * args.processos
+            ))
+        todos = []
+        for numeros, _ in resultados:
+            conferir(numeros)
+            todos.extend(numeros)
+        assert len(set(todos)) == len(todos), 'números repetidos entre processos'
+        vazao = sum(len(n) / d for n, d in resultados)
+        print(f'{args.processos} processos: {len(todos)} números únicos ({vazao:,.0f}/s somados)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark das rotas da loja - Smart Paws
+
+Popula um banco descartável com core/semeadura.py e mede, com o Client de
+teste do Django, a latência (p50/p95) e o número de consultas por requisição
+das rotas principais. O resultado vai para um JSON em benchmarks/resultados/
+(com o commit atual no nome), para comparar antes e depois de uma mudança:
+
+    python -m benchmarks.rotas --escala 1 --repeticoes 50
+    python -m benchmarks.rotas --comparar resultados/a1b2c3d.json resultados/e4f5a6b.json
+
+A comparação marca como regressão p50 acima de --tolerancia (padrão 10%) ou
+qualquer consulta a mais, e termina com código 1 se houver alguma.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.ambiente import BASE_DIR, configurar_django, banco_temporario, resumo, imprimir_linha
+
+PASTA_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+
+
+def commit_atual():
+    try:
+        saida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return 'sem-git'
+    return saida.stdout.strip()
+
+
+def rotas():
+    """``[(nome, metodo, url, dados, logado), ...]`` medidas pelo benchmark"""
+    from django.urls import reverse
+    from carrinho.models import Carrinho
+    from produtos.models import CategoriaProduto
+
+    categoria = CategoriaProduto.objects.order_by('pk').first()
+    item = Carrinho.objects.order_by('pk').first().itens.order_by('pk').first()
+    return [
+        ('home', 'get', reverse('core:home'), None, False),
+        ('produtos', 'get', reverse('produtos:lista'), None, False),
+        ('produtos_filtrados', 'get', reverse('produtos:lista'),
+         {'categoria': categoria.pk, 'ordenar': 'menor_preco'}, False),
+        ('produtos_busca', 'get', reverse('produtos:lista'), {'busca': 'racao premium'}, False),
+        ('produtos_mais', 'get', reverse('produtos:carregar_mais'), None, False),
+        ('pets', 'get', reverse('pets:adocao'), None, False),
+        ('servicos', 'get', reverse('servicos:lista'), None, False),
+        ('carrinho', 'get', reverse('carrinho:visualizar'), None, True),
+        ('carrinho_contador', 'get', reverse('carrinho:count'), None, True),
+        ('carrinho_atualizar', 'post', reverse('carrinho:atualizar', args=[item.pk]), {'quantidade': 2}, True),
+    ]
+
+
+def medir(cliente, metodo, url, dados, repeticoes, aquecimento, cache_frio):
+    import time
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    requisitar = getattr(cliente, metodo)
+    extra = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'} if metodo == 'post' else {}
+    for _ in range(aquecimento):
+        requisitar(url, dados, **extra)
+
+    duracoes, consultas = [], []
+    for _ in range(repeticoes):
+        if cache_frio:
+            cache.clear()
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            resposta = requisitar(url, dados, **extra)
+            duracoes.append((time.perf_counter() - inicio) * 1000)
+        if resposta.status_code >= 400:
+            raise RuntimeError(f'{url} respondeu {resposta.status_code}')
+        consultas.append(len(capturadas))
+
+    estatisticas = resumo(duracoes)
+    estatisticas['consultas'] = max(consultas)
+    return estatisticas
+
+
+def executar(args):
+    configurar_django()
+    import django
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from core import semeadura
+
+    with banco_temporario():
+        print(f'\nPopulando (escala={args.escala}, semente={args.semente})...')
+        resultado_semeadura = semeadura.semear(args.escala, args.semente)
+        total = sum(resultado_semeadura['linhas'].values())
+        print(f"  {total} linhas em {resultado_semeadura['segundos']:.1f}s "
+              f"({total / max(resultado_semeadura['segundos'], 1e-9):,.0f} linhas/s)")
+
+        anonimo = Client()
+        logado = Client()
+        # Dono do primeiro carrinho, usado nas rotas do carrinho
+        logado.force_login(get_user_model().objects.order_by('pk').first())
+
+        print(f'\nRotas ({args.repeticoes} repetições, cache {"frio" if args.cache_frio else "quente"}):')
+        resultados = {}
+        for nome, metodo, url, parametros, precisa_login in rotas():
+            estatisticas = medir(
+                logado if precisa_login else anonimo, metodo, url, parametros,
+                args.repeticoes, args.aquecimento, args.cache_frio,
+            )
+            resultados[nome] = estatisticas
+            imprimir_linha(f"{nome} ({estatisticas['consultas']} consultas)", estatisticas)
+
+        return {
+            'commit': commit_atual(),
+            'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'escala': args.escala,
+            'semente': args.semente,
+            'repeticoes': args.repeticoes,
+            'cache_frio': args.cache_frio,
+            'ambiente': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'banco': connection.vendor,
+                'maquina': platform.machine(),
+            },
+            'semeadura': resultado_semeadura,
+            'rotas': resultados,
+        }
+
+
+def comparar(caminho_base, caminho_novo, tolerancia):
+    base = json.loads(Path(caminho_base).read_text(encoding='utf-8'))
+    novo = json.loads(Path(caminho_novo).read_text(encoding='utf-8'))
+    print(f"\n{base['commit']} -> {novo['commit']} (escala {base['escala']} / {novo['escala']})")
+
+    regressoes = []
+    for nome, depois in novo['rotas'].items():
+        antes = base['rotas'].get(nome)
+        if antes is None:
+            print(f'  {nome:<22} (nova)')
+            continue
+        variacao = (depois['p50_ms'] - antes['p50_ms']) / antes['p50_ms'] if antes['p50_ms'] else 0.0
+        delta_consultas = depois['consultas'] - antes['consultas']
+        piorou = variacao > tolerancia or delta_consultas > 0
+        if piorou:
+            regressoes.append(nome)
+        print(
+            f"  {nome:<22} p50 {antes['p50_ms']:>8.2f} -> {depois['p50_ms']:>8.2f}ms ({variacao:+.0%})  "
+            f"consultas {antes['consultas']:>3} -> {depois['consultas']:<3}{'  REGRESSÃO' if piorou else ''}"
+        )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=float, default=0.2)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=30)
+    parser.add_argument('--aquecimento', type=int, default=3)
+    parser.add_argument('--cache-frio', action='store_true', help='limpa o cache antes de cada requisição')
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/<commit>.json)')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NOVO'))
+    parser.add_argument('--tolerancia', type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.comparar:
+        regressoes = comparar(*args.comparar, args.tolerancia)
+        sys.exit(1 if regressoes else 0)
+
+    resultado = executar(args)
+    saida = Path(args.saida) if args.saida else PASTA_RESULTADOS / f"{resultado['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'\nResultado salvo em {saida}')
+
+
+if __name__ == '__main__':
+    main()
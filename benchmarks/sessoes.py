@@ -0,0 +1,126 @@
+"""
+Benchmark do trabalho de banco das sessões - Smart Paws
+
+Um cliente entra na conta e navega ``--visitas`` vezes pela mesma sequência
+de páginas (home, produtos, adicionar ao carrinho com mensagem, carrinho,
+pets e serviços). Para cada motor de sessão conta, por página vista, as
+leituras e escritas na tabela ``django_session`` e o total de escritas no
+banco (incluindo as do carrinho):
+
+- antes: ``django.contrib.sessions.backends.db`` (o padrão do Django);
+- db, cached_db e cache (core/sessoes), com o cache em memória (locmem) e
+  em arquivo.
+
+O login (que sempre grava a sessão) é contado à parte, na última coluna.
+Cada cenário usa um cliente novo, com carrinho próprio.
+
+Uso:
+    python -m benchmarks.sessoes --visitas 20
+"""
+
+import argparse
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.ambiente import banco_temporario, configurar_django
+
+configurar_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from core import sessoes  # noqa: E402
+from produtos.models import CategoriaProduto, Produto  # noqa: E402
+
+ESCRITAS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def cenarios(pasta):
+    locmem = sessoes.cache_sessoes(Path(pasta), {}, cache='locmem')
+    arquivo = sessoes.cache_sessoes(Path(pasta), {}, cache='arquivo')
+    return {
+        'antes (db do Django)': ('django.contrib.sessions.backends.db', locmem),
+        'db': (sessoes.MOTORES['db'], locmem),
+        'cached_db + locmem': (sessoes.MOTORES['cached_db'], locmem),
+        'cached_db + arquivo': (sessoes.MOTORES['cached_db'], arquivo),
+        'cache + locmem': (sessoes.MOTORES['cache'], locmem),
+        'cache + arquivo': (sessoes.MOTORES['cache'], arquivo),
+    }
+
+
+def preparar():
+    categoria = CategoriaProduto.objects.create(nome='Benchmark', slug='benchmark')
+    produto = Produto.objects.create(
+        nome='Produto', slug='produto', categoria=categoria, descricao='',
+        preco_original=Decimal('10.00'), estoque=10**6,
+    )
+    return [
+        ('get', reverse('core:home')),
+        ('get', reverse('produtos:lista')),
+        ('post', reverse('carrinho:adicionar', args=[produto.pk])),
+        ('get', reverse('carrinho:visualizar')),
+        ('get', reverse('pets:adocao')),
+        ('get', reverse('servicos:lista')),
+    ]
+
+
+def _da_sessao(consultas):
+    return [consulta['sql'] for consulta in consultas.captured_queries if '"django_session"' in consulta['sql']]
+
+
+def navegar(nome, paginas, visitas):
+    email = f'{nome}@smartpaws.com'
+    get_user_model().objects.create_user(username=email, email=email, password='senha123')
+    cliente = Client()
+    with CaptureQueriesContext(connection) as login:
+        cliente.post(reverse('usuarios:login'), {'username': email, 'password': 'senha123'})
+    assert cliente.cookies.get(settings.SESSION_COOKIE_NAME), 'login falhou'
+
+    inicio = time.perf_counter()
+    with CaptureQueriesContext(connection) as consultas:
+        for _ in range(visitas):
+            for metodo, url in paginas:
+                getattr(cliente, metodo)(url)
+    segundos = time.perf_counter() - inicio
+
+    sql = [consulta['sql'] for consulta in consultas.captured_queries]
+    da_sessao = _da_sessao(consultas)
+    vistas = visitas * len(paginas)
+    return {
+        'leituras_sessao': sum(comando.startswith('SELECT') for comando in da_sessao) / vistas,
+        'escritas_sessao': sum(comando.startswith(ESCRITAS) for comando in da_sessao) / vistas,
+        'escritas_total': sum(comando.startswith(ESCRITAS) for comando in sql) / vistas,
+        'ms_por_pagina': segundos * 1000 / vistas,
+        'login_sessao': len(_da_sessao(login)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--visitas', type=int, default=20, help='vezes que a sequência de páginas é percorrida')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta, banco_temporario():
+        paginas = preparar()
+        print(f'{args.visitas} x {len(paginas)} páginas vistas por cenário (por página):')
+        print(f'  {"":<28} {"SELECT sessão":>14} {"escrita sessão":>15} {"escritas":>9} {"ms":>7} {"login":>6}')
+        for indice, (nome, (motor, cache)) in enumerate(cenarios(pasta).items()):
+            with override_settings(
+                SESSION_ENGINE=motor,
+                CACHES={**settings.CACHES, sessoes.ALIAS_CACHE: cache},
+            ):
+                medidas = navegar(f'cliente{indice}', paginas, args.visitas)
+            print(
+                f"  {nome:<28} {medidas['leituras_sessao']:>14.2f} {medidas['escritas_sessao']:>15.2f} "
+                f"{medidas['escritas_total']:>9.2f} {medidas['ms_por_pagina']:>7.2f} {medidas['login_sessao']:>6}"
+            )
+
+
+if __name__ == '__main__':
+    main()
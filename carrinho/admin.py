@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from . import exportacao
+from .forms import ExportarPedidosForm
 from .models import Carrinho, ItemCarrinho, Pedido, ItemPedido
 
 
@@ -10,9 +15,9 @@ class ItemCarrinhoInline(admin.TabularInline):
 
 @admin.register(Carrinho)
 class CarrinhoAdmin(admin.ModelAdmin):
-    list_display = ['usuario', 'total_itens', 'subtotal', 'created_at']
+    list_display = ['usuario', 'total_itens', 'subtotal', 'total', 'created_at']
     search_fields = ['usuario__email', 'usuario__first_name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['total_itens', 'subtotal', 'frete', 'total', 'created_at', 'updated_at']
     inlines = [ItemCarrinhoInline]
 
 
@@ -29,6 +34,7 @@ class PedidoAdmin(admin.ModelAdmin):
     search_fields = ['numero_pedido', 'usuario__email', 'usuario__first_name']
     readonly_fields = ['numero_pedido', 'created_at', 'updated_at', 'pago_em']
     inlines = [ItemPedidoInline]
+    actions = ['exportar_csv', 'exportar_xlsx']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -49,4 +55,42 @@ class PedidoAdmin(admin.ModelAdmin):
         ('Datas', {
             'fields': ('created_at', 'updated_at', 'pago_em')
         }),
-    )
\ No newline at end of file
+    )
+
+    def _nome_arquivo(self, formato):
+        return f"pedidos-{timezone.localtime():%Y%m%d-%H%M}.{formato}"
+
+    def exportar_csv(self, request, queryset):
+        return exportacao.resposta_csv(queryset, self._nome_arquivo('csv'))
+    exportar_csv.short_description = 'Exportar selecionados (CSV)'
+
+    def exportar_xlsx(self, request, queryset):
+        return exportacao.resposta_xlsx(queryset, self._nome_arquivo('xlsx'))
+    exportar_xlsx.short_description = 'Exportar selecionados (XLSX)'
+
+    def get_urls(self):
+        return [
+            path(
+                'exportar/',
+                self.admin_site.admin_view(self.exportar_pedidos),
+                name='carrinho_pedido_exportar'
+            ),
+        ] + super().get_urls()
+
+    def exportar_pedidos(self, request):
+        """Exporta os pedidos de um período/status com os itens (para relatórios do financeiro)"""
+        form = ExportarPedidosForm(request.GET or None)
+        if form.is_valid():
+            dados = form.cleaned_data
+            pedidos = exportacao.filtrar_pedidos(
+                self.get_queryset(request), dados['inicio'], dados['fim'], dados['status']
+            )
+            return exportacao.FORMATOS[dados['formato']](pedidos, self._nome_arquivo(dados['formato']))
+
+        contexto = {
+            **self.admin_site.each_context(request),
+            'title': 'Exportar pedidos',
+            'opts': self.model._meta,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/carrinho/pedido/exportar.html', contexto)
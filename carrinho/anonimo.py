@@ -0,0 +1,258 @@
+# ==========================================
+# carrinho/anonimo.py
+# ==========================================
+"""
+Carrinho de visitantes (não logados) num cookie assinado.
+
+Sem linha no banco nem sessão: o conteúdo é só ``produto x quantidade``
+(por exemplo ``12x2.15x1``), assinado com a SECRET_KEY para o visitante não
+alterar a mensagem sem ser percebido. Robôs e curiosos que clicam em
+"adicionar" não criam nada no banco; os preços são sempre os atuais do
+catálogo, lidos quando o carrinho é exibido.
+
+- ``obter(request)``: o carrinho do visitante (lido do cookie uma vez por
+  requisição);
+- ``CarrinhoAnonimoMiddleware``: grava o cookie na resposta se o carrinho
+  mudou (ou o apaga, se esvaziou);
+- ``mesclar(usuario, itens)``: no login (``user_logged_in``, ver
+  carrinho/signals.py) os itens vão para o ``Carrinho`` do usuário num
+  único upsert, que soma no próprio banco às quantidades que ele já tinha.
+
+Nas views, o ``item_id`` de um item do carrinho do visitante é o id do
+produto.
+"""
+
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from produtos.models import Produto
+
+from .models import Carrinho, ItemCarrinho
+
+
+SALT = 'carrinho.anonimo'
+DURACAO = 60 * 60 * 24 * 30  # 30 dias
+MAX_PRODUTOS = 50
+MAX_QUANTIDADE = 99
+
+
+def nome_cookie():
+    return getattr(settings, 'CARRINHO_ANONIMO_COOKIE', 'carrinho')
+
+
+def codificar(itens):
+    return '.'.join(f'{produto_id}x{quantidade}' for produto_id, quantidade in itens.items())
+
+
+def decodificar(valor):
+    """``{produto_id: quantidade}``; o que não for válido é descartado"""
+    itens = {}
+    for parte in (valor or '').split('.'):
+        produto_id, _, quantidade = parte.partition('x')
+        if produto_id.isdigit() and quantidade.isdigit() and int(quantidade) > 0:
+            itens[int(produto_id)] = min(int(quantidade), MAX_QUANTIDADE)
+        if len(itens) >= MAX_PRODUTOS:
+            break
+    return itens
+
+
+class ItemAnonimo:
+    """Item exibido na página do carrinho (mesmos atributos de ``ItemCarrinho``)"""
+
+    def __init__(self, produto, quantidade):
+        self.id = produto.pk
+        self.produto = produto
+        self.quantidade = quantidade
+        self.preco_unitario = produto.preco_final
+
+    @property
+    def total(self):
+        return self.quantidade * self.preco_unitario
+
+
+class CarrinhoAnonimo:
+    """
+    Conteúdo do cookie. Depois de ``carregar()`` tem os mesmos totais de
+    ``Carrinho`` (subtotal, frete, desconto e total), com os preços atuais.
+    """
+
+    desconto = Decimal('0.00')
+
+    def __init__(self, itens=None):
+        self.itens = dict(itens or {})
+        self.modificado = False
+        self.subtotal = Decimal('0.00')
+        self.frete = Carrinho.VALOR_FRETE
+        self.total = Carrinho.VALOR_FRETE
+
+    @classmethod
+    def do_cookie(cls, request):
+        valor = request.get_signed_cookie(nome_cookie(), default=None, salt=SALT, max_age=DURACAO)
+        return cls(decodificar(valor))
+
+    def __bool__(self):
+        return bool(self.itens)
+
+    @property
+    def total_itens(self):
+        return sum(self.itens.values())
+
+    def adicionar(self, produto_id, quantidade=1):
+        """Soma ``quantidade``; ``False`` se o carrinho já tem produtos demais"""
+        if produto_id not in self.itens and len(self.itens) >= MAX_PRODUTOS:
+            return False
+        return self.definir(produto_id, self.itens.get(produto_id, 0) + quantidade)
+
+    def definir(self, produto_id, quantidade):
+        if produto_id not in self.itens and len(self.itens) >= MAX_PRODUTOS:
+            return False
+        self.itens[produto_id] = max(1, min(quantidade, MAX_QUANTIDADE))
+        self.modificado = True
+        return True
+
+    def remover(self, produto_id):
+        if self.itens.pop(produto_id, None) is not None:
+            self.modificado = True
+
+    def limpar(self):
+        if self.itens:
+            self.itens = {}
+            self.modificado = True
+
+    # ========== PRODUTOS E TOTAIS ==========
+
+    def _produtos(self):
+        return Produto.objects.filter(pk__in=self.itens, ativo=True).select_related('categoria')
+
+    def _montar(self, produtos):
+        por_id = {produto.pk: produto for produto in produtos}
+        linhas = [
+            ItemAnonimo(por_id[produto_id], quantidade)
+            for produto_id, quantidade in self.itens.items() if produto_id in por_id
+        ]
+        # Produto desativado ou removido do catálogo sai do carrinho
+        if len(linhas) != len(self.itens):
+            self.itens = {linha.id: linha.quantidade for linha in linhas}
+            self.modificado = True
+
+        self.subtotal = sum((linha.total for linha in linhas), Decimal('0.00'))
+        self.frete = Decimal('0.00') if self.subtotal >= Carrinho.FRETE_GRATIS_MINIMO else Carrinho.VALOR_FRETE
+        self.total = self.subtotal - self.desconto + self.frete
+        return linhas
+
+    def carregar(self):
+        """Itens com os produtos (uma consulta) e totais atualizados"""
+        return self._montar(list(self._produtos()) if self.itens else [])
+
+    async def acarregar(self):
+        return self._montar([produto async for produto in self._produtos()] if self.itens else [])
+
+    # ========== COOKIE ==========
+
+    def gravar(self, response):
+        if not self.modificado:
+            return
+        if self.itens:
+            response.set_signed_cookie(
+                nome_cookie(), codificar(self.itens), salt=SALT, max_age=DURACAO,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        else:
+            response.delete_cookie(nome_cookie(), samesite='Lax')
+
+
+def obter(request):
+    """O carrinho do visitante desta requisição"""
+    if not hasattr(request, '_carrinho_anonimo'):
+        request._carrinho_anonimo = CarrinhoAnonimo.do_cookie(request)
+    return request._carrinho_anonimo
+
+
+class CarrinhoAnonimoMiddleware:
+    """Grava na resposta o carrinho do visitante que mudou na requisição"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.gravar(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.gravar(request, response)
+        return response
+
+    def gravar(self, request, response):
+        carrinho = getattr(request, '_carrinho_anonimo', None)
+        if carrinho is not None:
+            carrinho.gravar(response)
+
+
+# ========== LOGIN ==========
+
+_CAMPOS_UPSERT = ('carrinho', 'produto', 'quantidade', 'preco_unitario', 'created_at', 'updated_at')
+
+
+def _somar_itens(linhas):
+    """
+    INSERT ... ON CONFLICT (carrinho, produto) DO UPDATE que soma a
+    quantidade à da linha gravada (o ``update_conflicts`` do bulk_create só
+    sabe sobrescrever): uma adição concorrente ao mesmo item não se perde.
+    """
+    qn = connection.ops.quote_name
+    campos = [ItemCarrinho._meta.get_field(nome) for nome in _CAMPOS_UPSERT]
+    tabela = qn(ItemCarrinho._meta.db_table)
+    quantidade, atualizado = qn('quantidade'), qn('updated_at')
+    linha_sql = '({})'.format(', '.join(['%s'] * len(campos)))
+    sql = (
+        f'INSERT INTO {tabela} ({", ".join(qn(campo.column) for campo in campos)}) '
+        f'VALUES {", ".join([linha_sql] * len(linhas))} '
+        f'ON CONFLICT ({qn("carrinho_id")}, {qn("produto_id")}) DO UPDATE SET '
+        f'{quantidade} = {tabela}.{quantidade} + EXCLUDED.{quantidade}, '
+        f'{atualizado} = EXCLUDED.{atualizado}'
+    )
+    parametros = [
+        campo.get_db_prep_save(getattr(linha, campo.attname), connection)
+        for linha in linhas for campo in campos
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+
+
+def mesclar(usuario, itens):
+    """
+    Junta ``itens`` (``{produto_id: quantidade}``) ao carrinho do usuário
+    num único upsert, somando às quantidades gravadas sem lê-las antes.
+    """
+    if not itens:
+        return None
+    produtos = Produto.objects.filter(pk__in=itens, ativo=True).only('preco_original', 'preco_desconto')
+    with transaction.atomic():
+        carrinho, _ = Carrinho.objects.get_or_create(usuario=usuario)
+        agora = timezone.now()
+        linhas = [
+            ItemCarrinho(
+                carrinho=carrinho, produto_id=produto.pk, quantidade=itens[produto.pk],
+                preco_unitario=produto.preco_final, created_at=agora, updated_at=agora,
+            )
+            for produto in produtos
+        ]
+        if linhas:
+            _somar_itens(linhas)
+            Carrinho.atualizar_totais([carrinho.pk], [usuario.pk])
+    return carrinho
+
@@ -0,0 +1,181 @@
+# ==========================================
+# carrinho/api.py
+# ==========================================
+"""
+Endpoints JSON do carrinho em views assíncronas (ORM assíncrono do Django).
+
+São as chamadas AJAX mais frequentes do site (badge do cabeçalho, botão
+"adicionar", +/- e remover na página do carrinho). Servidas por ASGI
+(smartpaws/asgi.py), não seguram uma thread do servidor enquanto esperam o
+banco; sob WSGI continuam funcionando (o Django roda a corrotina num loop
+próprio). As views síncronas de carrinho/views.py seguem atendendo os
+formulários sem JavaScript.
+
+Cada escrita é uma instrução só, sem transação em volta: o item é criado ou
+incrementado (``quantidade = quantidade + n``) e os totais do carrinho são
+recalculados a partir dos itens num único UPDATE com somas
+(``Carrinho.aatualizar_totais``), então requisições concorrentes do mesmo
+usuário não perdem atualização.
+
+Visitantes usam o carrinho do cookie assinado (carrinho/anonimo.py); para
+eles o ``item_id`` é o id do produto.
+
+As respostas têm o mesmo formato das views síncronas com
+``X-Requested-With``.
+"""
+
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+from produtos.models import Produto
+
+from . import anonimo, contador
+from .models import Carrinho, ItemCarrinho
+
+
+def _erro(mensagem, status):
+    return JsonResponse({'success': False, 'error': mensagem}, status=status)
+
+
+def _quantidade(request):
+    try:
+        return int(request.POST.get('quantidade', 1))
+    except ValueError:
+        return 0
+
+
+async def _usuario(request):
+    usuario = await request.auser()
+    return usuario if usuario.is_authenticated else None
+
+
+async def _totais(carrinho_id):
+    return await Carrinho.objects.filter(pk=carrinho_id).values(*Carrinho.CAMPOS_TOTAIS).afirst()
+
+
+async def _totais_anonimo(carrinho):
+    """Totais do carrinho do visitante com os preços atuais (uma consulta)"""
+    await carrinho.acarregar()
+    return {'total_itens': carrinho.total_itens, 'subtotal': carrinho.subtotal, 'total': carrinho.total}
+
+
+@require_POST
+async def adicionar(request, produto_id):
+    """Adiciona ``quantidade`` (padrão 1) do produto ao carrinho"""
+    quantidade = _quantidade(request)
+    if quantidade <= 0:
+        return _erro('Quantidade inválida', 400)
+
+    produto = await Produto.objects.filter(pk=produto_id, ativo=True).only(
+        'nome', 'preco_original', 'preco_desconto'
+    ).afirst()
+    if produto is None:
+        return _erro('Produto não encontrado', 404)
+
+    usuario = await _usuario(request)
+    if usuario is None:
+        carrinho = anonimo.obter(request)
+        if not carrinho.adicionar(produto.pk, quantidade):
+            return _erro('Seu carrinho está cheio. Entre na sua conta para continuar comprando.', 400)
+        total_itens = carrinho.total_itens
+    else:
+        carrinho, _ = await Carrinho.objects.aget_or_create(usuario=usuario)
+        # Criado: ItemCarrinho.save já recalcula os totais
+        _, criado = await ItemCarrinho.objects.aget_or_create(
+            carrinho=carrinho, produto=produto,
+            defaults={'quantidade': quantidade, 'preco_unitario': produto.preco_final},
+        )
+        if not criado:
+            await ItemCarrinho.objects.filter(carrinho=carrinho, produto=produto).aupdate(
+                quantidade=F('quantidade') + quantidade, updated_at=timezone.now(),
+            )
+            await Carrinho.aatualizar_totais([carrinho.pk], [usuario.pk])
+        total_itens = (await _totais(carrinho.pk))['total_itens']
+
+    return JsonResponse({
+        'success': True,
+        'total_itens': total_itens,
+        'message': f'{produto.nome} adicionado ao carrinho!',
+    })
+
+
+@require_POST
+async def atualizar(request, item_id):
+    """Troca a quantidade de um item do carrinho"""
+    quantidade = _quantidade(request)
+    if quantidade <= 0:
+        return _erro('Quantidade inválida', 400)
+
+    usuario = await _usuario(request)
+    if usuario is None:
+        carrinho = anonimo.obter(request)
+        if item_id not in carrinho.itens:
+            return _erro('Item não encontrado', 404)
+        carrinho.definir(item_id, quantidade)
+        itens = {item.id: item for item in await carrinho.acarregar()}
+        if item_id not in itens:
+            return _erro('Item não encontrado', 404)
+        item_total = itens[item_id].total
+        totais = {'total_itens': carrinho.total_itens, 'subtotal': carrinho.subtotal, 'total': carrinho.total}
+    else:
+        item = await ItemCarrinho.objects.filter(pk=item_id, carrinho__usuario=usuario).values(
+            'carrinho_id', 'preco_unitario'
+        ).afirst()
+        if item is None:
+            return _erro('Item não encontrado', 404)
+
+        await ItemCarrinho.objects.filter(pk=item_id).aupdate(quantidade=quantidade, updated_at=timezone.now())
+        await Carrinho.aatualizar_totais([item['carrinho_id']], [usuario.pk])
+        item_total = quantidade * item['preco_unitario']
+        totais = await _totais(item['carrinho_id'])
+
+    return JsonResponse({
+        'success': True,
+        'item_total': float(item_total),
+        'total_itens': totais['total_itens'],
+        'carrinho_subtotal': float(totais['subtotal']),
+        'carrinho_total': float(totais['total']),
+    })
+
+
+@require_POST
+async def remover(request, item_id):
+    """Remove um item do carrinho"""
+    usuario = await _usuario(request)
+    if usuario is None:
+        carrinho = anonimo.obter(request)
+        if item_id not in carrinho.itens:
+            return _erro('Item não encontrado', 404)
+        carrinho.remover(item_id)
+        nome = await Produto.objects.filter(pk=item_id).values_list('nome', flat=True).afirst()
+        totais = await _totais_anonimo(carrinho)
+    else:
+        item = await ItemCarrinho.objects.filter(pk=item_id, carrinho__usuario=usuario).values(
+            'carrinho_id', 'produto__nome'
+        ).afirst()
+        if item is None:
+            return _erro('Item não encontrado', 404)
+
+        await ItemCarrinho.objects.filter(pk=item_id).adelete()
+        await Carrinho.aatualizar_totais([item['carrinho_id']], [usuario.pk])
+        nome = item['produto__nome']
+        totais = await _totais(item['carrinho_id'])
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{nome or "Produto"} removido do carrinho!',
+        'total_itens': totais['total_itens'],
+        'carrinho_subtotal': float(totais['subtotal']),
+        'carrinho_total': float(totais['total']),
+    })
+
+
+@require_GET
+async def contar(request):
+    """Quantidade de itens no carrinho (badge do cabeçalho)"""
+    usuario = await _usuario(request)
+    if usuario is None:
+        return JsonResponse({'count': anonimo.obter(request).total_itens})
+    return JsonResponse({'count': await contador.atotal_itens(usuario.pk)})
@@ -0,0 +1,86 @@
+# ==========================================
+# carrinho/checkout.py
+# ==========================================
+"""
+Montagem do pedido a partir do carrinho.
+
+Tudo numa transação e com número fixo de comandos, qualquer que seja o
+tamanho do carrinho:
+
+    1. trava o carrinho e lê os totais já calculados (SELECT ... FOR UPDATE)
+    2. lê os itens com o nome do produto (um SELECT)
+    3. baixa o estoque de todos os produtos (um UPDATE condicional)
+    4. grava o pedido (um INSERT, já com o QR Code PIX)
+    5. grava os itens do pedido (bulk_create)
+    6. esvazia o carrinho (um DELETE + um UPDATE dos totais)
+"""
+
+from django.db import transaction
+
+from produtos.estoque import baixar_estoque
+from .models import Carrinho, ItemPedido, Pedido
+
+
+class CarrinhoVazio(Exception):
+    """Não há itens para transformar em pedido"""
+
+
+def payload_pix(pedido):
+    # Mock - integrar com gateway real
+    return (
+        f"00020126580014BR.GOV.BCB.PIX0136{pedido.numero_pedido}520400005303986540"
+        f"{pedido.total}5802BR5913SmartPaws6009SAO PAULO62070503***6304"
+    )
+
+
+@transaction.atomic
+def finalizar_carrinho(carrinho, endereco_entrega, forma_pagamento, observacoes=''):
+    """
+    Transforma o carrinho em pedido e devolve o ``Pedido``.
+    
+    Levanta ``CarrinhoVazio`` ou ``produtos.estoque.EstoqueInsuficiente``;
+    nos dois casos nada é gravado.
+    """
+    carrinho = Carrinho.objects.select_for_update().get(pk=carrinho.pk)
+    itens = list(
+        carrinho.itens
+        .values_list('produto_id', 'produto__nome', 'quantidade', 'preco_unitario')
+        .order_by('pk')
+    )
+    if not itens:
+        raise CarrinhoVazio('Seu carrinho está vazio!')
+    
+    quantidades = {}
+    for produto_id, _, quantidade, _ in itens:
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+    baixar_estoque(quantidades)
+    
+    pedido = Pedido(
+        usuario_id=carrinho.usuario_id,
+        numero_pedido=Pedido.gerar_numero(),
+        subtotal=carrinho.subtotal,
+        desconto=carrinho.desconto,
+        frete=carrinho.frete,
+        total=carrinho.total,
+        endereco_entrega=endereco_entrega,
+        forma_pagamento=forma_pagamento,
+        observacoes=observacoes,
+    )
+    if forma_pagamento == 'pix':
+        pedido.qr_code_pix = payload_pix(pedido)
+    pedido.save(force_insert=True)
+    
+    ItemPedido.objects.bulk_create([
+        ItemPedido(
+            pedido=pedido,
+            produto_id=produto_id,
+            nome_produto=nome,
+            quantidade=quantidade,
+            preco_unitario=preco_unitario,
+            subtotal=quantidade * preco_unitario,
+        )
+        for produto_id, nome, quantidade, preco_unitario in itens
+    ])
+    
+    carrinho.limpar()
+    return pedido
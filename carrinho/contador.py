@@ -0,0 +1,70 @@
+# ==========================================
+# carrinho/contador.py
+# ==========================================
+"""
+Contador de itens do carrinho exibido no cabeçalho (badge).
+
+O valor fica no cache por usuário e é invalidado sempre que os totais do
+carrinho mudam (``Carrinho.atualizar_totais`` e ``Carrinho.limpar``).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+TEMPO_CACHE = 60 * 60  # 1 hora
+
+
+def chave(usuario_id):
+    return f'carrinho:contador:{usuario_id}'
+
+
+def total_itens(usuario_id):
+    """Quantidade de itens no carrinho do usuário (0 se ele não tiver carrinho)"""
+    total = cache.get(chave(usuario_id))
+    if total is None:
+        from .models import Carrinho
+        total = (
+            Carrinho.objects
+            .filter(usuario_id=usuario_id)
+            .values_list('total_itens', flat=True)
+            .first()
+        ) or 0
+        cache.set(chave(usuario_id), total, TEMPO_CACHE)
+    return total
+
+
+async def atotal_itens(usuario_id):
+    """Versão assíncrona de ``total_itens``"""
+    total = await cache.aget(chave(usuario_id))
+    if total is None:
+        from .models import Carrinho
+        total = await (
+            Carrinho.objects
+            .filter(usuario_id=usuario_id)
+            .values_list('total_itens', flat=True)
+            .afirst()
+        ) or 0
+        await cache.aset(chave(usuario_id), total, TEMPO_CACHE)
+    return total
+
+
+def invalidar(usuario_ids):
+    """Descarta o contador dos usuários informados"""
+    chaves = [chave(usuario_id) for usuario_id in usuario_ids]
+    if not chaves:
+        return
+    cache.delete_many(chaves)
+    # De novo no commit: uma leitura concorrente pode ter guardado o valor
+    # antigo enquanto a transação ainda estava aberta
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+async def ainvalidar(usuario_ids):
+    """
+    Versão assíncrona de ``invalidar``. As views assíncronas não abrem
+    transação (cada consulta é confirmada na hora), então basta apagar.
+    """
+    chaves = [chave(usuario_id) for usuario_id in usuario_ids]
+    if chaves:
+        await cache.adelete_many(chaves)
@@ -1,11 +1,21 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import anonimo, contador
+
+
 def carrinho_context(request):
-    """Adiciona informações do carrinho em todos os templates"""
+    """
+    Adiciona informações do carrinho em todos os templates.
+    
+    O contador é preguiçoso: só consulta o cache (e, se preciso, o banco)
+    quando o template realmente usa ``carrinho_total_itens``.
+    """
     if request.user.is_authenticated:
-        from .models import Carrinho
-        carrinho, _ = Carrinho.objects.get_or_create(usuario=request.user)
+        usuario_id = request.user.pk
         return {
-            'carrinho_total_itens': carrinho.total_itens,
+            'carrinho_total_itens': SimpleLazyObject(lambda: contador.total_itens(usuario_id)),
         }
+    # Visitante: o contador vem do cookie do carrinho, sem consulta
     return {
-        'carrinho_total_itens': 0,
-    }
\ No newline at end of file
+        'carrinho_total_itens': SimpleLazyObject(lambda: anonimo.obter(request).total_itens),
+    }
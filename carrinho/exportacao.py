@@ -0,0 +1,189 @@
+# ==========================================
+# carrinho/exportacao.py
+# ==========================================
+"""
+Exportação de pedidos (com itens e situação do pagamento) em CSV e XLSX.
+
+Uma linha por item do pedido; pedidos sem itens saem numa linha com as
+colunas do item vazias. Os pedidos são lidos com
+``.iterator(chunk_size=LOTE)`` e os itens carregados por lote de pedidos,
+então a memória não cresce com o tamanho do relatório:
+
+- CSV: gerado aos pedaços e enviado com ``StreamingHttpResponse`` enquanto é
+  lido do banco;
+- XLSX: xlsxwriter em ``constant_memory`` (cada linha vai para o disco assim
+  que é escrita) num arquivo temporário, enviado com ``FileResponse``. O
+  formato é um zip, então não dá para começar a enviar antes do fim.
+"""
+
+import csv
+import io
+import tempfile
+from collections import defaultdict
+from datetime import datetime, time
+from itertools import islice
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ItemPedido, Pedido
+
+
+LOTE = 2000
+TAMANHO_PEDACO = 64 * 1024
+
+CABECALHO = [
+    'Pedido', 'Data', 'Status', 'Forma de pagamento', 'ID do pagamento', 'Pago em',
+    'Cliente', 'Subtotal', 'Desconto', 'Frete', 'Total',
+    'Produto (ID)', 'Produto', 'Quantidade', 'Preço unitário', 'Subtotal do item',
+]
+SEM_ITEM = (None,) * 5
+
+TIPO_CSV = 'text/csv; charset=utf-8'
+TIPO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def filtrar_pedidos(pedidos=None, inicio=None, fim=None, status=None):
+    """
+    Pedidos criados entre as datas ``inicio`` e ``fim`` (inclusive, no fuso
+    do site) com um dos ``status``. Filtros ``None`` ou vazios são ignorados.
+    """
+    pedidos = Pedido.objects.all() if pedidos is None else pedidos
+    if inicio:
+        pedidos = pedidos.filter(created_at__gte=timezone.make_aware(datetime.combine(inicio, time.min)))
+    if fim:
+        pedidos = pedidos.filter(created_at__lte=timezone.make_aware(datetime.combine(fim, time.max)))
+    if status:
+        pedidos = pedidos.filter(status__in=status)
+    return pedidos
+
+
+def linhas(pedidos, lote=LOTE):
+    """
+    Tuplas na ordem de ``CABECALHO``, uma por item.
+
+    Pedidos e itens são lidos como tuplas (``values_list``), sem instanciar
+    modelos: a cada ``lote`` pedidos do iterador, uma consulta traz os itens
+    de todos eles - o mesmo que ``prefetch_related`` faria, a uma fração do
+    custo por linha.
+    """
+    nomes_status = dict(Pedido.STATUS_CHOICES)
+    nomes_formas = dict(Pedido.FORMA_PAGAMENTO_CHOICES)
+    cursor = pedidos.order_by('pk').values_list(
+        'pk', 'numero_pedido', 'created_at', 'status', 'forma_pagamento', 'payment_id', 'pago_em',
+        'usuario__email', 'subtotal', 'desconto', 'frete', 'total',
+    ).iterator(chunk_size=lote)
+
+    while bloco := list(islice(cursor, lote)):
+        itens = defaultdict(list)
+        for pedido_id, *item in (
+            ItemPedido.objects
+            .filter(pedido_id__in=[pedido[0] for pedido in bloco])
+            .order_by('pk')
+            .values_list('pedido_id', 'produto_id', 'nome_produto', 'quantidade', 'preco_unitario', 'subtotal')
+        ):
+            itens[pedido_id].append(tuple(item))
+
+        for pk, numero, criado_em, status, forma, payment_id, pago_em, email, *valores in bloco:
+            dados = (
+                numero,
+                timezone.localtime(criado_em),
+                nomes_status.get(status, status),
+                nomes_formas.get(forma, forma),
+                payment_id or '',
+                timezone.localtime(pago_em) if pago_em else None,
+                email,
+                *valores,
+            )
+            for item in itens.get(pk) or [SEM_ITEM]:
+                yield dados + item
+
+
+# ========== CSV ==========
+
+def _celula_csv(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return valor
+
+
+def gerar_csv(linhas_csv):
+    """Pedaços de texto CSV (com BOM, para o Excel reconhecer o UTF-8)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(CABECALHO)
+    for linha in linhas_csv:
+        escritor.writerow([_celula_csv(valor) for valor in linha])
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def escrever_csv(pedidos, arquivo, lote=LOTE):
+    """Grava o CSV num arquivo texto aberto; devolve o número de linhas de dados"""
+    total = 0
+
+    def contar():
+        nonlocal total
+        for linha in linhas(pedidos, lote):
+            total += 1
+            yield linha
+
+    for pedaco in gerar_csv(contar()):
+        arquivo.write(pedaco)
+    return total
+
+
+def resposta_csv(pedidos, nome='pedidos.csv', lote=LOTE):
+    resposta = StreamingHttpResponse(
+        (pedaco.encode('utf-8') for pedaco in gerar_csv(linhas(pedidos, lote))),
+        content_type=TIPO_CSV,
+    )
+    resposta['Content-Disposition'] = f'attachment; filename="{nome}"'
+    return resposta
+
+
+# ========== XLSX ==========
+
+def escrever_xlsx(pedidos, arquivo, lote=LOTE):
+    """Grava o XLSX no caminho ou arquivo binário; devolve o número de linhas de dados"""
+    import xlsxwriter
+
+    planilha = xlsxwriter.Workbook(arquivo, {
+        'constant_memory': True,
+        'remove_timezone': True,
+        'default_date_format': 'dd/mm/yyyy hh:mm',
+    })
+    aba = planilha.add_worksheet('Pedidos')
+    negrito = planilha.add_format({'bold': True})
+    moeda = planilha.add_format({'num_format': '#,##0.00'})
+    aba.set_column(0, 0, 22)
+    aba.set_column(1, 5, 18)
+    aba.set_column(6, 6, 30)
+    aba.set_column(7, 10, 12, moeda)
+    aba.set_column(12, 12, 40)
+    aba.set_column(14, 15, 14, moeda)
+    aba.write_row(0, 0, CABECALHO, negrito)
+    aba.freeze_panes(1, 0)
+
+    total = 0
+    for total, linha in enumerate(linhas(pedidos, lote), start=1):
+        aba.write_row(total, 0, linha)
+    planilha.close()
+    return total
+
+
+def resposta_xlsx(pedidos, nome='pedidos.xlsx', lote=LOTE):
+    arquivo = tempfile.TemporaryFile()
+    escrever_xlsx(pedidos, arquivo, lote)
+    arquivo.seek(0)
+    return FileResponse(arquivo, as_attachment=True, filename=nome, content_type=TIPO_XLSX)
+
+
+FORMATOS = {
+    'csv': resposta_csv,
+    'xlsx': resposta_xlsx,
+}
@@ -0,0 +1,39 @@
+# ==========================================
+# carrinho/forms.py
+# ==========================================
+
+from django import forms
+from .models import Pedido
+
+
+class ExportarPedidosForm(forms.Form):
+    """Filtros da exportação de pedidos no admin"""
+
+    inicio = forms.DateField(
+        label='De',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date'})
+    )
+    fim = forms.DateField(
+        label='Até',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date'})
+    )
+    status = forms.MultipleChoiceField(
+        label='Status',
+        choices=Pedido.STATUS_CHOICES,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text='Nenhum marcado = todos'
+    )
+    formato = forms.ChoiceField(
+        label='Formato',
+        choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')],
+        initial='csv'
+    )
+
+    def clean(self):
+        dados = super().clean()
+        if dados.get('inicio') and dados.get('fim') and dados['inicio'] > dados['fim']:
+            raise forms.ValidationError('A data inicial é depois da final')
+        return dados
@@ -0,0 +1,52 @@
+# carrinho/management/commands/exportar_pedidos.py
+
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from carrinho import exportacao
+from carrinho.models import Pedido
+
+
+class Command(BaseCommand):
+    help = 'Exporta pedidos com itens e situação do pagamento para CSV ou XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('saida', help='Arquivo de saída; o formato vem da extensão (.csv ou .xlsx)')
+        parser.add_argument('--inicio', type=date.fromisoformat, help='Pedidos criados a partir desta data (AAAA-MM-DD)')
+        parser.add_argument('--fim', type=date.fromisoformat, help='Pedidos criados até esta data, inclusive (AAAA-MM-DD)')
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=[valor for valor, _ in Pedido.STATUS_CHOICES],
+            help='Só pedidos com este status (pode repetir)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=exportacao.LOTE,
+            help=f'Pedidos lidos do banco por vez (padrão: {exportacao.LOTE})'
+        )
+
+    def handle(self, *args, **options):
+        saida = options['saida']
+        formato = os.path.splitext(saida)[1].lower().lstrip('.')
+        if formato not in exportacao.FORMATOS:
+            raise CommandError('Use um arquivo .csv ou .xlsx')
+
+        pedidos = exportacao.filtrar_pedidos(
+            inicio=options['inicio'], fim=options['fim'], status=options['status']
+        )
+        self.stdout.write(f'📤 Exportando pedidos para {saida}...')
+        inicio = time.perf_counter()
+        if formato == 'csv':
+            with open(saida, 'w', newline='', encoding='utf-8') as arquivo:
+                total = exportacao.escrever_csv(pedidos, arquivo, options['lote'])
+        else:
+            total = exportacao.escrever_xlsx(pedidos, saida, options['lote'])
+        duracao = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} linhas exportadas em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} linhas/s)'
+        ))
@@ -0,0 +1,73 @@
+# carrinho/management/commands/verificar_carrinhos.py
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from carrinho.models import Carrinho
+
+
+class Command(BaseCommand):
+    help = 'Compara os totais guardados nos carrinhos com os itens e corrige divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Recalcula os carrinhos divergentes (sem isso, apenas relata)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Carrinhos por UPDATE ao corrigir (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        calculados = {
+            f'calculado_{campo}': expressao
+            for campo, expressao in Carrinho.expressoes_totais().items()
+        }
+        campos = Carrinho.CAMPOS_TOTAIS
+        carrinhos = (
+            Carrinho.objects
+            .annotate(**calculados)
+            .values('pk', *campos, *calculados)
+            .order_by('pk')
+        )
+
+        divergentes = []
+        verificados = 0
+        for linha in carrinhos.iterator(chunk_size=2000):
+            verificados += 1
+            diferencas = [
+                campo for campo in campos
+                if self._normalizar(linha[campo]) != self._normalizar(linha[f'calculado_{campo}'])
+            ]
+            if diferencas:
+                divergentes.append(linha['pk'])
+                detalhes = ', '.join(
+                    f'{campo}: {linha[campo]} → {self._normalizar(linha[f"calculado_{campo}"])}'
+                    for campo in diferencas
+                )
+                self.stdout.write(self.style.WARNING(f'  Carrinho #{linha["pk"]}: {detalhes}'))
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS(f'✅ {verificados} carrinhos verificados, nenhuma divergência'))
+            return
+
+        if not options['corrigir']:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {len(divergentes)} de {verificados} carrinhos divergentes (use --corrigir)'
+            ))
+            return
+
+        lote = options['lote']
+        for inicio in range(0, len(divergentes), lote):
+            Carrinho.atualizar_totais(divergentes[inicio:inicio + lote])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(divergentes)} carrinhos corrigidos'))
+
+    @staticmethod
+    def _normalizar(valor):
+        # SQLite devolve somas decimais como float
+        return Decimal(str(valor or 0)).quantize(Decimal('0.01'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:34
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def preencher_totais(apps, schema_editor):
+    # Carrinhos que já têm itens (os vazios ficam com os defaults)
+    Carrinho = apps.get_model('carrinho', 'Carrinho')
+    ItemCarrinho = apps.get_model('carrinho', 'ItemCarrinho')
+    
+    totais = {}
+    for carrinho_id, quantidade, preco in ItemCarrinho.objects.values_list(
+        'carrinho_id', 'quantidade', 'preco_unitario'
+    ).iterator():
+        itens, subtotal = totais.get(carrinho_id, (0, Decimal('0.00')))
+        totais[carrinho_id] = (itens + quantidade, subtotal + quantidade * (preco or 0))
+    
+    for carrinho_id, (itens, subtotal) in totais.items():
+        frete = Decimal('0.00') if subtotal >= 200 else Decimal('15.00')
+        Carrinho.objects.filter(pk=carrinho_id).update(
+            total_itens=itens,
+            subtotal=subtotal,
+            frete=frete,
+            total=subtotal + frete,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrinho', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carrinho',
+            name='frete',
+            field=models.DecimalField(decimal_places=2, default=Decimal('15.00'), max_digits=10, verbose_name='Frete'),
+        ),
+        migrations.AddField(
+            model_name='carrinho',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Subtotal'),
+        ),
+        migrations.AddField(
+            model_name='carrinho',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('15.00'), max_digits=10, verbose_name='Total'),
+        ),
+        migrations.AddField(
+            model_name='carrinho',
+            name='total_itens',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total de Itens'),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrinho', '0002_totais_desnormalizados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['usuario', 'created_at'], name='pedido_usuario_recentes'),
+        ),
+    ]
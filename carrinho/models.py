@@ -1,8 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
 from django.conf import settings
 from produtos.models import Produto
 from decimal import Decimal
 
+from core.numeracao import gerar_numero_pedido
+
+from . import contador
+
 
 class Carrinho(models.Model):
     """Carrinho de compras do usuário"""
@@ -15,9 +22,21 @@ class Carrinho(models.Model):
     )
     
     session_key = models.CharField(max_length=40, blank=True, null=True)
+    
+    # Totais desnormalizados (mantidos por ItemCarrinho.save/delete e, quando
+    # um produto é excluído com os itens em cascata, por carrinho/signals.py)
+    total_itens = models.PositiveIntegerField(default=0, verbose_name="Total de Itens")
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Subtotal")
+    frete = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('15.00'), verbose_name="Frete")
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('15.00'), verbose_name="Total")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    FRETE_GRATIS_MINIMO = Decimal('200.00')
+    VALOR_FRETE = Decimal('15.00')
+    CAMPOS_TOTAIS = ('total_itens', 'subtotal', 'frete', 'total')
+    
     class Meta:
         verbose_name = "Carrinho"
         verbose_name_plural = "Carrinhos"
@@ -25,29 +44,78 @@ class Carrinho(models.Model):
     def __str__(self):
         return f"Carrinho de {self.usuario.email}"
     
-    @property
-    def total_itens(self):
-        return sum(item.quantidade for item in self.itens.all())
-    
-    @property
-    def subtotal(self):
-        return sum(item.total for item in self.itens.all())
-    
     @property
     def desconto(self):
         # Pode implementar lógica de cupons aqui
         return Decimal('0.00')
     
-    @property
-    def frete(self):
-        # Lógica de cálculo de frete
-        if self.subtotal >= 200:
-            return Decimal('0.00')  # Frete grátis
-        return Decimal('15.00')
-    
-    @property
-    def total(self):
-        return self.subtotal - self.desconto + self.frete
+    @classmethod
+    def expressoes_totais(cls):
+        """
+        Totais calculados a partir dos itens, como expressões SQL.
+        
+        Servem tanto para o UPDATE que recalcula o carrinho quanto para a
+        verificação de divergências (annotate).
+        """
+        def soma(expressao):
+            itens = (
+                ItemCarrinho.objects
+                .filter(carrinho=OuterRef('pk'))
+                .order_by()
+                .values('carrinho')
+                .annotate(soma=Sum(expressao))
+                .values('soma')
+            )
+            return Coalesce(Subquery(itens), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2))
+        
+        subtotal = soma(F('quantidade') * F('preco_unitario'))
+        frete = Case(
+            When(GreaterThanOrEqual(subtotal, cls.FRETE_GRATIS_MINIMO), then=Value(Decimal('0.00'))),
+            default=Value(cls.VALOR_FRETE),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+        return {
+            'total_itens': soma('quantidade'),
+            'subtotal': subtotal,
+            'frete': frete,
+            # Sem cupons por enquanto: total = subtotal - desconto (0) + frete
+            'total': subtotal + frete,
+        }
+    
+    @classmethod
+    def atualizar_totais(cls, carrinho_ids, usuario_ids=None):
+        """
+        Recalcula os totais dos carrinhos informados num único UPDATE e
+        invalida o contador do cabeçalho dos donos.
+        """
+        atualizados = cls.objects.filter(pk__in=carrinho_ids).update(**cls.expressoes_totais())
+        if usuario_ids is None:
+            usuario_ids = cls.objects.filter(pk__in=carrinho_ids).values_list('usuario_id', flat=True)
+        contador.invalidar(usuario_ids)
+        return atualizados
+    
+    @classmethod
+    async def aatualizar_totais(cls, carrinho_ids, usuario_ids):
+        """Versão assíncrona de ``atualizar_totais`` (views de carrinho/api.py)"""
+        atualizados = await cls.objects.filter(pk__in=carrinho_ids).aupdate(**cls.expressoes_totais())
+        await contador.ainvalidar(usuario_ids)
+        return atualizados
+    
+    def recalcular_totais(self):
+        """Recalcula os totais no banco e recarrega os campos desta instância"""
+        self.atualizar_totais([self.pk], usuario_ids=[self.usuario_id])
+        self.refresh_from_db(fields=self.CAMPOS_TOTAIS)
+    
+    @transaction.atomic
+    def limpar(self):
+        """Remove todos os itens e zera os totais sem carregar os itens"""
+        self.itens.all().delete()
+        self.total_itens = 0
+        self.subtotal = Decimal('0.00')
+        self.frete = self.VALOR_FRETE
+        self.total = self.VALOR_FRETE
+        self.save(update_fields=[*self.CAMPOS_TOTAIS, 'updated_at'])
+        contador.invalidar([self.usuario_id])
 
 
 class ItemCarrinho(models.Model):
@@ -92,13 +160,25 @@ class ItemCarrinho(models.Model):
 
     
     def save(self, *args, **kwargs):
-        """Ao salvar, pega o preço do produto se não tiver"""
+        """Ao salvar, pega o preço do produto se não tiver e atualiza os totais do carrinho"""
         if not self.preco_unitario and self.produto:
             self.preco_unitario = self.produto.preco_final
-        super().save(*args, **kwargs)
-    
-    def __str__(self):
-        return f"{self.quantidade}x {self.produto.nome}"
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self._atualizar_carrinho()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            resultado = super().delete(*args, **kwargs)
+            self._atualizar_carrinho()
+        return resultado
+    
+    def _atualizar_carrinho(self):
+        # Recarrega o carrinho só se ele já estiver em memória
+        if ItemCarrinho.carrinho.is_cached(self):
+            self.carrinho.recalcular_totais()
+        else:
+            Carrinho.atualizar_totais([self.carrinho_id])
 
 
 class Pedido(models.Model):
@@ -167,16 +247,22 @@ class Pedido(models.Model):
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
         ordering = ['-created_at']
+        indexes = [
+            # Meus pedidos
+            models.Index(fields=['usuario', 'created_at'], name='pedido_usuario_recentes'),
+        ]
     
     def __str__(self):
         return f"Pedido #{self.numero_pedido}"
     
     def save(self, *args, **kwargs):
         if not self.numero_pedido:
-            import random
-            import string
-            self.numero_pedido = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
+            self.numero_pedido = self.gerar_numero()
         super().save(*args, **kwargs)
+    
+    @staticmethod
+    def gerar_numero():
+        return gerar_numero_pedido()
 
 
 class ItemPedido(models.Model):
@@ -0,0 +1,39 @@
+# ==========================================
+# carrinho/signals.py
+# ==========================================
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from produtos.models import Produto
+
+from . import anonimo
+from .models import Carrinho, ItemCarrinho
+
+
+@receiver(user_logged_in, dispatch_uid='carrinho-mesclar-anonimo')
+def mesclar_carrinho_anonimo(sender, request, user, **kwargs):
+    """Leva o carrinho do visitante para o carrinho da conta que entrou"""
+    if request is None:
+        return
+    carrinho = anonimo.obter(request)
+    if carrinho:
+        anonimo.mesclar(user, carrinho.itens)
+        carrinho.limpar()
+
+
+@receiver(pre_delete, sender=Produto, dispatch_uid='carrinho-produto-pre-delete')
+def guardar_carrinhos_do_produto(sender, instance, **kwargs):
+    """Os itens do produto saem em cascata, sem ItemCarrinho.delete(): guarda os carrinhos afetados"""
+    instance._carrinhos_afetados = list(
+        ItemCarrinho.objects.filter(produto_id=instance.pk).values_list('carrinho_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Produto, dispatch_uid='carrinho-produto-post-delete')
+def atualizar_carrinhos_do_produto(sender, instance, **kwargs):
+    """Recalcula os totais (e o contador) dos carrinhos que tinham o produto, num UPDATE"""
+    carrinhos = getattr(instance, '_carrinhos_afetados', None)
+    if carrinhos:
+        Carrinho.atualizar_totais(carrinhos)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'carrinho'
 
@@ -22,4 +22,10 @@ urlpatterns = [
     
     # AJAX
     path('api/count/', views.carrinho_count, name='count'),
+    
+    # AJAX assíncrono (carrinho/api.py)
+    path('api/adicionar/<int:produto_id>/', api.adicionar, name='api_adicionar'),
+    path('api/atualizar/<int:item_id>/', api.atualizar, name='api_atualizar'),
+    path('api/remover/<int:item_id>/', api.remover, name='api_remover'),
+    path('api/contador/', api.contar, name='api_contador'),
 ]
\ No newline at end of file
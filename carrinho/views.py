@@ -1,11 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
-from django.db import transaction
 from decimal import Decimal
-from .models import Carrinho, ItemCarrinho, Pedido, ItemPedido
+from .models import Carrinho, ItemCarrinho, Pedido
+from .checkout import CarrinhoVazio, finalizar_carrinho
+from . import anonimo, contador
+from core.perfilamento import orcamento_consultas
+from produtos.estoque import EstoqueInsuficiente
 from produtos.models import Produto
 import json
 
@@ -16,25 +19,33 @@ def get_or_create_carrinho(user):
     return carrinho
 
 
-@login_required
 def adicionar_ao_carrinho(request, produto_id):
-    """Adiciona produto ao carrinho"""
+    """Adiciona produto ao carrinho (do visitante, no cookie, se não logado)"""
     produto = get_object_or_404(Produto, id=produto_id, ativo=True)
-    carrinho = get_or_create_carrinho(request.user)
-    
     quantidade = int(request.POST.get('quantidade', 1))
     
-    # Verifica se já existe no carrinho
-    item, created = ItemCarrinho.objects.get_or_create(
-        carrinho=carrinho,
-        produto=produto,
-        defaults={'quantidade': quantidade, 'preco_unitario': produto.preco_final}
-    )
-    
-    if not created:
-        # Atualiza quantidade
-        item.quantidade += quantidade
-        item.save()
+    if request.user.is_authenticated:
+        carrinho = get_or_create_carrinho(request.user)
+        
+        # Verifica se já existe no carrinho (pelo related manager, o item
+        # compartilha a instância do carrinho e os totais voltam atualizados)
+        item, created = carrinho.itens.get_or_create(
+            produto=produto,
+            defaults={'quantidade': quantidade, 'preco_unitario': produto.preco_final}
+        )
+        
+        if not created:
+            # Atualiza quantidade
+            item.quantidade += quantidade
+            item.save()
+    else:
+        carrinho = anonimo.obter(request)
+        if not carrinho.adicionar(produto.pk, quantidade):
+            mensagem = 'Seu carrinho está cheio. Entre na sua conta para continuar comprando.'
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({'success': False, 'error': mensagem})
+            messages.error(request, mensagem)
+            return redirect('carrinho:visualizar')
     
     messages.success(request, f'{produto.nome} adicionado ao carrinho!')
     
@@ -49,14 +60,17 @@ def adicionar_ao_carrinho(request, produto_id):
     return redirect('carrinho:visualizar')
 
 
-@login_required
+@orcamento_consultas(6)
 def visualizar_carrinho(request):
     """Visualiza carrinho"""
-    carrinho = get_or_create_carrinho(request.user)
-    itens = carrinho.itens.select_related('produto').all()
+    if request.user.is_authenticated:
+        carrinho = get_or_create_carrinho(request.user)
+        itens = carrinho.itens.select_related('produto__categoria').all()
+    else:
+        carrinho = anonimo.obter(request)
+        itens = carrinho.carregar()
     
-    frete_gratis_minimo = 200
-    falta_frete_gratis = max(0, frete_gratis_minimo - float(carrinho.subtotal))
+    falta_frete_gratis = max(0, float(Carrinho.FRETE_GRATIS_MINIMO - carrinho.subtotal))
     context = {
         'carrinho': carrinho,
         'itens': itens,
@@ -66,39 +80,69 @@ def visualizar_carrinho(request):
     return render(request, 'carrinho/visualizar.html', context)
 
 
-@login_required
 @require_POST
 def atualizar_quantidade(request, item_id):
     """Atualiza quantidade de um item"""
-    item = get_object_or_404(ItemCarrinho, id=item_id, carrinho__usuario=request.user)
     quantidade = int(request.POST.get('quantidade', 1))
-    
-    if quantidade > 0:
-        item.quantidade = quantidade
-        item.save()
-        
+    if quantidade <= 0:
+        return JsonResponse({'success': False, 'error': 'Quantidade inválida'})
+    
+    if not request.user.is_authenticated:
+        # Visitante: item_id é o id do produto
+        carrinho = anonimo.obter(request)
+        if item_id not in carrinho.itens:
+            raise Http404
+        carrinho.definir(item_id, quantidade)
+        itens = {item.id: item for item in carrinho.carregar()}
         return JsonResponse({
             'success': True,
-            'item_total': float(item.total),
-            'carrinho_subtotal': float(item.carrinho.subtotal),
-            'carrinho_total': float(item.carrinho.total)
+            'item_total': float(itens[item_id].total) if item_id in itens else 0.0,
+            'total_itens': carrinho.total_itens,
+            'carrinho_subtotal': float(carrinho.subtotal),
+            'carrinho_total': float(carrinho.total)
         })
     
-    return JsonResponse({'success': False, 'error': 'Quantidade inválida'})
+    item = get_object_or_404(
+        ItemCarrinho.objects.select_related('carrinho'),
+        id=item_id,
+        carrinho__usuario=request.user
+    )
+    item.quantidade = quantidade
+    item.save()  # Atualiza os totais de item.carrinho
+    
+    return JsonResponse({
+        'success': True,
+        'item_total': float(item.total),
+        'total_itens': item.carrinho.total_itens,
+        'carrinho_subtotal': float(item.carrinho.subtotal),
+        'carrinho_total': float(item.carrinho.total)
+    })
 
 
-@login_required
 @require_POST
 def remover_item(request, item_id):
     """Remove item do carrinho"""
-    item = get_object_or_404(ItemCarrinho, id=item_id, carrinho__usuario=request.user)
-    produto_nome = item.produto.nome
-    item.delete()
+    if request.user.is_authenticated:
+        item = get_object_or_404(
+            ItemCarrinho.objects.select_related('carrinho', 'produto'),
+            id=item_id,
+            carrinho__usuario=request.user
+        )
+        produto_nome = item.produto.nome
+        item.delete()  # Atualiza os totais de item.carrinho
+        carrinho = item.carrinho
+    else:
+        # Visitante: item_id é o id do produto
+        carrinho = anonimo.obter(request)
+        if item_id not in carrinho.itens:
+            raise Http404
+        carrinho.remover(item_id)
+        produto_nome = Produto.objects.filter(pk=item_id).values_list('nome', flat=True).first() or 'Produto'
+        carrinho.carregar()
     
     messages.success(request, f'{produto_nome} removido do carrinho!')
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        carrinho = get_or_create_carrinho(request.user)
         return JsonResponse({
             'success': True,
             'total_itens': carrinho.total_itens,
@@ -109,11 +153,12 @@ def remover_item(request, item_id):
     return redirect('carrinho:visualizar')
 
 
-@login_required
 def limpar_carrinho(request):
     """Limpa todo o carrinho"""
-    carrinho = get_or_create_carrinho(request.user)
-    carrinho.itens.all().delete()
+    if request.user.is_authenticated:
+        get_or_create_carrinho(request.user).limpar()
+    else:
+        anonimo.obter(request).limpar()
     
     messages.success(request, 'Carrinho limpo!')
     return redirect('carrinho:visualizar')
@@ -123,7 +168,7 @@ def limpar_carrinho(request):
 def checkout(request):
     """Página de checkout"""
     carrinho = get_or_create_carrinho(request.user)
-    itens = carrinho.itens.select_related('produto').all()
+    itens = carrinho.itens.select_related('produto__categoria').all()
     
     if not itens:
         messages.warning(request, 'Seu carrinho está vazio!')
@@ -142,55 +187,26 @@ def checkout(request):
 
 
 @login_required
-@transaction.atomic
 def finalizar_pedido(request):
     """Finaliza pedido e processa pagamento"""
     if request.method != 'POST':
         return redirect('carrinho:checkout')
     
     carrinho = get_or_create_carrinho(request.user)
-    itens = carrinho.itens.select_related('produto').all()
     
-    if not itens:
-        messages.error(request, 'Seu carrinho está vazio!')
-        return redirect('produtos:lista')
-    
-    # Dados do formulário
-    endereco_entrega = request.POST.get('endereco_entrega')
-    forma_pagamento = request.POST.get('forma_pagamento')
-    observacoes = request.POST.get('observacoes', '')
-    
-    # Cria o pedido
-    pedido = Pedido.objects.create(
-        usuario=request.user,
-        subtotal=carrinho.subtotal,
-        desconto=carrinho.desconto,
-        frete=carrinho.frete,
-        total=carrinho.total,
-        endereco_entrega=endereco_entrega,
-        forma_pagamento=forma_pagamento,
-        observacoes=observacoes
-    )
-    
-    # Cria itens do pedido
-    for item in itens:
-        ItemPedido.objects.create(
-            pedido=pedido,
-            produto=item.produto,
-            nome_produto=item.produto.nome,
-            quantidade=item.quantidade,
-            preco_unitario=item.preco_unitario,
-            subtotal=item.total
+    try:
+        pedido = finalizar_carrinho(
+            carrinho,
+            endereco_entrega=request.POST.get('endereco_entrega'),
+            forma_pagamento=request.POST.get('forma_pagamento'),
+            observacoes=request.POST.get('observacoes', ''),
         )
-    
-    # Processa pagamento
-    if forma_pagamento == 'pix':
-        # Gera QR Code PIX (mock - integrar com gateway real)
-        pedido.qr_code_pix = f"00020126580014BR.GOV.BCB.PIX0136{pedido.numero_pedido}520400005303986540{pedido.total}5802BR5913SmartPaws6009SAO PAULO62070503***6304"
-        pedido.save()
-    
-    # Limpa carrinho
-    carrinho.itens.all().delete()
+    except CarrinhoVazio as erro:
+        messages.error(request, str(erro))
+        return redirect('produtos:lista')
+    except EstoqueInsuficiente as erro:
+        messages.error(request, str(erro))
+        return redirect('carrinho:visualizar')
     
     messages.success(request, f'Pedido #{pedido.numero_pedido} criado com sucesso!')
     return redirect('carrinho:pedido_confirmado', pedido_id=pedido.id)
@@ -237,8 +253,8 @@ def detalhe_pedido(request, pedido_id):
 
 
 # AJAX - Contador do carrinho no header
-@login_required
 def carrinho_count(request):
     """Retorna quantidade de itens no carrinho (AJAX)"""
-    carrinho = get_or_create_carrinho(request.user)
-    return JsonResponse({'count': carrinho.total_itens})
\ No newline at end of file
+    if not request.user.is_authenticated:
+        return JsonResponse({'count': anonimo.obter(request).total_itens})
+    return JsonResponse({'count': contador.total_itens(request.user.pk)})
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from .imagens import url_derivada
 from .models import Banner, Categoria, Beneficio, ServicoDestaque, Oferta
 
 
@@ -14,7 +15,7 @@ class BannerAdmin(admin.ModelAdmin):
         if obj.imagem:
             return format_html(
                 '<img src="{}" width="100" style="border-radius: 5px;"/>',
-                obj.imagem.url
+                url_derivada(obj.imagem)
             )
         return '-'
     imagem_preview.short_description = 'Imagem'
@@ -32,7 +33,7 @@ class CategoriaAdmin(admin.ModelAdmin):
         if obj.imagem:
             return format_html(
                 '<img src="{}" width="60" style="border-radius: 50%;"/>',
-                obj.imagem.url
+                url_derivada(obj.imagem)
             )
         return '-'
     imagem_preview.short_description = 'Imagem'
@@ -59,7 +60,7 @@ class ServicoDestaqueAdmin(admin.ModelAdmin):
         if obj.imagem:
             return format_html(
                 '<img src="{}" width="80" style="border-radius: 10px;"/>',
-                obj.imagem.url
+                url_derivada(obj.imagem)
             )
         return '-'
     imagem_preview.short_description = 'Imagem'
@@ -75,7 +76,7 @@ class OfertaAdmin(admin.ModelAdmin):
         if obj.imagem:
             return format_html(
                 '<img src="{}" width="120" style="border-radius: 10px;"/>',
-                obj.imagem.url
+                url_derivada(obj.imagem)
             )
         return '-'
     imagem_preview.short_description = 'Imagem'
@@ -0,0 +1,154 @@
+# ==========================================
+# core/banco.py
+# ==========================================
+"""
+Configuração do banco a partir de variáveis de ambiente.
+
+Usado pelos settings (``smartpaws/settings.py`` e o perfil
+``smartpaws_settings/settings/production.py``); não importa nada do Django
+que dependa dos settings.
+
+Variáveis (todas opcionais):
+
+- ``DB_ENGINE``: ``sqlite`` ou ``postgresql``;
+- ``DB_NAME``, ``DB_USER``, ``DB_PASSWORD``, ``DB_HOST``, ``DB_PORT``,
+  ``DB_SSLMODE``: conexão (no SQLite, ``DB_NAME`` é o caminho do arquivo);
+- ``DB_CONN_MAX_AGE``: segundos que uma conexão é reaproveitada entre
+  requisições (0 = uma conexão por requisição);
+- ``DB_CONN_HEALTH_CHECKS``: testa a conexão reaproveitada antes de usar;
+- ``DB_POOL=1`` (PostgreSQL com psycopg 3): pool de conexões no processo,
+  com ``DB_POOL_MIN``, ``DB_POOL_MAX`` e ``DB_POOL_TIMEOUT``. Substitui o
+  ``CONN_MAX_AGE``, que o Django exige zerado com o pool;
+- ``DB_REPLICAS``: réplicas de leitura, separadas por vírgula - arquivos no
+  SQLite, ``host`` ou ``host:porta`` no PostgreSQL (ver core/replicas.py);
+- ``DB_SQLITE_JOURNAL_MODE``, ``DB_SQLITE_SYNCHRONOUS``,
+  ``DB_SQLITE_BUSY_TIMEOUT`` (ms): PRAGMAs aplicados a cada conexão SQLite
+  (``SQLITE_PRAGMAS``, ver ``aplicar_pragmas``);
+- ``DB_SQLITE_TRANSACTION_MODE``: ``IMMEDIATE`` (padrão), ``DEFERRED`` ou
+  ``EXCLUSIVE``.
+"""
+
+import copy
+import os
+from pathlib import Path
+
+
+VERDADEIROS = ('1', 'true', 'sim', 'yes', 'on')
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+
+def _booleano(valor):
+    return str(valor).strip().lower() in VERDADEIROS
+
+
+def configuracao_banco(base_dir, ambiente=None, engine='sqlite', conn_max_age=0, health_checks=False):
+    """
+    ``DATABASES['default']`` a partir de ``ambiente`` (padrão:
+    ``os.environ``). Os argumentos são os padrões do perfil, usados quando a
+    variável correspondente não existe.
+    """
+    ambiente = os.environ if ambiente is None else ambiente
+    engine = ambiente.get('DB_ENGINE', engine)
+    if engine not in ENGINES:
+        raise ValueError(f'DB_ENGINE inválido: {engine!r} (use {" ou ".join(ENGINES)})')
+
+    if engine == 'sqlite':
+        return {
+            'ENGINE': ENGINES[engine],
+            'NAME': ambiente.get('DB_NAME') or base_dir / 'db.sqlite3',
+            'CONN_MAX_AGE': int(ambiente.get('DB_CONN_MAX_AGE', conn_max_age)),
+            'CONN_HEALTH_CHECKS': _booleano(ambiente.get('DB_CONN_HEALTH_CHECKS', health_checks)),
+            # Transações já começam com a trava de escrita: uma transação que
+            # lê e depois escreve esperaria o busy_timeout, mas ao "promover"
+            # a trava no meio dela o SQLite falha na hora ("database is locked")
+            'OPTIONS': {'transaction_mode': ambiente.get('DB_SQLITE_TRANSACTION_MODE', 'IMMEDIATE')},
+        }
+
+    configuracao = {
+        'ENGINE': ENGINES[engine],
+        'NAME': ambiente.get('DB_NAME', 'smartpaws'),
+        'USER': ambiente.get('DB_USER', 'smartpaws'),
+        'PASSWORD': ambiente.get('DB_PASSWORD', ''),
+        'HOST': ambiente.get('DB_HOST', 'localhost'),
+        'PORT': ambiente.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(ambiente.get('DB_CONN_MAX_AGE', conn_max_age)),
+        'CONN_HEALTH_CHECKS': _booleano(ambiente.get('DB_CONN_HEALTH_CHECKS', health_checks)),
+        'OPTIONS': {},
+    }
+    if ambiente.get('DB_SSLMODE'):
+        configuracao['OPTIONS']['sslmode'] = ambiente['DB_SSLMODE']
+    if _booleano(ambiente.get('DB_POOL', '')):
+        configuracao['OPTIONS']['pool'] = _opcoes_pool(ambiente)
+        # O pool já reaproveita as conexões; o Django recusa os dois juntos
+        configuracao['CONN_MAX_AGE'] = 0
+    return configuracao
+
+
+def _opcoes_pool(ambiente):
+    """Argumentos do ``psycopg_pool.ConnectionPool`` criado pelo Django"""
+    opcoes = {
+        'min_size': int(ambiente.get('DB_POOL_MIN', 2)),
+        'max_size': int(ambiente.get('DB_POOL_MAX', 10)),
+        'timeout': float(ambiente.get('DB_POOL_TIMEOUT', 10)),
+    }
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        # Sem psycopg 3 o próprio Django explica o que falta ao conectar
+        return opcoes
+    # Verificação de saúde: testa a conexão ao tirá-la do pool
+    opcoes['check'] = ConnectionPool.check_connection
+    return opcoes
+
+
+def configuracao_replicas(principal, ambiente=None):
+    """
+    Aliases ``replica_1``, ``replica_2``... de ``DB_REPLICAS``: cópias de
+    ``principal`` com outro arquivo (SQLite) ou servidor (PostgreSQL). Nos
+    testes espelham o ``default``.
+    """
+    ambiente = os.environ if ambiente is None else ambiente
+    enderecos = [item.strip() for item in ambiente.get('DB_REPLICAS', '').split(',') if item.strip()]
+    bancos = {}
+    for numero, endereco in enumerate(enderecos, start=1):
+        configuracao = copy.deepcopy(principal)
+        if principal['ENGINE'] == ENGINES['sqlite']:
+            # Caminho relativo: na pasta do banco principal
+            configuracao['NAME'] = Path(principal['NAME']).parent / endereco
+        else:
+            host, _, porta = endereco.partition(':')
+            configuracao['HOST'] = host
+            configuracao['PORT'] = porta or principal.get('PORT', '5432')
+        configuracao['TEST'] = {'MIRROR': 'default'}
+        bancos[f'replica_{numero}'] = configuracao
+    return bancos
+
+
+def pragmas_sqlite(ambiente=None):
+    """``SQLITE_PRAGMAS``: nome -> valor, na ordem em que são aplicados"""
+    ambiente = os.environ if ambiente is None else ambiente
+    return {
+        # Leitores não bloqueiam o escritor (e vice-versa)
+        'journal_mode': ambiente.get('DB_SQLITE_JOURNAL_MODE', 'WAL'),
+        # Com WAL, NORMAL só perde as últimas transações numa queda de energia
+        # (nunca corrompe o banco) e evita um fsync por commit
+        'synchronous': ambiente.get('DB_SQLITE_SYNCHRONOUS', 'NORMAL'),
+        # Espera o escritor da vez em vez de falhar com "database is locked"
+        'busy_timeout': int(ambiente.get('DB_SQLITE_BUSY_TIMEOUT', 5000)),
+    }
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    """Receptor de ``connection_created`` (core/signals.py)"""
+    if connection.vendor != 'sqlite':
+        return
+    from django.conf import settings
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+    with connection.cursor() as cursor:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome} = {valor}')
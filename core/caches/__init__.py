@@ -0,0 +1,85 @@
+# ==========================================
+# core/caches/__init__.py
+# ==========================================
+"""
+Configuração dos caches a partir de variáveis de ambiente.
+
+Como core/banco.py, é usado pelos settings e não importa nada do Django que
+dependa deles. O serviço de cache em camadas (LRU do processo na frente do
+cache compartilhado, chaves versionadas por modelo e proteção contra
+estouro de recálculo) fica em core/caches/camadas.py.
+
+Variáveis (todas opcionais):
+
+- ``CACHE_COMPARTILHADO``: o cache ``default``, visto por todos os
+  processos - ``locmem`` (memória do processo: só serve com um processo,
+  como o runserver e os testes), ``arquivo`` (pasta compartilhada pelos
+  processos da máquina, ``CACHE_COMPARTILHADO_DIR``), ``redis://...``
+  (requer o pacote ``redis``) ou ``memcached://host:porta`` (requer
+  ``pymemcache``);
+- ``CACHE_LOCAL_TAMANHO`` e ``CACHE_LOCAL_TTL`` (segundos): a camada LRU de
+  cada processo (``CACHE_CAMADAS``).
+"""
+
+import os
+from pathlib import Path
+
+
+def configuracao_cache(valor, pasta, variavel, max_entries):
+    """
+    Um item de ``CACHES`` para ``valor`` (``locmem``, ``arquivo``,
+    ``redis://...`` ou ``memcached://...``); ``pasta`` é o diretório do
+    cache em arquivo e ``variavel`` o nome usado na mensagem de erro.
+    ``valor=None`` (variável obrigatória e não definida) levanta ValueError.
+    """
+    if valor is None:
+        raise ValueError(
+            f'{variavel} não definido: escolha o cache (redis://... ou memcached://... '
+            f'com várias máquinas; arquivo só com uma)'
+        )
+    if valor == 'locmem':
+        return {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': pasta.name,
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+    if valor == 'arquivo':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(pasta),
+            'OPTIONS': {'MAX_ENTRIES': max_entries * 10},
+        }
+    if valor.startswith(('redis://', 'rediss://')):
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': valor}
+    if valor.startswith('memcached://'):
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': valor.removeprefix('memcached://'),
+        }
+    raise ValueError(
+        f'{variavel} inválido: {valor!r} (use locmem, arquivo, redis://... ou memcached://...)'
+    )
+
+
+def cache_compartilhado(base_dir, ambiente=None, cache='locmem', entre_processos=False):
+    """
+    ``CACHES['default']`` para ``CACHE_COMPARTILHADO`` (padrão: ``cache``;
+    ``None`` a torna obrigatória). ``entre_processos=True`` recusa
+    ``locmem``: a numeração de pedidos (core/numeracao.py) reserva nele o
+    identificador de cada processo.
+    """
+    ambiente = os.environ if ambiente is None else ambiente
+    valor = ambiente.get('CACHE_COMPARTILHADO', cache)
+    if entre_processos and valor == 'locmem':
+        raise ValueError('CACHE_COMPARTILHADO=locmem não é visto pelos outros processos')
+    pasta = ambiente.get('CACHE_COMPARTILHADO_DIR') or base_dir / '.cache' / 'compartilhado'
+    return configuracao_cache(valor, Path(pasta), 'CACHE_COMPARTILHADO', 10_000)
+
+
+def configuracao_camadas(ambiente=None):
+    """``CACHE_CAMADAS``: tamanho e validade da camada LRU de cada processo"""
+    ambiente = os.environ if ambiente is None else ambiente
+    return {
+        'LOCAL_TAMANHO': int(ambiente.get('CACHE_LOCAL_TAMANHO', '1000')),
+        'LOCAL_TTL': float(ambiente.get('CACHE_LOCAL_TTL', '5')),
+    }
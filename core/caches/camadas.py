@@ -0,0 +1,335 @@
+# ==========================================
+# core/caches/camadas.py
+# ==========================================
+"""
+Cache em camadas.
+
+- local: LRU na memória do processo (``CACHE_CAMADAS['LOCAL_TAMANHO']``
+  chaves, cada uma por no máximo ``LOCAL_TTL`` segundos), sem rede nem
+  desserialização;
+- compartilhada: o cache ``default`` (``CACHE_COMPARTILHADO``), visto por
+  todos os processos.
+
+A leitura tenta a local e depois a compartilhada (guardando na local). Um
+``delete`` feito por outro processo não chega à camada local; por isso o
+TTL dela é curto, e por isso o que depende do banco usa chaves versionadas:
+``versao(Modelo)`` mora na camada compartilhada e ``invalidar(Modelo)`` a
+incrementa (os modelos de ``registrar`` fazem isso em todo save/delete).
+Uma chave montada com as versões atuais nunca devolve um dado anterior à
+última invalidação, em nenhuma das camadas. Baixa de estoque e notas de
+avaliação (UPDATEs frequentes, sem sinais) não invalidam: chegam às
+listagens quando elas expiram (``CACHE_LISTAGENS_TEMPO``).
+
+``camadas.get_or_set`` evita o estouro de recálculo (muitas requisições
+recalculando o mesmo valor ao mesmo tempo quando ele expira):
+
+- trava: sem o valor, só quem consegue criar a chave de trava (``add``)
+  calcula; os outros esperam o valor aparecer por até ``TRAVA_TEMPO``
+  segundos e depois calculam por conta própria. Entre processos depende de
+  um ``add`` atômico (Redis, memcached); no cache em arquivo é só uma
+  redução dos recálculos simultâneos;
+- expiração antecipada probabilística (XFetch): perto de expirar, cada
+  leitura tem uma chance de recalcular antes da hora, maior quanto mais
+  caro foi o cálculo e quanto maior o ``beta``; enquanto isso os demais
+  continuam servindo o valor atual.
+
+``queryset_em_cache(queryset)`` guarda a lista de objetos de um queryset
+sob as versões do modelo dele e das ``dependencias`` (ver as listagens de
+produtos, pets e serviços e ``core.paginacao.paginar``). O cálculo lê do
+primário (``core.replicas.lendo_do_primario``): logo depois da troca de
+versão, uma réplica atrasada devolveria o dado anterior à escrita, e ele
+ficaria guardado sob a versão nova.
+"""
+
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from core.replicas import lendo_do_primario
+
+
+TEMPO_PADRAO = 300  # 5 minutos
+TEMPO_LISTAGENS = 60  # 1 minuto; save/delete invalidam antes disso
+TRAVA_TEMPO = 10  # segundos; um cálculo mais lento que isso perde a exclusividade
+ESPERA_INTERVALO = 0.05
+
+
+class LRU:
+    """Dicionário do processo limitado a ``tamanho`` chaves, com validade por chave"""
+
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def get(self, chave):
+        with self._trava:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em <= time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.tamanho <= 0:
+            return
+        with self._trava:
+            self._dados[chave] = (valor, time.monotonic() + ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho:
+                self._dados.popitem(last=False)
+
+    def delete(self, chave):
+        with self._trava:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        with self._trava:
+            self._dados.clear()
+
+
+class CacheEmCamadas:
+    """
+    LRU do processo na frente do cache ``alias``.
+
+    Os valores são guardados nas duas camadas como ``(valor, expira_em,
+    custo)``: o instante de expiração (relógio de parede, o mesmo em todos
+    os processos) e quanto tempo o cálculo levou, usados pelo XFetch.
+    """
+
+    def __init__(self, alias='default', tamanho_local=None, ttl_local=None, trava_tempo=TRAVA_TEMPO):
+        configuracao = getattr(settings, 'CACHE_CAMADAS', {})
+        self.alias = alias
+        self.local = LRU(
+            configuracao.get('LOCAL_TAMANHO', 1000) if tamanho_local is None else tamanho_local,
+            configuracao.get('LOCAL_TTL', 5) if ttl_local is None else ttl_local,
+        )
+        self.trava_tempo = trava_tempo
+
+    @property
+    def compartilhado(self):
+        return caches[self.alias]
+
+    # ========== LEITURA E ESCRITA ==========
+
+    def _ler(self, chave):
+        envelope = self.local.get(chave)
+        if envelope is None:
+            envelope = self.compartilhado.get(chave)
+            if envelope is not None:
+                self.local.set(chave, envelope, _restante(envelope))
+        return envelope
+
+    def get(self, chave, padrao=None):
+        envelope = self._ler(chave)
+        return padrao if envelope is None else envelope[0]
+
+    def set(self, chave, valor, timeout=TEMPO_PADRAO, custo=0.0):
+        """``timeout=None`` guarda sem expiração (na camada local, vale ``LOCAL_TTL``)"""
+        envelope = (valor, None if timeout is None else time.time() + timeout, custo)
+        self.compartilhado.set(chave, envelope, timeout)
+        self.local.set(chave, envelope, timeout)
+
+    def delete(self, chave):
+        """Apaga nas duas camadas (a local dos outros processos expira sozinha)"""
+        self.compartilhado.delete(chave)
+        self.local.delete(chave)
+
+    # ========== GET_OR_SET ==========
+
+    def get_or_set(self, chave, calcular, timeout=TEMPO_PADRAO, beta=1.0, trava=True):
+        """
+        O valor de ``chave`` ou, na falta dele, o resultado de ``calcular()``
+        (guardado por ``timeout`` segundos). ``beta=0`` desliga a expiração
+        antecipada e ``trava=False`` a trava.
+        """
+        envelope = self._ler(chave)
+        if envelope is not None:
+            valor, expira_em, custo = envelope
+            if not _antecipar(expira_em, custo, beta):
+                return valor
+            # Recálculo antecipado: quem não pega a trava segue com o valor atual
+            token = self._travar(chave) if trava else None
+            if trava and token is None:
+                return valor
+            try:
+                return self._calcular(chave, calcular, timeout)
+            finally:
+                self._destravar(chave, token)
+
+        if not trava:
+            return self._calcular(chave, calcular, timeout)
+
+        token = self._travar(chave)
+        if token is None:
+            envelope = self._esperar(chave)
+            if envelope is not None:
+                return envelope[0]
+            # Quem tinha a trava não terminou a tempo (ou falhou): calcula sem ela
+            return self._calcular(chave, calcular, timeout)
+        try:
+            return self._calcular(chave, calcular, timeout)
+        finally:
+            self._destravar(chave, token)
+
+    def _calcular(self, chave, calcular, timeout):
+        inicio = time.perf_counter()
+        valor = calcular()
+        self.set(chave, valor, timeout, custo=time.perf_counter() - inicio)
+        return valor
+
+    def _travar(self, chave):
+        token = uuid.uuid4().hex
+        return token if self.compartilhado.add(f'{chave}:trava', token, self.trava_tempo) else None
+
+    def _destravar(self, chave, token):
+        # Não apaga a trava de outro: a nossa pode ter expirado no meio do cálculo
+        if token is not None and self.compartilhado.get(f'{chave}:trava') == token:
+            self.compartilhado.delete(f'{chave}:trava')
+
+    def _esperar(self, chave):
+        limite = time.monotonic() + self.trava_tempo
+        while time.monotonic() < limite:
+            time.sleep(ESPERA_INTERVALO)
+            envelope = self.compartilhado.get(chave)
+            if envelope is not None:
+                self.local.set(chave, envelope, _restante(envelope))
+                return envelope
+            if f'{chave}:trava' not in self.compartilhado:
+                return None
+        return None
+
+
+def _restante(envelope):
+    expira_em = envelope[1]
+    return None if expira_em is None else expira_em - time.time()
+
+
+def _antecipar(expira_em, custo, beta):
+    """XFetch: agora - custo * beta * ln(u) >= expiração, com u uniforme em (0, 1]"""
+    if expira_em is None or beta <= 0:
+        return False
+    return time.time() - custo * beta * math.log(1.0 - random.random()) >= expira_em
+
+
+camadas = CacheEmCamadas()
+
+
+# ========== VERSÕES POR MODELO ==========
+
+def _chave_versao(modelo):
+    return f'versao:{modelo._meta.label_lower}'
+
+
+def versoes(*modelos):
+    """Versões atuais dos modelos (uma leitura da camada compartilhada)"""
+    compartilhado = camadas.compartilhado
+    chaves = [_chave_versao(modelo) for modelo in modelos]
+    valores = compartilhado.get_many(chaves)
+    for chave in chaves:
+        if chave not in valores:
+            # Começa num valor único: se a chave sumir (clear, despejo), as
+            # chaves antigas não voltam a valer por coincidência. add() para
+            # não sobrescrever a versão criada por outro processo
+            compartilhado.add(chave, time.time_ns(), None)
+            valores[chave] = compartilhado.get(chave)
+    return [valores[chave] for chave in chaves]
+
+
+def versao(modelo):
+    return versoes(modelo)[0]
+
+
+def _incrementar(chave):
+    try:
+        camadas.compartilhado.incr(chave)
+    except ValueError:
+        camadas.compartilhado.set(chave, time.time_ns(), None)
+
+
+def invalidar(*modelos):
+    """Troca a versão dos modelos: tudo que foi guardado sob a anterior deixa de valer"""
+    for modelo in modelos:
+        chave = _chave_versao(modelo)
+        _incrementar(chave)
+        # De novo no commit: outra requisição pode ter guardado os dados
+        # antigos sob a versão nova enquanto a transação estava aberta
+        transaction.on_commit(partial(_incrementar, chave))
+
+
+def _invalidar_pelo_sinal(sender, **kwargs):
+    invalidar(sender)
+
+
+_registrados = set()
+
+
+def registrar(*modelos):
+    """Invalida os modelos a cada save/delete (gravações em lote chamam ``invalidar``)"""
+    for modelo in modelos:
+        _registrados.add(modelo)
+        rotulo = modelo._meta.label_lower
+        post_save.connect(_invalidar_pelo_sinal, sender=modelo, dispatch_uid=f'caches-{rotulo}-save')
+        post_delete.connect(_invalidar_pelo_sinal, sender=modelo, dispatch_uid=f'caches-{rotulo}-delete')
+
+
+def invalidar_registrados():
+    """Para cargas em lote que passam por cima dos sinais (seed, fixtures)"""
+    invalidar(*_registrados)
+
+
+# ========== QUERYSETS ==========
+
+def chave_queryset(queryset, dependencias=()):
+    """
+    Chave do resultado de ``queryset``: o SQL com os parâmetros e as versões
+    do modelo dele e das ``dependencias`` (modelos de select_related,
+    anotações, ...). ``None`` se o queryset não pode ter resultados.
+    """
+    try:
+        sql, parametros = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    resumo = hashlib.sha256(repr((queryset._db, sql, parametros)).encode()).hexdigest()[:32]
+    numeros = '.'.join(str(numero) for numero in versoes(queryset.model, *dependencias))
+    return f'qs:{queryset.model._meta.label_lower}:{numeros}:{resumo}'
+
+
+def queryset_em_cache(queryset, timeout=None, dependencias=()):
+    """
+    Lista dos objetos de ``queryset``, do cache sempre que possível.
+
+    Os objetos são compartilhados entre requisições do mesmo processo: não
+    altere atributos deles (a lista é sempre uma cópia).
+    """
+    chave = chave_queryset(queryset, dependencias)
+    if chave is None:
+        return []
+    if timeout is None:
+        timeout = getattr(settings, 'CACHE_LISTAGENS_TEMPO', TEMPO_LISTAGENS)
+    def calcular():
+        # Um clone a cada cálculo: o próprio queryset guarda o resultado da primeira avaliação
+        with lendo_do_primario():
+            return list(queryset.all())
+
+    return list(camadas.get_or_set(chave, calcular, timeout))
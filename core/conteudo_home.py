@@ -0,0 +1,103 @@
+# ==========================================
+# core/conteudo_home.py
+# ==========================================
+"""
+Conteúdo da página inicial em cache.
+
+Os blocos da home (banners, benefícios, categorias e serviços em destaque)
+são listas já avaliadas guardadas no cache sob as versões de ``MODELOS``
+(``core.caches.camadas.versoes``). Qualquer save/delete nesses modelos troca
+a versão (``camadas.registrar`` em core/signals.py), e a próxima requisição
+monta tudo de novo.
+
+A oferta ativa é escolhida no banco pelo período (data_inicio/data_fim) e
+fica em cache só até o fim dela, ou até a próxima oferta agendada começar.
+"""
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .caches import camadas
+from .models import Banner, Beneficio, Categoria, Oferta, ServicoDestaque
+from .replicas import lendo_do_primario
+
+
+MODELOS = (Banner, Beneficio, Categoria, ServicoDestaque, Oferta)
+TEMPO_CACHE = 60 * 60 * 24  # 24 horas; a invalidação é feita pelos sinais
+
+SEM_OFERTA = 'sem-oferta'
+
+
+def _chave(nome):
+    numeros = '.'.join(str(numero) for numero in camadas.versoes(*MODELOS))
+    return f'home:{numeros}:{nome}'
+
+
+def invalidar():
+    """Descarta os blocos e a oferta em cache (para gravações que não disparam sinais)"""
+    camadas.invalidar(*MODELOS)
+
+
+def _montar_blocos():
+    return {
+        # Banners do carrossel
+        'banners': list(Banner.objects.filter(ativo=True)[:4]),
+        # Benefícios (Entrega Expressa, Frete Grátis, etc)
+        'beneficios': list(Beneficio.objects.filter(ativo=True)),
+        # Mais Procurados
+        'mais_procurados': list(Categoria.objects.filter(tipo='mais_procurado', ativo=True)[:6]),
+        # Categorias por Espécies
+        'categorias_especies': list(Categoria.objects.filter(tipo='especie', ativo=True)[:6]),
+        # Serviços em Destaque
+        'servicos_destaque': list(ServicoDestaque.objects.filter(ativo=True)[:3]),
+    }
+
+
+def blocos():
+    """Blocos da home (listas de objetos), do cache sempre que possível"""
+    chave = _chave('blocos')
+    conteudo = cache.get(chave)
+    if conteudo is None:
+        # Do primário: a réplica pode não ter a escrita que trocou a versão
+        with lendo_do_primario():
+            conteudo = _montar_blocos()
+        cache.set(chave, conteudo, TEMPO_CACHE)
+    return conteudo
+
+
+def _buscar_oferta(agora):
+    """Oferta ativa agora e por quantos segundos a escolha continua valendo"""
+    ofertas = Oferta.objects.filter(ativo=True)
+    oferta = (
+        ofertas
+        .filter(data_inicio__lte=agora)
+        .filter(Q(data_fim__isnull=True) | Q(data_fim__gte=agora))
+        .order_by('-created_at')
+        .first()
+    )
+    
+    # A escolha muda quando a oferta atual acaba ou quando outra começa
+    limites = [
+        ofertas.filter(data_inicio__gt=agora).order_by('data_inicio')
+        .values_list('data_inicio', flat=True).first()
+    ]
+    if oferta and oferta.data_fim:
+        limites.append(oferta.data_fim)
+    limites = [limite for limite in limites if limite]
+    
+    validade = TEMPO_CACHE
+    if limites:
+        validade = min(validade, max(1, int((min(limites) - agora).total_seconds()) + 1))
+    return oferta, validade
+
+
+def oferta_ativa():
+    """Oferta em exibição (ou None), em cache até o fim do período"""
+    chave = _chave('oferta')
+    oferta = cache.get(chave)
+    if oferta is None:
+        with lendo_do_primario():
+            oferta, validade = _buscar_oferta(timezone.now())
+        cache.set(chave, oferta or SEM_OFERTA, validade)
+    return None if oferta == SEM_OFERTA else oferta
@@ -0,0 +1,275 @@
+# ==========================================
+# core/imagens.py
+# ==========================================
+"""
+Derivadas responsivas das imagens enviadas.
+
+No upload, o nome do original ganha o hash do conteúdo
+(``foto.3fa9c1d27b04.jpg``) e são geradas versões redimensionadas em WebP e
+JPEG nas larguras de ``LARGURAS``:
+
+    derivadas/3f/3fa9c1d27b04-640.webp
+
+Como o hash está no nome do original, os templates montam o ``srcset`` sem
+abrir arquivo nem consultar o banco (ver core/templatetags/imagens.py).
+Arquivos antigos, sem hash no nome, continuam servindo o original até o
+comando ``gerar_derivadas`` processá-los.
+
+Imagens menores que uma largura não são ampliadas: a derivada daquela
+largura fica com o tamanho original.
+
+Quando um campo recebe outra imagem, as derivadas do arquivo substituído
+são apagadas depois do commit, a menos que outro registro ainda use um
+original com o mesmo conteúdo. Um arquivo que o Pillow não consegue abrir
+não derruba o commit: o erro vai para o log.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+from functools import lru_cache
+
+from django.apps import apps
+from django.db.models import Q
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+LARGURAS = (320, 640, 1024)
+FORMATOS = ('webp', 'jpeg')
+QUALIDADE = 80
+PASTA = 'derivadas'
+TAMANHO_HASH = 12
+
+# Campos de imagem que ganham derivadas
+CAMPOS = [
+    ('produtos.Produto', 'imagem_principal'),
+    ('produtos.ImagemProduto', 'imagem'),
+    ('produtos.CategoriaProduto', 'imagem'),
+    ('pets.Pet', 'foto_principal'),
+    ('pets.FotoPet', 'foto'),
+    ('pets.PromocaoAdocao', 'banner'),
+    ('core.Banner', 'imagem'),
+    ('core.Categoria', 'imagem'),
+    ('core.ServicoDestaque', 'imagem'),
+    ('core.ServicoDestaque', 'avaliacao'),
+    ('core.Oferta', 'imagem'),
+    ('servicos.Prestador', 'logo'),
+    ('servicos.Servico', 'imagem_principal'),
+    ('usuarios.Usuario', 'foto_perfil'),
+]
+
+# foto.<hash>.jpg, ou foto.<hash>_AbC1234.jpg quando o storage desambiguou o nome
+_NOME_COM_HASH = re.compile(r'\.([0-9a-f]{%d})(?:_[A-Za-z0-9]{7})?\.[^./]+$' % TAMANHO_HASH)
+_EXTENSAO = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+@lru_cache(maxsize=None)
+def campos_por_modelo():
+    """``{Modelo: [nome_do_campo, ...]}`` dos campos registrados"""
+    resultado = {}
+    for rotulo, campo in CAMPOS:
+        resultado.setdefault(apps.get_model(rotulo), []).append(campo)
+    return resultado
+
+
+# ========== NOMES ==========
+
+def hash_conteudo(arquivo):
+    """Hash (curto) do conteúdo de um arquivo aberto"""
+    sha = hashlib.sha256()
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    for pedaco in iter(lambda: arquivo.read(1024 * 1024), b''):
+        sha.update(pedaco)
+    if hasattr(arquivo, 'seek'):
+        arquivo.seek(0)
+    return sha.hexdigest()[:TAMANHO_HASH]
+
+
+def hash_do_nome(nome):
+    """Hash embutido no nome do original (ou None para arquivos antigos)"""
+    encontrado = _NOME_COM_HASH.search(nome or '')
+    return encontrado.group(1) if encontrado else None
+
+
+def nome_com_hash(nome, hash_):
+    raiz, extensao = os.path.splitext(nome)
+    encontrado = _NOME_COM_HASH.search(nome)
+    if encontrado:
+        raiz = nome[:encontrado.start()]
+    return f'{raiz}.{hash_}{extensao.lower()}'
+
+
+def nome_derivada(hash_, largura, formato):
+    return f'{PASTA}/{hash_[:2]}/{hash_}-{largura}.{_EXTENSAO[formato]}'
+
+
+def urls_derivadas(arquivo, formato):
+    """``[(largura, url), ...]`` das derivadas; vazio se o original não tem hash"""
+    hash_ = hash_do_nome(getattr(arquivo, 'name', None))
+    if not hash_:
+        return []
+    return [
+        (largura, default_storage.url(nome_derivada(hash_, largura, formato)))
+        for largura in LARGURAS
+    ]
+
+
+def url_derivada(arquivo, largura=LARGURAS[0], formato='jpeg'):
+    """URL de uma derivada, ou do original se ainda não houver derivadas"""
+    if not arquivo:
+        return ''
+    hash_ = hash_do_nome(arquivo.name)
+    if not hash_:
+        return arquivo.url
+    return default_storage.url(nome_derivada(hash_, largura, formato))
+
+
+# ========== GERAÇÃO ==========
+
+def _para_rgb(imagem):
+    """JPEG não tem transparência: compõe sobre fundo branco"""
+    if imagem.mode in ('RGBA', 'LA') or (imagem.mode == 'P' and 'transparency' in imagem.info):
+        imagem = imagem.convert('RGBA')
+        fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+        fundo.paste(imagem, mask=imagem.getchannel('A'))
+        return fundo
+    return imagem.convert('RGB')
+
+
+def gerar_derivadas(conteudo, hash_, storage=None, sobrescrever=False):
+    """
+    Gera as derivadas de ``conteudo`` (bytes do original).
+
+    Retorna os nomes gravados (os que já existiam são pulados).
+    """
+    storage = storage or default_storage
+    faltando = [
+        (largura, formato) for largura in LARGURAS for formato in FORMATOS
+        if sobrescrever or not storage.exists(nome_derivada(hash_, largura, formato))
+    ]
+    if not faltando:
+        return []
+
+    with Image.open(io.BytesIO(conteudo)) as original:
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    gravados = []
+    for largura, formato in faltando:
+        imagem = original
+        if imagem.width > largura:
+            altura = max(1, round(imagem.height * largura / imagem.width))
+            imagem = imagem.resize((largura, altura), Image.Resampling.LANCZOS)
+
+        if formato == 'jpeg':
+            imagem = _para_rgb(imagem)
+        elif imagem.mode not in ('RGB', 'RGBA'):
+            imagem = imagem.convert('RGBA' if 'A' in imagem.getbands() else 'RGB')
+
+        saida = io.BytesIO()
+        imagem.save(saida, format=formato.upper(), quality=QUALIDADE, optimize=True)
+        nome = nome_derivada(hash_, largura, formato)
+        if sobrescrever and storage.exists(nome):
+            storage.delete(nome)
+        gravados.append(storage.save(nome, ContentFile(saida.getvalue())))
+    return gravados
+
+
+def processar_arquivo(nome, storage=None, sobrescrever=False):
+    """
+    Gera as derivadas que faltam para um original já gravado.
+
+    Originais antigos (sem hash no nome) ganham uma cópia com o hash no nome.
+    Retorna ``(nome_final, derivadas_gravadas)``; quem chamou deve apontar o
+    campo para ``nome_final`` quando ele mudar.
+    """
+    storage = storage or default_storage
+    with storage.open(nome, 'rb') as arquivo:
+        conteudo = arquivo.read()
+
+    hash_ = hash_do_nome(nome)
+    if not hash_:
+        hash_ = hashlib.sha256(conteudo).hexdigest()[:TAMANHO_HASH]
+        nome = storage.save(nome_com_hash(nome, hash_), ContentFile(conteudo))
+    return nome, gerar_derivadas(conteudo, hash_, storage, sobrescrever)
+
+
+# ========== UPLOAD (chamado pelos sinais) ==========
+
+def preparar_upload(instance, campos):
+    """
+    pre_save: põe o hash no nome dos arquivos novos.
+
+    Devolve os campos que receberam arquivo novo.
+    """
+    novos = []
+    for campo in campos:
+        arquivo = getattr(instance, campo)
+        if arquivo and not arquivo._committed:
+            arquivo.name = nome_com_hash(arquivo.name, hash_conteudo(arquivo))
+            novos.append(campo)
+    return novos
+
+
+def hashes_substituidos(instance, campos):
+    """pre_save: hashes dos arquivos que os ``campos`` novos vão substituir"""
+    if not campos or instance._state.adding or instance.pk is None:
+        return set()
+    antigos = type(instance)._default_manager.filter(pk=instance.pk).values_list(*campos).first() or ()
+    novos = {hash_do_nome(getattr(instance, campo).name) for campo in campos}
+    return {hash_ for hash_ in map(hash_do_nome, antigos) if hash_} - novos
+
+
+def em_uso(hash_):
+    """Algum campo registrado ainda aponta para um original com esse hash"""
+    for modelo, campos in campos_por_modelo().items():
+        filtro = Q()
+        for campo in campos:
+            filtro |= Q(**{f'{campo}__contains': f'.{hash_}'})
+        if modelo._default_manager.filter(filtro).exists():
+            return True
+    return False
+
+
+def remover_derivadas(hash_, storage=None):
+    """Apaga as derivadas de ``hash_`` se nenhum registro usa mais o original"""
+    storage = storage or default_storage
+    if em_uso(hash_):
+        return []
+    removidas = []
+    for largura in LARGURAS:
+        for formato in FORMATOS:
+            nome = nome_derivada(hash_, largura, formato)
+            if storage.exists(nome):
+                storage.delete(nome)
+                removidas.append(nome)
+    return removidas
+
+
+def gerar_do_upload(instance, campos, substituidos=()):
+    """
+    post_save (no commit): gera as derivadas dos arquivos recém-gravados e
+    apaga as dos ``substituidos``.
+    """
+    for campo in campos:
+        arquivo = getattr(instance, campo)
+        if not arquivo:
+            continue
+        try:
+            processar_arquivo(arquivo.name, arquivo.storage)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # O registro já foi gravado; sem derivadas, o arquivo fica para
+            # o comando gerar_derivadas depois de corrigido
+            logger.exception(
+                'Derivadas não geradas para %s.%s (pk=%s): %s',
+                instance._meta.label, campo, instance.pk, arquivo.name,
+            )
+    for hash_ in substituidos:
+        remover_derivadas(hash_)
@@ -0,0 +1,84 @@
+# core/management/commands/gerar_derivadas.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from core import conteudo_home, imagens
+
+
+def _iniciar_processo():
+    # Com "spawn" (Windows/macOS) o processo filho precisa configurar o Django
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _processar(nome, sobrescrever):
+    try:
+        novo_nome, gravadas = imagens.processar_arquivo(nome, sobrescrever=sobrescrever)
+        return nome, novo_nome, len(gravadas), None
+    except Exception as erro:  # arquivo ausente, formato inválido, ...
+        return nome, nome, 0, str(erro)
+
+
+class Command(BaseCommand):
+    help = 'Gera as derivadas (WebP/JPEG redimensionadas) das imagens já enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processos em paralelo (padrão: número de CPUs)'
+        )
+        parser.add_argument(
+            '--sobrescrever',
+            action='store_true',
+            help='Gera de novo mesmo as derivadas que já existem'
+        )
+
+    def handle(self, *args, **options):
+        # nome do arquivo -> [(Modelo, campo, pk), ...]
+        referencias = {}
+        for modelo, campos in imagens.campos_por_modelo().items():
+            for campo in campos:
+                linhas = modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                for pk, nome in linhas.values_list('pk', campo).iterator():
+                    referencias.setdefault(nome, []).append((modelo, campo, pk))
+
+        self.stdout.write(f'🖼️  {len(referencias)} imagens com {options["processos"]} processo(s)...')
+        inicio = time.perf_counter()
+        total_derivadas = renomeadas = erros = 0
+
+        with ProcessPoolExecutor(max_workers=options['processos'], initializer=_iniciar_processo) as executor:
+            tarefas = [
+                executor.submit(_processar, nome, options['sobrescrever'])
+                for nome in referencias
+            ]
+            for feitas, tarefa in enumerate(as_completed(tarefas), start=1):
+                nome, novo_nome, gravadas, erro = tarefa.result()
+                if erro:
+                    erros += 1
+                    self.stdout.write(self.style.WARNING(f'  {nome}: {erro}'))
+                    continue
+                total_derivadas += gravadas
+                if novo_nome != nome:
+                    # O original ganhou uma cópia com hash no nome
+                    renomeadas += 1
+                    for modelo, campo, pk in referencias[nome]:
+                        modelo.objects.filter(pk=pk).update(**{campo: novo_nome})
+                if feitas % 100 == 0:
+                    self.stdout.write(f'  {feitas}/{len(referencias)}')
+
+        if renomeadas:
+            # update() não dispara os sinais; a home guarda objetos com o nome antigo
+            conteudo_home.invalidar()
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total_derivadas} derivadas geradas, {renomeadas} originais com hash, '
+            f'{erros} erros em {duracao:.2f}s'
+        ))
@@ -0,0 +1,47 @@
+# core/management/commands/limpar_sessoes.py
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Apaga as sessões expiradas da tabela django_session em lotes (sem travar a tabela de uma vez)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Sessões apagadas por DELETE (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=0.0,
+            help='Segundos de espera entre um lote e o próximo'
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('.cache'):
+            self.stdout.write(self.style.SUCCESS('✅ Sessões só no cache: expiram sozinhas, nada a apagar'))
+            return
+
+        # O corte é fixo: sessões que expiram durante a limpeza ficam para a próxima
+        agora = timezone.now()
+        expiradas = Session.objects.filter(expire_date__lt=agora).order_by('expire_date')
+        total = lotes = 0
+        while True:
+            chaves = list(expiradas.values_list('session_key', flat=True)[:options['lote']])
+            if not chaves:
+                break
+            total += Session.objects.filter(session_key__in=chaves).delete()[0]
+            lotes += 1
+            self.stdout.write(f'  🗑️  lote {lotes}: {len(chaves)} sessões')
+            if options['pausa']:
+                time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} sessões expiradas apagadas em {lotes} lote(s)'))
@@ -0,0 +1,77 @@
+# core/management/commands/seed.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import semeadura
+
+
+class Command(BaseCommand):
+    help = 'Popula o banco em lote com dados sintéticos (ou com uma fixture JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala', '--scale',
+            type=float,
+            default=1.0,
+            help='Multiplicador das quantidades; 1 = 5.000 produtos (padrão: 1)'
+        )
+        parser.add_argument(
+            '--semente', '--seed',
+            type=int,
+            default=42,
+            help='Semente do gerador: a mesma semente gera os mesmos dados (padrão: 42)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=semeadura.LOTE,
+            help=f'Linhas por INSERT (padrão: {semeadura.LOTE})'
+        )
+        parser.add_argument(
+            '--fixture',
+            help='Carrega este arquivo JSON (formato do dumpdata) em vez de gerar dados'
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Apaga antes catálogo, carrinhos, pedidos, pets, serviços e usuários gerados'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help='Permite --limpar com DEBUG desligado (apaga TODOS os pedidos, pets e produtos)'
+        )
+
+    def handle(self, *args, **options):
+        if options['limpar'] and not (settings.DEBUG or options['forcar']):
+            raise CommandError(
+                '--limpar apaga todo o catálogo, pedidos, pets e serviços, não só os gerados; '
+                'com DEBUG desligado, confirme com --forcar'
+            )
+        if options['limpar']:
+            self.stdout.write('🧹 Apagando dados anteriores...')
+            semeadura.apagar()
+        elif not options['fixture'] and any(modelo.objects.exists() for modelo in semeadura.MODELOS):
+            raise CommandError('O banco já tem dados de catálogo, pedidos, pets ou serviços; use --limpar')
+
+        progresso = lambda tabela, linhas: self.stdout.write(f'  {tabela}: {linhas}')  # noqa: E731
+        inicio = time.perf_counter()
+        if options['fixture']:
+            self.stdout.write(f"📦 Carregando {options['fixture']}...")
+            with open(options['fixture'], encoding='utf-8') as arquivo:
+                linhas = semeadura.carregar(arquivo, lote=options['lote'], progresso=progresso)
+        else:
+            self.stdout.write(f"🌱 Gerando dados (escala={options['escala']}, semente={options['semente']})...")
+            linhas = semeadura.semear(
+                options['escala'], options['semente'], lote=options['lote'], progresso=progresso
+            )['linhas']
+        duracao = time.perf_counter() - inicio
+
+        total = sum(linhas.values())
+        for tabela, quantidade in linhas.items():
+            self.stdout.write(f'  {tabela:<25} {quantidade:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} linhas em {duracao:.2f}s ({total / max(duracao, 1e-9):,.0f} linhas/s)'
+        ))
@@ -0,0 +1,20 @@
+# core/management/commands/sincronizar_replicas.py
+
+from django.core.management.base import BaseCommand, CommandError
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco SQLite principal para as réplicas de DB_REPLICAS (desenvolvimento)'
+
+    def handle(self, *args, **options):
+        if not replicas.replicas():
+            raise CommandError('Nenhuma réplica configurada (defina DB_REPLICAS)')
+        try:
+            copiados = replicas.copiar_sqlite()
+        except ValueError as erro:
+            raise CommandError(str(erro))
+
+        for alias in copiados:
+            self.stdout.write(self.style.SUCCESS(f'  ✅ {alias}'))
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(copiados)} réplica(s) sincronizada(s)'))
@@ -0,0 +1,46 @@
+# core/management/commands/verificar_indices.py
+
+from django.core.management.base import BaseCommand, CommandError
+from core import planos, semeadura
+
+
+class Command(BaseCommand):
+    help = 'Roda EXPLAIN nas consultas quentes e falha se alguma lê uma tabela inteira (use sobre a massa do seed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--plano',
+            action='store_true',
+            help='Mostra o plano de todas as consultas (sem isso, só o das que falharam)'
+        )
+        parser.add_argument(
+            '--analisar',
+            action='store_true',
+            help='Atualiza as estatísticas do planejador (ANALYZE) antes'
+        )
+
+    def handle(self, *args, **options):
+        if options['analisar']:
+            semeadura.analisar()
+
+        try:
+            resultado = planos.verificar()
+        except NotImplementedError as erro:
+            raise CommandError(str(erro))
+
+        falhas = 0
+        for plano in resultado:
+            if plano.ok:
+                self.stdout.write(self.style.SUCCESS(f'  ✅ {plano.consulta.nome}'))
+            else:
+                falhas += 1
+                self.stdout.write(self.style.ERROR(
+                    f"  ❌ {plano.consulta.nome}: varredura completa de {', '.join(plano.varreduras)}"
+                ))
+            if options['plano'] or not plano.ok:
+                for linha in plano.linhas:
+                    self.stdout.write(f'       {linha}')
+
+        if falhas:
+            raise CommandError(f'{falhas} de {len(planos.CONSULTAS)} consultas quentes sem índice')
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(planos.CONSULTAS)} consultas quentes usam índices'))
@@ -0,0 +1,155 @@
+# ==========================================
+# core/numeracao.py
+# ==========================================
+"""
+Números de pedido únicos sem consultar o banco.
+
+Formato (19 dígitos, ordenável como texto):
+
+    MMMMMMMMMMMM WWW SSS D
+    │            │   │   └ dígito verificador (Luhn)
+    │            │   └ sequência dentro do mesmo milissegundo (000-999)
+    │            └ identificador do processo gerador (000-999)
+    └ milissegundos desde 01/01/2024, com 12 dígitos (até ~2055)
+
+Dois processos só geram o mesmo número se tiverem o mesmo identificador.
+Cada processo (inclusive cada worker criado por fork) reserva o seu no cache
+compartilhado (``default``): ``add`` da chave ``numeracao:worker:N``, que
+só um processo consegue criar, válida por ``NUMERACAO_RESERVA_TEMPO``
+segundos e renovada pelo próprio gerador antes de vencer. Um processo parado
+há mais tempo que isso confere a reserva antes do próximo número e, se outro
+a tomou, reserva um identificador novo. Por isso o cache ``default`` tem de
+ser visto por todos os processos (Redis ou memcached; no cache em arquivo o
+``add`` não é atômico) - o perfil de produção recusa ``locmem``.
+
+Se o relógio voltar ou a sequência de um milissegundo se esgotar, o gerador
+segue "emprestando" o próximo milissegundo, então os números de um mesmo
+processo são sempre crescentes.
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+EPOCA_MS = 1704067200000  # 2024-01-01T00:00:00Z
+DIGITOS_TEMPO = 12
+MAX_WORKER = 1000
+MAX_SEQUENCIA = 1000
+RESERVA_TEMPO = 3600  # segundos; renovada depois de um terço disso
+
+
+_DOBRO = {str(d): (2 * d if d < 5 else 2 * d - 9) for d in range(10)}
+_SIMPLES = {str(d): d for d in range(10)}
+
+
+def digito_verificador(numero):
+    """Dígito de Luhn para a sequência de dígitos ``numero``"""
+    invertido = numero[::-1]
+    soma = sum(_DOBRO[d] for d in invertido[::2]) + sum(_SIMPLES[d] for d in invertido[1::2])
+    return str(-soma % 10)
+
+
+def validar(numero):
+    """True se ``numero`` tem o formato e o dígito verificador corretos"""
+    return (
+        isinstance(numero, str)
+        and len(numero) == DIGITOS_TEMPO + 7
+        and numero.isdigit()
+        and digito_verificador(numero[:-1]) == numero[-1]
+    )
+
+
+def _chave_reserva(worker_id):
+    return f'numeracao:worker:{worker_id}'
+
+
+class GeradorNumeros:
+    """
+    Gerador thread-safe; use a instância compartilhada ``gerador``.
+    ``worker_id`` fixa o identificador (benchmarks, semeadura, testes); sem
+    ele, o identificador é reservado no cache ``alias`` no primeiro número
+    de cada processo.
+    """
+
+    def __init__(self, worker_id=None, relogio=None, alias='default'):
+        self._worker_fixo = worker_id
+        self._relogio = relogio or (lambda: time.time_ns() // 1_000_000)
+        self.alias = alias
+        self._trava = threading.Lock()
+        self._pid = None
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._ultimo_ms = -1
+        self._sequencia = 0
+        if self._worker_fixo is not None:
+            self.worker_id = self._worker_fixo % MAX_WORKER
+        else:
+            self._reservar()
+
+    # ========== RESERVA DO IDENTIFICADOR ==========
+
+    def _tempo_reserva(self):
+        return getattr(settings, 'NUMERACAO_RESERVA_TEMPO', RESERVA_TEMPO)
+
+    def _reservar(self):
+        cache = caches[self.alias]
+        self._token = uuid.uuid4().hex
+        inicio = random.randrange(MAX_WORKER)
+        for deslocamento in range(MAX_WORKER):
+            worker_id = (inicio + deslocamento) % MAX_WORKER
+            if cache.add(_chave_reserva(worker_id), self._token, self._tempo_reserva()):
+                self.worker_id = worker_id
+                self._reservado_em = time.monotonic()
+                return
+        raise RuntimeError(f'Todos os {MAX_WORKER} identificadores de numeração estão reservados')
+
+    def _renovar(self):
+        """Estende a reserva; se ela venceu e outro processo a tomou, reserva outro identificador"""
+        tempo = self._tempo_reserva()
+        if time.monotonic() - self._reservado_em < tempo / 3:
+            return
+        cache = caches[self.alias]
+        chave = _chave_reserva(self.worker_id)
+        # get_or_set recria a chave se ela sumiu (expirou, foi despejada)
+        if cache.get_or_set(chave, self._token, tempo) == self._token:
+            cache.touch(chave, tempo)
+            self._reservado_em = time.monotonic()
+        else:
+            self._reservar()
+
+    def proximo(self):
+        with self._trava:
+            if os.getpid() != self._pid:
+                # Primeiro número do processo (ou processo filho, criado por
+                # fork): identificador próprio, sem a sequência do pai
+                self._reiniciar()
+            elif self._worker_fixo is None:
+                self._renovar()
+
+            agora = self._relogio() - EPOCA_MS
+            if agora > self._ultimo_ms:
+                self._ultimo_ms = agora
+                self._sequencia = 0
+            else:
+                self._sequencia += 1
+                if self._sequencia >= MAX_SEQUENCIA:
+                    self._ultimo_ms += 1
+                    self._sequencia = 0
+
+            corpo = f'{self._ultimo_ms:0{DIGITOS_TEMPO}d}{self.worker_id:03d}{self._sequencia:03d}'
+        return corpo + digito_verificador(corpo)
+
+
+gerador = GeradorNumeros()
+
+
+def gerar_numero_pedido():
+    """Próximo número de pedido (19 dígitos, crescente, sem consulta ao banco)"""
+    return gerador.proximo()
@@ -0,0 +1,207 @@
+# ==========================================
+# core/paginacao.py
+# ==========================================
+"""
+Paginação por chave (keyset / cursor).
+
+Em vez de OFFSET, cada página começa logo depois da última linha da página
+anterior, usando os valores das colunas de ordenação. O custo de uma página
+não cresce com a profundidade e não há COUNT.
+
+O cursor é opaco: um token assinado com os valores da última (ou primeira)
+linha, a ordenação em uso e a direção. Tokens adulterados ou gerados para
+outra ordenação são rejeitados com ``CursorInvalido``.
+
+As colunas de ordenação não podem ser nulas; a chave primária é acrescentada
+como desempate quando não faz parte da ordenação.
+
+Com ``em_cache=True`` cada página vem de ``queryset_em_cache`` (core/caches),
+sob as versões do modelo e das ``dependencias``.
+"""
+
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from core.caches.camadas import queryset_em_cache
+
+
+SALT_CURSOR = 'smartpaws.paginacao.cursor'
+
+PROXIMA = 'p'
+ANTERIOR = 'a'
+
+
+class CursorInvalido(Exception):
+    """Cursor adulterado, expirado ou de outra ordenação"""
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _valor_do_objeto(objeto, campo):
+    if campo == 'pk':
+        return objeto.pk
+    for parte in campo.split('__'):
+        objeto = getattr(objeto, parte)
+    return objeto
+
+
+class PaginaCursor:
+    """Página de resultados com os cursores vizinhos"""
+
+    def __init__(self, paginador, object_list, cursor_proximo, cursor_anterior):
+        self.paginator = paginador
+        self.object_list = object_list
+        self.cursor_proximo = cursor_proximo
+        self.cursor_anterior = cursor_anterior
+
+    def __repr__(self):
+        return f'<PaginaCursor {len(self.object_list)} itens>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self.cursor_proximo is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginadorCursor:
+    """
+    Paginador por chave.
+
+    ``ordenacao`` usa a mesma sintaxe de ``order_by`` (``'-created_at'``,
+    ``'prestador__avaliacao_media'``, anotações, ...). Sem ordenação
+    explícita, usa a do queryset ou a do ``Meta.ordering`` do modelo.
+    """
+
+    def __init__(self, queryset, por_pagina, ordenacao=None, count=None, em_cache=False, dependencias=()):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.per_page = por_pagina
+        self.em_cache = em_cache
+        self.dependencias = dependencias
+
+        if ordenacao is None:
+            ordenacao = queryset.query.order_by or queryset.model._meta.ordering
+        ordenacao = [campo for campo in ordenacao if isinstance(campo, str)]
+        if not any(campo.lstrip('-') in ('pk', 'id') for campo in ordenacao):
+            desempate = '-pk' if ordenacao and ordenacao[0].startswith('-') else 'pk'
+            ordenacao.append(desempate)
+        self.ordenacao = tuple(ordenacao)
+
+        if count is not None:
+            self.__dict__['count'] = count
+
+    @cached_property
+    def count(self):
+        """Total de itens (só consulta o banco se alguém pedir)"""
+        return self.queryset.count()
+
+    # ========== CURSORES ==========
+
+    def codificar(self, objeto, direcao=PROXIMA):
+        valores = [_serializar(_valor_do_objeto(objeto, campo.lstrip('-'))) for campo in self.ordenacao]
+        return signing.dumps(
+            {'o': ','.join(self.ordenacao), 'd': direcao, 'v': valores},
+            salt=SALT_CURSOR,
+            compress=True,
+        )
+
+    def decodificar(self, cursor):
+        try:
+            dados = signing.loads(cursor, salt=SALT_CURSOR)
+        except signing.BadSignature:
+            raise CursorInvalido('Cursor inválido')
+        if (
+            not isinstance(dados, dict)
+            or dados.get('o') != ','.join(self.ordenacao)
+            or dados.get('d') not in (PROXIMA, ANTERIOR)
+            or len(dados.get('v') or ()) != len(self.ordenacao)
+        ):
+            raise CursorInvalido('Cursor não corresponde à ordenação atual')
+        return dados['d'], dados['v']
+
+    def _condicao(self, valores, direcao):
+        """
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        com > ou < conforme a direção de cada coluna.
+        """
+        condicao = Q()
+        iguais = Q()
+        for campo, valor in zip(self.ordenacao, valores):
+            nome = campo.lstrip('-')
+            decrescente = campo.startswith('-')
+            if direcao == ANTERIOR:
+                decrescente = not decrescente
+            lookup = 'lt' if decrescente else 'gt'
+            condicao |= iguais & Q(**{f'{nome}__{lookup}': valor})
+            iguais &= Q(**{nome: valor})
+        return condicao
+
+    @staticmethod
+    def _inverter(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    # ========== PÁGINAS ==========
+
+    def pagina(self, cursor=None):
+        """Página que começa depois (ou termina antes) do cursor"""
+        direcao, valores = (PROXIMA, None)
+        if cursor:
+            direcao, valores = self.decodificar(cursor)
+
+        ordenacao = self.ordenacao
+        if direcao == ANTERIOR:
+            ordenacao = tuple(self._inverter(campo) for campo in ordenacao)
+
+        queryset = self.queryset.order_by(*ordenacao)
+        if valores is not None:
+            queryset = queryset.filter(self._condicao(valores, direcao))
+
+        fatia = queryset[:self.por_pagina + 1]
+        itens = queryset_em_cache(fatia, dependencias=self.dependencias) if self.em_cache else list(fatia)
+        tem_mais = len(itens) > self.por_pagina
+        itens = itens[:self.por_pagina]
+
+        if direcao == ANTERIOR:
+            itens.reverse()
+            tem_proxima, tem_anterior = True, tem_mais
+        else:
+            tem_proxima, tem_anterior = tem_mais, valores is not None
+
+        cursor_proximo = self.codificar(itens[-1], PROXIMA) if itens and tem_proxima else None
+        cursor_anterior = self.codificar(itens[0], ANTERIOR) if itens and tem_anterior else None
+        return PaginaCursor(self, itens, cursor_proximo, cursor_anterior)
+
+
+def paginar(request, queryset, por_pagina, ordenacao=None, count=None, em_cache=False, dependencias=()):
+    """Atalho para views: lê ``?cursor=`` e devolve a página (404 se inválido)"""
+    paginador = PaginadorCursor(
+        queryset, por_pagina, ordenacao=ordenacao, count=count, em_cache=em_cache, dependencias=dependencias,
+    )
+    try:
+        return paginador.pagina(request.GET.get('cursor'))
+    except CursorInvalido:
+        raise Http404('Página inválida')
@@ -0,0 +1,234 @@
+# ==========================================
+# core/perfilamento.py
+# ==========================================
+"""
+Perfilamento de SQL por requisição e orçamento de consultas por view.
+
+``PerfilamentoSQLMiddleware`` (opt-in, ``PERFILAMENTO_SQL = True``) mede, numa
+amostra das requisições (``PERFILAMENTO_AMOSTRAGEM``, de 0 a 1):
+
+- número de consultas e tempo total de SQL;
+- consultas repetidas, agrupadas pela "impressão" do SQL (o texto com os
+  parâmetros e listas ``IN (...)`` normalizados) - o sinal típico de N+1;
+- tempo de Python (total menos SQL).
+
+As últimas ``PERFILAMENTO_CAPACIDADE`` medições ficam num buffer circular em
+memória do processo, exibido em /perfilamento/ (só staff) e em
+/perfilamento/json/.
+
+``orcamento_consultas(n)`` declara o máximo de consultas de uma view. Com
+``ORCAMENTO_CONSULTAS_ESTRITO`` (ligado nos testes) estourar o orçamento
+levanta ``OrcamentoExcedido``, que é um ``AssertionError`` e faz o teste que
+chamou a view falhar; em DEBUG ou com ``PERFILAMENTO_SQL`` só gera um aviso
+no log. Sem nenhum dos três a view roda sem ``execute_wrapper`` nenhum.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+MAX_DUPLICADAS = 5
+
+_ESPACOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def impressao(sql):
+    """SQL normalizado: consultas que só diferem nos parâmetros ficam iguais"""
+    sql = _ESPACOS.sub(' ', sql).strip()
+    sql = _TEXTO.sub('?', sql)
+    sql = _NUMERO.sub('?', sql)
+    return _LISTA_IN.sub('IN (...)', sql)
+
+
+# ========== MEDIÇÃO ==========
+
+class ColetorConsultas:
+    """``execute_wrapper`` que conta e cronometra as consultas"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.impressoes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_sql += time.perf_counter() - inicio
+            self.consultas += 1
+            self.impressoes[impressao(sql)] += 1
+
+    def duplicadas(self, limite=MAX_DUPLICADAS):
+        return [
+            {'sql': sql, 'vezes': vezes}
+            for sql, vezes in self.impressoes.most_common(limite) if vezes > 1
+        ]
+
+
+@contextmanager
+def medir_consultas():
+    """Mede as consultas de todos os bancos dentro do bloco"""
+    coletor = ColetorConsultas()
+    with ExitStack() as pilha:
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(coletor))
+        yield coletor
+
+
+# ========== BUFFER CIRCULAR ==========
+
+class RegistroPerfis:
+    """Últimas medições do processo (thread-safe)"""
+
+    def __init__(self, capacidade=None):
+        capacidade = capacidade or getattr(settings, 'PERFILAMENTO_CAPACIDADE', 200)
+        self._amostras = deque(maxlen=capacidade)
+        self._trava = threading.Lock()
+
+    @property
+    def capacidade(self):
+        return self._amostras.maxlen
+
+    def adicionar(self, amostra):
+        with self._trava:
+            self._amostras.append(amostra)
+
+    def amostras(self):
+        """Medições, da mais recente para a mais antiga"""
+        with self._trava:
+            return list(reversed(self._amostras))
+
+    def limpar(self):
+        with self._trava:
+            self._amostras.clear()
+
+    def resumo(self):
+        """Agregado por view, das que mais consultam para as que menos"""
+        por_view = {}
+        for amostra in self.amostras():
+            por_view.setdefault(amostra['view'], []).append(amostra)
+
+        linhas = []
+        for view, amostras in por_view.items():
+            n = len(amostras)
+            linhas.append({
+                'view': view,
+                'requisicoes': n,
+                'consultas_media': round(sum(a['consultas'] for a in amostras) / n, 1),
+                'consultas_max': max(a['consultas'] for a in amostras),
+                'sql_ms_media': round(sum(a['sql_ms'] for a in amostras) / n, 2),
+                'python_ms_media': round(sum(a['python_ms'] for a in amostras) / n, 2),
+                'com_duplicadas': sum(1 for a in amostras if a['duplicadas']),
+                'acima_do_orcamento': sum(1 for a in amostras if a['acima_do_orcamento']),
+            })
+        return sorted(linhas, key=lambda linha: -linha['consultas_media'])
+
+
+registro = RegistroPerfis()
+
+
+# ========== MIDDLEWARE ==========
+
+class PerfilamentoSQLMiddleware:
+    """Mede uma amostra das requisições e guarda em ``registro``"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFILAMENTO_SQL', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.amostragem = float(getattr(settings, 'PERFILAMENTO_AMOSTRAGEM', 1.0))
+
+    def __call__(self, request):
+        if random.random() >= self.amostragem:
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with medir_consultas() as coletor:
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        rota = getattr(request, 'resolver_match', None)
+        view = rota.view_name if rota else '-'
+        if view.startswith('core:perfilamento'):
+            return response
+
+        orcamento = getattr(request, 'orcamento_consultas', None)
+        registro.adicionar({
+            'instante': timezone.now().isoformat(timespec='seconds'),
+            'metodo': request.method,
+            'caminho': request.path,
+            'view': view,
+            'status': response.status_code,
+            'consultas': coletor.consultas,
+            'sql_ms': round(coletor.tempo_sql * 1000, 2),
+            'python_ms': round((total - coletor.tempo_sql) * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'duplicadas': coletor.duplicadas(),
+            'orcamento': orcamento,
+            'acima_do_orcamento': orcamento is not None and coletor.consultas > orcamento,
+        })
+        return response
+
+
+# ========== ORÇAMENTO ==========
+
+class OrcamentoExcedido(AssertionError):
+    """A view fez mais consultas do que o orçamento declarado"""
+
+
+def orcamento_consultas(maximo):
+    """
+    Declara que a view faz no máximo ``maximo`` consultas.
+
+    Conta também as consultas da renderização de ``TemplateResponse`` (que é
+    renderizada aqui). Em class-based views, use com ``method_decorator`` no
+    ``dispatch``.
+    """
+    def decorador(view):
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            request.orcamento_consultas = maximo
+            estrito = getattr(settings, 'ORCAMENTO_CONSULTAS_ESTRITO', False)
+            if not (estrito or settings.DEBUG or getattr(settings, 'PERFILAMENTO_SQL', False)):
+                # Produção: ninguém veria o aviso; não paga a contagem
+                return view(request, *args, **kwargs)
+
+            with medir_consultas() as coletor:
+                response = view(request, *args, **kwargs)
+                if not getattr(response, 'is_rendered', True):
+                    response.render()
+
+            if coletor.consultas > maximo:
+                mensagem = (
+                    f'{request.path}: {coletor.consultas} consultas, orçamento de {maximo}'
+                )
+                repetidas = coletor.duplicadas()
+                if repetidas:
+                    mensagem += '. Repetidas: ' + '; '.join(
+                        f"{d['vezes']}x {d['sql']}" for d in repetidas
+                    )
+                if estrito:
+                    raise OrcamentoExcedido(mensagem)
+                logger.warning(mensagem)
+            return response
+
+        _view.orcamento_consultas = maximo
+        return _view
+    return decorador
@@ -0,0 +1,245 @@
+# ==========================================
+# core/planos.py
+# ==========================================
+"""
+Planos de execução das consultas quentes.
+
+``CONSULTAS`` lista as consultas dos caminhos mais acessados (listagens,
+ordenações e páginas "meus ..."). Sempre que possível elas são montadas
+pelas mesmas funções das views, então o que se verifica é o SQL que vai ao
+banco. ``verificar()`` roda ``EXPLAIN`` em cada uma e aponta varreduras
+completas de tabela:
+
+- SQLite: linha ``SCAN tabela`` no ``EXPLAIN QUERY PLAN``, a não ser que
+  percorra um índice que já entrega a ordenação inteira (e pare no LIMIT).
+  ``USE TEMP B-TREE FOR ORDER BY`` obriga a ler todas as linhas antes da
+  primeira; ``USE TEMP B-TREE FOR RIGHT PART OF ORDER BY`` (só o desempate)
+  também conta como varredura, a não ser nas consultas com
+  ``ordena_desempate``;
+- PostgreSQL: nó ``Seq Scan`` no ``EXPLAIN (FORMAT JSON)``.
+
+O comando ``verificar_indices`` roda a verificação; faça isso sobre a massa
+da semeadura (``seed``): num banco quase vazio o PostgreSQL prefere ler a
+tabela inteira mesmo havendo índice.
+"""
+
+import json
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+
+from core.paginacao import PaginadorCursor
+
+
+@dataclass
+class ConsultaQuente:
+    """
+    ``montar(amostra)`` devolve o queryset (sem paginação); ``por_pagina``
+    limita como a primeira página da view. ``ordena_desempate``: aceita no
+    SQLite a ordenação só do desempate ("RIGHT PART"), feita a cada grupo de
+    valores iguais da ordenação principal e interrompida no LIMIT.
+    """
+    nome: str
+    montar: object
+    por_pagina: int = 20
+    ordena_desempate: bool = False
+
+
+@dataclass
+class Plano:
+    consulta: ConsultaQuente
+    sql: str
+    linhas: list = field(default_factory=list)
+    varreduras: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.varreduras
+
+
+# ========== CONSULTAS ==========
+
+def _requisicao(**parametros):
+    requisicao = HttpRequest()
+    requisicao.method = 'GET'
+    requisicao.GET = QueryDict(urlencode(parametros))
+    return requisicao
+
+
+def _produtos(por_categoria=False, **parametros):
+    def montar(amostra):
+        from produtos.views import ProdutoListView
+
+        filtros = dict(parametros, categoria=amostra['categoria_produto']) if por_categoria else parametros
+        view = ProdutoListView()
+        view.setup(_requisicao(**filtros))
+        return view.get_queryset()
+    return montar
+
+
+def _pets(*filtros):
+    def montar(amostra):
+        from pets.views import filtrar_pets
+
+        return filtrar_pets(_requisicao(**{filtro: amostra[filtro] for filtro in filtros}))[0]
+    return montar
+
+
+def _servicos(por_categoria=False, **parametros):
+    def montar(amostra):
+        from servicos.views import filtrar_servicos
+
+        filtros = dict(parametros, categoria=amostra['categoria_servico']) if por_categoria else parametros
+        return filtrar_servicos(_requisicao(**filtros))
+    return montar
+
+
+def _pedidos(amostra):
+    from carrinho.models import Pedido
+
+    return Pedido.objects.filter(usuario_id=amostra['usuario_pedidos'])
+
+
+def _agendamentos(amostra):
+    from servicos.models import AgendamentoServico
+
+    return AgendamentoServico.objects.filter(
+        usuario_id=amostra['usuario_agendamentos']
+    ).select_related('servico', 'servico__prestador').order_by('-created_at')
+
+
+def _solicitacoes(amostra):
+    from pets.models import SolicitacaoAdocao
+
+    return SolicitacaoAdocao.objects.filter(
+        usuario_id=amostra['usuario_solicitacoes']
+    ).select_related('pet').order_by('-created_at')
+
+
+def _relacionados(amostra):
+    from produtos.models import Produto
+
+    return Produto.objects.filter(
+        relacionado_a__produto_id=amostra['produto'], ativo=True
+    ).order_by('relacionado_a__posicao')
+
+
+CONSULTAS = [
+    ConsultaQuente('produtos: vitrine', _produtos()),
+    ConsultaQuente('produtos: por categoria', _produtos(por_categoria=True)),
+    ConsultaQuente('produtos: menor preço', _produtos(ordenar='menor_preco')),
+    ConsultaQuente('produtos: maior preço', _produtos(ordenar='maior_preco')),
+    ConsultaQuente('produtos: melhor avaliação', _produtos(ordenar='melhor_avaliacao')),
+    ConsultaQuente('produtos: nome', _produtos(ordenar='nome_az')),
+    ConsultaQuente('produtos: relacionados', _relacionados, por_pagina=6),
+    ConsultaQuente('pets: vitrine', _pets(), por_pagina=12),
+    ConsultaQuente('pets: espécie, porte e sexo', _pets('especie', 'porte', 'sexo'), por_pagina=12),
+    ConsultaQuente('serviços: vitrine', _servicos(), por_pagina=12),
+    ConsultaQuente('serviços: por categoria', _servicos(por_categoria=True), por_pagina=12),
+    ConsultaQuente('serviços: menor preço', _servicos(ordem='preco_menor'), por_pagina=12),
+    ConsultaQuente('serviços: nome', _servicos(ordem='nome'), por_pagina=12),
+    # Desempate (-pk) ordenado entre os serviços de prestadores com a mesma nota
+    ConsultaQuente(
+        'serviços: avaliação do prestador', _servicos(ordem='avaliacao'), por_pagina=12, ordena_desempate=True,
+    ),
+    ConsultaQuente('meus pedidos', _pedidos),
+    ConsultaQuente('meus agendamentos', _agendamentos),
+    ConsultaQuente('minhas solicitações de adoção', _solicitacoes),
+]
+
+
+def amostra():
+    """Valores reais do banco para os parâmetros das consultas"""
+    from carrinho.models import Pedido
+    from pets.models import Pet, SolicitacaoAdocao
+    from produtos.models import CategoriaProduto, Produto
+    from servicos.models import AgendamentoServico, CategoriaServico
+
+    pet = Pet.objects.values('especie', 'porte', 'sexo').order_by('pk').first() or {
+        'especie': 'cao', 'porte': 'medio', 'sexo': 'M',
+    }
+    return {
+        'categoria_produto': CategoriaProduto.objects.values_list('pk', flat=True).order_by('pk').first() or 0,
+        'produto': Produto.objects.values_list('pk', flat=True).order_by('pk').first() or 0,
+        **pet,
+        'categoria_servico': CategoriaServico.objects.values_list('slug', flat=True).order_by('pk').first() or '',
+        'usuario_pedidos': Pedido.objects.values_list('usuario_id', flat=True).order_by('pk').first() or 0,
+        'usuario_agendamentos': AgendamentoServico.objects.values_list('usuario_id', flat=True).order_by('pk').first() or 0,
+        'usuario_solicitacoes': SolicitacaoAdocao.objects.values_list('usuario_id', flat=True).order_by('pk').first() or 0,
+    }
+
+
+# ========== EXPLAIN ==========
+
+def _primeira_pagina(consulta, valores):
+    """O queryset como a view o executa: ordenação da paginação e LIMIT"""
+    queryset = consulta.montar(valores)
+    paginador = PaginadorCursor(queryset, consulta.por_pagina)
+    return queryset.order_by(*paginador.ordenacao)[:consulta.por_pagina + 1]
+
+
+def _plano_sqlite(cursor, sql, params, ordena_desempate=False):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    linhas = [linha[-1] for linha in cursor.fetchall()]
+    # Percorrer um índice em ordem só para no LIMIT se ele já dá a ordenação;
+    # seguido de ordenação em B-tree temporária, lê todas as linhas também
+    ordenacoes = [
+        linha for linha in linhas if linha.startswith('USE TEMP B-TREE FOR') and linha.endswith('ORDER BY')
+    ]
+    # Só do desempate: "RIGHT PART OF ORDER BY" (ou "LAST N TERMS OF ..." nas versões novas)
+    ordena_tudo = any(linha == 'USE TEMP B-TREE FOR ORDER BY' or not ordena_desempate for linha in ordenacoes)
+    varreduras = [
+        linha.split()[1] for linha in linhas
+        if linha.startswith('SCAN ') and linha != 'SCAN CONSTANT ROW'
+        and (' USING ' not in linha or ordena_tudo)
+    ]
+    return linhas, varreduras
+
+
+def _plano_postgresql(cursor, sql, params, ordena_desempate=False):
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    resultado = cursor.fetchone()[0]
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+
+    linhas, varreduras = [], []
+
+    def percorrer(no, nivel=0):
+        tipo = no['Node Type']
+        relacao = no.get('Relation Name')
+        linhas.append('  ' * nivel + (f'{tipo} on {relacao}' if relacao else tipo))
+        if tipo == 'Seq Scan':
+            varreduras.append(relacao)
+        for filho in no.get('Plans', ()):
+            percorrer(filho, nivel + 1)
+
+    percorrer(resultado[0]['Plan'])
+    return linhas, varreduras
+
+
+EXPLICADORES = {
+    'sqlite': _plano_sqlite,
+    'postgresql': _plano_postgresql,
+}
+
+
+def explicar(consulta, valores):
+    """``Plano`` da primeira página de ``consulta``"""
+    queryset = _primeira_pagina(consulta, valores)
+    conexao = connections[queryset.db]
+    explicador = EXPLICADORES.get(conexao.vendor)
+    if explicador is None:
+        raise NotImplementedError(f'EXPLAIN não suportado para o banco {conexao.vendor}')
+
+    sql, params = queryset.query.sql_with_params()
+    with conexao.cursor() as cursor:
+        linhas, varreduras = explicador(cursor, sql, params, ordena_desempate=consulta.ordena_desempate)
+    return Plano(consulta, sql, linhas, varreduras)
+
+
+def verificar(consultas=None):
+    """Planos de todas as consultas (ou das informadas)"""
+    valores = amostra()
+    return [explicar(consulta, valores) for consulta in (CONSULTAS if consultas is None else consultas)]
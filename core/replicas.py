@@ -0,0 +1,203 @@
+# ==========================================
+# core/replicas.py
+# ==========================================
+"""
+Leituras do catálogo nas réplicas do banco.
+
+``RoteadorReplicas`` (``DATABASE_ROUTERS``) manda as leituras dos apps de
+catálogo (``REPLICAS_APPS``: produtos, pets, serviços e a home) para um dos
+``BANCOS_REPLICA``, sorteado a cada consulta. Todo o resto vai para o
+primário (``default``):
+
+- escritas, sempre;
+- leituras de outros apps (sessão, usuário, carrinho, pedidos);
+- qualquer leitura dentro de uma transação no primário;
+- leituras fora de uma requisição (comandos, shell, cron) - para ler das
+  réplicas num script, use ``lendo_das_replicas()``;
+- leituras dentro de ``lendo_do_primario()``: quem remonta um cache
+  versionado (home, categorias, listagens em cache) logo depois da troca de
+  versão leria da réplica o dado anterior à escrita e o guardaria sob a
+  versão nova;
+- requisições fixadas no primário por ``ReplicasMiddleware``: métodos que
+  não são de leitura, rotas de ``REPLICAS_ROTAS_PRIMARIO`` (carrinho,
+  checkout, pedidos, conta do usuário, admin), o restante de uma requisição
+  que já escreveu e as requisições do mesmo cliente nos
+  ``REPLICAS_JANELA_FIXA`` segundos seguintes a uma escrita (cookie), para
+  não ler da réplica algo que ela ainda não recebeu.
+
+Sem réplicas configuradas (``DB_REPLICAS``, ver core/banco.py) o middleware
+se desliga e o roteador manda tudo para o primário.
+
+Localmente dá para usar dois arquivos SQLite: ``DB_REPLICAS=replica.sqlite3``
+e ``manage.py sincronizar_replicas`` para copiar o primário para a réplica
+(a "replicação" acontece só quando o comando roda).
+"""
+
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PRIMARIO = DEFAULT_DB_ALIAS
+COOKIE = 'primario_ate'
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+class EstadoRequisicao:
+    """Se a requisição atual lê do primário e se já escreveu"""
+    __slots__ = ('primario', 'escreveu')
+
+    def __init__(self, primario=False):
+        self.primario = primario
+        self.escreveu = False
+
+
+# Um por requisição; None fora delas (tudo no primário)
+_estado = ContextVar('replicas_estado', default=None)
+
+
+def replicas():
+    return tuple(getattr(settings, 'BANCOS_REPLICA', ()))
+
+
+@contextmanager
+def lendo_das_replicas():
+    """Leituras do catálogo nas réplicas fora de uma requisição"""
+    token = _estado.set(EstadoRequisicao())
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+@contextmanager
+def lendo_do_primario():
+    """Todas as leituras do bloco no primário, mesmo numa requisição que lê das réplicas"""
+    estado = _estado.get()
+    if estado is None or estado.primario:
+        yield
+        return
+    estado.primario = True
+    try:
+        yield
+    finally:
+        estado.primario = False
+
+
+# ========== ROTEADOR ==========
+
+class RoteadorReplicas:
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if estado is None or estado.primario or estado.escreveu:
+            return PRIMARIO
+        bancos = replicas()
+        if not bancos or model._meta.app_label not in getattr(settings, 'REPLICAS_APPS', ()):
+            return PRIMARIO
+        if connections[PRIMARIO].in_atomic_block:
+            return PRIMARIO
+        return random.choice(bancos)
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.escreveu = True
+        return PRIMARIO
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm o mesmo conteúdo do primário
+        bancos = {PRIMARIO, *replicas()}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+# ========== MIDDLEWARE ==========
+
+class ReplicasMiddleware:
+    """Decide se a requisição pode ler das réplicas (ver o docstring do módulo)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.janela = int(getattr(settings, 'REPLICAS_JANELA_FIXA', 5))
+        self.rotas = tuple(getattr(settings, 'REPLICAS_ROTAS_PRIMARIO', ()))
+        # Sob ASGI, sem pular para uma thread a cada requisição
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        estado = EstadoRequisicao(primario=self.fixar(request))
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.fixar_depois_de_escrita(estado, response)
+
+    async def __acall__(self, request):
+        estado = EstadoRequisicao(primario=self.fixar(request))
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.fixar_depois_de_escrita(estado, response)
+
+    def fixar_depois_de_escrita(self, estado, response):
+        if estado.escreveu and self.janela > 0:
+            response.set_cookie(
+                COOKIE, str(int(time.time()) + self.janela),
+                max_age=self.janela, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def fixar(self, request):
+        if request.method not in METODOS_LEITURA or request.path.startswith(self.rotas):
+            return True
+        try:
+            return int(request.COOKIES.get(COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+# ========== DESENVOLVIMENTO ==========
+
+def copiar_sqlite(destinos=None):
+    """Copia o primário SQLite para as réplicas (API de backup do SQLite)"""
+    origem = connections[PRIMARIO]
+    if origem.vendor != 'sqlite':
+        raise ValueError('a cópia só funciona com SQLite; no PostgreSQL use a replicação do servidor')
+    origem.ensure_connection()
+    copiados = []
+    for alias in destinos or replicas():
+        destino = connections[alias]
+        destino.close()
+        arquivo = sqlite3.connect(destino.settings_dict['NAME'])
+        try:
+            origem.connection.backup(arquivo)
+        finally:
+            arquivo.close()
+        copiados.append(alias)
+    return copiados
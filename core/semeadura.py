@@ -0,0 +1,488 @@
+# ==========================================
+# core/semeadura.py
+# ==========================================
+"""
+Massa de dados sintética em lote (comando ``seed`` e benchmarks).
+
+Gera categorias, produtos, usuários, carrinhos, pedidos, avaliações, pets e
+serviços em lotes de ``lote`` linhas com ``executemany``, sem instanciar os
+modelos nem passar pelo ``save()``: os slugs são montados aqui a partir de
+partes já "slugificadas" e os sinais ficam desligados (``sinais_desligados``). No
+final, os dados derivados são reconstruídos de uma vez: totais dos
+carrinhos (um UPDATE por lote), contadores das categorias, agregados de
+avaliação dos produtos e índice de busca; por fim, as estatísticas do
+planejador (``analisar``).
+
+Cada tabela usa um gerador aleatório próprio, derivado de ``semente``: com a
+mesma semente e a mesma escala o conteúdo é sempre o mesmo (só as datas de
+criação variam). ``escala=1`` produz 5.000 produtos; as demais quantidades
+acompanham (``QUANTIDADES``).
+
+Os usuários gerados têm e-mail em ``DOMINIO`` e a senha ``SENHA``.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+from django.utils.text import slugify
+
+from carrinho.models import Carrinho, ItemCarrinho, ItemPedido, Pedido
+from core.caches import camadas
+from core.numeracao import GeradorNumeros
+from pets.models import Pet
+from produtos import busca
+from produtos import categorias as cache_categorias
+from produtos.models import AvaliacaoProduto, CategoriaProduto, Produto
+from servicos.models import CategoriaServico, Prestador, Servico
+
+
+LOTE = 5000
+SENHA = 'smartpaws123'
+DOMINIO = 'seed.smartpaws.com'
+
+# Quantidades para escala=1
+QUANTIDADES = {
+    'produtos': 5000,
+    'usuarios': 500,
+    'carrinhos': 250,
+    'pedidos': 1000,
+    'avaliacoes': 5000,
+    'pets': 1000,
+    'prestadores': 50,
+    'servicos': 500,
+}
+ITENS_POR_CARRINHO = 5
+ITENS_POR_PEDIDO = (1, 4)
+
+CATEGORIAS = [
+    ('Alimentos', 'alimentos'), ('Petiscos', 'alimentos'), ('Brinquedos', 'brinquedos'),
+    ('Gaiolas e Viveiros', 'gaiolas_viveiros'), ('Roupas e Acessórios', 'roupas_acessorios'),
+    ('Coleiras', 'roupas_acessorios'), ('Higiene', 'higiene'), ('Farmácia', 'outros'),
+]
+CATEGORIAS_SERVICO = [
+    ('Banho e Tosa', 'fa-shower'), ('Veterinário', 'fa-stethoscope'), ('Hospedagem', 'fa-hotel'),
+    ('Passeios', 'fa-walking'), ('Adestramento', 'fa-graduation-cap'),
+]
+TIPOS_PRODUTO = ['Ração', 'Petisco', 'Brinquedo', 'Coleira', 'Caminha', 'Shampoo', 'Arranhador', 'Moletom']
+MARCAS = ['SmartPaws', 'Pedigree', 'Whiskas', 'Golden', 'Premier', 'Royal Canin', 'Kong', 'Chalesco']
+VARIANTES = ['Premium', 'Natural', 'Light', 'Filhote', 'Adulto', 'Sênior', 'Grande', 'Compacto']
+NOMES_PETS = ['Rex', 'Luna', 'Max', 'Bella', 'Thor', 'Nina', 'Bob', 'Mel', 'Zeus', 'Lola', 'Duke', 'Mia']
+RACAS = ['Vira-lata', 'Labrador', 'Poodle', 'Siamês', 'Persa', 'Beagle', 'Bulldog', 'Maine Coon']
+TEMPERAMENTOS = ['Calmo', 'Brincalhão', 'Protetor', 'Sociável', 'Energético']
+DESCRICOES_PET = [
+    'Pet muito carinhoso e brincalhão, ótimo para famílias.',
+    'Animal calmo e sociável, se dá bem com outros pets.',
+    'Cheio de energia, perfeito para atividades ao ar livre.',
+    'Dócil e protetor, ideal para apartamentos.',
+]
+SERVICOS = {
+    'Banho e Tosa': ['Banho Básico', 'Banho e Tosa Completo', 'Tosa Higiênica'],
+    'Veterinário': ['Consulta Veterinária', 'Vacinação V10', 'Vacinação Antirrábica'],
+    'Hospedagem': ['Hotel Pet', 'Creche Pet'],
+    'Passeios': ['Dog Walker 30min', 'Dog Walker 1 hora'],
+    'Adestramento': ['Adestramento Básico', 'Adestramento Avançado'],
+}
+CIDADES = [('São Paulo', 'SP'), ('Brasília', 'DF'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR')]
+
+# Modelos preenchidos, na ordem em que podem ser apagados
+MODELOS = [
+    ItemPedido, Pedido, ItemCarrinho, Carrinho, Servico, Prestador, CategoriaServico,
+    Pet, AvaliacaoProduto, Produto, CategoriaProduto,
+]
+
+
+def quantidades(escala):
+    return {nome: max(1, int(valor * escala)) for nome, valor in QUANTIDADES.items()}
+
+
+@contextmanager
+def sinais_desligados(*sinais):
+    """Desliga os receptores dos sinais de modelo dentro do bloco"""
+    sinais = sinais or (pre_save, post_save, pre_delete, post_delete, m2m_changed)
+    guardados = [(sinal, sinal.receivers) for sinal in sinais]
+    for sinal in sinais:
+        sinal.receivers = []
+        sinal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for sinal, receivers in guardados:
+            sinal.receivers = receivers
+            sinal.sender_receivers_cache.clear()
+
+
+def _preco(sorteio, minimo, maximo):
+    return Decimal(sorteio.randint(minimo * 100, maximo * 100)) / 100
+
+
+def _padroes(modelo, agora):
+    """Valores padrão (já convertidos para o banco) dos campos do modelo"""
+    padroes = {}
+    for campo in modelo._meta.concrete_fields:
+        if campo.primary_key:
+            continue
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+            valor = agora
+        else:
+            valor = campo.get_default()
+        padroes[campo.attname] = campo.get_db_prep_save(valor, connection)
+    return padroes
+
+
+class Semeadura:
+    """
+    Uma execução da semeadura.
+
+    As linhas são geradas como dicionários ``{attname: valor}`` e gravadas
+    com ``executemany`` (sem instanciar os modelos); as chaves primárias são
+    atribuídas aqui, a partir do maior id existente, para as tabelas
+    seguintes referenciarem sem consultar o banco. ``progresso(tabela,
+    linhas)`` é chamado a cada lote gravado.
+    """
+
+    def __init__(self, escala=1.0, semente=42, lote=LOTE, progresso=None):
+        self.escala = escala
+        self.semente = semente
+        self.lote = lote
+        self.progresso = progresso
+        self.quantidades = quantidades(escala)
+        self.linhas = {}
+        self.agora = timezone.now()
+
+    def _sorteio(self, tabela):
+        return random.Random(f'{self.semente}:{tabela}')
+
+    def _inserir(self, tabela, modelo, linhas, campo=None):
+        """
+        Grava ``linhas`` (iterável de dicionários) em lotes.
+
+        Devolve as chaves primárias (ou ``campo(linha)``, com a chave em
+        ``linha['id']``) na ordem de inserção.
+        """
+        pk = modelo._meta.pk
+        padroes = _padroes(modelo, self.agora)
+        atributos = [pk.attname, *padroes]
+        colunas = [modelo._meta.get_field(atributo).column for atributo in atributos]
+        qn = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            qn(modelo._meta.db_table), ', '.join(map(qn, colunas)), ', '.join(['%s'] * len(colunas))
+        )
+
+        proximo = (modelo.objects.aggregate(maior=Max('pk'))['maior'] or 0) + 1
+        linhas = iter(linhas)
+        gravados = []
+        with connection.cursor() as cursor:
+            while True:
+                lote = list(islice(linhas, self.lote))
+                if not lote:
+                    break
+                for linha in lote:
+                    linha[pk.attname] = proximo
+                    proximo += 1
+                cursor.executemany(sql, [
+                    [linha.get(atributo, padroes.get(atributo)) for atributo in atributos]
+                    for linha in lote
+                ])
+                gravados.extend(linha[pk.attname] if campo is None else campo(linha) for linha in lote)
+                self.linhas[tabela] = self.linhas.get(tabela, 0) + len(lote)
+                if self.progresso:
+                    self.progresso(tabela, self.linhas[tabela])
+        self.linhas.setdefault(tabela, 0)
+        self.modelos.append(modelo)
+        return gravados
+
+    # ========== TABELAS ==========
+
+    def catalogo(self):
+        sorteio = self._sorteio('produtos')
+        categoria_ids = self._inserir('categorias_produto', CategoriaProduto, (
+            {'nome': nome, 'slug': slugify(nome), 'tipo': tipo, 'ordem': ordem}
+            for ordem, (nome, tipo) in enumerate(CATEGORIAS)
+        ))
+
+        # Slugs montados com as partes já convertidas
+        tipos = [(nome, slugify(nome)) for nome in TIPOS_PRODUTO]
+        marcas = [(nome, slugify(nome)) for nome in MARCAS]
+        variantes = [(nome, slugify(nome)) for nome in VARIANTES]
+
+        def produtos():
+            for i in range(self.quantidades['produtos']):
+                tipo, slug_tipo = sorteio.choice(tipos)
+                marca, slug_marca = sorteio.choice(marcas)
+                variante, slug_variante = sorteio.choice(variantes)
+                preco = _preco(sorteio, 5, 400)
+                em_promocao = sorteio.random() < 0.2
+                yield {
+                    'nome': f'{tipo} {marca} {variante} {i}',
+                    'slug': f'{slug_tipo}-{slug_marca}-{slug_variante}-{i}',
+                    'categoria_id': sorteio.choice(categoria_ids),
+                    'descricao': f'{tipo} {variante.lower()} da {marca} para o seu pet.',
+                    'marca': marca,
+                    'preco_original': preco,
+                    'preco_desconto': (preco * Decimal('0.8')).quantize(Decimal('0.01')) if em_promocao else None,
+                    'estoque': sorteio.randint(0, 500),
+                    'destaque': sorteio.random() < 0.05,
+                    'novidade': sorteio.random() < 0.1,
+                }
+
+        self.produtos = self._inserir(
+            'produtos', Produto, produtos(),
+            campo=lambda linha: (linha['id'], linha['nome'], linha['preco_original']),
+        )
+
+    def usuarios(self):
+        # Mesma senha para todos: o hash (caro de propósito) é calculado uma vez
+        senha = make_password(SENHA)
+        self.usuario_ids = self._inserir('usuarios', get_user_model(), (
+            {'username': f'seed{i}', 'email': f'seed{i}@{DOMINIO}', 'password': senha, 'first_name': f'Cliente {i}'}
+            for i in range(self.quantidades['usuarios'])
+        ))
+
+    def carrinhos(self):
+        sorteio = self._sorteio('carrinhos')
+        carrinho_ids = self._inserir('carrinhos', Carrinho, (
+            {'usuario_id': usuario_id}
+            for usuario_id in self.usuario_ids[:self.quantidades['carrinhos']]
+        ))
+        por_carrinho = min(ITENS_POR_CARRINHO, len(self.produtos))
+        self._inserir('itens_carrinho', ItemCarrinho, (
+            {'carrinho_id': carrinho_id, 'produto_id': pk, 'quantidade': sorteio.randint(1, 3), 'preco_unitario': preco}
+            for carrinho_id in carrinho_ids
+            for pk, _, preco in sorteio.sample(self.produtos, por_carrinho)
+        ))
+        # Usuários novos: não há contador em cache para invalidar
+        for inicio in range(0, len(carrinho_ids), self.lote):
+            Carrinho.atualizar_totais(carrinho_ids[inicio:inicio + self.lote], usuario_ids=[])
+
+    def pedidos(self):
+        sorteio = self._sorteio('pedidos')
+        # Relógio fixo: a numeração também é determinística
+        numeros = GeradorNumeros(worker_id=999, relogio=lambda: 1_735_689_600_000)
+        itens_por_pedido = []
+
+        def pedidos():
+            for _ in range(self.quantidades['pedidos']):
+                escolhidos = sorteio.sample(self.produtos, min(sorteio.randint(*ITENS_POR_PEDIDO), len(self.produtos)))
+                itens = [(pk, nome, preco, sorteio.randint(1, 3)) for pk, nome, preco in escolhidos]
+                itens_por_pedido.append(itens)
+                subtotal = sum(preco * quantidade for _, _, preco, quantidade in itens)
+                frete = Decimal('0.00') if subtotal >= Carrinho.FRETE_GRATIS_MINIMO else Carrinho.VALOR_FRETE
+                yield {
+                    'usuario_id': sorteio.choice(self.usuario_ids),
+                    'numero_pedido': numeros.proximo(),
+                    'subtotal': subtotal, 'frete': frete, 'total': subtotal + frete,
+                    'endereco_entrega': 'Rua das Flores, 123 - Centro, São Paulo/SP',
+                    'forma_pagamento': sorteio.choice(['pix', 'cartao', 'boleto']),
+                    'status': sorteio.choice(['pendente', 'pago', 'processando', 'enviado', 'entregue', 'cancelado']),
+                }
+
+        pedido_ids = self._inserir('pedidos', Pedido, pedidos())
+        self._inserir('itens_pedido', ItemPedido, (
+            {
+                'pedido_id': pedido_id, 'produto_id': pk, 'nome_produto': nome,
+                'quantidade': quantidade, 'preco_unitario': preco, 'subtotal': preco * quantidade,
+            }
+            for pedido_id, itens in zip(pedido_ids, itens_por_pedido)
+            for pk, nome, preco, quantidade in itens
+        ))
+
+    def avaliacoes(self):
+        sorteio = self._sorteio('avaliacoes')
+        # Um par (usuário, produto) por avaliação; limitado aos pares possíveis
+        total = min(self.quantidades['avaliacoes'], len(self.usuario_ids) * len(self.produtos))
+        pares = set()
+        while len(pares) < total:
+            pares.add((sorteio.choice(self.usuario_ids), sorteio.choice(self.produtos)[0]))
+
+        self._inserir('avaliacoes', AvaliacaoProduto, (
+            {
+                'usuario_id': usuario_id, 'produto_id': produto_id,
+                'nota': sorteio.choice([1, 2, 3, 3, 4, 4, 4, 5, 5, 5]),
+                'comentario': 'Avaliação gerada pela semeadura.',
+                'aprovado': sorteio.random() < 0.95,
+            }
+            for usuario_id, produto_id in sorted(pares)
+        ))
+
+    def pets(self):
+        sorteio = self._sorteio('pets')
+        nomes = [(nome, slugify(nome)) for nome in NOMES_PETS]
+
+        def pets():
+            for i in range(self.quantidades['pets']):
+                nome, slug = sorteio.choice(nomes)
+                yield {
+                    'nome': nome, 'slug': f'{slug}-{i}',
+                    'especie': sorteio.choice(['cao', 'cao', 'gato', 'gato', 'ave', 'roedor']),
+                    'raca': sorteio.choice(RACAS),
+                    'porte': sorteio.choice(['mini', 'pequeno', 'medio', 'grande']),
+                    'sexo': sorteio.choice('MF'),
+                    'idade_anos': sorteio.randint(0, 12),
+                    'idade_meses': sorteio.randint(0, 11),
+                    'descricao': sorteio.choice(DESCRICOES_PET),
+                    'temperamento': sorteio.choice(TEMPERAMENTOS),
+                    'foto_principal': f'pets/seed/{i % 50}.jpg',
+                    'castrado': sorteio.random() < 0.6,
+                    'vacinado': sorteio.random() < 0.8,
+                    'status': sorteio.choice(['disponivel'] * 8 + ['processo', 'adotado']),
+                }
+
+        self._inserir('pets', Pet, pets())
+
+    def servicos(self):
+        sorteio = self._sorteio('servicos')
+        categorias = self._inserir('categorias_servico', CategoriaServico, (
+            {'nome': nome, 'slug': slugify(nome), 'icone': f'fas {icone}', 'ordem': ordem}
+            for ordem, (nome, icone) in enumerate(CATEGORIAS_SERVICO, start=1)
+        ), campo=lambda linha: (linha['id'], linha['nome']))
+
+        def prestadores():
+            for i in range(self.quantidades['prestadores']):
+                cidade, estado = sorteio.choice(CIDADES)
+                yield {
+                    'nome': f'Pet Center {i}', 'slug': f'pet-center-{i}',
+                    'descricao': 'Centro completo de cuidados para seu pet com profissionais qualificados.',
+                    'telefone': f'(11) 9{i % 10000:04d}-{sorteio.randint(0, 9999):04d}',
+                    'endereco': f'Rua das Flores, {sorteio.randint(1, 999)}', 'bairro': 'Centro',
+                    'cidade': cidade, 'estado': estado,
+                    'avaliacao_media': Decimal(sorteio.randint(30, 50)) / 10,
+                    'verificado': sorteio.random() < 0.5,
+                }
+
+        prestador_ids = self._inserir('prestadores', Prestador, prestadores())
+        nomes = {nome: [(servico, slugify(servico)) for servico in SERVICOS[nome]] for _, nome in categorias}
+
+        def servicos():
+            for i in range(self.quantidades['servicos']):
+                categoria_id, categoria = sorteio.choice(categorias)
+                nome, slug = sorteio.choice(nomes[categoria])
+                yield {
+                    'prestador_id': sorteio.choice(prestador_ids), 'categoria_id': categoria_id,
+                    'nome': nome, 'slug': f'{slug}-{i}',
+                    'descricao': f'{nome} - Serviço de qualidade com profissionais experientes.',
+                    'descricao_curta': nome,
+                    'preco': _preco(sorteio, 30, 500),
+                    'unidade_tempo': sorteio.choice(['hora', 'dia', 'servico']),
+                    'destaque': sorteio.random() < 0.1,
+                }
+
+        self._inserir('servicos', Servico, servicos())
+
+    # ========== EXECUÇÃO ==========
+
+    def executar(self):
+        """Gera tudo numa transação; devolve ``{'linhas': {...}, 'segundos': s}``"""
+        inicio = time.perf_counter()
+        self.modelos = []
+        with sinais_desligados(), transaction.atomic():
+            self.catalogo()
+            self.usuarios()
+            self.carrinhos()
+            self.pedidos()
+            self.avaliacoes()
+            self.pets()
+            self.servicos()
+            CategoriaProduto.atualizar_totais()
+            Produto.atualizar_avaliacoes()
+            reiniciar_sequencias(self.modelos)
+        busca.reindexar(lote=self.lote)
+        cache_categorias.invalidar()
+        camadas.invalidar_registrados()
+        analisar()
+        return {'linhas': dict(self.linhas), 'segundos': round(time.perf_counter() - inicio, 3)}
+
+
+def reiniciar_sequencias(modelos):
+    """Ids atribuídos na carga: as sequências (PostgreSQL) precisam avançar"""
+    with connection.cursor() as cursor:
+        for comando in connection.ops.sequence_reset_sql(no_style(), modelos):
+            cursor.execute(comando)
+
+
+def analisar():
+    """
+    Atualiza as estatísticas do planejador (ANALYZE). Depois de uma carga em
+    lote elas descrevem as tabelas vazias e o banco escolhe planos ruins.
+    """
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def semear(escala=1.0, semente=42, lote=LOTE, progresso=None):
+    """Atalho para ``Semeadura(...).executar()``"""
+    return Semeadura(escala, semente, lote, progresso).executar()
+
+
+def carregar(arquivo, lote=LOTE, progresso=None):
+    """
+    Grava uma fixture JSON (formato do ``dumpdata``) com ``bulk_create``.
+
+    Objetos consecutivos do mesmo modelo vão no mesmo lote; as relações
+    muitos-para-muitos são gravadas depois do lote. Devolve
+    ``{tabela: linhas}``.
+    """
+    linhas = {}
+    pendentes = []
+    modelos = []
+
+    def gravar():
+        if not pendentes:
+            return
+        modelo = type(pendentes[0].object)
+        if modelo not in modelos:
+            modelos.append(modelo)
+        modelo.objects.bulk_create([deserializado.object for deserializado in pendentes])
+        for deserializado in pendentes:
+            for campo, valores in (deserializado.m2m_data or {}).items():
+                getattr(deserializado.object, campo).set(valores)
+        tabela = modelo._meta.label_lower
+        linhas[tabela] = linhas.get(tabela, 0) + len(pendentes)
+        if progresso:
+            progresso(tabela, linhas[tabela])
+        pendentes.clear()
+
+    with sinais_desligados(), transaction.atomic():
+        for deserializado in serializers.deserialize('json', arquivo):
+            modelo = type(deserializado.object)
+            if pendentes and (modelo is not type(pendentes[0].object) or len(pendentes) >= lote):
+                gravar()
+            pendentes.append(deserializado)
+        gravar()
+        CategoriaProduto.atualizar_totais()
+        Produto.atualizar_avaliacoes()
+        # A fixture traz as chaves primárias, como a geração
+        reiniciar_sequencias(modelos)
+
+    busca.reindexar(lote=lote)
+    cache_categorias.invalidar()
+    camadas.invalidar_registrados()
+    analisar()
+    return linhas
+
+
+def apagar():
+    """
+    Apaga catálogo, carrinhos, pedidos, pets e serviços (todos, não só os
+    gerados) e os usuários de ``DOMINIO``. Só para bancos de desenvolvimento
+    e homologação: o comando ``seed --limpar`` recusa sem ``DEBUG`` ou
+    ``--forcar``.
+    """
+    with sinais_desligados(), transaction.atomic():
+        get_user_model().objects.filter(email__endswith=f'@{DOMINIO}').delete()
+        for modelo in MODELOS:
+            modelo.objects.all().delete()
+    busca.obter_indice().limpar()
+    cache_categorias.invalidar()
+    camadas.invalidar_registrados()
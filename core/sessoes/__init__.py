@@ -0,0 +1,52 @@
+# ==========================================
+# core/sessoes/__init__.py
+# ==========================================
+"""
+Configuração das sessões a partir de variáveis de ambiente.
+
+Como core/banco.py, é usado pelos settings e não importa nada do Django que
+dependa deles. Os motores (``SESSION_ENGINE``) ficam nos submódulos e só
+gravam a sessão quando o conteúdo mudou (ver core/sessoes/base.py).
+
+Variáveis (todas opcionais):
+
+- ``SESSION_STORE``: onde a sessão mora -
+  ``db`` (só a tabela ``django_session``, o padrão do Django),
+  ``cached_db`` (tabela + cache: leituras no cache, escritas nos dois) ou
+  ``cache`` (só o cache, sem tocar no banco; a sessão some se o cache for
+  esvaziado);
+- ``SESSION_CACHE``: o cache das sessões (alias ``sessoes``) -
+  ``locmem``, ``arquivo`` (em ``SESSION_CACHE_DIR``), ``redis://...`` ou
+  ``memcached://host:porta``, como ``CACHE_COMPARTILHADO`` (core/caches).
+"""
+
+import os
+from pathlib import Path
+
+from core.caches import configuracao_cache
+
+
+ALIAS_CACHE = 'sessoes'
+
+MOTORES = {
+    'db': 'core.sessoes.db',
+    'cached_db': 'core.sessoes.cached_db',
+    'cache': 'core.sessoes.cache',
+}
+
+
+def motor_sessoes(ambiente=None, armazenamento='cached_db'):
+    """``SESSION_ENGINE`` para ``SESSION_STORE`` (padrão: ``armazenamento``)"""
+    ambiente = os.environ if ambiente is None else ambiente
+    armazenamento = ambiente.get('SESSION_STORE', armazenamento)
+    if armazenamento not in MOTORES:
+        raise ValueError(f'SESSION_STORE inválido: {armazenamento!r} (use {", ".join(MOTORES)})')
+    return MOTORES[armazenamento]
+
+
+def cache_sessoes(base_dir, ambiente=None, cache='locmem'):
+    """``CACHES['sessoes']`` para ``SESSION_CACHE`` (padrão: ``cache``; ``None`` a torna obrigatória)"""
+    ambiente = os.environ if ambiente is None else ambiente
+    pasta = ambiente.get('SESSION_CACHE_DIR') or base_dir / '.cache' / ALIAS_CACHE
+    # Uma sessão por visitante logado: o MAX_ENTRIES padrão (300) é pouco
+    return configuracao_cache(ambiente.get('SESSION_CACHE', cache), Path(pasta), 'SESSION_CACHE', 10_000)
@@ -0,0 +1,45 @@
+# ==========================================
+# core/sessoes/base.py
+# ==========================================
+
+class SemEscritaRedundante:
+    """
+    Não grava a sessão quando o conteúdo é igual ao que foi carregado.
+
+    O SessionMiddleware grava sempre que a sessão foi marcada como
+    modificada, mesmo que a atribuição tenha repetido o valor que já estava
+    lá (``request.session['x'] = request.session['x']``). Aqui o conteúdo
+    carregado é guardado serializado e comparado no ``save``. Sessões novas,
+    ``cycle_key`` (login) e mudanças de expiração (``_session_expiry`` faz
+    parte do conteúdo) continuam gravando.
+    """
+
+    def _serializado(self, dados):
+        return self.serializer().dumps(dados)
+
+    def load(self):
+        dados = super().load()
+        self._carregado = self._serializado(dados)
+        return dados
+
+    async def aload(self):
+        dados = await super().aload()
+        self._carregado = self._serializado(dados)
+        return dados
+
+    def _inalterada(self, must_create):
+        return (
+            not must_create
+            and self.session_key is not None
+            and getattr(self, '_carregado', None) == self._serializado(self._get_session())
+        )
+
+    def save(self, must_create=False):
+        if not self._inalterada(must_create):
+            super().save(must_create)
+            self._carregado = self._serializado(self._get_session())
+
+    async def asave(self, must_create=False):
+        if not self._inalterada(must_create):
+            await super().asave(must_create)
+            self._carregado = self._serializado(self._get_session())
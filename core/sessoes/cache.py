@@ -0,0 +1,11 @@
+# ==========================================
+# core/sessoes/cache.py
+# ==========================================
+
+from django.contrib.sessions.backends import cache
+
+from .base import SemEscritaRedundante
+
+
+class SessionStore(SemEscritaRedundante, cache.SessionStore):
+    pass
@@ -0,0 +1,11 @@
+# ==========================================
+# core/sessoes/cached_db.py
+# ==========================================
+
+from django.contrib.sessions.backends import cached_db
+
+from .base import SemEscritaRedundante
+
+
+class SessionStore(SemEscritaRedundante, cached_db.SessionStore):
+    pass
@@ -0,0 +1,11 @@
+# ==========================================
+# core/sessoes/db.py
+# ==========================================
+
+from django.contrib.sessions.backends import db
+
+from .base import SemEscritaRedundante
+
+
+class SessionStore(SemEscritaRedundante, db.SessionStore):
+    pass
@@ -0,0 +1,50 @@
+# ==========================================
+# core/signals.py
+# ==========================================
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, pre_save
+
+from pets.models import Pet
+from produtos.models import CategoriaProduto, Produto
+from servicos.models import CategoriaServico, Prestador, Servico
+
+from . import banco, conteudo_home, imagens
+from .caches import camadas
+
+
+# Qualquer mudança no conteúdo da home descarta o cache dela
+camadas.registrar(*conteudo_home.MODELOS)
+
+
+def preparar_imagens(sender, instance, raw=False, **kwargs):
+    """Arquivos novos ganham o hash do conteúdo no nome"""
+    if raw:
+        return
+    instance._imagens_novas = imagens.preparar_upload(instance, imagens.campos_por_modelo()[sender])
+    instance._imagens_substituidas = imagens.hashes_substituidos(instance, instance._imagens_novas)
+
+
+def gerar_derivadas(sender, instance, raw=False, **kwargs):
+    """Gera as derivadas dos arquivos novos (e apaga as substituídas) depois do commit"""
+    campos = getattr(instance, '_imagens_novas', None)
+    if raw or not campos:
+        return
+    substituidos = instance._imagens_substituidas
+    instance._imagens_novas = []
+    instance._imagens_substituidas = set()
+    transaction.on_commit(lambda: imagens.gerar_do_upload(instance, campos, substituidos))
+
+
+for modelo in imagens.campos_por_modelo():
+    pre_save.connect(preparar_imagens, sender=modelo, dispatch_uid=f'imagens-{modelo.__name__}-pre')
+    post_save.connect(gerar_derivadas, sender=modelo, dispatch_uid=f'imagens-{modelo.__name__}-post')
+
+
+# Listagens em cache (queryset_em_cache) valem até o próximo save/delete
+camadas.registrar(Produto, CategoriaProduto, Pet, Servico, CategoriaServico, Prestador)
+
+
+# PRAGMAs do SQLite (WAL, synchronous, busy_timeout) em cada conexão nova
+connection_created.connect(banco.aplicar_pragmas, dispatch_uid='sqlite-pragmas')
@@ -0,0 +1,44 @@
+# ==========================================
+# core/templatetags/imagens.py
+# ==========================================
+"""
+Tags de imagens responsivas.
+
+    {% load imagens %}
+    <img src="{{ produto.imagem_principal.url }}" srcset="{% srcset produto.imagem_principal %}" sizes="...">
+    {% imagem_responsiva produto.imagem_principal alt=produto.nome sizes="(max-width: 600px) 50vw, 25vw" %}
+
+Enquanto o original não tiver derivadas, as tags caem de volta nele.
+"""
+
+from django import template
+
+from core import imagens
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(arquivo, formato='jpeg'):
+    """Valor do atributo srcset (vazio se ainda não houver derivadas)"""
+    return ', '.join(f'{url} {largura}w' for largura, url in imagens.urls_derivadas(arquivo, formato))
+
+
+@register.simple_tag
+def imagem_url(arquivo, largura=imagens.LARGURAS[0], formato='jpeg'):
+    """URL de uma largura específica (ou do original)"""
+    return imagens.url_derivada(arquivo, largura, formato)
+
+
+@register.inclusion_tag('core/imagem_responsiva.html')
+def imagem_responsiva(arquivo, alt='', sizes='100vw', css_class='', largura_padrao=imagens.LARGURAS[1]):
+    """<picture> com WebP e JPEG em todas as larguras"""
+    return {
+        'original': arquivo.url if arquivo else '',
+        'webp': srcset(arquivo, 'webp'),
+        'jpeg': srcset(arquivo, 'jpeg'),
+        'padrao': imagens.url_derivada(arquivo, largura_padrao) if arquivo else '',
+        'alt': alt,
+        'sizes': sizes,
+        'css_class': css_class,
+    }
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import HomeView, produtos, servicos, adocao
+from .views import HomeView, produtos, servicos, adocao, perfilamento, perfilamento_json
 
 app_name = 'core'
 
@@ -8,4 +8,6 @@ urlpatterns = [
     path('produtos/', produtos, name='produtos'),
     path('servicos/', servicos, name='servicos'),
     path('adocao/', adocao, name='adocao'),
+    path('perfilamento/', perfilamento, name='perfilamento'),
+    path('perfilamento/json/', perfilamento_json, name='perfilamento_json'),
 ]
\ No newline at end of file
@@ -1,8 +1,14 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
-from .models import Banner, Categoria, Beneficio, ServicoDestaque, Oferta
+from . import conteudo_home
+from .perfilamento import orcamento_consultas, registro
 
 
+@method_decorator(orcamento_consultas(10), name='dispatch')
 class HomeView(TemplateView):
     """View da página inicial"""
     template_name = 'core/index.html'
@@ -10,30 +16,12 @@ class HomeView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Banners do carrossel
-        context['banners'] = Banner.objects.filter(ativo=True)[:4]
+        # Banners, benefícios, categorias e serviços em destaque (em cache,
+        # invalidados pelos sinais de core/signals.py)
+        context.update(conteudo_home.blocos())
         
-        # Benefícios (Entrega Expressa, Frete Grátis, etc)
-        context['beneficios'] = Beneficio.objects.filter(ativo=True)
-        
-        # Mais Procurados
-        context['mais_procurados'] = Categoria.objects.filter(
-            tipo='mais_procurado',
-            ativo=True
-        )[:6]
-        
-        # Categorias por Espécies
-        context['categorias_especies'] = Categoria.objects.filter(
-            tipo='especie',
-            ativo=True
-        )[:6]
-        
-        # Serviços em Destaque
-        context['servicos_destaque'] = ServicoDestaque.objects.filter(ativo=True)[:3]
-        
-        # Oferta Ativa
-        ofertas = Oferta.objects.filter(ativo=True)
-        context['oferta'] = next((o for o in ofertas if o.esta_ativa), None)
+        # Oferta Ativa (escolhida pelo período, em cache até o fim dela)
+        context['oferta'] = conteudo_home.oferta_ativa()
         
         return context
 
@@ -58,6 +46,35 @@ def adocao(request):
         'titulo': 'Adoção - Smart Paws'
     })
 
+@staff_member_required
+def perfilamento(request):
+    """Últimas medições do middleware de perfilamento de SQL"""
+    if request.method == 'POST':
+        registro.limpar()
+        return redirect('core:perfilamento')
+
+    return render(request, 'core/perfilamento.html', {
+        'titulo': 'Perfilamento SQL - Smart Paws',
+        'ativo': getattr(settings, 'PERFILAMENTO_SQL', False),
+        'amostragem': getattr(settings, 'PERFILAMENTO_AMOSTRAGEM', 1.0),
+        'capacidade': registro.capacidade,
+        'resumo': registro.resumo(),
+        'amostras': registro.amostras(),
+    })
+
+
+@staff_member_required
+def perfilamento_json(request):
+    """Mesmos dados de ``perfilamento`` em JSON"""
+    return JsonResponse({
+        'ativo': getattr(settings, 'PERFILAMENTO_SQL', False),
+        'amostragem': getattr(settings, 'PERFILAMENTO_AMOSTRAGEM', 1.0),
+        'capacidade': registro.capacidade,
+        'resumo': registro.resumo(),
+        'amostras': registro.amostras(),
+    })
+
+
 # def usuario(request):
 #     return render(request, 'templates/usuarios/paginalogin.html',{
 #         'titulo': 'Pagina  login - SmartPaws'
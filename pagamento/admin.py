@@ -94,11 +94,27 @@ class PedidoAdmin(admin.ModelAdmin):
     
     def marcar_como_pago(self, request, queryset):
         from django.utils import timezone
-        count = queryset.filter(status='aguardando_pagamento').update(
-            status='pago',
-            data_pagamento=timezone.now()
-        )
+        from produtos import estoque
+        from django.contrib import messages
+        from django.db import transaction
+        pedidos = queryset.filter(status='aguardando_pagamento')
+        with transaction.atomic():
+            numeros = list(pedidos.values_list('numero_pedido', flat=True))
+            # Só os que ainda têm estoque reservado: sem a reserva, as
+            # unidades já voltaram à venda e o pedido venderia a mais
+            confirmados = estoque.confirmar_reservas(numeros)
+            count = pedidos.filter(numero_pedido__in=confirmados).update(
+                status='pago',
+                data_pagamento=timezone.now()
+            )
         self.message_user(request, f'{count} pedido(s) marcado(s) como pago.')
+        sem_reserva = sorted(set(numeros) - confirmados)
+        if sem_reserva:
+            self.message_user(
+                request,
+                f'Reserva de estoque expirada, não confirmados: {", ".join(sem_reserva)}',
+                messages.WARNING,
+            )
     marcar_como_pago.short_description = 'Marcar como Pago'
     
     def marcar_como_enviado(self, request, queryset):
@@ -111,9 +127,14 @@ class PedidoAdmin(admin.ModelAdmin):
     marcar_como_enviado.short_description = 'Marcar como Enviado'
     
     def cancelar_pedidos(self, request, queryset):
-        count = queryset.filter(status__in=['pendente', 'aguardando_pagamento']).update(
-            status='cancelado'
-        )
+        from django.db import transaction
+        from produtos import estoque
+        pedidos = queryset.filter(status__in=['pendente', 'aguardando_pagamento'])
+        with transaction.atomic():
+            estoque.liberar_reservas(list(pedidos.values_list('numero_pedido', flat=True)))
+            count = pedidos.update(
+                status='cancelado'
+            )
         self.message_user(request, f'{count} pedido(s) cancelado(s).')
     cancelar_pedidos.short_description = 'Cancelar Pedidos'
 
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from decimal import Decimal
 
@@ -16,6 +17,7 @@ from .serializers import (
     
 )
 from carrinho.models import ItemCarrinho
+from produtos import estoque
 
 
 
@@ -82,7 +84,7 @@ def criar_pedido(request):
     
     # Buscar itens do carrinho
     itens_carrinho = ItemCarrinho.objects.filter(
-        usuario=request.user
+        carrinho__usuario=request.user
     ).select_related('produto', 'produto__loja')
     
     if not itens_carrinho.exists():
@@ -92,8 +94,10 @@ def criar_pedido(request):
     
     try:
         with transaction.atomic():
+            itens = list(itens_carrinho)
+            
             # Calcular valores
-            subtotal = sum(item.subtotal for item in itens_carrinho)
+            subtotal = sum(item.total for item in itens)
             taxa_entrega = Decimal('15.00') if subtotal > 0 else Decimal('0.00')
             total = subtotal + taxa_entrega
             
@@ -108,24 +112,26 @@ def criar_pedido(request):
                 observacoes=serializer.validated_data.get('observacoes', '')
             )
             
+            # Reservar estoque: baixa condicional de todos os produtos num
+            # único UPDATE; as unidades voltam se o pagamento não sair no prazo
+            quantidades = {}
+            for item in itens:
+                quantidades[item.produto_id] = quantidades.get(item.produto_id, 0) + item.quantidade
+            estoque.reservar(quantidades, referencia=pedido.numero_pedido)
+            
             # Criar itens do pedido
-            for item_carrinho in itens_carrinho:
-                # Verificar estoque
-                if item_carrinho.produto.estoque < item_carrinho.quantidade:
-                    raise Exception(f'Estoque insuficiente para {item_carrinho.produto.nome}')
-                
-                ItemPedido.objects.create(
+            ItemPedido.objects.bulk_create([
+                ItemPedido(
                     pedido=pedido,
-                    produto=item_carrinho.produto,
-                    loja=item_carrinho.produto.loja,
-                    nome_produto=item_carrinho.produto.nome,
-                    preco_unitario=item_carrinho.produto.preco,
-                    quantidade=item_carrinho.quantidade
+                    produto=item.produto,
+                    loja=item.produto.loja,
+                    nome_produto=item.produto.nome,
+                    preco_unitario=item.produto.preco,
+                    quantidade=item.quantidade,
+                    subtotal=item.produto.preco * item.quantidade
                 )
-                
-                # Reduzir estoque
-                item_carrinho.produto.estoque -= item_carrinho.quantidade
-                item_carrinho.produto.save()
+                for item in itens
+            ])
             
             # Criar pagamento
             pagamento = Pagamentos.objects.create(
@@ -160,9 +166,10 @@ def criar_pedido(request):
                 pedido.status = 'pago'
                 pedido.data_pagamento = timezone.now()
                 pedido.save()
+                estoque.confirmar_reservas([pedido.numero_pedido])
                         
-                # Limpar carrinho
-                itens_carrinho.delete()
+                # Limpar carrinho (com os totais e o contador)
+                itens[0].carrinho.limpar()
                         
     
                 RastreamentoEntrega.objects.create(
@@ -178,73 +185,85 @@ def criar_pedido(request):
                         'pedido': PedidoSerializer(pedido).data
                         }, status=status.HTTP_201_CREATED)
                 
+    except estoque.EstoqueInsuficiente as e:
+                    return Response({
+                        'error': str(e),
+                        'produtos': [produto_id for produto_id, _, _ in e.produtos]
+                    }, status=status.HTTP_409_CONFLICT)
     except Exception as e:
                     return Response({
                         'error': str(e)
                     }, status=status.HTTP_400_BAD_REQUEST)
 
 
-    @api_view(['POST'])
-    @permission_classes([IsAuthenticated])
-    def cancelar_pedido(request, numero_pedido):
-     
-                pedido = get_object_or_404(
-                    Pedido,
-                    numero_pedido=numero_pedido,
-                    usuario=request.user
-                )
-                
-                if not pedido.pode_cancelar:
-                    return Response({
-                        'error': 'Este pedido não pode ser cancelado'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                with transaction.atomic():
-                    # Devolver estoque
-                    for item in pedido.itens.all():
-                        item.produto.estoque += item.quantidade
-                        item.produto.save()
-                    
-                    # Cancelar pagamento
-                    if hasattr(pedido, 'pagamento'):
-                        pedido.pagamento.status = 'cancelado'
-                        pedido.pagamento.data_cancelamento = timezone.now()
-                        pedido.pagamento.save()
-                    
-                    # Cancelar pedido
-                    pedido.status = 'cancelado'
-                    pedido.save()
-                    
-                    # Adicionar rastreamento
-                    RastreamentoEntrega.objects.create(
-                        pedido=pedido,
-                        status='Pedido Cancelado',
-                        descricao='Pedido cancelado pelo cliente.'
-                    )
-                
-                return Response({
-                    'message': 'Pedido cancelado com sucesso'
-                })
-
-
-    @api_view(['GET'])
-    @permission_classes([IsAuthenticated])
-    def rastreamento_pedido(request, numero_pedido):
-                """
-                GET /api/pagamento/pedidos/{numero_pedido}/rastreamento/
-                Rastreamento do pedido
-                """
-                pedido = get_object_or_404(
-                    Pedido,
-                    numero_pedido=numero_pedido,
-                    usuario=request.user
-                )
-                
-                rastreamentos = pedido.rastreamentos.all()
-                
-                return Response({
-                    'pedido': numero_pedido,
-                    'status_atual': pedido.get_status_display(),
-                    'rastreamentos': RastreamentoSerializer(rastreamentos, many=True).data
-                })
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancelar_pedido(request, numero_pedido):
+    
+    pedido = get_object_or_404(
+        Pedido,
+        numero_pedido=numero_pedido,
+        usuario=request.user
+    )
+    
+    if not pedido.pode_cancelar:
+        return Response({
+            'error': 'Este pedido não pode ser cancelado'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        # Devolver estoque: pedido pago devolve as quantidades dos itens; antes
+        # do pagamento, só o que ainda estiver reservado (a reserva vencida já
+        # voltou ao estoque por liberar_reservas_expiradas)
+        if pedido.status == 'pago':
+            quantidades = dict(
+                pedido.itens.values('produto_id')
+                .annotate(total=Sum('quantidade'))
+                .values_list('produto_id', 'total')
+            )
+            estoque.repor_estoque(quantidades)
+        else:
+            estoque.liberar_reservas([pedido.numero_pedido])
+        
+        # Cancelar pagamento
+        if hasattr(pedido, 'pagamento'):
+            pedido.pagamento.status = 'cancelado'
+            pedido.pagamento.data_cancelamento = timezone.now()
+            pedido.pagamento.save()
+        
+        # Cancelar pedido
+        pedido.status = 'cancelado'
+        pedido.save()
+        
+        # Adicionar rastreamento
+        RastreamentoEntrega.objects.create(
+            pedido=pedido,
+            status='Pedido Cancelado',
+            descricao='Pedido cancelado pelo cliente.'
+        )
+    
+    return Response({
+        'message': 'Pedido cancelado com sucesso'
+    })
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def rastreamento_pedido(request, numero_pedido):
+    """
+    GET /api/pagamento/pedidos/{numero_pedido}/rastreamento/
+    Rastreamento do pedido
+    """
+    pedido = get_object_or_404(
+        Pedido,
+        numero_pedido=numero_pedido,
+        usuario=request.user
+    )
+    
+    rastreamentos = pedido.rastreamentos.all()
+    
+    return Response({
+        'pedido': numero_pedido,
+        'status_atual': pedido.get_status_display(),
+        'rastreamentos': RastreamentoSerializer(rastreamentos, many=True).data
+    })
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 import uuid
+
+from core.numeracao import gerar_numero_pedido
 User = get_user_model()
 
 class Endereco(models.Model):
@@ -177,14 +179,8 @@ class Pedido(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero_pedido:
-            # Gerar número único do pedido
-            import random
-            import string
-            while True:
-                numero = ''.join(random.choices(string.digits, k=10))
-                if not Pedido.objects.filter(numero_pedido=numero).exists():
-                    self.numero_pedido = numero
-                    break
+            # Gerar número único do pedido (sem consultar o banco)
+            self.numero_pedido = gerar_numero_pedido()
         super().save(*args, **kwargs)
     
     @property
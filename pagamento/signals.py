@@ -0,0 +1,37 @@
+# ==========================================
+# pagamento/signals.py
+# ==========================================
+
+from django.dispatch import receiver
+from django.utils import timezone
+
+from produtos import estoque
+
+from .models import Pagamentos, Pedido, RastreamentoEntrega
+
+
+@receiver(estoque.reservas_expiradas, dispatch_uid='pagamento-cancelar-expirados')
+def cancelar_pedidos_expirados(sender, referencias, **kwargs):
+    """
+    O estoque reservado para o pedido voltou à venda: o pedido é cancelado
+    para não ser confirmado depois sem unidades para entregar.
+    """
+    pedidos = Pedido.objects.filter(
+        numero_pedido__in=referencias,
+        status__in=['pendente', 'aguardando_pagamento'],
+    )
+    ids = list(pedidos.values_list('pk', flat=True))
+    if not ids:
+        return
+    Pedido.objects.filter(pk__in=ids).update(status='cancelado')
+    Pagamentos.objects.filter(pedido_id__in=ids, status__in=['pendente', 'processando']).update(
+        status='cancelado', data_cancelamento=timezone.now()
+    )
+    RastreamentoEntrega.objects.bulk_create([
+        RastreamentoEntrega(
+            pedido_id=pk,
+            status='Pedido Cancelado',
+            descricao='Pagamento não confirmado dentro do prazo da reserva.',
+        )
+        for pk in ids
+    ])
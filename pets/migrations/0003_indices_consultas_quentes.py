@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'especie', 'porte', 'sexo'], name='pet_filtros_adocao'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'created_at'], name='pet_status_recentes'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoadocao',
+            index=models.Index(fields=['usuario', 'created_at'], name='solicitacao_usuario_recentes'),
+        ),
+    ]
@@ -62,6 +62,11 @@ class Pet(models.Model):
         verbose_name = "Pet"
         verbose_name_plural = "Pets"
         ordering = ['-created_at']
+        indexes = [
+            # Vitrine de adoção (status='disponivel'), com e sem filtros
+            models.Index(fields=['status', 'especie', 'porte', 'sexo'], name='pet_filtros_adocao'),
+            models.Index(fields=['status', 'created_at'], name='pet_status_recentes'),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.get_especie_display()}"
@@ -164,6 +169,10 @@ class SolicitacaoAdocao(models.Model):
         verbose_name = "Solicitação de Adoção"
         verbose_name_plural = "Solicitações de Adoção"
         ordering = ['-created_at']
+        indexes = [
+            # Minhas solicitações
+            models.Index(fields=['usuario', 'created_at'], name='solicitacao_usuario_recentes'),
+        ]
     
     def __str__(self):
         return f"Solicitação de {self.nome_completo} para {self.pet.nome}"
@@ -11,6 +11,9 @@ urlpatterns = [
     # Página principal de adoção
     path('', views.adocao, name='adocao'),
     
+    # Próxima página em JSON (carregar mais)
+    path('api/mais/', views.carregar_mais, name='carregar_mais'),
+    
     # Detalhes do pet
     path('<slug:slug>/', views.detalhe_pet, name='detalhe'),
     
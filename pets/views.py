@@ -6,22 +6,29 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import reverse
+from core.paginacao import paginar
+from core.perfilamento import orcamento_consultas
 from .models import Pet, SolicitacaoAdocao, PromocaoAdocao
 from .forms import SolicitacaoAdocaoForm
 
 
-def adocao(request):
-    """Página principal de adoção"""
+PETS_POR_PAGINA = 24
+
+
+def filtrar_pets(request):
+    """Pets disponíveis com os filtros e a ordenação da querystring"""
     # Buscar pets disponíveis
     pets = Pet.objects.filter(status='disponivel')
     
     # Filtros
     ordenacao = request.GET.get('ordem', '-created_at')
     
-    if ordenacao == 'recentes':
-        pets = pets.order_by('-created_at')
-    elif ordenacao == 'antigos':
+    if ordenacao == 'antigos':
         pets = pets.order_by('created_at')
+    else:  # recentes
+        pets = pets.order_by('-created_at')
     
     # Filtro por espécie, porte, sexo
     especie = request.GET.get('especie')
@@ -36,14 +43,45 @@ def adocao(request):
     if sexo:
         pets = pets.filter(sexo=sexo)
     
+    return pets, ordenacao
+
+
+@orcamento_consultas(5)
+def adocao(request):
+    """Página principal de adoção"""
+    pets, ordenacao = filtrar_pets(request)
+    
     context = {
-        'pets': pets,
+        'pets': paginar(request, pets, PETS_POR_PAGINA, em_cache=True),
         'ordenacao_atual': ordenacao,
     }
     
     return render(request, 'pets/adocao.html', context)
 
 
+def carregar_mais(request):
+    """Próxima página de pets em JSON (botão "carregar mais")"""
+    pets, _ = filtrar_pets(request)
+    pagina = paginar(request, pets, PETS_POR_PAGINA)
+    
+    return JsonResponse({
+        'pets': [
+            {
+                'id': pet.id,
+                'nome': pet.nome,
+                'url': reverse('pets:detalhe', args=[pet.slug]),
+                'especie': pet.get_especie_display(),
+                'porte': pet.get_porte_display(),
+                'sexo': pet.sexo,
+                'foto': pet.foto_principal.url if pet.foto_principal else None,
+            }
+            for pet in pagina
+        ],
+        'proximo_cursor': pagina.cursor_proximo,
+        'tem_mais': pagina.has_next(),
+    })
+
+
 def detalhe_pet(request, slug):
     """Detalhes de um pet específico"""
     pet = get_object_or_404(Pet, slug=slug, status__in=['disponivel', 'processo'])
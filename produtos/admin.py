@@ -1,19 +1,22 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
-from .models import CategoriaProduto, Produto, ImagemProduto
+from core.imagens import url_derivada
+from . import importacao
+from .forms import ImportarCatalogoForm
+from .models import AvaliacaoProduto, CategoriaProduto, Produto, ImagemProduto, ReservaEstoque
 
 
 @admin.register(CategoriaProduto)
 class CategoriaProdutoAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'tipo', 'ordem', 'ativo', 'total_produtos']
+    # total_produtos_ativos é mantido pelos sinais de Produto (sem COUNT por linha)
+    list_display = ['nome', 'tipo', 'ordem', 'ativo', 'total_produtos_ativos']
     list_filter = ['tipo', 'ativo']
     search_fields = ['nome', 'descricao']
     list_editable = ['ordem', 'ativo']
     prepopulated_fields = {'slug': ('nome',)}
-    
-    def total_produtos(self, obj):
-        return obj.produtos.count()
-    total_produtos.short_description = 'Total de Produtos'
 
 
 class ImagemProdutoInline(admin.TabularInline):
@@ -40,6 +43,8 @@ class ProdutoAdmin(admin.ModelAdmin):
     list_editable = ['ativo']
     prepopulated_fields = {'slug': ('nome',)}
     inlines = [ImagemProdutoInline]
+    # Agregados de AvaliacaoProduto (produtos/signals.py)
+    readonly_fields = ['avaliacao', 'numero_avaliacoes', 'pontuacao_avaliacao']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -55,7 +60,7 @@ class ProdutoAdmin(admin.ModelAdmin):
             'fields': ('estoque', 'estoque_minimo')
         }),
         ('Avaliação', {
-            'fields': ('avaliacao', 'numero_avaliacoes')
+            'fields': ('avaliacao', 'numero_avaliacoes', 'pontuacao_avaliacao')
         }),
         ('Características', {
             'fields': ('peso_tamanho',)
@@ -69,7 +74,7 @@ class ProdutoAdmin(admin.ModelAdmin):
         if obj.imagem_principal:
             return format_html(
                 '<img src="{}" width="50" style="border-radius: 5px;"/>',
-                obj.imagem_principal.url
+                url_derivada(obj.imagem_principal)
             )
         return '-'
     imagem_thumb.short_description = 'Imagem'
@@ -86,3 +91,80 @@ class ProdutoAdmin(admin.ModelAdmin):
             )
         return '-'
     desconto_display.short_description = 'Desconto'
+
+    def get_urls(self):
+        return [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.importar_catalogo),
+                name='produtos_produto_importar'
+            ),
+        ] + super().get_urls()
+
+    def importar_catalogo(self, request):
+        """Importa uma planilha enviada pelo admin (para arquivos muito grandes, use o comando importar_catalogo)"""
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            raise PermissionDenied
+
+        resultado = None
+        form = ImportarCatalogoForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            arquivo = form.cleaned_data['arquivo']
+            try:
+                resultado = importacao.importar_catalogo(
+                    arquivo.file, arquivo.name,
+                    somente_validar=form.cleaned_data['somente_validar']
+                )
+            except (UnicodeDecodeError, importacao.PlanilhaInvalida) as erro:
+                messages.error(request, f'Não foi possível ler a planilha: {erro}')
+            else:
+                verbo = 'válidos' if form.cleaned_data['somente_validar'] else 'importados'
+                nivel = messages.WARNING if resultado.total_erros else messages.SUCCESS
+                messages.add_message(
+                    request, nivel,
+                    f'{resultado.gravadas} produtos {verbo}, {resultado.total_erros} linhas rejeitadas.'
+                )
+
+        contexto = {
+            **self.admin_site.each_context(request),
+            'title': 'Importar catálogo',
+            'opts': self.model._meta,
+            'form': form,
+            'resultado': resultado,
+            'colunas': importacao.COLUNAS,
+            'obrigatorias': importacao.OBRIGATORIAS,
+        }
+        return TemplateResponse(request, 'admin/produtos/produto/importar.html', contexto)
+
+
+@admin.register(AvaliacaoProduto)
+class AvaliacaoProdutoAdmin(admin.ModelAdmin):
+    list_display = ['produto', 'usuario', 'nota', 'titulo', 'recomenda', 'aprovado', 'created_at']
+    list_filter = ['aprovado', 'nota', 'recomenda', 'created_at']
+    search_fields = ['titulo', 'comentario', 'produto__nome', 'usuario__email']
+    list_select_related = ['produto', 'usuario']
+    raw_id_fields = ['produto', 'usuario']
+    actions = ['aprovar', 'reprovar']
+
+    def _moderar(self, request, queryset, aprovado):
+        # update() não dispara sinais: reconta os produtos afetados
+        produto_ids = set(queryset.values_list('produto_id', flat=True))
+        alteradas = queryset.update(aprovado=aprovado)
+        Produto.atualizar_avaliacoes(produto_ids)
+        self.message_user(request, f'{alteradas} avaliações atualizadas.', messages.SUCCESS)
+
+    @admin.action(description='Aprovar avaliações selecionadas')
+    def aprovar(self, request, queryset):
+        self._moderar(request, queryset, True)
+
+    @admin.action(description='Reprovar avaliações selecionadas')
+    def reprovar(self, request, queryset):
+        self._moderar(request, queryset, False)
+
+
+@admin.register(ReservaEstoque)
+class ReservaEstoqueAdmin(admin.ModelAdmin):
+    list_display = ['referencia', 'produto', 'quantidade', 'expira_em', 'created_at']
+    list_select_related = ['produto']
+    search_fields = ['referencia', 'produto__nome']
+    readonly_fields = ['produto', 'referencia', 'quantidade', 'expira_em', 'created_at']
@@ -0,0 +1,513 @@
+# ==========================================
+# produtos/busca.py
+# ==========================================
+"""
+Índice de busca textual de produtos.
+
+O índice invertido é mantido fora da tabela de produtos e sincronizado pelos
+sinais de ``Produto`` (ver ``produtos/signals.py``). O backend é escolhido
+pelo banco em uso:
+
+* SQLite     -> tabela virtual FTS5 ``produtos_busca`` (ranking por bm25)
+* PostgreSQL -> tabela ``produtos_busca`` com ``tsvector`` + índice GIN
+* outros     -> índice invertido em memória, em Python
+
+Os textos são normalizados (minúsculas, sem acentos) e reduzidos a radicais
+antes de indexar, então "Rações", "racao" e "ração" caem no mesmo termo.
+
+Na consulta, todo termo casa como prefixo, em qualquer backend: "cach"
+encontra "cachorro" e "bolin" encontra "bolinha" (o índice guarda também as
+palavras inteiras que o stemmer alterou, ver ``termos_indexados``).
+
+``filtrar_queryset`` restringe a listagem a todos os produtos encontrados
+(subconsulta no índice, sem limite), então totais e facetas contam tudo; só
+a ordenação por relevância se limita aos ``LIMITE_RESULTADOS`` primeiros, e
+os demais vêm depois deles.
+
+A tabela do índice é criada pela migração 0002_indice_busca e preenchida
+por ``reindexar`` (comando ``reindexar_busca``, e no ``migrate`` quando o
+índice está vazio e já há produtos).
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import connections, transaction
+from django.db.models import F, Func, IntegerField
+from django.db.models.expressions import RawSQL
+
+
+# Tabela criada pela migração 0002_indice_busca
+TABELA_INDICE = 'produtos_busca'
+
+# Máximo de resultados ranqueados por busca (os demais encontrados não são
+# descartados, só ficam sem posição de relevância)
+LIMITE_RESULTADOS = 1000
+
+# Peso de cada campo no ranking
+PESO_NOME = 10.0
+PESO_CATEGORIA = 4.0
+PESO_DESCRICAO = 1.0
+
+TAMANHO_MINIMO_RADICAL = 3
+
+_RE_PALAVRA = re.compile(r'[a-z0-9]+')
+
+_DIMINUTIVOS = ('zinhos', 'zinhas', 'zinho', 'zinha', 'inhos', 'inhas', 'inho', 'inha')
+
+_PLURAIS = (
+    ('oes', 'ao'),
+    ('aes', 'ao'),
+    ('ais', 'al'),
+    ('eis', 'el'),
+    ('ois', 'ol'),
+    ('res', 'r'),
+    ('les', 'l'),
+    ('zes', 'z'),
+    ('ns', 'm'),
+    ('s', ''),
+)
+
+
+# ========== NORMALIZAÇÃO ==========
+
+def normalizar(texto):
+    """Minúsculas e sem acentos"""
+    texto = texto or ''
+    if texto.isascii():
+        return texto.lower()
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+@lru_cache(maxsize=100_000)
+def radical(palavra):
+    """
+    Stemmer leve para português (diminutivo, plural e gênero).
+
+    O vocabulário do catálogo é pequeno: na reindexação quase toda palavra
+    já passou pelo cache.
+    """
+    if len(palavra) <= TAMANHO_MINIMO_RADICAL or palavra.isdigit():
+        return palavra
+
+    for sufixo in _DIMINUTIVOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= TAMANHO_MINIMO_RADICAL:
+            palavra = palavra[:-len(sufixo)]
+            break
+
+    for sufixo, troca in _PLURAIS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) + len(troca) >= TAMANHO_MINIMO_RADICAL:
+            palavra = palavra[:-len(sufixo)] + troca
+            break
+
+    if palavra[-1] in 'aoe' and len(palavra) > TAMANHO_MINIMO_RADICAL:
+        palavra = palavra[:-1]
+
+    return palavra
+
+
+def tokenizar(texto):
+    """Lista de radicais de um texto, na ordem em que aparecem"""
+    return [radical(p) for p in _RE_PALAVRA.findall(normalizar(texto))]
+
+
+def termos_indexados(texto):
+    """
+    Radicais do texto mais as palavras inteiras que o stemmer alterou.
+
+    As palavras inteiras permitem que uma busca digitada pela metade
+    ("bolin") ainda encontre "bolinha", cujo radical é "bol".
+    """
+    palavras = _RE_PALAVRA.findall(normalizar(texto))
+    radicais = [radical(p) for p in palavras]
+    extras = [p for p, r in zip(palavras, radicais) if p != r]
+    return ' '.join(radicais + extras)
+
+
+def documento(produto):
+    """Campos indexados de um produto"""
+    categoria = produto.categoria.nome if produto.categoria_id else ''
+    return (
+        termos_indexados(produto.nome),
+        termos_indexados(categoria),
+        termos_indexados(produto.descricao),
+    )
+
+
+# ========== BACKENDS ==========
+
+class IndiceBusca:
+    """Interface comum dos backends de busca"""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def connection(self):
+        return connections[self.alias]
+
+    def indexar(self, produtos, novos=False):
+        """``novos=True``: os produtos ainda não estão no índice (reindexação)"""
+        raise NotImplementedError
+
+    def remover(self, ids):
+        raise NotImplementedError
+
+    def limpar(self):
+        raise NotImplementedError
+
+    def vazio(self):
+        raise NotImplementedError
+
+    def consultar(self, termos, limite):
+        """IDs ranqueados; ``limite=None`` devolve todos"""
+        raise NotImplementedError
+
+    def encontrados(self, termos):
+        """
+        Todos os IDs que contêm os termos, para ``pk__in``: uma subconsulta
+        nos backends com tabela, a lista inteira no índice em memória.
+        """
+        return self.consultar(termos, None)
+
+    def buscar(self, texto, limite=LIMITE_RESULTADOS):
+        """IDs dos produtos que contêm todos os termos, do mais relevante ao menos"""
+        termos = termos_busca(texto)
+        if not termos:
+            return []
+        return self.consultar(termos, limite)
+
+
+class IndiceSQLite(IndiceBusca):
+    """FTS5 com rowid = id do produto"""
+
+    def indexar(self, produtos, novos=False):
+        linhas = [(p.pk, *documento(p)) for p in produtos]
+        if not linhas:
+            return
+        with self.connection.cursor() as cursor:
+            if not novos:
+                cursor.executemany(
+                    f'DELETE FROM {TABELA_INDICE} WHERE rowid = %s',
+                    [(linha[0],) for linha in linhas]
+                )
+            cursor.executemany(
+                f'INSERT INTO {TABELA_INDICE} (rowid, nome, categoria, descricao) '
+                f'VALUES (%s, %s, %s, %s)',
+                linhas
+            )
+
+    def remover(self, ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABELA_INDICE} WHERE rowid = %s',
+                [(pk,) for pk in ids]
+            )
+
+    def limpar(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABELA_INDICE}')
+
+    def vazio(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT 1 FROM {TABELA_INDICE} LIMIT 1')
+            return cursor.fetchone() is None
+
+    @staticmethod
+    def _expressao(termos):
+        # Cada termo vira um prefixo: "cach" encontra "cachorr"
+        return ' AND '.join(f'"{termo}" *' for termo in termos)
+
+    def consultar(self, termos, limite):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABELA_INDICE} WHERE {TABELA_INDICE} MATCH %s '
+                f'ORDER BY bm25({TABELA_INDICE}, %s, %s, %s), rowid DESC LIMIT %s',
+                [self._expressao(termos), PESO_NOME, PESO_CATEGORIA, PESO_DESCRICAO,
+                 -1 if limite is None else limite]
+            )
+            return [linha[0] for linha in cursor.fetchall()]
+
+    def encontrados(self, termos):
+        return RawSQL(
+            f'SELECT rowid FROM {TABELA_INDICE} WHERE {TABELA_INDICE} MATCH %s',
+            [self._expressao(termos)]
+        )
+
+
+class IndicePostgres(IndiceBusca):
+    """tsvector com pesos A/B/C por campo"""
+
+    def indexar(self, produtos, novos=False):
+        linhas = [(p.pk, *documento(p)) for p in produtos]
+        if not linhas:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABELA_INDICE} (produto_id, documento) VALUES ('
+                f"  %s,"
+                f"  setweight(to_tsvector('simple', %s), 'A') ||"
+                f"  setweight(to_tsvector('simple', %s), 'B') ||"
+                f"  setweight(to_tsvector('simple', %s), 'C')"
+                f') ON CONFLICT (produto_id) DO UPDATE SET documento = EXCLUDED.documento',
+                linhas
+            )
+
+    def remover(self, ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABELA_INDICE} WHERE produto_id = ANY(%s)',
+                [list(ids)]
+            )
+
+    def limpar(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABELA_INDICE}')
+
+    def vazio(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT 1 FROM {TABELA_INDICE} LIMIT 1')
+            return cursor.fetchone() is None
+
+    @staticmethod
+    def _expressao(termos):
+        # Cada termo vira um prefixo, como no SQLite
+        return ' & '.join(f'{termo}:*' for termo in termos)
+
+    def consultar(self, termos, limite):
+        expressao = self._expressao(termos)
+        # ts_rank espera os pesos na ordem {D, C, B, A}, entre 0 e 1
+        pesos = '{0,%s,%s,1}' % (PESO_DESCRICAO / PESO_NOME, PESO_CATEGORIA / PESO_NOME)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT produto_id FROM {TABELA_INDICE} "
+                f"WHERE documento @@ to_tsquery('simple', %s) "
+                f"ORDER BY ts_rank(%s::float4[], documento, to_tsquery('simple', %s)) DESC, produto_id DESC "
+                f"LIMIT %s",
+                [expressao, pesos, expressao, limite]
+            )
+            return [linha[0] for linha in cursor.fetchall()]
+
+    def encontrados(self, termos):
+        return RawSQL(
+            f"SELECT produto_id FROM {TABELA_INDICE} WHERE documento @@ to_tsquery('simple', %s)",
+            [self._expressao(termos)]
+        )
+
+
+class IndiceMemoria(IndiceBusca):
+    """Índice invertido em Python para bancos sem busca textual nativa"""
+
+    def __init__(self, alias='default'):
+        super().__init__(alias)
+        self._lock = threading.RLock()
+        self._carregado = False
+        self._postings = defaultdict(dict)    # termo -> {produto_id: peso}
+        self._termos_produto = {}             # produto_id -> termos indexados
+        self._vocabulario = []                # termos ordenados (busca por prefixo)
+
+    def _carregar(self):
+        if self._carregado:
+            return
+        from .models import Produto
+        self._carregado = True
+        produtos = Produto.objects.using(self.alias).select_related('categoria')
+        self.indexar(produtos.iterator(chunk_size=2000))
+
+    def indexar(self, produtos, novos=False):
+        with self._lock:
+            for produto in produtos:
+                self._remover_um(produto.pk)
+                pesos = defaultdict(float)
+                for campo, peso in zip(documento(produto), (PESO_NOME, PESO_CATEGORIA, PESO_DESCRICAO)):
+                    for termo in campo.split():
+                        pesos[termo] += peso
+                for termo, peso in pesos.items():
+                    if termo not in self._postings:
+                        bisect.insort(self._vocabulario, termo)
+                    self._postings[termo][produto.pk] = peso
+                self._termos_produto[produto.pk] = tuple(pesos)
+
+    def _remover_um(self, pk):
+        for termo in self._termos_produto.pop(pk, ()):
+            postings = self._postings.get(termo)
+            if postings is None:
+                continue
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[termo]
+                posicao = bisect.bisect_left(self._vocabulario, termo)
+                del self._vocabulario[posicao]
+
+    def remover(self, ids):
+        with self._lock:
+            for pk in ids:
+                self._remover_um(pk)
+
+    def limpar(self):
+        with self._lock:
+            self._postings.clear()
+            self._termos_produto.clear()
+            self._vocabulario.clear()
+            self._carregado = True
+
+    def vazio(self):
+        # Carregado da tabela de produtos na primeira consulta
+        return False
+
+    def consultar(self, termos, limite):
+        with self._lock:
+            self._carregar()
+            pontuacao = None
+            for termo in termos:
+                encontrados = defaultdict(float)
+                inicio = bisect.bisect_left(self._vocabulario, termo)
+                for candidato in self._vocabulario[inicio:]:
+                    if not candidato.startswith(termo):
+                        break
+                    for pk, peso in self._postings[candidato].items():
+                        encontrados[pk] = max(encontrados[pk], peso)
+                if pontuacao is None:
+                    pontuacao = encontrados
+                else:
+                    pontuacao = {
+                        pk: total + encontrados[pk]
+                        for pk, total in pontuacao.items() if pk in encontrados
+                    }
+                if not pontuacao:
+                    return []
+        ordenados = sorted(pontuacao.items(), key=lambda item: (-item[1], -item[0]))
+        return [pk for pk, _ in ordenados[:limite]]
+
+
+_BACKENDS = {
+    'sqlite': IndiceSQLite,
+    'postgresql': IndicePostgres,
+}
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def obter_indice(alias='default'):
+    """Backend de busca adequado ao banco do alias"""
+    with _indices_lock:
+        if alias not in _indices:
+            classe = _BACKENDS.get(connections[alias].vendor, IndiceMemoria)
+            _indices[alias] = classe(alias)
+        return _indices[alias]
+
+
+# ========== ORDENAÇÃO ==========
+
+class PosicaoNaBusca(Func):
+    """
+    Posição do produto na lista ranqueada de IDs (menor = mais relevante);
+    quem não está na lista fica depois de todos.
+
+    Evita um CASE com um WHEN por resultado, que fica caro de montar e de
+    avaliar com centenas de IDs.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, ids):
+        self.ids = [int(pk) for pk in ids]
+        super().__init__(F('pk'))
+
+    def _coluna(self, compiler):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        coluna, params = self._coluna(compiler)
+        lista = ',%s,' % ','.join(map(str, self.ids))
+        # instr devolve a posição do caractere: cresce com a posição na lista
+        return (
+            f"COALESCE(NULLIF(instr(%s, ',' || {coluna} || ','), 0), %s)",
+            [lista, *params, len(lista)]
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        coluna, params = self._coluna(compiler)
+        return f'COALESCE(array_position(%s::bigint[], {coluna}), %s)', [self.ids, *params, len(self.ids) + 1]
+
+    def as_sql(self, compiler, connection, **extra_context):
+        coluna, params = self._coluna(compiler)
+        casos = ' '.join(['WHEN %s THEN %s'] * len(self.ids))
+        valores = [v for posicao, pk in enumerate(self.ids) for v in (pk, posicao)]
+        return f'CASE {coluna} {casos} ELSE %s END', [*params, *valores, len(self.ids)]
+
+
+# ========== API ==========
+
+def termos_busca(texto):
+    """Radicais da busca, sem repetidos e na ordem em que aparecem"""
+    return list(dict.fromkeys(tokenizar(texto)))
+
+
+def buscar(texto, limite=LIMITE_RESULTADOS):
+    """IDs dos produtos encontrados, ordenados por relevância"""
+    return obter_indice().buscar(texto, limite)
+
+
+def filtrar_queryset(queryset, texto):
+    """
+    Restringe o queryset a todos os produtos encontrados e anota
+    ``relevancia_busca`` (menor = mais relevante; os que passam de
+    ``LIMITE_RESULTADOS`` empatam em último) para ordenação.
+    """
+    termos = termos_busca(texto)
+    if not termos:
+        return queryset
+    indice = obter_indice()
+    ids = indice.consultar(termos, LIMITE_RESULTADOS)
+    if not ids:
+        return queryset.none()
+    return (
+        queryset
+        .filter(pk__in=indice.encontrados(termos))
+        .annotate(relevancia_busca=PosicaoNaBusca(ids))
+    )
+
+
+def indexar_produtos(produtos):
+    obter_indice().indexar(produtos)
+
+
+def remover_produtos(ids):
+    obter_indice().remover(ids)
+
+
+def reindexar(lote=2000, progresso=None):
+    """Reconstrói o índice inteiro a partir da tabela de produtos (numa transação)"""
+    from .models import Produto
+
+    indice = obter_indice()
+    total = 0
+    buffer = []
+    produtos = (
+        Produto.objects
+        .select_related('categoria')
+        .only('nome', 'descricao', 'categoria__nome')
+        .order_by('pk')
+    )
+    with transaction.atomic():
+        indice.limpar()
+        for produto in produtos.iterator(chunk_size=lote):
+            buffer.append(produto)
+            if len(buffer) >= lote:
+                indice.indexar(buffer, novos=True)
+                total += len(buffer)
+                buffer = []
+                if progresso:
+                    progresso(total)
+        if buffer:
+            indice.indexar(buffer, novos=True)
+            total += len(buffer)
+            if progresso:
+                progresso(total)
+    return total
@@ -0,0 +1,57 @@
+# ==========================================
+# produtos/categorias.py
+# ==========================================
+"""
+Categorias ativas em cache na memória do processo.
+
+A lista (com o contador ``total_produtos_ativos``) fica num atributo do
+módulo, junto com a versão de CategoriaProduto em que foi montada
+(``core.caches.camadas.versao``). Cada processo remonta a lista na próxima
+leitura, ao ver que a versão mudou. Custa uma leitura do cache por
+requisição em vez de uma consulta.
+
+Todo save/delete de CategoriaProduto troca a versão (``camadas.registrar``
+em core/signals.py); os contadores, atualizados com ``update()`` pelos
+sinais de Produto (produtos/signals.py), chamam ``invalidar()``.
+"""
+
+import threading
+
+from core.caches import camadas
+from core.replicas import lendo_do_primario
+
+
+# (versão, categorias), trocado de uma vez só
+_local = (None, ())
+_trava = threading.Lock()
+
+
+def invalidar():
+    """Descarta a lista em todos os processos (para gravações que não disparam sinais)"""
+    from .models import CategoriaProduto
+
+    camadas.invalidar(CategoriaProduto)
+
+
+def ativas():
+    """
+    Tupla das categorias ativas, na ordem do Meta.
+
+    Os objetos são compartilhados entre requisições: não altere atributos
+    deles (use ``copy.copy`` para anotar valores por requisição).
+    """
+    from .models import CategoriaProduto
+
+    global _local
+    atual = camadas.versao(CategoriaProduto)
+    versao_local, categorias = _local
+    if versao_local == atual:
+        return categorias
+
+    with _trava:
+        if _local[0] != atual:
+            # Do primário: a lista vale até a próxima invalidação, e a réplica
+            # pode ainda não ter a escrita que trocou a versão
+            with lendo_do_primario():
+                _local = (atual, tuple(CategoriaProduto.objects.filter(ativo=True)))
+        return _local[1]
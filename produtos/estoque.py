@@ -0,0 +1,187 @@
+# ==========================================
+# produtos/estoque.py
+# ==========================================
+"""
+Baixa e reposição de estoque em lote.
+
+Cada operação é um único UPDATE condicional, sem carregar os produtos:
+
+    UPDATE produto SET estoque = estoque - CASE id WHEN ... END
+    WHERE id IN (...) AND estoque >= CASE id WHEN ... END
+
+Se alguma linha não passar na condição, o UPDATE afeta menos produtos do que
+o pedido e ``EstoqueInsuficiente`` é levantada; quem chamou deve estar dentro
+de ``transaction.atomic`` para desfazer a baixa parcial.
+
+Reservas: ``reservar`` baixa o estoque e registra as unidades com prazo de
+validade (``ReservaEstoque``) enquanto o pagamento está pendente.
+``confirmar_reservas`` mantém a baixa; ``liberar_reservas`` e
+``liberar_reservas_expiradas`` devolvem as unidades com um UPDATE por lote.
+Uma reserva devolvida não pode mais ser confirmada: ``confirmar_reservas``
+informa quais referências ainda tinham reserva, e ``reservas_expiradas``
+avisa (na mesma transação) quais referências perderam a reserva por prazo,
+para que o dono delas (o pedido) seja cancelado.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Produto, ReservaEstoque
+
+
+# Enviado com ``referencias`` (set) quando o prazo de reservas acaba
+reservas_expiradas = Signal()
+
+
+def validade_reserva():
+    """Prazo padrão das reservas (settings.RESERVA_ESTOQUE_MINUTOS, 30 min)"""
+    return timedelta(minutes=getattr(settings, 'RESERVA_ESTOQUE_MINUTOS', 30))
+
+
+class EstoqueInsuficiente(Exception):
+    """Um ou mais produtos não têm estoque para a quantidade pedida"""
+
+    def __init__(self, produtos):
+        self.produtos = produtos
+        nomes = ', '.join(nome for _, nome, _ in produtos)
+        super().__init__(f'Estoque insuficiente para {nomes}')
+
+
+def _quantidade_por_produto(quantidades):
+    return Case(
+        *[When(pk=produto_id, then=Value(quantidade)) for produto_id, quantidade in quantidades.items()],
+        output_field=IntegerField(),
+    )
+
+
+def baixar_estoque(quantidades):
+    """
+    Baixa ``{produto_id: quantidade}`` de uma vez.
+
+    Levanta ``EstoqueInsuficiente`` (com ``(id, nome, estoque)`` dos produtos
+    que faltaram) se algum produto não tiver a quantidade pedida.
+    """
+    quantidades = {pid: qtd for pid, qtd in quantidades.items() if qtd > 0}
+    if not quantidades:
+        return 0
+
+    pedida = _quantidade_por_produto(quantidades)
+    atualizados = Produto.objects.filter(
+        pk__in=quantidades, estoque__gte=pedida
+    ).update(estoque=F('estoque') - pedida)
+
+    if atualizados != len(quantidades):
+        # Caminho de erro: descobre quais faltaram para a mensagem
+        faltando = Produto.objects.filter(
+            pk__in=quantidades, estoque__lt=pedida
+        ).values_list('pk', 'nome', 'estoque')
+        raise EstoqueInsuficiente(list(faltando))
+    # Sem invalidar as listagens em cache: uma venda trocaria a versão de
+    # todas as páginas. Elas mostram o estoque com até CACHE_LISTAGENS_TEMPO
+    # segundos de atraso; carrinho e checkout conferem no banco
+    return atualizados
+
+
+def repor_estoque(quantidades):
+    """Devolve ``{produto_id: quantidade}`` ao estoque num único UPDATE"""
+    quantidades = {pid: qtd for pid, qtd in quantidades.items() if pid and qtd > 0}
+    if not quantidades:
+        return 0
+    # Como em baixar_estoque, as listagens em cache só expiram pelo tempo
+    return Produto.objects.filter(pk__in=quantidades).update(
+        estoque=F('estoque') + _quantidade_por_produto(quantidades)
+    )
+
+
+# ========== RESERVAS ==========
+
+@transaction.atomic
+def reservar(quantidades, referencia, validade=None):
+    """
+    Baixa ``{produto_id: quantidade}`` e registra a reserva de ``referencia``.
+    
+    Levanta ``EstoqueInsuficiente`` sem reservar nada se faltar algum produto.
+    """
+    quantidades = {pid: qtd for pid, qtd in quantidades.items() if qtd > 0}
+    baixar_estoque(quantidades)
+    
+    expira_em = timezone.now() + (validade or validade_reserva())
+    return ReservaEstoque.objects.bulk_create([
+        ReservaEstoque(produto_id=produto_id, referencia=referencia, quantidade=quantidade, expira_em=expira_em)
+        for produto_id, quantidade in quantidades.items()
+    ])
+
+
+@transaction.atomic
+def confirmar_reservas(referencias):
+    """
+    Pagamento aprovado: a baixa fica e as reservas deixam de existir.
+
+    Retorna as referências confirmadas. As que não têm mais reserva (o prazo
+    acabou e as unidades já voltaram ao estoque) ficam de fora e não podem
+    ser dadas como pagas sem uma nova reserva.
+    """
+    # Trava as reservas contra a liberação concorrente por prazo
+    confirmadas = set(
+        ReservaEstoque.objects.filter(referencia__in=referencias)
+        .select_for_update()
+        .values_list('referencia', flat=True)
+    )
+    ReservaEstoque.objects.filter(referencia__in=confirmadas).delete()
+    return confirmadas
+
+
+@transaction.atomic
+def _liberar(reservas, expiradas=False):
+    """Devolve ao estoque as reservas do queryset e as apaga"""
+    # Trava as reservas para que uma confirmação concorrente não seja
+    # devolvida ao estoque (no SQLite a transação que lê bloqueia a escrita
+    # concorrente até o fim)
+    linhas = list(reservas.select_for_update().values_list('pk', 'referencia', 'produto_id', 'quantidade'))
+    if not linhas:
+        return 0
+    
+    quantidades = {}
+    for _, _, produto_id, quantidade in linhas:
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+    
+    ReservaEstoque.objects.filter(pk__in=[pk for pk, _, _, _ in linhas]).delete()
+    repor_estoque(quantidades)
+    if expiradas:
+        # Na mesma transação: o pedido não fica aguardando um pagamento
+        # que não tem mais estoque reservado
+        reservas_expiradas.send(
+            sender=ReservaEstoque, referencias={referencia for _, referencia, _, _ in linhas}
+        )
+    return len(linhas)
+
+
+def liberar_reservas(referencias):
+    """Pedidos cancelados antes do pagamento: devolve as unidades reservadas"""
+    return _liberar(ReservaEstoque.objects.filter(referencia__in=referencias))
+
+
+def liberar_reservas_expiradas(agora=None, lote=5000):
+    """
+    Devolve ao estoque todas as reservas vencidas, ``lote`` de cada vez.
+    
+    Retorna o número de reservas liberadas.
+    """
+    agora = agora or timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            ReservaEstoque.objects
+            .filter(expira_em__lte=agora)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:lote]
+        )
+        if not ids:
+            return total
+        total += _liberar(ReservaEstoque.objects.filter(pk__in=ids, expira_em__lte=agora), expiradas=True)
+
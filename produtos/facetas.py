@@ -0,0 +1,93 @@
+# ==========================================
+# produtos/facetas.py
+# ==========================================
+"""
+Contagens facetadas da listagem de produtos.
+
+Todas as facetas saem de uma única consulta agrupada por categoria. Cada
+faceta é contada com todos os filtros ativos, exceto o da própria dimensão
+(a contagem de uma categoria ignora a categoria escolhida, a de uma faixa de
+preço ignora o filtro de preço, ...). O total filtrado é somado em Python a
+partir das mesmas linhas e repassado ao paginador.
+"""
+
+import operator
+from decimal import Decimal
+from functools import reduce
+
+from django.db.models import Count, Q
+
+
+# (chave, rótulo, mínimo, máximo) - os dois inclusivos, como preco_min e
+# preco_max da listagem (os dois usam filtro_faixa). O máximo fica um
+# centavo abaixo do mínimo da faixa seguinte: um preço de R$ 100,00 conta
+# numa faixa só, e o link da faixa lista exatamente o que ela conta
+FAIXAS_PRECO = [
+    ('ate_50', 'Até R$ 50', None, Decimal('49.99')),
+    ('50_100', 'R$ 50 a R$ 100', Decimal('50'), Decimal('99.99')),
+    ('100_200', 'R$ 100 a R$ 200', Decimal('100'), Decimal('199.99')),
+    ('acima_200', 'Acima de R$ 200', Decimal('200'), None),
+]
+
+EM_PROMOCAO = Q(preco_desconto__isnull=False)
+
+
+def filtro_faixa(minimo, maximo):
+    condicao = Q()
+    if minimo is not None:
+        condicao &= Q(preco_original__gte=minimo)
+    if maximo is not None:
+        condicao &= Q(preco_original__lte=maximo)
+    return condicao
+
+
+def _e(*condicoes):
+    """AND das condições informadas (None se não houver nenhuma)"""
+    condicoes = [c for c in condicoes if c]
+    if not condicoes:
+        return None
+    return reduce(operator.and_, condicoes)
+
+
+def calcular_facetas(queryset, categoria_id=None, filtro_preco=None, filtro_promocao=None):
+    """
+    Calcula total, contagem por categoria, produtos em promoção e
+    histograma de preços em uma consulta.
+
+    ``queryset`` deve ter apenas os filtros comuns a todas as facetas
+    (ativo, busca); os das dimensões facetadas vêm separados.
+    """
+    agregados = {
+        'n_total': Count('pk', filter=_e(filtro_preco, filtro_promocao)),
+        'n_promocao': Count('pk', filter=_e(filtro_preco, EM_PROMOCAO)),
+    }
+    for chave, _, minimo, maximo in FAIXAS_PRECO:
+        agregados[f'n_faixa_{chave}'] = Count(
+            'pk', filter=_e(filtro_promocao, filtro_faixa(minimo, maximo))
+        )
+
+    linhas = list(
+        queryset.order_by().values('categoria_id').annotate(**agregados)
+    )
+
+    if categoria_id:
+        selecionadas = [l for l in linhas if str(l['categoria_id']) == str(categoria_id)]
+    else:
+        selecionadas = linhas
+
+    return {
+        'total': sum(l['n_total'] for l in selecionadas),
+        'por_categoria': {l['categoria_id']: l['n_total'] for l in linhas},
+        'promocao': sum(l['n_promocao'] for l in selecionadas),
+        'faixas': [
+            {
+                'chave': chave,
+                'rotulo': rotulo,
+                'minimo': minimo,
+                'maximo': maximo,
+                'total': sum(l[f'n_faixa_{chave}'] for l in selecionadas),
+            }
+            for chave, rotulo, minimo, maximo in FAIXAS_PRECO
+        ],
+    }
+
@@ -3,7 +3,7 @@
 # ==========================================
 
 from django import forms
-from .models import CategoriaProduto
+from .models import AvaliacaoProduto, CategoriaProduto
 
 
 class ProdutoFiltroForm(forms.Form):
@@ -87,48 +87,30 @@ class AdicionarCarrinhoForm(forms.Form):
             )
 
 
-class AvaliacaoProdutoForm(forms.Form):
-    """Formulário para avaliar produtos"""
-    
-    nota = forms.IntegerField(
-        min_value=1,
-        max_value=5,
-        widget=forms.RadioSelect(
-            choices=[(i, f'{i}') for i in range(1, 6)],
-            attrs={'class': 'rating-stars'}
-        )
-    )
-    
-    titulo = forms.CharField(
-        max_length=100,
-        widget=forms.TextInput(attrs={
-            'placeholder': 'Título da avaliação',
-            'class': 'form-control'
-        })
-    )
-    
-    comentario = forms.CharField(
-        max_length=1000,
-        widget=forms.Textarea(attrs={
-            'placeholder': 'Conte sua experiência com o produto...',
-            'class': 'form-control',
-            'rows': 4
-        })
-    )
-    
-    nome = forms.CharField(
-        max_length=100,
-        widget=forms.TextInput(attrs={
-            'placeholder': 'Seu nome',
-            'class': 'form-control'
-        })
-    )
-    
-    recomenda = forms.BooleanField(
-        required=False,
-        initial=True,
-        label='Eu recomendo este produto'
-    )
+class AvaliacaoProdutoForm(forms.ModelForm):
+    """Formulário para avaliar produtos (o cliente é o usuário logado)"""
+    
+    class Meta:
+        model = AvaliacaoProduto
+        fields = ['nota', 'titulo', 'comentario', 'recomenda']
+        widgets = {
+            'nota': forms.RadioSelect(
+                choices=[(i, f'{i}') for i in range(1, 6)],
+                attrs={'class': 'rating-stars'}
+            ),
+            'titulo': forms.TextInput(attrs={
+                'placeholder': 'Título da avaliação',
+                'class': 'form-control'
+            }),
+            'comentario': forms.Textarea(attrs={
+                'placeholder': 'Conte sua experiência com o produto...',
+                'class': 'form-control',
+                'rows': 4
+            }),
+        }
+        labels = {
+            'recomenda': 'Eu recomendo este produto',
+        }
 
 
 class NotificarDisponibilidadeForm(forms.Form):
@@ -147,3 +129,22 @@ class NotificarDisponibilidadeForm(forms.Form):
         email = self.cleaned_data.get('email')
         # Validação adicional se necessário
         return email.lower()
+
+
+class ImportarCatalogoForm(forms.Form):
+    """Upload da planilha do catálogo no admin"""
+
+    arquivo = forms.FileField(
+        label='Planilha',
+        help_text='CSV ou XLSX com cabeçalho: nome, categoria (slug), preco_original e colunas opcionais'
+    )
+    somente_validar = forms.BooleanField(
+        label='Só validar (não grava nada)',
+        required=False
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.xlsx', '.xlsm')):
+            raise forms.ValidationError('Envie um arquivo .csv ou .xlsx')
+        return arquivo
@@ -0,0 +1,309 @@
+# ==========================================
+# produtos/importacao.py
+# ==========================================
+"""
+Importação do catálogo a partir de planilhas CSV ou XLSX.
+
+A planilha é lida linha a linha (``csv`` ou openpyxl em modo read-only), sem
+carregar o arquivo na memória, e os produtos são gravados em lotes com um
+upsert pelo slug:
+
+    INSERT ... ON CONFLICT (slug) DO UPDATE SET <colunas da planilha>
+
+Colunas reconhecidas (cabeçalho na primeira linha; maiúsculas, acentos e
+espaços são ignorados): ``COLUNAS``. São obrigatórias ``nome``,
+``categoria`` (slug de uma ``CategoriaProduto`` existente) e
+``preco_original``. Sem ``slug``, ele é gerado a partir do nome e a linha
+só cria produto: se o slug gerado já existir (no banco ou numa linha
+anterior da planilha), a linha vai para o relatório de erros em vez de
+sobrescrever outro produto - atualizar exige a coluna ``slug``. Células
+vazias recebem o valor padrão do campo; colunas ausentes não são alteradas
+nos produtos que já existem.
+
+Linhas inválidas não interrompem a importação: vão para o relatório de erros
+com o número da linha e as mensagens. Cada lote é gravado numa transação
+própria; em seguida são atualizados o índice de busca dos produtos do lote e
+o contador de produtos ativos das categorias envolvidas.
+"""
+
+import csv
+import io
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+
+from core.caches import camadas
+
+from . import busca, categorias
+from .models import CategoriaProduto, Produto
+
+
+LOTE = 1000
+MAX_ERROS_GUARDADOS = 1000
+
+COLUNAS = (
+    'slug', 'nome', 'categoria', 'descricao', 'marca', 'preco_original', 'preco_desconto',
+    'estoque', 'estoque_minimo', 'peso_tamanho', 'destaque', 'novidade', 'ativo',
+)
+OBRIGATORIAS = ('nome', 'categoria', 'preco_original')
+DECIMAIS = ('preco_original', 'preco_desconto')
+BOOLEANOS = ('destaque', 'novidade', 'ativo')
+
+_VERDADEIRO = {'1', 'sim', 's', 'true', 'verdadeiro', 'x', 'yes'}
+_FALSO = {'0', 'nao', 'n', 'false', 'falso', 'no'}
+
+
+class PlanilhaInvalida(Exception):
+    """Arquivo em formato desconhecido ou sem as colunas obrigatórias"""
+
+
+# ========== LEITURA ==========
+
+def _nome_coluna(valor):
+    return busca.normalizar(str(valor or '')).strip().replace(' ', '_').replace('-', '_')
+
+
+def _ler_csv(arquivo, encoding):
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, newline='')
+    amostra = texto.read(8192)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(texto, dialeto)
+    yield from leitor
+    texto.detach()
+
+
+def _ler_xlsx(arquivo):
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def ler_planilha(arquivo, nome, encoding='utf-8-sig'):
+    """
+    Linhas da planilha como ``(numero_da_linha, {coluna: valor})``.
+
+    ``arquivo`` é um arquivo binário aberto; o formato vem da extensão de
+    ``nome``. Levanta ``PlanilhaInvalida`` se faltar coluna obrigatória.
+    """
+    extensao = os.path.splitext(nome)[1].lower()
+    if extensao == '.csv':
+        linhas = _ler_csv(arquivo, encoding)
+    elif extensao in ('.xlsx', '.xlsm'):
+        linhas = _ler_xlsx(arquivo)
+    else:
+        raise PlanilhaInvalida(f'Formato não suportado: {extensao or nome} (use .csv ou .xlsx)')
+
+    cabecalho = [_nome_coluna(valor) for valor in next(linhas, None) or []]
+    faltando = [coluna for coluna in OBRIGATORIAS if coluna not in cabecalho]
+    if faltando:
+        raise PlanilhaInvalida(f'Colunas obrigatórias ausentes: {", ".join(faltando)}')
+    posicoes = [(i, coluna) for i, coluna in enumerate(cabecalho) if coluna in COLUNAS]
+
+    def registros():
+        for numero, linha in enumerate(linhas, start=2):
+            if not linha or all(valor in (None, '') for valor in linha):
+                continue
+            yield numero, {coluna: linha[i] if i < len(linha) else None for i, coluna in posicoes}
+
+    return [coluna for _, coluna in posicoes], registros()
+
+
+# ========== VALIDAÇÃO ==========
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _decimal(valor):
+    if isinstance(valor, (int, float)):
+        return Decimal(str(valor))
+    texto = valor.replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValidationError(f'"{valor}" não é um número válido')
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    texto = busca.normalizar(_texto(valor))
+    if texto in _VERDADEIRO:
+        return True
+    if texto in _FALSO:
+        return False
+    raise ValidationError(f'"{valor}" não é sim/não')
+
+
+class ImportadorCatalogo:
+    """
+    Valida e grava os registros de ``ler_planilha``.
+
+    ``progresso(linhas_lidas, gravadas, erros)`` é chamado a cada lote;
+    ``relatorio(numero_da_linha, mensagens)`` recebe cada linha rejeitada.
+    Com ``somente_validar``, nada é gravado.
+    """
+
+    def __init__(self, colunas, lote=LOTE, somente_validar=False, progresso=None, relatorio=None):
+        self.colunas = colunas
+        self.lote = lote
+        self.somente_validar = somente_validar
+        self.progresso = progresso
+        self.relatorio = relatorio
+
+        self.categorias = dict(CategoriaProduto.objects.values_list('slug', 'pk'))
+        self.campos = {coluna: Produto._meta.get_field(coluna) for coluna in COLUNAS if coluna != 'categoria'}
+        self.atualizar = [
+            'categoria' if coluna == 'categoria' else coluna
+            for coluna in colunas if coluna != 'slug'
+        ] + ['updated_at']
+
+        self.linhas = 0
+        self.gravadas = 0
+        self.total_erros = 0
+        self.erros = []
+
+    def validar(self, registro):
+        """``(valores, erros)`` de um registro da planilha"""
+        valores, erros = {}, []
+        for coluna, bruto in registro.items():
+            if bruto is None or _texto(bruto) == '':
+                if coluna in OBRIGATORIAS:
+                    erros.append(f'{coluna}: obrigatório')
+                continue
+            try:
+                if coluna == 'categoria':
+                    slug = _texto(bruto).lower()
+                    if slug not in self.categorias:
+                        raise ValidationError(f'categoria "{slug}" não existe')
+                    valores['categoria_id'] = self.categorias[slug]
+                    continue
+                if coluna in DECIMAIS:
+                    valor = _decimal(bruto)
+                elif coluna in BOOLEANOS:
+                    valor = _booleano(bruto)
+                else:
+                    valor = bruto if isinstance(bruto, int) else _texto(bruto)
+                valores[coluna] = self.campos[coluna].clean(valor, None)
+            except ValidationError as erro:
+                erros.append(f'{coluna}: {" ".join(erro.messages)}')
+
+        if 'nome' in valores and not valores.get('slug'):
+            valores['slug'] = slugify(valores['nome'])[:self.campos['slug'].max_length]
+            if not valores['slug']:
+                erros.append('slug: não foi possível gerar a partir do nome')
+        desconto = valores.get('preco_desconto')
+        if desconto is not None and 'preco_original' in valores and desconto >= valores['preco_original']:
+            erros.append('preco_desconto: deve ser menor que o preço original')
+        return valores, erros
+
+    def _rejeitar(self, numero, erros):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_GUARDADOS:
+            self.erros.append((numero, erros))
+        if self.relatorio:
+            self.relatorio(numero, erros)
+
+    def _descartar_gerados_existentes(self, pendentes, gerados):
+        """Slugs gerados do nome não atualizam: o produto existente seria outro"""
+        if not gerados:
+            return
+        for slug in Produto.objects.filter(slug__in=list(gerados)).values_list('slug', flat=True):
+            self._rejeitar(gerados[slug], [
+                f'slug: já existe um produto "{slug}"; para atualizá-lo, informe a coluna slug'
+            ])
+            del pendentes[slug]
+        gerados.clear()
+
+    def _gravar(self, pendentes, gerados):
+        self._descartar_gerados_existentes(pendentes, gerados)
+        if not pendentes:
+            return
+        if not self.somente_validar:
+            slugs = list(pendentes)
+            with transaction.atomic():
+                existentes = dict(Produto.objects.filter(slug__in=slugs).values_list('slug', 'categoria_id'))
+                Produto.objects.bulk_create(
+                    [Produto(**valores) for valores in pendentes.values()],
+                    update_conflicts=True,
+                    unique_fields=['slug'],
+                    update_fields=self.atualizar,
+                )
+                produtos = (
+                    Produto.objects
+                    .filter(slug__in=slugs)
+                    .select_related('categoria')
+                    .only('slug', 'nome', 'descricao', 'categoria__nome')
+                )
+                # Tirar do índice só os que já estavam lá: remover do FTS é o passo mais caro
+                indice = busca.obter_indice()
+                atualizados, novos = [], []
+                for produto in produtos:
+                    (atualizados if produto.slug in existentes else novos).append(produto)
+                indice.indexar(atualizados)
+                indice.indexar(novos, novos=True)
+                # bulk_create não dispara sinais: reconta as categorias tocadas
+                CategoriaProduto.atualizar_totais(
+                    {valores['categoria_id'] for valores in pendentes.values()} | set(existentes.values())
+                )
+            categorias.invalidar()
+            camadas.invalidar(Produto)
+        self.gravadas += len(pendentes)
+        pendentes.clear()
+
+    def importar(self, registros):
+        pendentes = {}  # slug -> valores (a última linha de um slug informado vence)
+        gerados = {}  # slug gerado do nome -> número da linha
+        for numero, registro in registros:
+            self.linhas += 1
+            valores, erros = self.validar(registro)
+            slug = valores.get('slug')
+            gerado = not _texto(registro.get('slug'))
+            if not erros and gerado and slug in pendentes:
+                erros = [f'slug: "{slug}" gerado a partir do nome repete outra linha; informe a coluna slug']
+            if erros:
+                self._rejeitar(numero, erros)
+            else:
+                pendentes[slug] = valores
+                if gerado:
+                    gerados[slug] = numero
+                else:
+                    gerados.pop(slug, None)
+
+            if len(pendentes) >= self.lote:
+                self._gravar(pendentes, gerados)
+                if self.progresso:
+                    self.progresso(self.linhas, self.gravadas, self.total_erros)
+
+        self._gravar(pendentes, gerados)
+        if self.progresso:
+            self.progresso(self.linhas, self.gravadas, self.total_erros)
+        return self
+
+
+def importar_catalogo(arquivo, nome, lote=LOTE, somente_validar=False, progresso=None, relatorio=None,
+                      encoding='utf-8-sig'):
+    """Lê e importa a planilha; devolve o ``ImportadorCatalogo`` com os totais"""
+    colunas, registros = ler_planilha(arquivo, nome, encoding)
+    importador = ImportadorCatalogo(
+        colunas, lote=lote, somente_validar=somente_validar, progresso=progresso, relatorio=relatorio
+    )
+    return importador.importar(registros)
@@ -0,0 +1,31 @@
+# produtos/management/commands/calcular_recomendacoes.py
+
+from django.core.management.base import BaseCommand
+from produtos import recomendacoes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os produtos relacionados a partir do histórico de pedidos (rodar via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vizinhos',
+            type=int,
+            default=recomendacoes.VIZINHOS,
+            help=f'Relacionados guardados por produto (padrão: {recomendacoes.VIZINHOS})'
+        )
+        parser.add_argument(
+            '--minimo',
+            type=int,
+            default=recomendacoes.MINIMO_JUNTOS,
+            help=f'Pedidos em comum para dois produtos contarem como comprados juntos (padrão: {recomendacoes.MINIMO_JUNTOS})'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Calculando produtos relacionados...')
+        estatisticas = recomendacoes.calcular(vizinhos=options['vizinhos'], minimo=options['minimo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {estatisticas['produtos']} produtos, {estatisticas['pedidos']} pedidos: "
+            f"{estatisticas['por_compra']} relacionados por compra, "
+            f"{estatisticas['por_categoria']} por categoria ({estatisticas['segundos']}s)"
+        ))
@@ -0,0 +1,76 @@
+# produtos/management/commands/importar_catalogo.py
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from produtos import importacao
+
+
+class Command(BaseCommand):
+    help = 'Importa (cria ou atualiza pelo slug) produtos de uma planilha CSV ou XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Planilha .csv ou .xlsx com cabeçalho na primeira linha')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=importacao.LOTE,
+            help=f'Produtos gravados por transação (padrão: {importacao.LOTE})'
+        )
+        parser.add_argument(
+            '--relatorio',
+            help='Grava as linhas rejeitadas neste CSV (linha, erros)'
+        )
+        parser.add_argument(
+            '--validar',
+            action='store_true',
+            help='Só valida a planilha, sem gravar nada'
+        )
+        parser.add_argument(
+            '--encoding',
+            default='utf-8-sig',
+            help='Codificação do CSV (padrão: utf-8-sig; planilhas antigas do Excel usam cp1252)'
+        )
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        relatorio = open(options['relatorio'], 'w', newline='', encoding='utf-8') if options['relatorio'] else None
+        escritor = csv.writer(relatorio) if relatorio else None
+        if escritor:
+            escritor.writerow(['linha', 'erros'])
+
+        def progresso(linhas, gravadas, erros):
+            self.stdout.write(f'  {linhas} linhas lidas, {gravadas} gravadas, {erros} com erro')
+
+        acao = 'Validando' if options['validar'] else 'Importando'
+        self.stdout.write(f'📥 {acao} {caminho}...')
+        inicio = time.perf_counter()
+        try:
+            with open(caminho, 'rb') as arquivo:
+                resultado = importacao.importar_catalogo(
+                    arquivo, caminho,
+                    lote=options['lote'],
+                    somente_validar=options['validar'],
+                    progresso=progresso,
+                    relatorio=(lambda numero, erros: escritor.writerow([numero, '; '.join(erros)]))
+                    if escritor else None,
+                    encoding=options['encoding'],
+                )
+        except (OSError, UnicodeDecodeError, importacao.PlanilhaInvalida) as erro:
+            raise CommandError(str(erro))
+        finally:
+            if relatorio:
+                relatorio.close()
+        duracao = time.perf_counter() - inicio
+
+        for numero, erros in resultado.erros[:20]:
+            self.stdout.write(self.style.WARNING(f'  linha {numero}: {"; ".join(erros)}'))
+        if resultado.total_erros > 20:
+            self.stdout.write(self.style.WARNING(f'  ... e mais {resultado.total_erros - 20} linhas com erro'))
+
+        verbo = 'válidos' if options['validar'] else 'importados'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado.gravadas} produtos {verbo}, {resultado.total_erros} linhas rejeitadas '
+            f'em {duracao:.2f}s ({resultado.linhas / max(duracao, 1e-9):,.0f} linhas/s)'
+        ))
@@ -0,0 +1,20 @@
+# produtos/management/commands/liberar_reservas_expiradas.py
+
+from django.core.management.base import BaseCommand
+from produtos import estoque
+
+
+class Command(BaseCommand):
+    help = 'Devolve ao estoque as reservas cujo pagamento não saiu no prazo (rodar via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Reservas liberadas por transação (padrão: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        liberadas = estoque.liberar_reservas_expiradas(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {liberadas} reservas expiradas liberadas'))
@@ -0,0 +1,33 @@
+# produtos/management/commands/reindexar_busca.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from produtos import busca
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual de produtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Quantidade de produtos indexados por lote (padrão: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        indice = busca.obter_indice()
+        self.stdout.write(f'🔎 Reindexando produtos ({type(indice).__name__})...')
+
+        inicio = time.perf_counter()
+        total = busca.reindexar(
+            lote=options['lote'],
+            progresso=lambda n: self.stdout.write(f'  {n} produtos indexados')
+        )
+        duracao = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Índice reconstruído: {total} produtos em {duracao:.2f}s'
+        ))
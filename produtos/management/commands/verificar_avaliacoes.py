@@ -0,0 +1,54 @@
+# produtos/management/commands/verificar_avaliacoes.py
+
+from django.core.management.base import BaseCommand
+from produtos.models import Produto
+
+
+class Command(BaseCommand):
+    help = 'Compara os agregados de avaliação dos produtos com as avaliações aprovadas e corrige divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Recalcula os produtos divergentes (sem isso, apenas relata)'
+        )
+
+    def handle(self, *args, **options):
+        numero, soma = Produto.expressoes_avaliacoes_aprovadas()
+        media, peso = Produto.prior_avaliacao()
+        linhas = (
+            Produto.objects
+            .annotate(numero_calculado=numero, soma_calculada=soma)
+            .values_list('pk', 'nome', 'numero_avaliacoes', 'soma_notas', 'pontuacao_avaliacao',
+                         'numero_calculado', 'soma_calculada')
+            .order_by('pk')
+            .iterator(chunk_size=2000)
+        )
+
+        divergentes = []
+        verificados = 0
+        for pk, nome, guardado_numero, guardada_soma, pontuacao, calculado_numero, calculada_soma in linhas:
+            verificados += 1
+            # A pontuação também diverge quando o prior muda nas settings
+            esperada = (calculada_soma + media * peso) / (calculado_numero + peso)
+            if (guardado_numero, guardada_soma) != (calculado_numero, calculada_soma) or abs(pontuacao - esperada) > 1e-9:
+                divergentes.append(pk)
+                self.stdout.write(self.style.WARNING(
+                    f'  {nome} (#{pk}): {guardado_numero} notas / soma {guardada_soma} → '
+                    f'{calculado_numero} notas / soma {calculada_soma}'
+                ))
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS(f'✅ {verificados} produtos verificados, nenhuma divergência'))
+            return
+
+        if not options['corrigir']:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {len(divergentes)} de {verificados} produtos divergentes (use --corrigir)'
+            ))
+            return
+
+        for inicio in range(0, len(divergentes), 2000):
+            Produto.atualizar_avaliacoes(divergentes[inicio:inicio + 2000])
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(divergentes)} produtos corrigidos'))
@@ -0,0 +1,46 @@
+# produtos/management/commands/verificar_categorias.py
+
+from django.core.management.base import BaseCommand
+from produtos import categorias as cache_categorias
+from produtos.models import CategoriaProduto
+
+
+class Command(BaseCommand):
+    help = 'Compara o contador de produtos ativos das categorias com os produtos e corrige divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Reconta as categorias divergentes (sem isso, apenas relata)'
+        )
+
+    def handle(self, *args, **options):
+        linhas = (
+            CategoriaProduto.objects
+            .annotate(calculado=CategoriaProduto.expressao_total_ativos())
+            .values_list('pk', 'nome', 'total_produtos_ativos', 'calculado')
+            .order_by('pk')
+        )
+
+        divergentes = []
+        verificadas = 0
+        for pk, nome, guardado, calculado in linhas:
+            verificadas += 1
+            if guardado != calculado:
+                divergentes.append(pk)
+                self.stdout.write(self.style.WARNING(f'  {nome} (#{pk}): {guardado} → {calculado}'))
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS(f'✅ {verificadas} categorias verificadas, nenhuma divergência'))
+            return
+
+        if not options['corrigir']:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {len(divergentes)} de {verificadas} categorias divergentes (use --corrigir)'
+            ))
+            return
+
+        CategoriaProduto.atualizar_totais(divergentes)
+        cache_categorias.invalidar()
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(divergentes)} categorias corrigidas'))
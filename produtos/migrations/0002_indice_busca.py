@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def criar_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS produtos_busca USING fts5("
+            "nome, categoria, descricao, tokenize='unicode61', prefix='2 3')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS produtos_busca ("
+            "produto_id bigint PRIMARY KEY, documento tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS produtos_busca_documento_gin "
+            "ON produtos_busca USING gin (documento)"
+        )
+    # Outros bancos usam o índice em memória (produtos/busca.py). Os produtos
+    # que já existem são indexados no post_migrate (produtos/signals.py): o
+    # conteúdo do índice depende do stemmer atual, não do desta migração
+
+
+def remover_indice(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS produtos_busca')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
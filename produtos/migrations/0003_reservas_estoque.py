@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0002_indice_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('referencia', models.CharField(db_index=True, help_text='Número do pedido (ou outra chave) que segura a reserva', max_length=40, verbose_name='Referência')),
+                ('quantidade', models.PositiveIntegerField(verbose_name='Quantidade')),
+                ('expira_em', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='produtos.produto', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Estoque',
+                'verbose_name_plural': 'Reservas de Estoque',
+                'ordering': ['expira_em'],
+            },
+        ),
+    ]
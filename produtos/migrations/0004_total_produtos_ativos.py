@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:37
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def preencher_totais(apps, schema_editor):
+    CategoriaProduto = apps.get_model('produtos', 'CategoriaProduto')
+    Produto = apps.get_model('produtos', 'Produto')
+    
+    totais = (
+        Produto.objects
+        .filter(ativo=True)
+        .order_by()
+        .values_list('categoria_id')
+        .annotate(total=Count('pk'))
+    )
+    for categoria_id, total in totais:
+        CategoriaProduto.objects.filter(pk=categoria_id).update(total_produtos_ativos=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0003_reservas_estoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoriaproduto',
+            name='total_produtos_ativos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Produtos Ativos'),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0004_total_produtos_ativos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProdutoRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('pontuacao', models.FloatField(verbose_name='Pontuação')),
+                ('origem', models.CharField(choices=[('compra', 'Comprados juntos'), ('categoria', 'Mesma categoria e faixa de preço')], max_length=10, verbose_name='Origem')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='produtos.produto', verbose_name='Produto')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionado_a', to='produtos.produto', verbose_name='Relacionado')),
+            ],
+            options={
+                'verbose_name': 'Produto Relacionado',
+                'verbose_name_plural': 'Produtos Relacionados',
+                'ordering': ['produto', 'posicao'],
+                'constraints': [models.UniqueConstraint(fields=('produto', 'posicao'), name='produto_relacionado_posicao')],
+            },
+        ),
+    ]
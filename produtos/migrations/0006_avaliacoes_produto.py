@@ -0,0 +1,87 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:44
+
+import django.core.validators
+import django.db.models.deletion
+import produtos.models
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def zerar_avaliacoes(apps, schema_editor):
+    # Os valores antigos eram digitados à mão, sem avaliações que os
+    # sustentem: os agregados passam a vir só de AvaliacaoProduto (vazia)
+    Produto = apps.get_model('produtos', 'Produto')
+    Produto.objects.update(avaliacao=Decimal('0.0'), numero_avaliacoes=0, soma_notas=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0005_produtos_relacionados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvaliacaoProduto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)], verbose_name='Nota (1-5)')),
+                ('titulo', models.CharField(blank=True, max_length=100, verbose_name='Título')),
+                ('comentario', models.TextField(max_length=1000, verbose_name='Comentário')),
+                ('recomenda', models.BooleanField(default=True, verbose_name='Recomenda o Produto')),
+                ('aprovado', models.BooleanField(default=True, verbose_name='Aprovado')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Avaliação de Produto',
+                'verbose_name_plural': 'Avaliações de Produtos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='pontuacao_avaliacao',
+            field=models.FloatField(default=produtos.models.pontuacao_inicial, editable=False, verbose_name='Pontuação da Avaliação'),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='soma_notas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Soma das Notas'),
+        ),
+        migrations.AlterField(
+            model_name='produto',
+            name='avaliacao',
+            field=models.DecimalField(decimal_places=1, default=Decimal('0.0'), editable=False, max_digits=2, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)], verbose_name='Avaliação (0-5)'),
+        ),
+        migrations.AlterField(
+            model_name='produto',
+            name='numero_avaliacoes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Número de Avaliações'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['pontuacao_avaliacao'], name='produto_pontuacao'),
+        ),
+        migrations.AddField(
+            model_name='avaliacaoproduto',
+            name='produto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avaliacoes', to='produtos.produto', verbose_name='Produto'),
+        ),
+        migrations.AddField(
+            model_name='avaliacaoproduto',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avaliacoes_produtos', to=settings.AUTH_USER_MODEL, verbose_name='Usuário'),
+        ),
+        migrations.AddIndex(
+            model_name='avaliacaoproduto',
+            index=models.Index(fields=['produto', 'aprovado', '-created_at'], name='avaliacao_produto_recentes'),
+        ),
+        migrations.AddConstraint(
+            model_name='avaliacaoproduto',
+            constraint=models.UniqueConstraint(fields=('produto', 'usuario'), name='avaliacao_unica_por_usuario'),
+        ),
+        migrations.RunPython(zerar_avaliacoes, migrations.RunPython.noop),
+    ]
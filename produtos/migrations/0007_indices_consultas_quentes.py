@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtos', '0006_avaliacoes_produto'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='produto',
+            name='produto_pontuacao',
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['destaque', 'created_at'], name='produto_ativo_vitrine'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['preco_original'], name='produto_ativo_preco'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['nome'], name='produto_ativo_nome'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['pontuacao_avaliacao'], name='produto_ativo_pontuacao'),
+        ),
+    ]
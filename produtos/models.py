@@ -1,10 +1,15 @@
 
 
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
+from core.caches import camadas
+
 
 class CategoriaProduto(models.Model):
     """Categorias de produtos"""
@@ -57,6 +62,13 @@ class CategoriaProduto(models.Model):
         verbose_name="Ativo"
     )
     
+    # Desnormalizado: mantido pelos sinais de Produto (produtos/signals.py)
+    total_produtos_ativos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Produtos Ativos"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -72,6 +84,38 @@ class CategoriaProduto(models.Model):
         if not self.slug:
             self.slug = slugify(self.nome)
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def expressao_total_ativos(cls):
+        """Contagem dos produtos ativos da categoria, como subconsulta SQL"""
+        produtos = (
+            Produto.objects
+            .filter(categoria=OuterRef('pk'), ativo=True)
+            .order_by()
+            .values('categoria')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(produtos), Value(0))
+    
+    @classmethod
+    def atualizar_totais(cls, categoria_ids=None):
+        """
+        Reconta os produtos ativos das categorias (todas, se ``None``) num
+        único UPDATE. Para gravações em lote, que não disparam sinais.
+        """
+        categorias = cls.objects.all() if categoria_ids is None else cls.objects.filter(pk__in=categoria_ids)
+        return categorias.update(total_produtos_ativos=cls.expressao_total_ativos())
+    
+    @classmethod
+    def somar_ativos(cls, categoria_id, delta):
+        """Incremento atômico do contador (sem ler a categoria)"""
+        cls.objects.filter(pk=categoria_id).update(total_produtos_ativos=F('total_produtos_ativos') + delta)
+
+
+def pontuacao_inicial():
+    """Pontuação de um produto sem avaliações: a média do prior"""
+    return Produto.prior_avaliacao()[0]
 
 
 class Produto(models.Model):
@@ -135,20 +179,37 @@ class Produto(models.Model):
         verbose_name="Estoque Mínimo"
     )
     
-    # Avaliação
+    # Avaliação: agregados de AvaliacaoProduto, mantidos pelos sinais
+    # (produtos/signals.py) com UPDATEs atômicos
     avaliacao = models.DecimalField(
         max_digits=2,
         decimal_places=1,
-        default=Decimal('5.0'),
+        default=Decimal('0.0'),
+        editable=False,
         validators=[MinValueValidator(0), MaxValueValidator(5)],
         verbose_name="Avaliação (0-5)"
     )
     
     numero_avaliacoes = models.PositiveIntegerField(
         default=0,
+        editable=False,
         verbose_name="Número de Avaliações"
     )
     
+    soma_notas = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Soma das Notas"
+    )
+    
+    # Média bayesiana (ver prior_avaliacao): ordena "melhor avaliação" sem
+    # que um produto com uma única nota 5 passe na frente dos demais
+    pontuacao_avaliacao = models.FloatField(
+        default=pontuacao_inicial,
+        editable=False,
+        verbose_name="Pontuação da Avaliação"
+    )
+    
     # Características
     peso_tamanho = models.CharField(
         max_length=50,
@@ -188,16 +249,108 @@ class Produto(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['categoria', 'ativo']),
+            # Uma por ordenação da listagem, só sobre os ativos: o filtro sai
+            # como "WHERE ativo", que só usa o índice se for a condição dele.
+            # Percorridos de trás para frente nas ordenações decrescentes
+            # (o desempate da paginação por pk vem de graça)
+            models.Index(fields=['destaque', 'created_at'], condition=Q(ativo=True), name='produto_ativo_vitrine'),
+            models.Index(fields=['preco_original'], condition=Q(ativo=True), name='produto_ativo_preco'),
+            models.Index(fields=['nome'], condition=Q(ativo=True), name='produto_ativo_nome'),
+            models.Index(fields=['pontuacao_avaliacao'], condition=Q(ativo=True), name='produto_ativo_pontuacao'),
         ]
     
     def __str__(self):
         return self.nome
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._guardar_estado_contagem()
+        return instancia
+    
+    def _guardar_estado_contagem(self):
+        """
+        Categoria e ativo como estão no banco, para o sinal de post_save
+        saber o que mudou no contador das categorias (None = desconhecido,
+        se algum dos dois campos não foi carregado).
+        """
+        if 'categoria_id' in self.__dict__ and 'ativo' in self.__dict__:
+            self._estado_contagem = (self.categoria_id, self.ativo)
+        else:
+            self._estado_contagem = None
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.nome)
         super().save(*args, **kwargs)
     
+    # ========== AVALIAÇÕES ==========
+    
+    @staticmethod
+    def prior_avaliacao():
+        """
+        (média, peso) da média bayesiana: todo produto começa como se tivesse
+        ``peso`` notas iguais a ``média``. Mudou nas settings? Rode
+        ``verificar_avaliacoes --corrigir`` para recalcular as pontuações.
+        """
+        return (
+            float(getattr(settings, 'AVALIACAO_MEDIA_PRIOR', 3.5)),
+            float(getattr(settings, 'AVALIACAO_PESO_PRIOR', 10)),
+        )
+    
+    @classmethod
+    def expressoes_avaliacao(cls, numero, soma):
+        """Valores dos campos de avaliação, em SQL, a partir do número e da soma das notas"""
+        media, peso = cls.prior_avaliacao()
+        soma_real = Cast(soma, models.FloatField())
+        return {
+            'numero_avaliacoes': numero,
+            'soma_notas': soma,
+            'avaliacao': Coalesce(
+                Round(soma_real / NullIf(numero, 0), 1),
+                Value(0.0),
+                output_field=models.DecimalField(max_digits=2, decimal_places=1),
+            ),
+            'pontuacao_avaliacao': ExpressionWrapper(
+                (soma_real + Value(media * peso)) / (numero + Value(peso)),
+                output_field=models.FloatField(),
+            ),
+        }
+    
+    @classmethod
+    def somar_avaliacao(cls, produto_id, numero, soma):
+        """
+        Soma ``numero`` notas de total ``soma`` (negativos para retirar) num
+        único UPDATE, sem ler o produto: o SQL usa os valores da própria
+        linha, então avaliações simultâneas não se perdem.
+        """
+        cls.objects.filter(pk=produto_id).update(
+            **cls.expressoes_avaliacao(F('numero_avaliacoes') + numero, F('soma_notas') + soma)
+        )
+        # Sem invalidar as listagens em cache (cada avaliação trocaria a versão
+        # de todas as páginas): a nota aparece nelas em até CACHE_LISTAGENS_TEMPO
+    
+    @classmethod
+    def atualizar_avaliacoes(cls, produto_ids=None):
+        """
+        Recalcula os campos de avaliação a partir das avaliações aprovadas
+        dos produtos (todos, se ``None``). Para gravações em lote, que não
+        disparam sinais.
+        """
+        produtos = cls.objects.all() if produto_ids is None else cls.objects.filter(pk__in=produto_ids)
+        atualizados = produtos.update(**cls.expressoes_avaliacao(*cls.expressoes_avaliacoes_aprovadas()))
+        camadas.invalidar(cls)
+        return atualizados
+    
+    @classmethod
+    def expressoes_avaliacoes_aprovadas(cls):
+        """(número, soma) das notas aprovadas do produto, como subconsultas SQL"""
+        aprovadas = AvaliacaoProduto.objects.filter(produto=OuterRef('pk'), aprovado=True).order_by().values('produto')
+        return (
+            Coalesce(Subquery(aprovadas.annotate(total=Count('pk')).values('total')), Value(0)),
+            Coalesce(Subquery(aprovadas.annotate(total=Sum('nota')).values('total')), Value(0)),
+        )
+    
     @property
     def preco_final(self):
         """Retorna o preço final (com ou sem desconto)"""
@@ -256,3 +409,164 @@ class ImagemProduto(models.Model):
     
     def __str__(self):
         return f"Imagem {self.ordem} - {self.produto.nome}"
+
+
+class AvaliacaoProduto(models.Model):
+    """
+    Avaliação de um produto por um cliente (uma por cliente e produto).
+    
+    Só as aprovadas entram nos agregados do produto (avaliacao,
+    numero_avaliacoes, pontuacao_avaliacao).
+    """
+    
+    produto = models.ForeignKey(
+        Produto,
+        on_delete=models.CASCADE,
+        related_name='avaliacoes',
+        verbose_name="Produto"
+    )
+    
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='avaliacoes_produtos',
+        verbose_name="Usuário"
+    )
+    
+    nota = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        verbose_name="Nota (1-5)"
+    )
+    
+    titulo = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Título"
+    )
+    
+    comentario = models.TextField(
+        max_length=1000,
+        verbose_name="Comentário"
+    )
+    
+    recomenda = models.BooleanField(
+        default=True,
+        verbose_name="Recomenda o Produto"
+    )
+    
+    aprovado = models.BooleanField(
+        default=True,
+        verbose_name="Aprovado"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Avaliação de Produto"
+        verbose_name_plural = "Avaliações de Produtos"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'usuario'], name='avaliacao_unica_por_usuario'),
+        ]
+        indexes = [
+            models.Index(fields=['produto', 'aprovado', '-created_at'], name='avaliacao_produto_recentes'),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario} - {self.produto_id} ({self.nota}★)"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._guardar_estado_agregado()
+        return instancia
+    
+    def _guardar_estado_agregado(self):
+        """
+        Produto, nota e aprovação como estão no banco, para o sinal de
+        post_save saber o que mudou nos agregados (None = desconhecido).
+        """
+        if all(campo in self.__dict__ for campo in ('produto_id', 'nota', 'aprovado')):
+            self._estado_agregado = (self.produto_id, self.nota, self.aprovado)
+        else:
+            self._estado_agregado = None
+
+
+class ReservaEstoque(models.Model):
+    """
+    Unidades já descontadas do estoque enquanto o pagamento não sai.
+    
+    A baixa acontece na criação da reserva (ver produtos/estoque.py). Se o
+    pagamento for confirmado a reserva é apagada e a baixa fica; se expirar
+    ou o pedido for cancelado, as unidades voltam ao estoque.
+    """
+    
+    produto = models.ForeignKey(
+        Produto,
+        on_delete=models.CASCADE,
+        related_name='reservas',
+        verbose_name="Produto"
+    )
+    
+    referencia = models.CharField(
+        max_length=40,
+        db_index=True,
+        verbose_name="Referência",
+        help_text="Número do pedido (ou outra chave) que segura a reserva"
+    )
+    
+    quantidade = models.PositiveIntegerField(verbose_name="Quantidade")
+    expira_em = models.DateTimeField(db_index=True, verbose_name="Expira em")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Reserva de Estoque"
+        verbose_name_plural = "Reservas de Estoque"
+        ordering = ['expira_em']
+    
+    def __str__(self):
+        return f"{self.quantidade}x {self.produto_id} ({self.referencia})"
+
+
+class ProdutoRelacionado(models.Model):
+    """
+    Vizinhos de um produto, calculados em lote (produtos/recomendacoes.py).
+    
+    Uma linha por (produto, posição); a página do produto lê os vizinhos
+    pelo índice único (produto, posicao) numa única consulta.
+    """
+    
+    ORIGEM_CHOICES = [
+        ('compra', 'Comprados juntos'),
+        ('categoria', 'Mesma categoria e faixa de preço'),
+    ]
+    
+    produto = models.ForeignKey(
+        Produto,
+        on_delete=models.CASCADE,
+        related_name='relacionados',
+        verbose_name="Produto"
+    )
+    
+    relacionado = models.ForeignKey(
+        Produto,
+        on_delete=models.CASCADE,
+        related_name='relacionado_a',
+        verbose_name="Relacionado"
+    )
+    
+    posicao = models.PositiveSmallIntegerField(verbose_name="Posição")
+    pontuacao = models.FloatField(verbose_name="Pontuação")
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES, verbose_name="Origem")
+    
+    class Meta:
+        verbose_name = "Produto Relacionado"
+        verbose_name_plural = "Produtos Relacionados"
+        ordering = ['produto', 'posicao']
+        constraints = [
+            models.UniqueConstraint(fields=['produto', 'posicao'], name='produto_relacionado_posicao'),
+        ]
+    
+    def __str__(self):
+        return f"{self.produto_id} → {self.relacionado_id} (#{self.posicao})"
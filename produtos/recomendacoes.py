@@ -0,0 +1,249 @@
+# ==========================================
+# produtos/recomendacoes.py
+# ==========================================
+"""
+Produtos relacionados, calculados em lote a partir do histórico de pedidos.
+
+``calcular()`` (comando ``calcular_recomendacoes``, para rodar via cron):
+
+1. lê os pares (pedido, produto) dos pedidos não cancelados como arrays do
+   NumPy;
+2. monta a matriz esparsa (CSR, do SciPy) pedido x produto ``X`` e a de
+   co-compra ``X.T @ X``: a célula (a, b) é o número de pedidos com os dois
+   produtos e a diagonal, o de pedidos com cada um - só os pares que
+   existem ocupam memória;
+3. pontua cada par pela similaridade do cosseno
+   ``juntos / sqrt(pedidos_a * pedidos_b)`` e guarda os ``VIZINHOS``
+   melhores de cada produto;
+4. completa quem tem poucos (ou nenhum) vizinhos de compra com os produtos
+   da mesma categoria de preço mais próximo (distância em log, ou seja,
+   proporcional);
+5. troca o conteúdo de ``ProdutoRelacionado`` numa transação.
+
+A página do produto lê os vizinhos com ``relacionados()``: uma consulta
+pelo índice único (produto, posicao).
+"""
+
+import time
+from itertools import chain, islice
+
+import numpy as np
+from django.apps import apps
+from scipy import sparse
+from django.db import transaction
+
+from .models import Produto, ProdutoRelacionado
+
+
+VIZINHOS = 12
+MINIMO_JUNTOS = 2
+# Pedidos com mais produtos que isso (atacado, testes) ligariam tudo com tudo
+MAX_PRODUTOS_POR_PEDIDO = 50
+LOTE = 5000
+
+
+# ========== HISTÓRICO ==========
+
+def _pares(queryset):
+    """Array (n, 2) de (pedido_id, produto_id) sem montar tuplas em memória"""
+    valores = chain.from_iterable(queryset.values_list('pedido_id', 'produto_id').iterator(chunk_size=LOTE))
+    return np.fromiter(valores, dtype=np.int64).reshape(-1, 2)
+
+
+def historico_compras():
+    """
+    Pares (pedido, produto) dos pedidos válidos. Os pedidos do app pagamento,
+    quando instalado, entram com id negativo para não colidir com os do
+    carrinho.
+    """
+    from carrinho.models import ItemPedido
+
+    pares = [_pares(
+        ItemPedido.objects.exclude(pedido__status='cancelado').filter(produto__isnull=False)
+    )]
+    if apps.is_installed('pagamento'):
+        ItemPedidoPagamento = apps.get_model('pagamento', 'ItemPedido')
+        outros = _pares(
+            ItemPedidoPagamento.objects.exclude(pedido__status__in=['cancelado', 'reembolsado'])
+        )
+        outros[:, 0] = -outros[:, 0]
+        pares.append(outros)
+    return np.concatenate(pares)
+
+
+# ========== CO-COMPRA ==========
+
+def coocorrencias(pares, max_por_pedido=MAX_PRODUTOS_POR_PEDIDO):
+    """
+    Matriz de co-compra em coordenadas.
+
+    Devolve ``(ids, linha, coluna, juntos, frequencia)``: ``ids`` mapeia o
+    índice denso para o id do produto; ``juntos[k]`` é o número de pedidos
+    com ``ids[linha[k]]`` e ``ids[coluna[k]]`` (simétrica, sem diagonal);
+    ``frequencia[i]`` é o número de pedidos com ``ids[i]``.
+    """
+    vazio = np.empty(0, dtype=np.int64)
+    if not len(pares):
+        return vazio, vazio, vazio, vazio, vazio
+
+    # Ordena por pedido e conta o mesmo produto uma vez por pedido
+    pares = np.unique(pares, axis=0)
+    pedidos, produtos = pares[:, 0], pares[:, 1]
+    _, tamanhos = np.unique(pedidos, return_counts=True)
+    manter = np.repeat(tamanhos, tamanhos) <= max_por_pedido
+    pedidos, produtos = pedidos[manter], produtos[manter]
+    if not len(pedidos):
+        return vazio, vazio, vazio, vazio, vazio
+
+    _, pedido_denso = np.unique(pedidos, return_inverse=True)
+    ids, denso = np.unique(produtos, return_inverse=True)
+    x = sparse.csr_matrix(
+        (np.ones(len(denso), dtype=np.int64), (pedido_denso, denso)),
+        shape=(pedido_denso.max() + 1, len(ids)),
+    )
+    matriz = (x.T @ x).tocsr()
+    matriz.sort_indices()
+    frequencia = matriz.diagonal().astype(np.int64)
+
+    coordenadas = matriz.tocoo()
+    fora_da_diagonal = coordenadas.row != coordenadas.col
+    return (
+        ids,
+        coordenadas.row[fora_da_diagonal].astype(np.int64),
+        coordenadas.col[fora_da_diagonal].astype(np.int64),
+        coordenadas.data[fora_da_diagonal].astype(np.int64),
+        frequencia,
+    )
+
+
+def melhores_por_linha(linha, coluna, pontuacao, limite):
+    """Os ``limite`` maiores de cada linha, ordenados (empate: menor coluna)"""
+    ordem = np.lexsort((coluna, -pontuacao, linha))
+    linha, coluna, pontuacao = linha[ordem], coluna[ordem], pontuacao[ordem]
+    posicao = np.arange(len(linha)) - np.searchsorted(linha, linha, side='left')
+    manter = posicao < limite
+    return linha[manter], coluna[manter], pontuacao[manter]
+
+
+def vizinhos_de_compra(pares, ativos, vizinhos=VIZINHOS, minimo=MINIMO_JUNTOS):
+    """Arrays (produto_id, relacionado_id, pontuação) entre produtos ativos"""
+    ids, linha, coluna, juntos, frequencia = coocorrencias(pares)
+    manter = (juntos >= minimo) & np.isin(ids[linha], ativos) & np.isin(ids[coluna], ativos)
+    linha, coluna, juntos = linha[manter], coluna[manter], juntos[manter]
+    pontuacao = juntos / np.sqrt(frequencia[linha] * frequencia[coluna])
+    linha, coluna, pontuacao = melhores_por_linha(linha, coluna, pontuacao, vizinhos)
+    return ids[linha], ids[coluna], pontuacao
+
+
+# ========== CATEGORIA E PREÇO ==========
+
+def vizinhos_por_preco(ids, categorias, precos, vizinhos=VIZINHOS):
+    """
+    Para cada produto, os ``vizinhos`` da mesma categoria com preço mais
+    próximo. Com os produtos ordenados por (categoria, preço), eles estão
+    entre as ``vizinhos`` posições antes e depois.
+    """
+    ordem = np.lexsort((ids, precos, categorias))
+    ids, categorias = ids[ordem], categorias[ordem]
+    log_preco = np.log(np.maximum(precos[ordem], 0.01))
+    n = len(ids)
+
+    deslocamentos = np.concatenate([np.arange(-vizinhos, 0), np.arange(1, vizinhos + 1)])
+    candidatos = np.arange(n)[:, None] + deslocamentos[None, :]
+    validos = (candidatos >= 0) & (candidatos < n)
+    candidatos = np.clip(candidatos, 0, max(n - 1, 0))
+    validos &= categorias[candidatos] == categorias[:, None]
+    distancia = np.where(validos, np.abs(log_preco[candidatos] - log_preco[:, None]), np.inf)
+
+    escolhidos = np.argsort(distancia, axis=1, kind='stable')[:, :vizinhos]
+    distancia = np.take_along_axis(distancia, escolhidos, axis=1)
+    relacionados = np.take_along_axis(candidatos, escolhidos, axis=1)
+    linha = np.repeat(np.arange(n), relacionados.shape[1])
+    distancia, relacionados = distancia.ravel(), relacionados.ravel()
+    manter = np.isfinite(distancia)
+    return ids[linha[manter]], ids[relacionados[manter]], 1 / (1 + distancia[manter])
+
+
+# ========== CÁLCULO ==========
+
+def combinar(compra, categoria, vizinhos=VIZINHOS):
+    """
+    Junta as duas listas: primeiro os vizinhos de compra, depois os de
+    categoria que ainda não apareceram. Devolve arrays
+    (produto, relacionado, pontuação, é_de_compra, posição).
+    """
+    produto = np.concatenate([compra[0], categoria[0]])
+    relacionado = np.concatenate([compra[1], categoria[1]])
+    pontuacao = np.concatenate([compra[2], categoria[2]])
+    de_compra = np.concatenate([np.ones(len(compra[0]), bool), np.zeros(len(categoria[0]), bool)])
+    # Prioridade: compra antes de categoria; dentro de cada uma, a ordem recebida
+    prioridade = np.arange(len(produto)) + np.where(de_compra, 0, len(produto))
+
+    # Um relacionado que aparece nas duas fica com a de maior prioridade
+    ordem = np.lexsort((prioridade, relacionado, produto))
+    produto, relacionado = produto[ordem], relacionado[ordem]
+    primeiro = np.ones(len(produto), bool)
+    primeiro[1:] = (produto[1:] != produto[:-1]) | (relacionado[1:] != relacionado[:-1])
+    ordem = ordem[primeiro]
+
+    produto, relacionado, pontuacao, de_compra, prioridade = (
+        produto[primeiro], relacionado[primeiro], pontuacao[ordem], de_compra[ordem], prioridade[ordem]
+    )
+    ordem = np.lexsort((prioridade, produto))
+    produto, relacionado, pontuacao, de_compra = produto[ordem], relacionado[ordem], pontuacao[ordem], de_compra[ordem]
+    posicao = np.arange(len(produto)) - np.searchsorted(produto, produto, side='left')
+    manter = posicao < vizinhos
+    return produto[manter], relacionado[manter], pontuacao[manter], de_compra[manter], posicao[manter]
+
+
+def _catalogo_ativo():
+    linhas = list(Produto.objects.filter(ativo=True).values_list('pk', 'categoria_id', 'preco_original', 'preco_desconto'))
+    ids = np.array([linha[0] for linha in linhas], dtype=np.int64)
+    categorias = np.array([linha[1] for linha in linhas], dtype=np.int64)
+    precos = np.array([float(linha[3] or linha[2]) for linha in linhas], dtype=np.float64)
+    return ids, categorias, precos
+
+
+def calcular(vizinhos=VIZINHOS, minimo=MINIMO_JUNTOS, lote=LOTE):
+    """Recalcula ``ProdutoRelacionado`` inteiro; devolve estatísticas"""
+    inicio = time.perf_counter()
+    ids, categorias, precos = _catalogo_ativo()
+    pares = historico_compras()
+
+    compra = vizinhos_de_compra(pares, ids, vizinhos, minimo)
+    categoria = vizinhos_por_preco(ids, categorias, precos, vizinhos)
+    produto, relacionado, pontuacao, de_compra, posicao = combinar(compra, categoria, vizinhos)
+
+    linhas = (
+        ProdutoRelacionado(
+            produto_id=p, relacionado_id=r, pontuacao=round(s, 6),
+            origem='compra' if c else 'categoria', posicao=pos,
+        )
+        for p, r, s, c, pos in zip(
+            produto.tolist(), relacionado.tolist(), pontuacao.tolist(), de_compra.tolist(), posicao.tolist()
+        )
+    )
+    with transaction.atomic():
+        ProdutoRelacionado.objects.all().delete()
+        while objetos := list(islice(linhas, lote)):
+            ProdutoRelacionado.objects.bulk_create(objetos)
+
+    return {
+        'produtos': len(np.unique(produto)),
+        'pedidos': len(np.unique(pares[:, 0])) if len(pares) else 0,
+        'por_compra': int(de_compra.sum()),
+        'por_categoria': int((~de_compra).sum()),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+# ========== LEITURA ==========
+
+def relacionados(produto, limite=6):
+    """Produtos relacionados já calculados, em uma consulta"""
+    return list(
+        Produto.objects
+        .filter(relacionado_a__produto=produto, ativo=True)
+        .select_related('categoria')
+        .order_by('relacionado_a__posicao')[:limite]
+    )
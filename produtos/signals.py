@@ -0,0 +1,119 @@
+# ==========================================
+# produtos/signals.py
+# ==========================================
+
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import busca, categorias
+from .models import AvaliacaoProduto, Produto, CategoriaProduto
+
+
+@receiver(post_save, sender=Produto)
+def indexar_produto(sender, instance, raw=False, **kwargs):
+    """Mantém o índice de busca em dia com o produto salvo"""
+    if raw:
+        return
+    busca.indexar_produtos([instance])
+
+
+@receiver(post_delete, sender=Produto)
+def remover_produto_do_indice(sender, instance, **kwargs):
+    busca.remover_produtos([instance.pk])
+
+
+@receiver(post_save, sender=CategoriaProduto)
+def reindexar_categoria(sender, instance, created=False, raw=False, **kwargs):
+    """O nome da categoria faz parte do documento indexado"""
+    if raw or created:
+        return
+    produtos = instance.produtos.select_related('categoria')
+    busca.indexar_produtos(produtos.iterator(chunk_size=2000))
+
+
+@receiver(post_migrate, dispatch_uid='produtos-indexar-apos-migrate')
+def indexar_produtos_existentes(sender, app_config=None, using='default', **kwargs):
+    """Preenche o índice recém-criado quando o banco já tinha produtos"""
+    # reindexar() trabalha no banco principal
+    if app_config is None or app_config.name != 'produtos' or using != 'default':
+        return
+    if Produto.objects.exists() and busca.obter_indice().vazio():
+        busca.reindexar()
+
+
+# ========== CONTADOR DE PRODUTOS ATIVOS ==========
+
+@receiver(post_save, sender=Produto)
+def atualizar_contador_categoria(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Ajusta ``total_produtos_ativos`` das categorias envolvidas: -1 na
+    categoria antiga se o produto contava nela, +1 na nova se ele conta.
+    """
+    if raw:
+        return
+    novo = (instance.categoria_id, instance.ativo)
+    anterior = (None, False) if created else getattr(instance, '_estado_contagem', None)
+    instance._estado_contagem = novo
+    if anterior == novo:
+        return
+
+    if anterior is None:
+        # Instância que não veio do banco (ou com campos adiados): reconta tudo
+        CategoriaProduto.atualizar_totais()
+    else:
+        if anterior[1]:
+            CategoriaProduto.somar_ativos(anterior[0], -1)
+        if novo[1]:
+            CategoriaProduto.somar_ativos(novo[0], 1)
+    categorias.invalidar()
+
+
+@receiver(post_delete, sender=Produto)
+def descontar_produto_removido(sender, instance, **kwargs):
+    categoria_id, ativo = getattr(instance, '_estado_contagem', None) or (instance.categoria_id, instance.ativo)
+    if ativo:
+        CategoriaProduto.somar_ativos(categoria_id, -1)
+        categorias.invalidar()
+
+
+# ========== AGREGADOS DE AVALIAÇÃO ==========
+
+def _somar_contribuicoes(anterior, novo):
+    """
+    Aplica a diferença entre o peso antigo e o novo de uma avaliação
+    (``(produto_id, nota, aprovado)``; ``None`` = não conta) nos produtos.
+    """
+    numero, soma = Counter(), Counter()
+    if anterior and anterior[2]:
+        numero[anterior[0]] -= 1
+        soma[anterior[0]] -= anterior[1]
+    if novo and novo[2]:
+        numero[novo[0]] += 1
+        soma[novo[0]] += novo[1]
+    for produto_id in numero.keys() | soma.keys():
+        if numero[produto_id] or soma[produto_id]:
+            Produto.somar_avaliacao(produto_id, numero[produto_id], soma[produto_id])
+
+
+@receiver(post_save, sender=AvaliacaoProduto)
+def atualizar_agregado_avaliacoes(sender, instance, created=False, raw=False, **kwargs):
+    """Média, número e pontuação do produto: um UPDATE por produto afetado"""
+    if raw:
+        return
+    novo = (instance.produto_id, instance.nota, instance.aprovado)
+    anterior = None if created else getattr(instance, '_estado_agregado', None)
+    instance._estado_agregado = novo
+
+    if not created and anterior is None:
+        # Instância que não veio do banco (ou com campos adiados): reconta
+        Produto.atualizar_avaliacoes([instance.produto_id])
+    elif anterior != novo:
+        _somar_contribuicoes(anterior, novo)
+
+
+@receiver(post_delete, sender=AvaliacaoProduto)
+def descontar_avaliacao_removida(sender, instance, **kwargs):
+    estado = getattr(instance, '_estado_agregado', None) or (instance.produto_id, instance.nota, instance.aprovado)
+    _somar_contribuicoes(estado, None)
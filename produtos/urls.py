@@ -11,6 +11,12 @@ urlpatterns = [
     # Lista de produtos (com filtros)
     path('', views.ProdutoListView.as_view(), name='lista'),
     
+    # Próxima página em JSON (carregar mais)
+    path('api/mais/', views.carregar_mais, name='carregar_mais'),
+    
+    # Avaliar produto (POST)
+    path('avaliar/<slug:produto_slug>/', views.adicionar_avaliacao, name='adicionar_avaliacao'),
+    
     # Detalhe do produto
     path('<slug:slug>/', views.ProdutoDetailView.as_view(), name='detalhe'),
     
@@ -2,13 +2,30 @@
 # produtos/views.py
 # ==========================================
 
-from django.shortcuts import render, get_object_or_404
+import copy
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, Count, Avg
-from .models import Produto, CategoriaProduto
-from .forms import ProdutoFiltroForm
+from django.db.models import Q, Avg
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from core.paginacao import paginar
+from core.perfilamento import orcamento_consultas
+from .models import AvaliacaoProduto, CategoriaProduto, Produto
+from .forms import AvaliacaoProdutoForm, ProdutoFiltroForm
+from .categorias import ativas as categorias_ativas
+from .facetas import EM_PROMOCAO, calcular_facetas, filtro_faixa
+from . import busca as indice_busca
+from . import recomendacoes
 
 
+@method_decorator(orcamento_consultas(8), name='dispatch')
 class ProdutoListView(ListView):
     """Lista de produtos com filtros avançados"""
     model = Produto
@@ -16,8 +33,18 @@ class ProdutoListView(ListView):
     context_object_name = 'produtos'
     paginate_by = 20
     
+    ORDENACOES = {
+        'menor_preco': ('preco_original',),
+        'maior_preco': ('-preco_original',),
+        # Média bayesiana, pelo índice de pontuacao_avaliacao
+        'melhor_avaliacao': ('-pontuacao_avaliacao',),
+        'nome_az': ('nome',),
+        'nome_za': ('-nome',),
+    }
+    ORDENACAO_PADRAO = ('-destaque', '-created_at')  # relevancia ou mais_vendidos
+    
     def get_queryset(self):
-        queryset = Produto.objects.filter(ativo=True).select_related('categoria')
+        queryset = Produto.objects.filter(ativo=True)
         
         # Parâmetros do filtro
         busca = self.request.GET.get('busca', '').strip()
@@ -27,54 +54,66 @@ class ProdutoListView(ListView):
         em_promocao = self.request.GET.get('em_promocao')
         ordenar = self.request.GET.get('ordenar', 'relevancia')
         
-        # Filtro de busca
+        # Filtro de busca (índice textual, ver produtos/busca.py)
         if busca:
-            queryset = queryset.filter(
-                Q(nome__icontains=busca) |
-                Q(descricao__icontains=busca) |
-                Q(categoria__nome__icontains=busca)
-            )
+            queryset = indice_busca.filtrar_queryset(queryset, busca)
+        
+        # Filtro por preço (mínimo e máximo inclusivos), o mesmo das faixas da faceta
+        filtro_preco = filtro_faixa(preco_min or None, preco_max or None)
+        
+        # Filtro de promoção
+        filtro_promocao = EM_PROMOCAO if em_promocao else Q()
+        
+        # Facetas contadas sobre a busca, com os filtros de cada dimensão à parte
+        self._consulta_facetas = {
+            'queryset': queryset,
+            'categoria_id': categoria_id,
+            'filtro_preco': filtro_preco,
+            'filtro_promocao': filtro_promocao,
+        }
+        
+        queryset = queryset.select_related('categoria').filter(filtro_preco & filtro_promocao)
         
         # Filtro por categoria
         if categoria_id:
             queryset = queryset.filter(categoria_id=categoria_id)
         
-        # Filtro por preço
-        if preco_min:
-            queryset = queryset.filter(preco_original__gte=preco_min)
-        if preco_max:
-            queryset = queryset.filter(preco_original__lte=preco_max)
-        
-        # Filtro de promoção
-        if em_promocao:
-            queryset = queryset.filter(preco_desconto__isnull=False)
-        
         # Ordenação
-        if ordenar == 'menor_preco':
-            queryset = queryset.order_by('preco_original')
-        elif ordenar == 'maior_preco':
-            queryset = queryset.order_by('-preco_original')
-        elif ordenar == 'melhor_avaliacao':
-            queryset = queryset.order_by('-avaliacao', '-numero_avaliacoes')
-        elif ordenar == 'nome_az':
-            queryset = queryset.order_by('nome')
-        elif ordenar == 'nome_za':
-            queryset = queryset.order_by('-nome')
-        else:  # relevancia ou mais_vendidos
-            queryset = queryset.order_by('-destaque', '-created_at')
+        if ordenar in self.ORDENACOES:
+            queryset = queryset.order_by(*self.ORDENACOES[ordenar])
+        elif busca and 'relevancia_busca' in queryset.query.annotations:
+            queryset = queryset.order_by('relevancia_busca')
+        else:
+            queryset = queryset.order_by(*self.ORDENACAO_PADRAO)
         
         return queryset
     
+    @cached_property
+    def facetas(self):
+        return calcular_facetas(**self._consulta_facetas)
+    
+    def paginate_queryset(self, queryset, page_size):
+        # Paginação por cursor; o total já veio das facetas
+        pagina = paginar(
+            self.request, queryset, page_size, count=self.facetas['total'],
+            em_cache=True, dependencias=(CategoriaProduto,),
+        )
+        return pagina.paginator, pagina, pagina.object_list, pagina.has_other_pages()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Formulário de filtros
         context['form_filtro'] = ProdutoFiltroForm(self.request.GET)
         
-        # Todas as categorias
-        context['categorias'] = CategoriaProduto.objects.filter(ativo=True).annotate(
-            total_produtos=Count('produtos', filter=Q(produtos__ativo=True))
-        )
+        # Todas as categorias (do cache do processo), com a contagem da faceta.
+        # Cópias: os objetos do cache são compartilhados entre requisições
+        categorias = []
+        for categoria in categorias_ativas():
+            categoria = copy.copy(categoria)
+            categoria.total_produtos = self.facetas['por_categoria'].get(categoria.pk, 0)
+            categorias.append(categoria)
+        context['categorias'] = categorias
         
         # Produtos em destaque
         context['produtos_destaque'] = Produto.objects.filter(
@@ -83,7 +122,8 @@ class ProdutoListView(ListView):
         )[:4]
         
         # Estatísticas
-        context['total_produtos'] = self.get_queryset().count()
+        context['facetas'] = self.facetas
+        context['total_produtos'] = self.facetas['total']
         
         # Parâmetros atuais (para manter filtros ativos)
         context['filtros_ativos'] = {
@@ -112,10 +152,67 @@ class ProdutoDetailView(DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Produtos relacionados
-        context['produtos_relacionados'] = Produto.objects.filter(
-            categoria=self.object.categoria,
-            ativo=True
-        ).exclude(pk=self.object.pk)[:6]
+        # Produtos relacionados: calculados em lote (calcular_recomendacoes);
+        # produto novo, ainda sem cálculo, mostra os da mesma categoria
+        context['produtos_relacionados'] = recomendacoes.relacionados(self.object) or list(
+            Produto.objects.filter(
+                categoria=self.object.categoria,
+                ativo=True
+            ).exclude(pk=self.object.pk)[:6]
+        )
         
         return context
+
+
+@login_required
+@require_POST
+def adicionar_avaliacao(request, produto_slug):
+    """Cria a avaliação do cliente para o produto (ou atualiza a que já existe)"""
+    produto = get_object_or_404(Produto, slug=produto_slug, ativo=True)
+    avaliacao = AvaliacaoProduto.objects.filter(produto=produto, usuario=request.user).first()
+    form = AvaliacaoProdutoForm(request.POST, instance=avaliacao)
+    
+    if not form.is_valid():
+        messages.error(request, 'Não foi possível salvar a avaliação. Confira a nota e o comentário.')
+        return redirect('produtos:detalhe', slug=produto.slug)
+    
+    avaliacao = form.save(commit=False)
+    avaliacao.produto = produto
+    avaliacao.usuario = request.user
+    try:
+        # Avaliação e agregados do produto juntos
+        with transaction.atomic():
+            avaliacao.save()
+    except IntegrityError:
+        # Outra requisição do mesmo cliente criou a avaliação antes
+        messages.error(request, 'Você já avaliou este produto.')
+    else:
+        messages.success(request, 'Obrigado pela sua avaliação!')
+    return redirect('produtos:detalhe', slug=produto.slug)
+
+
+def carregar_mais(request):
+    """Próxima página da listagem em JSON (botão "carregar mais")"""
+    view = ProdutoListView()
+    view.setup(request)
+    pagina = paginar(request, view.get_queryset(), view.paginate_by)
+    
+    return JsonResponse({
+        'produtos': [
+            {
+                'id': produto.id,
+                'nome': produto.nome,
+                'url': reverse('produtos:detalhe', args=[produto.slug]),
+                'categoria': produto.categoria.nome,
+                'imagem': produto.imagem_principal.url if produto.imagem_principal else None,
+                'preco_original': str(produto.preco_original),
+                'preco_final': str(produto.preco_final),
+                'percentual_desconto': produto.percentual_desconto,
+                'avaliacao': str(produto.avaliacao),
+                'em_estoque': produto.em_estoque,
+            }
+            for produto in pagina
+        ],
+        'proximo_cursor': pagina.cursor_proximo,
+        'tem_mais': pagina.has_next(),
+    })
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0003_alter_servico_imagem_principal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamentoservico',
+            index=models.Index(fields=['usuario', 'created_at'], name='agendamento_usuario_recentes'),
+        ),
+        migrations.AddIndex(
+            model_name='prestador',
+            index=models.Index(fields=['avaliacao_media'], name='prestador_avaliacao'),
+        ),
+        migrations.AddIndex(
+            model_name='servico',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['destaque', 'created_at'], name='servico_ativo_vitrine'),
+        ),
+        migrations.AddIndex(
+            model_name='servico',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['preco'], name='servico_ativo_preco'),
+        ),
+        migrations.AddIndex(
+            model_name='servico',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['nome'], name='servico_ativo_nome'),
+        ),
+    ]
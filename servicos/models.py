@@ -77,6 +77,11 @@ class Prestador(models.Model):
         verbose_name = "Prestador"
         verbose_name_plural = "Prestadores"
         ordering = ['-destaque', '-avaliacao_media', 'nome']
+        indexes = [
+            # Serviços ordenados pela avaliação do prestador: a consulta
+            # parte dos prestadores nessa ordem e busca os serviços de cada um
+            models.Index(fields=['avaliacao_media'], name='prestador_avaliacao'),
+        ]
     
     def __str__(self):
         return self.nome
@@ -158,6 +163,13 @@ class Servico(models.Model):
         verbose_name = "Serviço"
         verbose_name_plural = "Serviços"
         ordering = ['-destaque', '-created_at']
+        # Ordenações da listagem, só sobre os ativos: o filtro sai como
+        # "WHERE ativo", que só usa o índice se for a condição dele
+        indexes = [
+            models.Index(fields=['destaque', 'created_at'], condition=models.Q(ativo=True), name='servico_ativo_vitrine'),
+            models.Index(fields=['preco'], condition=models.Q(ativo=True), name='servico_ativo_preco'),
+            models.Index(fields=['nome'], condition=models.Q(ativo=True), name='servico_ativo_nome'),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.prestador.nome}"
@@ -223,6 +235,10 @@ class AgendamentoServico(models.Model):
         verbose_name = "Agendamento"
         verbose_name_plural = "Agendamentos"
         ordering = ['-created_at']
+        indexes = [
+            # Meus agendamentos
+            models.Index(fields=['usuario', 'created_at'], name='agendamento_usuario_recentes'),
+        ]
     
     def __str__(self):
         return f"{self.servico.nome} - {self.usuario.email} - {self.data_agendamento}"
@@ -11,6 +11,9 @@ urlpatterns = [
     # Lista de serviços
     path('', views.lista_servicos, name='lista'),
     
+    # Próxima página em JSON (carregar mais)
+    path('api/mais/', views.carregar_mais, name='carregar_mais'),
+    
     # Detalhe do serviço
     path('servico/<slug:slug>/', views.detalhe_servico, name='detalhe'),
     
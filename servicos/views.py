@@ -5,13 +5,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.urls import reverse
+from core.caches.camadas import queryset_em_cache
+from core.paginacao import paginar
+from core.perfilamento import orcamento_consultas
 from .models import Servico, CategoriaServico, Prestador, AgendamentoServico
 from .forms import AgendamentoServicoForm
 
 
-def lista_servicos(request):
-    """Lista de serviços com filtros"""
+SERVICOS_POR_PAGINA = 20
+
+
+def filtrar_servicos(request):
+    """Serviços ativos com os filtros e a ordenação da querystring"""
     servicos = Servico.objects.filter(ativo=True).select_related('prestador', 'categoria')
     
     # Filtro por categoria
@@ -54,23 +62,61 @@ def lista_servicos(request):
     else:
         servicos = servicos.order_by('-destaque', '-created_at')
     
-    # Categorias e prestadores para filtros
-    categorias = CategoriaServico.objects.filter(ativo=True)
-    prestadores = Prestador.objects.filter(ativo=True)
+    return servicos
+
+
+@orcamento_consultas(8)
+def lista_servicos(request):
+    """Lista de serviços com filtros"""
+    servicos = filtrar_servicos(request)
+    
+    # Categorias (com o total de serviços já contado) e prestadores para filtros
+    categorias = queryset_em_cache(
+        CategoriaServico.objects.filter(ativo=True).annotate(total_servicos=Count('servicos')),
+        dependencias=(Servico,),
+    )
+    prestadores = queryset_em_cache(Prestador.objects.filter(ativo=True))
     
     context = {
-        'servicos': servicos,
+        'servicos': paginar(
+            request, servicos, SERVICOS_POR_PAGINA,
+            em_cache=True, dependencias=(Prestador, CategoriaServico),
+        ),
         'categorias': categorias,
         'prestadores': prestadores,
-        'categoria_atual': categoria_slug,
-        'prestador_atual': prestador_slug,
-        'query': query,
-        'ordem_atual': ordem,
+        'categoria_atual': request.GET.get('categoria'),
+        'prestador_atual': request.GET.get('prestador'),
+        'query': request.GET.get('q'),
+        'ordem_atual': request.GET.get('ordem', '-destaque'),
     }
     
     return render(request, 'servicos/lista.html', context)
 
 
+def carregar_mais(request):
+    """Próxima página de serviços em JSON (botão "carregar mais")"""
+    pagina = paginar(request, filtrar_servicos(request), SERVICOS_POR_PAGINA)
+    
+    return JsonResponse({
+        'servicos': [
+            {
+                'id': servico.id,
+                'nome': servico.nome,
+                'url': reverse('servicos:detalhe', args=[servico.slug]),
+                'descricao_curta': servico.descricao_curta,
+                'preco': str(servico.preco),
+                'unidade_tempo': servico.get_unidade_tempo_display(),
+                'prestador': servico.prestador.nome,
+                'categoria': servico.categoria.nome if servico.categoria else None,
+                'imagem': servico.imagem_principal.url if servico.imagem_principal else None,
+            }
+            for servico in pagina
+        ],
+        'proximo_cursor': pagina.cursor_proximo,
+        'tem_mais': pagina.has_next(),
+    })
+
+
 def detalhe_servico(request, slug):
     """Detalhes de um serviço"""
     servico = get_object_or_404(
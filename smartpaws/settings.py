@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from core import banco, caches, sessoes
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,14 +50,33 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.perfilamento.PerfilamentoSQLMiddleware',
+    'core.replicas.ReplicasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'carrinho.anonimo.CarrinhoAnonimoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Carrinho de visitantes num cookie assinado (carrinho/anonimo.py), mesclado
+# ao carrinho do usuário no login
+CARRINHO_ANONIMO_COOKIE = 'carrinho'
+
+# Perfilamento de SQL (core/perfilamento.py): desligado por padrão; com
+# PERFILAMENTO_SQL=1 mede a fração PERFILAMENTO_AMOSTRAGEM das requisições
+PERFILAMENTO_SQL = os.environ.get('PERFILAMENTO_SQL') == '1'
+PERFILAMENTO_AMOSTRAGEM = float(os.environ.get('PERFILAMENTO_AMOSTRAGEM', '1.0'))
+PERFILAMENTO_CAPACIDADE = 200
+
+# Views com @orcamento_consultas falham ao estourar o orçamento com
+# ORCAMENTO_CONSULTAS_ESTRITO=1 (a suíte de testes liga em tests/__init__.py);
+# em DEBUG (ou com PERFILAMENTO_SQL) só registram um aviso, e em produção
+# nem contam as consultas
+ORCAMENTO_CONSULTAS_ESTRITO = os.environ.get('ORCAMENTO_CONSULTAS_ESTRITO') == '1'
+
 ROOT_URLCONF = 'smartpaws.urls'
 
 TEMPLATES = [
@@ -79,13 +101,48 @@ WSGI_APPLICATION = 'smartpaws.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Variáveis DB_* do ambiente (core/banco.py); sem elas, SQLite em
+# db.sqlite3 com uma conexão por requisição. Produção: perfil
+# smartpaws_settings.settings.production
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': banco.configuracao_banco(BASE_DIR),
 }
 
+# Réplicas de leitura do catálogo (DB_REPLICAS, core/replicas.py)
+DATABASES.update(banco.configuracao_replicas(DATABASES['default']))
+BANCOS_REPLICA = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.replicas.RoteadorReplicas']
+REPLICAS_APPS = ('core', 'produtos', 'pets', 'servicos')
+# Carrinho, checkout, pedidos e conta leem sempre do primário
+REPLICAS_ROTAS_PRIMARIO = ('/carrinho/', '/usuarios/', '/admin/')
+# Segundos em que o cliente lê do primário depois de uma escrita
+REPLICAS_JANELA_FIXA = int(os.environ.get('DB_REPLICAS_JANELA', '5'))
+
+# Aplicados a cada conexão SQLite (WAL, synchronous=NORMAL, busy_timeout)
+SQLITE_PRAGMAS = banco.pragmas_sqlite()
+
+# Caches (core/caches). ``default`` é a camada compartilhada entre os
+# processos (CACHE_COMPARTILHADO; em desenvolvimento, a memória do processo)
+# e ``sessoes`` guarda as sessões (SESSION_CACHE, core/sessoes)
+CACHES = {
+    'default': caches.cache_compartilhado(BASE_DIR),
+    sessoes.ALIAS_CACHE: sessoes.cache_sessoes(BASE_DIR),
+}
+# LRU de cada processo na frente do ``default`` (core/caches/camadas.py)
+CACHE_CAMADAS = caches.configuracao_camadas()
+# Segundos que uma página de listagem fica em cache (save/delete invalidam antes)
+CACHE_LISTAGENS_TEMPO = int(os.environ.get('CACHE_LISTAGENS_TEMPO', '60'))
+
+# Sessões (SESSION_STORE): em desenvolvimento, tabela + cache em memória -
+# cada página lê a sessão do cache e o banco só é escrito quando ela muda.
+# Produção: smartpaws_settings.settings.production
+SESSION_ENGINE = sessoes.motor_sessoes()
+SESSION_CACHE_ALIAS = sessoes.ALIAS_CACHE
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Mensagens no cookie; só as que não couberem nele vão para a sessão
+MESSAGE_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+
 
 AUTH_USER_MODEL = 'usuarios.Usuario'  # ← ADICIONE ESTA LINHA
 
@@ -136,6 +193,10 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Uploads (originais e derivadas geradas por core/imagens.py)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
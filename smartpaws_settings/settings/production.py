@@ -0,0 +1,76 @@
+# ==========================================
+# smartpaws_settings/settings/production.py
+# ==========================================
+"""
+Perfil de produção - Smart Paws
+
+Parte dos settings de smartpaws/settings.py e troca o que muda em produção,
+tudo por variáveis de ambiente:
+
+    DJANGO_SETTINGS_MODULE=smartpaws_settings.settings.production
+    DJANGO_SECRET_KEY=...  DJANGO_ALLOWED_HOSTS=smartpaws.com.br,www.smartpaws.com.br
+    DB_NAME=smartpaws DB_USER=smartpaws DB_PASSWORD=... DB_HOST=db
+
+Banco: PostgreSQL com conexões persistentes (``DB_CONN_MAX_AGE``, padrão
+600 s) e verificação de saúde antes de reaproveitar uma conexão. Com
+``DB_POOL=1`` (requer ``psycopg[binary,pool]``) usa o pool de conexões do
+psycopg 3 no lugar das conexões persistentes. ``DB_ENGINE=sqlite`` mantém o
+SQLite com os PRAGMAs de ``SQLITE_PRAGMAS``. ``DB_REPLICAS`` manda as
+leituras do catálogo para réplicas (core/replicas.py). Detalhes em
+core/banco.py.
+
+Sessões: tabela + cache (``SESSION_STORE``, padrão ``cached_db``) num cache
+compartilhado pelos processos (``SESSION_CACHE``, obrigatório).
+``SESSION_STORE=cache`` tira as sessões do banco de vez. Detalhes em
+core/sessoes. As expiradas saem da tabela com ``manage.py limpar_sessoes``
+(agendado, por exemplo, uma vez por dia).
+
+Cache: ``default`` (``CACHE_COMPARTILHADO``, obrigatório e nunca
+``locmem``) é a camada compartilhada do cache em camadas (core/caches), com
+uma LRU em cada processo na frente. Nele cada processo também reserva o
+identificador da numeração dos pedidos (core/numeracao.py).
+
+Os dois caches não têm padrão: com várias máquinas precisam ser
+``redis://...`` ou ``memcached://...``. ``arquivo`` só serve numa máquina
+e lista a pasta inteira a cada escrita, então tem de ser escolhido
+explicitamente.
+"""
+
+import os
+
+from core import banco, caches, sessoes
+from smartpaws.settings import *  # noqa: F401,F403
+from smartpaws.settings import BASE_DIR
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = [
+    host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()
+]
+
+DATABASES = {
+    'default': banco.configuracao_banco(
+        BASE_DIR, engine='postgresql', conn_max_age=600, health_checks=True,
+    ),
+}
+DATABASES.update(banco.configuracao_replicas(DATABASES['default']))
+BANCOS_REPLICA = [alias for alias in DATABASES if alias != 'default']
+
+# Com vários processos os caches não podem ser os da memória de cada um:
+# uma invalidação (ou uma sessão encerrada) num não chegaria aos outros.
+# Sem padrão (ver o docstring): CACHE_COMPARTILHADO e SESSION_CACHE são
+# obrigatórios, e o default não pode ser locmem (a numeração dos pedidos
+# reserva nele o identificador de cada processo)
+CACHES = {
+    'default': caches.cache_compartilhado(BASE_DIR, cache=None, entre_processos=True),
+    sessoes.ALIAS_CACHE: sessoes.cache_sessoes(BASE_DIR, cache=None),
+}
+SESSION_ENGINE = sessoes.motor_sessoes()
+
+# Em produção o orçamento de consultas só registra aviso
+ORCAMENTO_CONSULTAS_ESTRITO = False
+
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
@@ -62,7 +62,7 @@ async function updateQuantity(itemId, quantidade) {
         formData.append('quantidade', quantidade);
         formData.append('csrfmiddlewaretoken', getCsrfToken());
         
-        const response = await fetch(`/carrinho/atualizar/${itemId}/`, {
+        const response = await fetch(`/carrinho/api/atualizar/${itemId}/`, {
             method: 'POST',
             headers: {
                 'X-Requested-With': 'XMLHttpRequest',
@@ -103,7 +103,7 @@ async function handleRemoveItem(e) {
         const formData = new FormData();
         formData.append('csrfmiddlewaretoken', getCsrfToken());
         
-        const response = await fetch(`/carrinho/remover/${itemId}/`, {
+        const response = await fetch(`/carrinho/api/remover/${itemId}/`, {
             method: 'POST',
             headers: {
                 'X-Requested-With': 'XMLHttpRequest',
@@ -149,7 +149,7 @@ async function handleRemoveItem(e) {
 // Atualiza contador do carrinho no header
 async function updateCarrinhoCount() {
     try {
-        const response = await fetch('/carrinho/api/count/', {
+        const response = await fetch('/carrinho/api/contador/', {
             headers: {
                 'X-Requested-With': 'XMLHttpRequest',
             }
@@ -179,7 +179,7 @@ async function adicionarAoCarrinho(produtoId, quantidade = 1) {
         formData.append('quantidade', quantidade);
         formData.append('csrfmiddlewaretoken', getCsrfToken());
         
-        const response = await fetch(`/carrinho/adicionar/${produtoId}/`, {
+        const response = await fetch(`/carrinho/api/adicionar/${produtoId}/`, {
             method: 'POST',
             headers: {
                 'X-Requested-With': 'XMLHttpRequest',
@@ -95,7 +95,8 @@ document.addEventListener('DOMContentLoaded', function() {
             e.preventDefault();
             
             const formData = new FormData(this);
-            const url = this.action;
+            // Endpoint assíncrono; o action fica para quem não tem JavaScript
+            const url = this.dataset.api || this.action;
             const csrftoken = getCookie('csrftoken');
             const button = this.querySelector('button[type="submit"]');
             const originalText = button.innerHTML;
@@ -0,0 +1,6 @@
+from django.test import override_settings
+
+# Orçamento de consultas estrito em toda a suíte, qualquer que seja o runner
+# (manage.py test, pytest-django...): uma view que estoure o seu
+# @orcamento_consultas derruba o teste em vez de só registrar um aviso
+override_settings(ORCAMENTO_CONSULTAS_ESTRITO=True).enable()
@@ -0,0 +1,551 @@
+# ==========================================
+# tests/test_carrinho.py
+# ==========================================
+
+import csv
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import RequestContext, Template
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from carrinho import anonimo, contador, exportacao
+from carrinho.models import Carrinho, ItemCarrinho, ItemPedido, Pedido
+from produtos.models import CategoriaProduto, Produto
+
+User = get_user_model()
+
+
+class TotaisCarrinhoTest(TestCase):
+    """Testes dos totais desnormalizados do carrinho"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='cliente', email='cliente@teste.com', password='senha123'
+        )
+        categoria = CategoriaProduto.objects.create(nome='Rações')
+        cls.racao = Produto.objects.create(
+            nome='Ração', categoria=categoria, descricao='',
+            preco_original=Decimal('80.00'), estoque=10,
+        )
+        cls.petisco = Produto.objects.create(
+            nome='Petisco', categoria=categoria, descricao='',
+            preco_original=Decimal('12.50'), estoque=10,
+        )
+
+    def setUp(self):
+        self.carrinho = Carrinho.objects.create(usuario=self.usuario)
+        self.client.force_login(self.usuario)
+
+    def test_totais_acompanham_itens(self):
+        item = self.carrinho.itens.create(produto=self.racao, quantidade=2)
+        self.carrinho.itens.create(produto=self.petisco, quantidade=1)
+
+        self.assertEqual(self.carrinho.total_itens, 3)
+        self.assertEqual(self.carrinho.subtotal, Decimal('172.50'))
+        self.assertEqual(self.carrinho.frete, Decimal('15.00'))
+        self.assertEqual(self.carrinho.total, Decimal('187.50'))
+
+        # Passa do mínimo do frete grátis
+        item.quantidade = 3
+        item.save()
+        self.assertEqual(self.carrinho.subtotal, Decimal('252.50'))
+        self.assertEqual(self.carrinho.frete, Decimal('0.00'))
+        self.assertEqual(self.carrinho.total, Decimal('252.50'))
+
+        item.delete()
+        self.assertEqual(self.carrinho.total_itens, 1)
+        self.assertEqual(self.carrinho.total, Decimal('27.50'))
+
+    def test_excluir_produto_atualiza_totais_e_contador(self):
+        self.carrinho.itens.create(produto=self.racao, quantidade=2)
+        self.carrinho.itens.create(produto=self.petisco, quantidade=1)
+        self.assertEqual(contador.total_itens(self.usuario.pk), 3)
+
+        # Os itens saem em cascata, sem ItemCarrinho.delete()
+        Produto.objects.filter(pk=self.racao.pk).delete()
+
+        self.carrinho.refresh_from_db()
+        self.assertEqual(self.carrinho.total_itens, 1)
+        self.assertEqual(self.carrinho.total, Decimal('27.50'))
+        self.assertEqual(contador.total_itens(self.usuario.pk), 1)
+
+    def test_limpar_zera_totais(self):
+        self.carrinho.itens.create(produto=self.racao, quantidade=2)
+        self.carrinho.limpar()
+
+        self.carrinho.refresh_from_db()
+        self.assertEqual(self.carrinho.total_itens, 0)
+        self.assertEqual(self.carrinho.subtotal, Decimal('0.00'))
+        self.assertFalse(self.carrinho.itens.exists())
+
+    def test_ajax_nao_carrega_itens(self):
+        item = self.carrinho.itens.create(produto=self.racao, quantidade=1)
+        self.carrinho.itens.create(produto=self.petisco, quantidade=1)
+
+        # SELECT item+carrinho, UPDATE item, UPDATE carrinho, SELECT totais
+        # (+ usuário e savepoint do save atômico; a sessão vem do cache)
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                reverse('carrinho:atualizar', args=[item.id]), {'quantidade': 2}
+            )
+        dados = response.json()
+        self.assertEqual(dados['total_itens'], 3)
+        self.assertEqual(dados['carrinho_subtotal'], 172.5)
+        self.assertEqual(dados['carrinho_total'], 187.5)
+
+        response = self.client.post(
+            reverse('carrinho:remover', args=[item.id]),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        dados = response.json()
+        self.assertEqual(dados['total_itens'], 1)
+        self.assertEqual(dados['carrinho_total'], 27.5)
+
+    def test_comando_detecta_e_corrige_divergencia(self):
+        self.carrinho.itens.create(produto=self.racao, quantidade=2)
+        Carrinho.objects.filter(pk=self.carrinho.pk).update(total_itens=99, total=Decimal('1.00'))
+
+        saida = StringIO()
+        call_command('verificar_carrinhos', stdout=saida)
+        self.assertIn('1 de 1 carrinhos divergentes', saida.getvalue())
+
+        call_command('verificar_carrinhos', '--corrigir', stdout=StringIO())
+        self.carrinho.refresh_from_db()
+        self.assertEqual(self.carrinho.total_itens, 2)
+        self.assertEqual(self.carrinho.total, Decimal('175.00'))
+
+        saida = StringIO()
+        call_command('verificar_carrinhos', stdout=saida)
+        self.assertIn('nenhuma divergência', saida.getvalue())
+
+
+class ContadorCarrinhoTest(TestCase):
+    """Testes do contador de itens no cabeçalho"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='badge', email='badge@teste.com', password='senha123'
+        )
+        categoria = CategoriaProduto.objects.create(nome='Brinquedos')
+        cls.produto = Produto.objects.create(
+            nome='Bolinha', categoria=categoria, descricao='',
+            preco_original=Decimal('10.00'), estoque=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.usuario
+
+    def test_sem_carrinho_nao_cria_nada(self):
+        self.client.force_login(self.usuario)
+        self.client.get(reverse('core:home'))
+        self.assertFalse(Carrinho.objects.exists())
+
+    def test_home_com_contador_em_cache_so_busca_o_usuario(self):
+        carrinho = Carrinho.objects.create(usuario=self.usuario)
+        carrinho.itens.create(produto=self.produto, quantidade=3)
+        self.client.force_login(self.usuario)
+        self.client.get(reverse('core:home'))
+
+        # Pela view inteira: só o usuário da sessão; blocos da home, sessão
+        # e contador vêm do cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('core:home'))
+        self.assertContains(response, '<span class="carrinho-count">3</span>', html=True)
+
+    def test_template_que_nao_usa_contador_nao_consulta(self):
+        template = Template('<h1>{{ titulo }}</h1>')
+        with self.assertNumQueries(0):
+            template.render(RequestContext(self.request, {'titulo': 'Produtos'}))
+
+    def test_mudancas_no_carrinho_invalidam_contador(self):
+        carrinho = Carrinho.objects.create(usuario=self.usuario)
+        self.assertEqual(contador.total_itens(self.usuario.pk), 0)
+
+        item = carrinho.itens.create(produto=self.produto, quantidade=2)
+        self.assertEqual(contador.total_itens(self.usuario.pk), 2)
+
+        item.delete()
+        self.assertEqual(contador.total_itens(self.usuario.pk), 0)
+
+        carrinho.itens.create(produto=self.produto, quantidade=1)
+        carrinho.limpar()
+        self.assertEqual(contador.total_itens(self.usuario.pk), 0)
+
+
+class CarrinhoAssincronoTest(TestCase):
+    """Endpoints JSON assíncronos do carrinho (carrinho/api.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='apressado', email='apressado@teste.com', password='senha123'
+        )
+        cls.outro = User.objects.create_user(
+            username='vizinho', email='vizinho@teste.com', password='senha123'
+        )
+        categoria = CategoriaProduto.objects.create(nome='Petiscos')
+        cls.petisco = Produto.objects.create(
+            nome='Bifinho', categoria=categoria, descricao='',
+            preco_original=Decimal('60.00'), preco_desconto=Decimal('50.00'), estoque=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_adicionar_cria_e_incrementa(self):
+        await self.async_client.aforce_login(self.usuario)
+        url = reverse('carrinho:api_adicionar', args=[self.petisco.pk])
+
+        resposta = await self.async_client.post(url, {'quantidade': 2})
+        self.assertEqual(resposta.json(), {
+            'success': True, 'total_itens': 2, 'message': 'Bifinho adicionado ao carrinho!',
+        })
+        resposta = await self.async_client.post(url, {'quantidade': 3})
+        self.assertEqual(resposta.json()['total_itens'], 5)
+
+        carrinho = await Carrinho.objects.aget(usuario=self.usuario)
+        item = await carrinho.itens.aget()
+        self.assertEqual((item.quantidade, item.preco_unitario), (5, Decimal('50.00')))
+        # 250,00 passa do frete grátis
+        self.assertEqual((carrinho.subtotal, carrinho.frete, carrinho.total), (
+            Decimal('250.00'), Decimal('0.00'), Decimal('250.00'),
+        ))
+
+    async def test_atualizar_e_remover(self):
+        await self.async_client.aforce_login(self.usuario)
+        carrinho = await Carrinho.objects.acreate(usuario=self.usuario)
+        item = await carrinho.itens.acreate(produto=self.petisco, quantidade=1)
+
+        resposta = await self.async_client.post(
+            reverse('carrinho:api_atualizar', args=[item.pk]), {'quantidade': 3}
+        )
+        self.assertEqual(resposta.json(), {
+            'success': True, 'item_total': 150.0, 'total_itens': 3,
+            'carrinho_subtotal': 150.0, 'carrinho_total': 165.0,
+        })
+        resposta = await self.async_client.post(
+            reverse('carrinho:api_atualizar', args=[item.pk]), {'quantidade': 0}
+        )
+        self.assertEqual(resposta.status_code, 400)
+
+        resposta = await self.async_client.post(reverse('carrinho:api_remover', args=[item.pk]))
+        self.assertEqual(resposta.json()['total_itens'], 0)
+        self.assertEqual(resposta.json()['carrinho_total'], 15.0)
+        self.assertFalse(await carrinho.itens.aexists())
+
+    async def test_item_de_outro_usuario_e_anonimo(self):
+        carrinho = await Carrinho.objects.acreate(usuario=self.outro)
+        item = await carrinho.itens.acreate(produto=self.petisco, quantidade=1)
+
+        # Visitante: o id é de produto do carrinho do cookie, e esse está vazio
+        resposta = await self.async_client.post(reverse('carrinho:api_remover', args=[item.pk]))
+        self.assertEqual(resposta.status_code, 404)
+        resposta = await self.async_client.get(reverse('carrinho:api_contador'))
+        self.assertEqual(resposta.json(), {'count': 0})
+
+        await self.async_client.aforce_login(self.usuario)
+        resposta = await self.async_client.post(reverse('carrinho:api_remover', args=[item.pk]))
+        self.assertEqual(resposta.status_code, 404)
+        self.assertTrue(await carrinho.itens.aexists())
+
+    async def test_contador_em_cache_e_invalidado(self):
+        await self.async_client.aforce_login(self.usuario)
+        url = reverse('carrinho:api_contador')
+        self.assertEqual((await self.async_client.get(url)).json(), {'count': 0})
+        self.assertEqual(await cache.aget(contador.chave(self.usuario.pk)), 0)
+
+        await self.async_client.post(reverse('carrinho:api_adicionar', args=[self.petisco.pk]))
+        self.assertEqual((await self.async_client.get(url)).json(), {'count': 1})
+
+    def test_views_sincronas_continuam_atendendo(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('carrinho:api_adicionar', args=[self.petisco.pk]))
+        resposta = self.client.get(reverse('carrinho:count'))
+        self.assertEqual(resposta.json(), {'count': 1})
+
+
+class CarrinhoAnonimoTest(TestCase):
+    """Carrinho do visitante no cookie assinado (carrinho/anonimo.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='visitante@teste.com', email='visitante@teste.com', password='senha123'
+        )
+        categoria = CategoriaProduto.objects.create(nome='Brinquedos')
+        cls.bolinha = Produto.objects.create(
+            nome='Bolinha', categoria=categoria, descricao='',
+            preco_original=Decimal('20.00'), estoque=10,
+        )
+        cls.corda = Produto.objects.create(
+            nome='Corda', categoria=categoria, descricao='',
+            preco_original=Decimal('35.00'), estoque=10,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def adicionar(self, produto, quantidade=1):
+        return self.client.post(
+            reverse('carrinho:api_adicionar', args=[produto.pk]), {'quantidade': quantidade}
+        )
+
+    def test_visitante_nao_cria_linhas_no_banco(self):
+        self.adicionar(self.bolinha, 2)
+        self.adicionar(self.corda)
+        self.adicionar(self.bolinha)
+
+        self.assertEqual(self.client.get(reverse('carrinho:api_contador')).json(), {'count': 4})
+        self.assertFalse(Carrinho.objects.exists())
+        self.assertFalse(ItemCarrinho.objects.exists())
+        self.assertFalse(Session.objects.exists())
+
+        cookie = self.client.cookies[anonimo.nome_cookie()]
+        self.assertEqual(
+            anonimo.decodificar(cookie.value.split(':')[0]), {self.bolinha.pk: 3, self.corda.pk: 1}
+        )
+
+    def test_cookie_adulterado_e_ignorado(self):
+        self.adicionar(self.bolinha)
+        cookie = self.client.cookies[anonimo.nome_cookie()]
+        cookie.set(cookie.key, cookie.value.replace(f'{self.bolinha.pk}x1', f'{self.bolinha.pk}x9'), '')
+
+        self.assertEqual(self.client.get(reverse('carrinho:api_contador')).json(), {'count': 0})
+
+    def test_pagina_e_atualizacao_do_visitante(self):
+        self.adicionar(self.bolinha, 2)
+        resposta = self.client.get(reverse('carrinho:visualizar'))
+        self.assertContains(resposta, 'Bolinha')
+
+        resposta = self.client.post(
+            reverse('carrinho:api_atualizar', args=[self.bolinha.pk]), {'quantidade': 3}
+        )
+        self.assertEqual(resposta.json(), {
+            'success': True, 'item_total': 60.0, 'total_itens': 3,
+            'carrinho_subtotal': 60.0, 'carrinho_total': 75.0,
+        })
+        resposta = self.client.post(reverse('carrinho:api_remover', args=[self.bolinha.pk]))
+        self.assertEqual(resposta.json()['total_itens'], 0)
+        self.assertEqual(self.client.cookies[anonimo.nome_cookie()].value, '')
+
+    def test_login_mescla_com_o_carrinho_da_conta(self):
+        carrinho = Carrinho.objects.create(usuario=self.usuario)
+        carrinho.itens.create(produto=self.bolinha, quantidade=1)
+        self.adicionar(self.bolinha, 2)
+        self.adicionar(self.corda)
+
+        self.client.post(reverse('usuarios:login'), {
+            'username': 'visitante@teste.com', 'password': 'senha123',
+        })
+
+        quantidades = dict(carrinho.itens.values_list('produto__nome', 'quantidade'))
+        self.assertEqual(quantidades, {'Bolinha': 3, 'Corda': 1})
+        carrinho.refresh_from_db()
+        self.assertEqual((carrinho.total_itens, carrinho.subtotal), (4, Decimal('95.00')))
+        self.assertEqual(self.client.cookies[anonimo.nome_cookie()].value, '')
+
+    def test_mesclar_grava_todos_os_itens_num_upsert(self):
+        carrinho = Carrinho.objects.create(usuario=self.usuario)
+        carrinho.itens.create(produto=self.bolinha, quantidade=1)
+
+        with CaptureQueriesContext(connection) as consultas:
+            anonimo.mesclar(self.usuario, {self.bolinha.pk: 2, self.corda.pk: 1})
+
+        escritas = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(('INSERT INTO "carrinho_itemcarrinho"', 'UPDATE "carrinho_itemcarrinho"'))
+        ]
+        self.assertEqual(len(escritas), 1)
+        self.assertIn('ON CONFLICT', escritas[0])
+        # A soma é feita no banco: nenhuma leitura das quantidades do carrinho
+        self.assertFalse([
+            consulta for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('SELECT') and '"carrinho_itemcarrinho"."quantidade"' in consulta['sql']
+        ])
+        self.assertEqual(carrinho.itens.get(produto=self.bolinha).quantidade, 3)
+        item = carrinho.itens.get(produto=self.corda)
+        self.assertEqual((item.quantidade, item.preco_unitario), (1, self.corda.preco_final))
+
+
+class FinalizarPedidoTest(TestCase):
+    """Testes da montagem do pedido a partir do carrinho"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='comprador', email='comprador@teste.com', password='senha123'
+        )
+        categoria = CategoriaProduto.objects.create(nome='Higiene')
+        cls.produtos = [
+            Produto.objects.create(
+                nome=f'Shampoo {i}', categoria=categoria, descricao='',
+                preco_original=Decimal('30.00'), estoque=5,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.carrinho = Carrinho.objects.create(usuario=self.usuario)
+        self.client.force_login(self.usuario)
+
+    def _finalizar(self):
+        return self.client.post(reverse('carrinho:finalizar'), {
+            'endereco_entrega': 'Rua A, 1',
+            'forma_pagamento': 'pix',
+        })
+
+    def test_pedido_itens_estoque_e_carrinho(self):
+        for produto in self.produtos:
+            self.carrinho.itens.create(produto=produto, quantidade=2)
+
+        response = self._finalizar()
+
+        pedido = Pedido.objects.get(usuario=self.usuario)
+        self.assertRedirects(response, reverse('carrinho:pedido_confirmado', args=[pedido.id]),
+                             fetch_redirect_response=False)
+        self.assertEqual(pedido.subtotal, Decimal('180.00'))
+        self.assertEqual(pedido.total, Decimal('195.00'))
+        self.assertIn(pedido.numero_pedido, pedido.qr_code_pix)
+        self.assertEqual(pedido.itens.count(), 3)
+        self.assertEqual(
+            list(Produto.objects.order_by('pk').values_list('estoque', flat=True)), [3, 3, 3]
+        )
+        self.assertFalse(self.carrinho.itens.exists())
+        self.carrinho.refresh_from_db()
+        self.assertEqual(self.carrinho.total_itens, 0)
+
+    def test_numero_de_comandos_nao_depende_do_carrinho(self):
+        from carrinho.checkout import finalizar_carrinho
+
+        self.carrinho.itens.create(produto=self.produtos[0], quantidade=1)
+        with self.assertNumQueries(11) as uma_linha:
+            finalizar_carrinho(self.carrinho, 'Rua A, 1', 'pix')
+
+        for produto in self.produtos:
+            self.carrinho.itens.create(produto=produto, quantidade=1)
+        with self.assertNumQueries(len(uma_linha.captured_queries)):
+            finalizar_carrinho(self.carrinho, 'Rua A, 1', 'pix')
+
+    def test_estoque_insuficiente_nao_grava_nada(self):
+        self.carrinho.itens.create(produto=self.produtos[0], quantidade=1)
+        self.carrinho.itens.create(produto=self.produtos[1], quantidade=6)
+
+        response = self._finalizar()
+
+        self.assertRedirects(response, reverse('carrinho:visualizar'), fetch_redirect_response=False)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(
+            list(Produto.objects.order_by('pk').values_list('estoque', flat=True)), [5, 5, 5]
+        )
+        self.assertEqual(self.carrinho.itens.count(), 2)
+
+
+class ExportacaoPedidosTest(TestCase):
+    """Testes da exportação de pedidos em CSV/XLSX"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(
+            username='cliente', email='cliente@teste.com', password='senha123'
+        )
+        cls.pago = cls.criar_pedido('pago', datetime(2025, 1, 10, 12), itens=[('Ração', 2, '80.00'), ('Bola', 1, '12.50')])
+        cls.pendente = cls.criar_pedido('pendente', datetime(2025, 2, 5, 9), itens=[('Petisco', 3, '5.00')])
+        cls.vazio = cls.criar_pedido('cancelado', datetime(2025, 2, 28, 23, 59), itens=[])
+
+    @classmethod
+    def criar_pedido(cls, status, criado_em, itens):
+        pedido = Pedido.objects.create(
+            usuario=cls.usuario, subtotal=Decimal('100.00'), frete=Decimal('15.00'),
+            total=Decimal('115.00'), endereco_entrega='Rua A, 1', forma_pagamento='pix', status=status,
+        )
+        Pedido.objects.filter(pk=pedido.pk).update(created_at=timezone.make_aware(criado_em))
+        ItemPedido.objects.bulk_create([
+            ItemPedido(
+                pedido=pedido, nome_produto=nome, quantidade=quantidade,
+                preco_unitario=Decimal(preco), subtotal=Decimal(preco) * quantidade,
+            )
+            for nome, quantidade, preco in itens
+        ])
+        return pedido
+
+    def test_uma_linha_por_item_e_pedido_sem_itens(self):
+        linhas = list(exportacao.linhas(Pedido.objects.all()))
+        self.assertEqual([linha[0] for linha in linhas], [
+            self.pago.numero_pedido, self.pago.numero_pedido, self.pendente.numero_pedido, self.vazio.numero_pedido,
+        ])
+        self.assertEqual(linhas[0][2], 'Pago')
+        self.assertEqual(linhas[0][6], 'cliente@teste.com')
+        self.assertEqual(linhas[1][12:], ('Bola', 1, Decimal('12.50'), Decimal('12.50')))
+        self.assertEqual(linhas[3][11:], exportacao.SEM_ITEM)
+
+    def test_consultas_nao_crescem_com_os_pedidos(self):
+        # pedidos + itens pré-carregados, independente da quantidade
+        with self.assertNumQueries(2):
+            list(exportacao.linhas(Pedido.objects.all(), lote=10))
+
+    def test_filtros_por_periodo_e_status(self):
+        fevereiro = exportacao.filtrar_pedidos(inicio=date(2025, 2, 1), fim=date(2025, 2, 28))
+        self.assertQuerySetEqual(fevereiro, [self.vazio, self.pendente])
+        self.assertQuerySetEqual(exportacao.filtrar_pedidos(status=['pago', 'pendente']), [self.pendente, self.pago])
+
+    def test_csv_em_streaming(self):
+        resposta = exportacao.resposta_csv(Pedido.objects.all())
+        self.assertTrue(resposta.streaming)
+        conteudo = b''.join(resposta.streaming_content).decode('utf-8-sig')
+        linhas = list(csv.reader(StringIO(conteudo)))
+        self.assertEqual(linhas[0], exportacao.CABECALHO)
+        self.assertEqual(len(linhas), 5)
+        self.assertEqual(linhas[1][1], '2025-01-10 12:00:00')
+
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        arquivo = BytesIO()
+        self.assertEqual(exportacao.escrever_xlsx(Pedido.objects.all(), arquivo), 4)
+        arquivo.seek(0)
+        linhas = list(load_workbook(arquivo, read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(list(linhas[0]), exportacao.CABECALHO)
+        self.assertEqual(linhas[1][1], datetime(2025, 1, 10, 12))
+        self.assertEqual(linhas[2][14], 12.5)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            saida = os.path.join(pasta, 'pedidos.csv')
+            call_command('exportar_pedidos', saida, status=['pendente'], stdout=StringIO())
+            with open(saida, encoding='utf-8-sig') as arquivo:
+                linhas = list(csv.reader(arquivo))
+        self.assertEqual(len(linhas), 2)
+        self.assertEqual(linhas[1][0], self.pendente.numero_pedido)
+
+    def test_admin(self):
+        admin = User.objects.create_superuser(email='admin@teste.com', username='admin', password='senha12345')
+        self.client.force_login(admin)
+        url = reverse('admin:carrinho_pedido_exportar')
+
+        self.assertContains(self.client.get(reverse('admin:carrinho_pedido_changelist')), url)
+        self.assertContains(self.client.get(url), 'Exportar')
+        resposta = self.client.get(url, {'inicio': '2025-02-01', 'formato': 'xlsx'})
+        self.assertEqual(resposta['Content-Type'], exportacao.TIPO_XLSX)
+        self.assertIn('attachment', resposta['Content-Disposition'])
+
+        resposta = self.client.post(reverse('admin:carrinho_pedido_changelist'), {
+            'action': 'exportar_csv', '_selected_action': [self.pago.pk],
+        })
+        conteudo = b''.join(resposta.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(conteudo.strip().splitlines()), 3)
@@ -0,0 +1,572 @@
+# ==========================================
+# tests/test_models.py
+# ==========================================
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from carrinho.models import Carrinho, Pedido
+from core import banco, caches, imagens, numeracao, planos, semeadura, sessoes
+from core.caches import camadas
+from core.models import Banner
+from core.numeracao import GeradorNumeros, digito_verificador, validar
+from core.sessoes import cached_db
+from pets.models import Pet
+from produtos import busca
+from produtos.models import CategoriaProduto, Produto
+
+User = get_user_model()
+
+
+class NumeracaoPedidoTest(SimpleTestCase):
+    """Testes do gerador de números de pedido"""
+
+    def test_numeros_unicos_crescentes_e_validos(self):
+        gerador = GeradorNumeros(worker_id=7)
+        numeros = [gerador.proximo() for _ in range(20000)]
+
+        self.assertEqual(len(set(numeros)), len(numeros))
+        self.assertEqual(numeros, sorted(numeros))
+        self.assertTrue(all(validar(numero) for numero in numeros))
+        self.assertTrue(all(numero[12:15] == '007' for numero in numeros))
+
+    def test_relogio_voltando_nao_repete(self):
+        instantes = iter([1_800_000_000_000, 1_800_000_000_000, 1_799_999_999_000, 1_800_000_000_001])
+        gerador = GeradorNumeros(worker_id=1, relogio=lambda: next(instantes))
+        numeros = [gerador.proximo() for _ in range(4)]
+
+        self.assertEqual(numeros, sorted(set(numeros)))
+
+    def test_sequencia_esgotada_avanca_o_milissegundo(self):
+        gerador = GeradorNumeros(worker_id=1, relogio=lambda: 1_800_000_000_000)
+        numeros = [gerador.proximo() for _ in range(2500)]
+
+        self.assertEqual(len(set(numeros)), 2500)
+        self.assertEqual(numeros, sorted(numeros))
+
+    def test_workers_diferentes_nao_colidem(self):
+        relogio = lambda: 1_800_000_000_000  # noqa: E731
+        a = [GeradorNumeros(worker_id=1, relogio=relogio).proximo() for _ in range(3)]
+        b = [GeradorNumeros(worker_id=2, relogio=relogio).proximo() for _ in range(3)]
+        self.assertFalse(set(a) & set(b))
+
+    def test_cada_processo_reserva_seu_identificador(self):
+        cache.clear()
+        relogio = lambda: 1_800_000_000_000  # noqa: E731
+        a, b = GeradorNumeros(relogio=relogio), GeradorNumeros(relogio=relogio)
+        self.assertNotEqual(a.proximo(), b.proximo())
+        self.assertNotEqual(a.worker_id, b.worker_id)
+
+        # Filho criado por fork: não herda o identificador do pai
+        do_pai = a.worker_id
+        with patch('core.numeracao.os.getpid', return_value=os.getpid() + 1):
+            a.proximo()
+        self.assertNotIn(a.worker_id, (do_pai, b.worker_id))
+
+    def test_reserva_vencida_e_tomada_troca_identificador(self):
+        cache.clear()
+        gerador = GeradorNumeros()
+        gerador.proximo()
+        anterior = gerador.worker_id
+        cache.set(f'numeracao:worker:{anterior}', 'outro processo')
+        gerador.proximo()
+        self.assertEqual(gerador.worker_id, anterior)  # renovação só depois de um terço do prazo
+
+        gerador._reservado_em -= numeracao.RESERVA_TEMPO
+        gerador.proximo()
+        self.assertNotEqual(gerador.worker_id, anterior)
+        self.assertEqual(cache.get(f'numeracao:worker:{gerador.worker_id}'), gerador._token)
+
+    def test_digito_verificador_detecta_erro_de_digitacao(self):
+        self.assertEqual(digito_verificador('7992739871'), '3')
+        numero = GeradorNumeros(worker_id=3).proximo()
+        trocado = numero[:5] + str((int(numero[5]) + 1) % 10) + numero[6:]
+        self.assertFalse(validar(trocado))
+
+
+class NumeroPedidoModeloTest(TestCase):
+
+    def test_pedido_recebe_numero_sem_consulta_extra(self):
+        usuario = User.objects.create_user(username='n', email='n@teste.com', password='senha123')
+        with self.assertNumQueries(1):
+            pedido = Pedido.objects.create(
+                usuario=usuario, subtotal=10, frete=15, total=25,
+                endereco_entrega='Rua B, 2', forma_pagamento='pix',
+            )
+        self.assertTrue(validar(pedido.numero_pedido))
+
+
+def imagem_png(largura, altura, modo='RGBA'):
+    saida = io.BytesIO()
+    Image.new(modo, (largura, altura), (200, 120, 40, 128)[:len(modo)]).save(saida, format='PNG')
+    return saida.getvalue()
+
+
+class DerivadasImagemTest(TestCase):
+    """Testes das derivadas responsivas"""
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=self.pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def _existe(self, nome):
+        return os.path.exists(os.path.join(self.pasta, nome))
+
+    def test_upload_gera_derivadas_com_hash(self):
+        arquivo = SimpleUploadedFile('Banner Home.PNG', imagem_png(1500, 600))
+        with self.captureOnCommitCallbacks(execute=True):
+            banner = Banner.objects.create(titulo='Home', imagem=arquivo)
+
+        hash_ = imagens.hash_do_nome(banner.imagem.name)
+        self.assertIsNotNone(hash_)
+        for largura in imagens.LARGURAS:
+            for formato in imagens.FORMATOS:
+                self.assertTrue(self._existe(imagens.nome_derivada(hash_, largura, formato)))
+
+        with Image.open(os.path.join(self.pasta, imagens.nome_derivada(hash_, 640, 'jpeg'))) as derivada:
+            self.assertEqual(derivada.size, (640, 256))
+            self.assertEqual(derivada.mode, 'RGB')
+
+        html = Template('{% load imagens %}{% srcset banner.imagem "webp" %}').render(Context({'banner': banner}))
+        self.assertEqual(html.count('w, ') + 1, len(imagens.LARGURAS))
+        self.assertIn(f'{hash_}-1024.webp 1024w', html)
+
+    def test_trocar_imagem_apaga_derivadas_antigas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            banner = Banner.objects.create(titulo='A', imagem=SimpleUploadedFile('a.png', imagem_png(400, 200)))
+            copia = Banner.objects.create(titulo='Cópia', imagem=SimpleUploadedFile('c.png', imagem_png(400, 200)))
+        antigo = imagens.hash_do_nome(banner.imagem.name)
+
+        # A cópia usa o mesmo conteúdo: as derivadas ficam
+        with self.captureOnCommitCallbacks(execute=True):
+            banner.imagem = SimpleUploadedFile('b.png', imagem_png(300, 100))
+            banner.save()
+        self.assertTrue(self._existe(imagens.nome_derivada(antigo, 320, 'webp')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copia.imagem = SimpleUploadedFile('d.png', imagem_png(500, 100))
+            copia.save()
+        self.assertFalse(self._existe(imagens.nome_derivada(antigo, 320, 'webp')))
+        novo = imagens.hash_do_nome(copia.imagem.name)
+        self.assertTrue(self._existe(imagens.nome_derivada(novo, 320, 'webp')))
+
+    def test_arquivo_invalido_nao_derruba_o_commit(self):
+        with self.assertLogs('core.imagens', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                banner = Banner.objects.create(titulo='X', imagem=SimpleUploadedFile('x.png', b'nao e imagem'))
+        self.assertTrue(Banner.objects.filter(pk=banner.pk).exists())
+
+    def test_imagem_pequena_nao_e_ampliada(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            banner = Banner.objects.create(titulo='P', imagem=SimpleUploadedFile('p.png', imagem_png(200, 100)))
+
+        hash_ = imagens.hash_do_nome(banner.imagem.name)
+        with Image.open(os.path.join(self.pasta, imagens.nome_derivada(hash_, 1024, 'webp'))) as derivada:
+            self.assertEqual(derivada.size, (200, 100))
+
+    def test_original_antigo_usa_fallback_e_comando_gera(self):
+        nome = default_storage.save('banners/antigo.png', ContentFile(imagem_png(800, 400, 'RGB')))
+        banner = Banner.objects.create(titulo='Antigo', imagem=nome)
+
+        html = Template('{% load imagens %}{% imagem_responsiva b.imagem alt="x" %}').render(Context({'b': banner}))
+        self.assertIn('src="/media/banners/antigo.png"', html)
+        self.assertNotIn('<picture>', html)
+
+        call_command('gerar_derivadas', '--processos', '1', stdout=io.StringIO())
+
+        banner.refresh_from_db()
+        hash_ = imagens.hash_do_nome(banner.imagem.name)
+        self.assertIsNotNone(hash_)
+        self.assertTrue(self._existe(imagens.nome_derivada(hash_, 320, 'webp')))
+        html = Template('{% load imagens %}{% imagem_responsiva b.imagem alt="x" %}').render(Context({'b': banner}))
+        self.assertIn('<picture>', html)
+
+
+class SeedTest(TestCase):
+    """Testes do comando seed (core/semeadura.py)"""
+
+    def _seed(self, *args):
+        call_command('seed', '--escala', '0.01', *args, stdout=io.StringIO())
+
+    def _catalogo(self):
+        return list(Produto.objects.order_by('pk').values_list('slug', 'preco_original', 'categoria__nome'))
+
+    def test_gera_quantidades_e_dados_derivados(self):
+        self._seed()
+
+        esperado = semeadura.quantidades(0.01)
+        self.assertEqual(Produto.objects.count(), esperado['produtos'])
+        self.assertEqual(Pet.objects.count(), esperado['pets'])
+        self.assertEqual(Pedido.objects.count(), esperado['pedidos'])
+        self.assertTrue(all(validar(numero) for numero in Pedido.objects.values_list('numero_pedido', flat=True)))
+
+        # Totais dos carrinhos batem com os itens
+        calculados = {f'calc_{campo}': expressao for campo, expressao in Carrinho.expressoes_totais().items()}
+        for carrinho in Carrinho.objects.annotate(**calculados):
+            self.assertEqual(carrinho.total_itens, carrinho.calc_total_itens)
+            self.assertGreater(carrinho.total_itens, 0)
+
+        # Agregados de avaliação batem com as avaliações aprovadas
+        numero, soma = Produto.expressoes_avaliacoes_aprovadas()
+        produtos = Produto.objects.annotate(calc_numero=numero, calc_soma=soma)
+        self.assertTrue(produtos.filter(numero_avaliacoes__gt=0).exists())
+        for produto in produtos:
+            self.assertEqual((produto.numero_avaliacoes, produto.soma_notas), (produto.calc_numero, produto.calc_soma))
+
+        # Índice de busca reconstruído e usuários com a senha conhecida
+        produto = Produto.objects.order_by('pk').first()
+        self.assertIn(produto.pk, busca.buscar(produto.nome))
+        self.assertTrue(self.client.login(email=f'seed0@{semeadura.DOMINIO}', password=semeadura.SENHA))
+
+    def test_mesma_semente_gera_os_mesmos_dados(self):
+        self._seed('--semente', '7')
+        primeiro = self._catalogo()
+
+        self._seed('--semente', '7', '--limpar', '--forcar')
+        self.assertEqual(self._catalogo(), primeiro)
+
+        with self.settings(DEBUG=True):
+            self._seed('--semente', '8', '--limpar')
+        self.assertNotEqual(self._catalogo(), primeiro)
+
+    def test_limpar_sem_debug_exige_forcar(self):
+        categoria = CategoriaProduto.objects.create(nome='Existente')
+        with self.assertRaises(CommandError):
+            self._seed('--limpar')
+        self.assertTrue(CategoriaProduto.objects.filter(pk=categoria.pk).exists())
+
+    def test_banco_com_dados_exige_limpar(self):
+        CategoriaProduto.objects.create(nome='Existente')
+        with self.assertRaises(CommandError):
+            self._seed()
+
+    def test_carrega_fixture_em_lote(self):
+        categoria = CategoriaProduto.objects.create(nome='Rações')
+        Produto.objects.create(nome='Ração Premium', categoria=categoria, descricao='', preco_original=50, estoque=3)
+        fixture = os.path.join(tempfile.mkdtemp(), 'catalogo.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(fixture))
+        call_command('dumpdata', 'produtos.CategoriaProduto', 'produtos.Produto', output=fixture)
+
+        semeadura.apagar()
+        self.assertFalse(Produto.objects.exists())
+
+        call_command('seed', '--fixture', fixture, stdout=io.StringIO())
+        self.assertEqual(Produto.objects.get().nome, 'Ração Premium')
+        self.assertEqual(len(busca.buscar('racao')), 1)
+
+
+class IndicesConsultasQuentesTest(TestCase):
+    """Testes do verificar_indices (core/planos.py) sobre a massa do seed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Com tabelas de poucas linhas o planejador prefere, com razão, lê-las inteiras
+        call_command('seed', '--escala', '0.1', stdout=io.StringIO())
+
+    def test_nenhuma_consulta_quente_le_a_tabela_inteira(self):
+        saida = io.StringIO()
+        call_command('verificar_indices', '--plano', stdout=saida)
+        self.assertIn(f'✅ {len(planos.CONSULTAS)} consultas quentes usam índices', saida.getvalue())
+        self.assertIn('USING INDEX produto_ativo_vitrine', saida.getvalue())
+
+    def test_falha_sem_o_indice(self):
+        # O do Meta e o da chave estrangeira
+        with connection.cursor() as cursor:
+            restricoes = connection.introspection.get_constraints(cursor, 'carrinho_pedido')
+            for nome, restricao in restricoes.items():
+                if restricao['index'] and restricao['columns'][0] == 'usuario_id':
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(nome)}')
+        saida = io.StringIO()
+        with self.assertRaisesMessage(CommandError, '1 de'):
+            call_command('verificar_indices', stdout=saida)
+        self.assertIn('❌ meus pedidos: varredura completa de carrinho_pedido', saida.getvalue())
+
+    def test_ordenar_o_desempate_so_quando_permitido(self):
+        def por_avaliacao(amostra):
+            from servicos.models import Servico
+
+            return Servico.objects.filter(ativo=True).order_by('-prestador__avaliacao_media')
+
+        valores = planos.amostra()
+        plano = planos.explicar(planos.ConsultaQuente('avaliação', por_avaliacao), valores)
+        self.assertIn('USE TEMP B-TREE FOR RIGHT PART OF ORDER BY', plano.linhas)
+        self.assertEqual(plano.varreduras, ['servicos_prestador'])
+
+        plano = planos.explicar(planos.ConsultaQuente('avaliação', por_avaliacao, ordena_desempate=True), valores)
+        self.assertTrue(plano.ok)
+
+    def test_banco_sem_explain_e_erro_do_comando(self):
+        with patch.dict(planos.EXPLICADORES, clear=True):
+            with self.assertRaisesMessage(CommandError, 'EXPLAIN não suportado'):
+                call_command('verificar_indices', stdout=io.StringIO())
+
+
+class ConfiguracaoBancoTest(SimpleTestCase):
+    """Perfil do banco por variáveis de ambiente (core/banco.py)"""
+
+    def test_padrao_e_sqlite_com_uma_conexao_por_requisicao(self):
+        configuracao = banco.configuracao_banco(Path('/app'), {})
+        self.assertEqual(configuracao['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(configuracao['NAME'], Path('/app/db.sqlite3'))
+        self.assertEqual(configuracao['CONN_MAX_AGE'], 0)
+        self.assertFalse(configuracao['CONN_HEALTH_CHECKS'])
+
+    def test_postgresql_persistente_com_health_checks(self):
+        configuracao = banco.configuracao_banco(Path('/app'), {
+            'DB_NAME': 'loja', 'DB_HOST': 'db', 'DB_PASSWORD': 'segredo', 'DB_SSLMODE': 'require',
+        }, engine='postgresql', conn_max_age=600, health_checks=True)
+        self.assertEqual(configuracao['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((configuracao['NAME'], configuracao['HOST']), ('loja', 'db'))
+        self.assertEqual(configuracao['CONN_MAX_AGE'], 600)
+        self.assertTrue(configuracao['CONN_HEALTH_CHECKS'])
+        self.assertEqual(configuracao['OPTIONS'], {'sslmode': 'require'})
+
+    def test_pool_zera_conn_max_age(self):
+        configuracao = banco.configuracao_banco(Path('/app'), {
+            'DB_ENGINE': 'postgresql', 'DB_CONN_MAX_AGE': '600', 'DB_POOL': '1', 'DB_POOL_MAX': '20',
+        })
+        self.assertEqual(configuracao['CONN_MAX_AGE'], 0)
+        self.assertEqual(configuracao['OPTIONS']['pool']['min_size'], 2)
+        self.assertEqual(configuracao['OPTIONS']['pool']['max_size'], 20)
+
+    def test_replicas_copiam_o_principal(self):
+        principal = banco.configuracao_banco(Path('/app'), {'DB_ENGINE': 'postgresql', 'DB_POOL': '1'})
+        bancos = banco.configuracao_replicas(principal, {'DB_REPLICAS': 'leitura1, leitura2:6432'})
+        self.assertEqual(list(bancos), ['replica_1', 'replica_2'])
+        self.assertEqual((bancos['replica_1']['HOST'], bancos['replica_1']['PORT']), ('leitura1', '5432'))
+        self.assertEqual((bancos['replica_2']['HOST'], bancos['replica_2']['PORT']), ('leitura2', '6432'))
+        self.assertEqual(bancos['replica_2']['OPTIONS']['pool'], principal['OPTIONS']['pool'])
+        self.assertEqual(bancos['replica_1']['TEST'], {'MIRROR': 'default'})
+
+        sqlite = banco.configuracao_replicas(banco.configuracao_banco(Path('/app'), {}), {'DB_REPLICAS': 'replica.sqlite3'})
+        self.assertEqual(sqlite['replica_1']['NAME'], Path('/app/replica.sqlite3'))
+
+    def test_engine_invalido(self):
+        with self.assertRaisesMessage(ValueError, 'DB_ENGINE inválido'):
+            banco.configuracao_banco(Path('/app'), {'DB_ENGINE': 'mysql'})
+
+    def test_pragmas_aplicados_em_cada_conexao_sqlite(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        # Conexão avulsa num arquivo (o banco de teste é em memória, sem WAL)
+        conexao = DatabaseWrapper(dict(
+            connection.settings_dict, NAME=os.path.join(pasta, 'pragmas.sqlite3'),
+        ), alias='pragmas')
+        self.addCleanup(conexao.close)
+
+        pragmas = banco.pragmas_sqlite({'DB_SQLITE_BUSY_TIMEOUT': '2500'})
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            with conexao.cursor() as cursor:
+                valores = []
+                for nome in ('journal_mode', 'synchronous', 'busy_timeout'):
+                    cursor.execute(f'PRAGMA {nome}')
+                    valores.append(cursor.fetchone()[0])
+        self.assertEqual(valores, ['wal', 1, 2500])
+
+
+class ConfiguracaoSessoesTest(SimpleTestCase):
+    """Motor e cache das sessões por variáveis de ambiente (core/sessoes)"""
+
+    def test_padrao_e_cached_db_em_memoria(self):
+        self.assertEqual(sessoes.motor_sessoes({}), 'core.sessoes.cached_db')
+        self.assertEqual(
+            sessoes.cache_sessoes(Path('/app'), {})['BACKEND'],
+            'django.core.cache.backends.locmem.LocMemCache',
+        )
+
+    def test_cache_em_arquivo_e_compartilhados(self):
+        self.assertEqual(sessoes.motor_sessoes({'SESSION_STORE': 'cache'}), 'core.sessoes.cache')
+        arquivo = sessoes.cache_sessoes(Path('/app'), {'SESSION_CACHE': 'arquivo'})
+        self.assertEqual(arquivo['LOCATION'], str(Path('/app/.cache/sessoes')))
+        redis = sessoes.cache_sessoes(Path('/app'), {'SESSION_CACHE': 'redis://cache:6379/1'})
+        self.assertEqual(redis['LOCATION'], 'redis://cache:6379/1')
+        memcached = sessoes.cache_sessoes(Path('/app'), {'SESSION_CACHE': 'memcached://cache:11211'})
+        self.assertEqual(memcached['LOCATION'], 'cache:11211')
+
+    def test_valores_invalidos(self):
+        with self.assertRaisesMessage(ValueError, 'SESSION_STORE inválido'):
+            sessoes.motor_sessoes({'SESSION_STORE': 'cookies'})
+        with self.assertRaisesMessage(ValueError, 'SESSION_CACHE inválido'):
+            sessoes.cache_sessoes(Path('/app'), {'SESSION_CACHE': 'disco'})
+        with self.assertRaisesMessage(ValueError, 'SESSION_CACHE não definido'):
+            sessoes.cache_sessoes(Path('/app'), {}, cache=None)
+
+
+class SessoesTest(TestCase):
+    """Sessões sem escrita redundante e limpeza das expiradas"""
+
+    def test_sessao_inalterada_nao_e_gravada(self):
+        sessao = cached_db.SessionStore()
+        sessao['carrinho'] = 3
+        sessao.save()
+
+        sessao = cached_db.SessionStore(sessao.session_key)
+        sessao['carrinho'] = sessao['carrinho']
+        self.assertTrue(sessao.modified)
+        with self.assertNumQueries(0):
+            sessao.save()
+
+        sessao['carrinho'] = 4
+        # UPDATE entre SAVEPOINT e RELEASE
+        with self.assertNumQueries(3):
+            sessao.save()
+        self.assertEqual(Session.objects.get().get_decoded(), {'carrinho': 4})
+
+    def test_paginas_nao_escrevem_a_sessao(self):
+        usuario = get_user_model().objects.create_user(
+            username='sessao@teste.com', email='sessao@teste.com', password='senha123'
+        )
+        self.client.force_login(usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('core:home'))
+            self.client.get(reverse('produtos:lista'))
+            self.client.get(reverse('carrinho:visualizar'))
+
+        # Sessão lida do cache e nunca regravada
+        self.assertFalse([
+            consulta['sql'] for consulta in consultas.captured_queries if 'django_session' in consulta['sql']
+        ])
+
+    def test_limpar_sessoes_em_lotes(self):
+        expirou = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'expirada{i}', session_data='', expire_date=expirou) for i in range(5)
+        ])
+        ativa = cached_db.SessionStore()
+        ativa['x'] = 1
+        ativa.save()
+
+        saida = io.StringIO()
+        call_command('limpar_sessoes', lote=2, stdout=saida)
+
+        self.assertIn('5 sessões expiradas apagadas em 3 lote(s)', saida.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [ativa.session_key])
+
+
+class CacheEmCamadasTest(TestCase):
+    """LRU do processo + cache compartilhado, versões e get_or_set (core/caches)"""
+
+    def setUp(self):
+        cache.clear()
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        # Um cache em arquivo faz o papel do compartilhado (Redis, memcached)
+        configuracao = {
+            'default': caches.configuracao_cache('locmem', Path('default'), 'CACHE', 100),
+            'arquivo': caches.configuracao_cache('arquivo', Path(pasta), 'CACHE', 100),
+        }
+        substituicao = override_settings(CACHES=configuracao)
+        substituicao.enable()
+        self.addCleanup(substituicao.disable)
+        self.camadas = camadas.CacheEmCamadas('arquivo', tamanho_local=2, ttl_local=60)
+
+    def test_configuracao_do_compartilhado(self):
+        self.assertEqual(caches.cache_compartilhado(Path('/app'), {})['LOCATION'], 'compartilhado')
+        arquivo = caches.cache_compartilhado(Path('/app'), {'CACHE_COMPARTILHADO': 'arquivo'})
+        self.assertEqual(arquivo['LOCATION'], str(Path('/app/.cache/compartilhado')))
+        with self.assertRaisesMessage(ValueError, 'CACHE_COMPARTILHADO inválido'):
+            caches.cache_compartilhado(Path('/app'), {'CACHE_COMPARTILHADO': 'disco'})
+        # Produção não tem padrão: o cache precisa ser escolhido
+        with self.assertRaisesMessage(ValueError, 'CACHE_COMPARTILHADO não definido'):
+            caches.cache_compartilhado(Path('/app'), {}, cache=None)
+        with self.assertRaisesMessage(ValueError, 'não é visto pelos outros processos'):
+            caches.cache_compartilhado(Path('/app'), {'CACHE_COMPARTILHADO': 'locmem'}, entre_processos=True)
+        redis = caches.cache_compartilhado(Path('/app'), {'CACHE_COMPARTILHADO': 'redis://cache:6379/0'}, cache=None)
+        self.assertEqual(redis['LOCATION'], 'redis://cache:6379/0')
+
+    def test_lru_descarta_o_menos_usado(self):
+        for chave in ('a', 'b'):
+            self.camadas.set(chave, chave.upper())
+        self.camadas.get('a')
+        self.camadas.set('c', 'C')
+
+        self.assertEqual(len(self.camadas.local), 2)
+        self.assertIsNone(self.camadas.local.get('b'))
+        # Continua na camada compartilhada
+        self.assertEqual(self.camadas.get('b'), 'B')
+
+    def test_local_serve_ate_o_ttl(self):
+        self.camadas.set('chave', 1)
+        self.camadas.compartilhado.set('chave', (2, None, 0.0))
+        self.assertEqual(self.camadas.get('chave'), 1)
+
+        self.camadas.local.ttl = 0.01
+        self.camadas.local.set('chave', (1, None, 0.0))
+        time.sleep(0.02)
+        self.assertEqual(self.camadas.get('chave'), 2)
+
+    def test_trava_calcula_uma_vez_so(self):
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            time.sleep(0.2)
+            return 'valor'
+
+        # add() do cache em memória é atômico (o do cache em arquivo não é)
+        em_memoria = camadas.CacheEmCamadas('default')
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(em_memoria.get_or_set('lenta', calcular, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(resultados, ['valor'] * 8)
+        self.assertEqual(len(chamadas), 1)
+        self.assertNotIn('lenta:trava', em_memoria.compartilhado)
+
+    def test_expiracao_antecipada_probabilistica(self):
+        # Faltam 2 s para expirar e o cálculo levou 100 s: com o sorteio no
+        # meio (u = 0.5, antecipa 100 * ln 2 ≈ 69 s), recalcula já
+        self.camadas.compartilhado.set('xfetch', ('antigo', time.time() + 2, 100.0))
+        with patch.object(camadas.random, 'random', return_value=0.5):
+            self.assertEqual(self.camadas.get_or_set('xfetch', lambda: 'novo', 60), 'novo')
+
+        self.camadas.local.clear()
+        self.camadas.compartilhado.set('xfetch', ('antigo', time.time() + 2, 100.0))
+        self.assertEqual(self.camadas.get_or_set('xfetch', lambda: 'novo', 60, beta=0), 'antigo')
+
+    def test_queryset_em_cache_ate_o_modelo_mudar(self):
+        CategoriaProduto.objects.create(nome='Rações')
+        consulta = CategoriaProduto.objects.filter(ativo=True).order_by('nome')
+
+        with self.assertNumQueries(1):
+            camadas.queryset_em_cache(consulta)
+        with self.assertNumQueries(0):
+            self.assertEqual([c.nome for c in camadas.queryset_em_cache(consulta)], ['Rações'])
+
+        CategoriaProduto.objects.create(nome='Brinquedos')
+        with self.assertNumQueries(1):
+            nomes = [c.nome for c in camadas.queryset_em_cache(consulta)]
+        self.assertEqual(nomes, ['Brinquedos', 'Rações'])
+        self.assertEqual(camadas.queryset_em_cache(CategoriaProduto.objects.none()), [])
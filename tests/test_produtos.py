@@ -0,0 +1,745 @@
+# ==========================================
+# tests/test_produtos.py
+# ==========================================
+
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from produtos import busca, estoque, importacao, recomendacoes
+from produtos.models import AvaliacaoProduto, CategoriaProduto, Produto, ProdutoRelacionado, ReservaEstoque
+
+User = get_user_model()
+
+
+def criar_produto(categoria, nome, **kwargs):
+    dados = {
+        'descricao': '',
+        'preco_original': Decimal('50.00'),
+        'estoque': 10,
+    }
+    dados.update(kwargs)
+    return Produto.objects.create(nome=nome, categoria=categoria, **dados)
+
+
+class NormalizacaoBuscaTest(TestCase):
+    """Testes da normalização e do stemmer"""
+
+    def test_remove_acentos_e_maiusculas(self):
+        self.assertEqual(busca.normalizar('Ração ÚMIDA'), 'racao umida')
+
+    def test_plural_e_singular_tem_mesmo_radical(self):
+        self.assertEqual(busca.radical('racoes'), busca.radical('racao'))
+        self.assertEqual(busca.radical('brinquedos'), busca.radical('brinquedo'))
+        self.assertEqual(busca.radical('caes'), busca.radical('cao'))
+
+    def test_diminutivo_e_genero(self):
+        self.assertEqual(busca.radical('gatinhos'), busca.radical('gato'))
+        self.assertEqual(busca.radical('cachorra'), busca.radical('cachorro'))
+
+    def test_tokenizar_ignora_pontuacao(self):
+        self.assertEqual(busca.tokenizar('  !!  '), [])
+        self.assertEqual(len(busca.tokenizar('Ração, 15kg!')), 2)
+
+
+class IndiceBuscaTest(TestCase):
+    """Testes do índice de busca sincronizado por sinais"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alimentos = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.brinquedos = CategoriaProduto.objects.create(nome='Brinquedos', slug='brinquedos', tipo='brinquedos')
+        cls.racao = criar_produto(cls.alimentos, 'Ração para Cães Adultos', descricao='Sabor carne')
+        cls.petisco = criar_produto(cls.alimentos, 'Petisco Natural', descricao='Complementa a ração diária')
+        cls.bola = criar_produto(cls.brinquedos, 'Bolinha Resistente', descricao='Para cães agitados')
+
+    def test_busca_sem_acento_encontra_produto_acentuado(self):
+        self.assertIn(self.racao.pk, busca.buscar('racao'))
+
+    def test_nome_tem_mais_peso_que_descricao(self):
+        self.assertEqual(busca.buscar('rações'), [self.racao.pk, self.petisco.pk])
+
+    def test_prefixo_do_ultimo_termo(self):
+        self.assertEqual(busca.buscar('bolin'), [self.bola.pk])
+
+    def test_todos_os_termos_sao_obrigatorios(self):
+        self.assertEqual(busca.buscar('cães resistente'), [self.bola.pk])
+
+    def test_busca_por_nome_da_categoria(self):
+        self.assertEqual(set(busca.buscar('alimento')), {self.racao.pk, self.petisco.pk})
+
+    def test_salvar_produto_atualiza_indice(self):
+        self.bola.nome = 'Frisbee Flutuante'
+        self.bola.save()
+
+        self.assertEqual(busca.buscar('bolinha'), [])
+        self.assertEqual(busca.buscar('frisbee'), [self.bola.pk])
+
+    def test_excluir_produto_remove_do_indice(self):
+        pk = self.petisco.pk
+        self.petisco.delete()
+
+        self.assertNotIn(pk, busca.buscar('petisco'))
+
+    def test_renomear_categoria_reindexa_produtos(self):
+        self.brinquedos.nome = 'Diversão'
+        self.brinquedos.save()
+
+        self.assertEqual(busca.buscar('diversao'), [self.bola.pk])
+
+    def test_reindexar_reconstroi_indice(self):
+        busca.obter_indice().limpar()
+        self.assertEqual(busca.buscar('petisco'), [])
+
+        saida = StringIO()
+        call_command('reindexar_busca', stdout=saida)
+
+        self.assertEqual(busca.buscar('petisco'), [self.petisco.pk])
+        self.assertIn('3 produtos', saida.getvalue())
+
+    def test_limite_so_afeta_o_ranking(self):
+        queryset = Produto.objects.all()
+        with patch.object(busca, 'LIMITE_RESULTADOS', 1):
+            filtrado = busca.filtrar_queryset(queryset, 'rações')
+            self.assertEqual(filtrado.count(), 2)
+            self.assertEqual(
+                list(filtrado.order_by('relevancia_busca').values_list('pk', flat=True)),
+                [self.racao.pk, self.petisco.pk],
+            )
+
+    def test_migrate_indexa_produtos_se_indice_vazio(self):
+        busca.obter_indice().limpar()
+        call_command('migrate', 'produtos', verbosity=0)
+
+        self.assertEqual(busca.buscar('petisco'), [self.petisco.pk])
+
+    def test_indice_em_memoria_tem_mesmo_resultado(self):
+        indice = busca.IndiceMemoria()
+
+        self.assertEqual(indice.buscar('rações'), [self.racao.pk, self.petisco.pk])
+        self.assertEqual(indice.buscar('cães resistente'), [self.bola.pk])
+
+        indice.remover([self.racao.pk])
+        self.assertEqual(indice.buscar('rações'), [self.petisco.pk])
+
+    def test_lista_de_produtos_ordena_por_relevancia(self):
+        response = self.client.get(reverse('produtos:lista'), {'busca': 'ração'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['produtos']), [self.racao, self.petisco])
+        self.assertEqual(response.context['total_produtos'], 2)
+
+    def test_lista_de_produtos_busca_sem_resultado(self):
+        response = self.client.get(reverse('produtos:lista'), {'busca': 'aquário'})
+
+        self.assertEqual(list(response.context['produtos']), [])
+
+
+class FacetasListagemTest(TestCase):
+    """Testes das contagens facetadas da listagem"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alimentos = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.higiene = CategoriaProduto.objects.create(nome='Higiene', slug='higiene', tipo='higiene')
+        criar_produto(cls.alimentos, 'Ração Filhotes', preco_original=Decimal('30.00'))
+        criar_produto(cls.alimentos, 'Ração Sênior', preco_original=Decimal('80.00'), preco_desconto=Decimal('70.00'))
+        criar_produto(cls.alimentos, 'Petisco', preco_original=Decimal('250.00'))
+        criar_produto(cls.higiene, 'Shampoo', preco_original=Decimal('45.00'), preco_desconto=Decimal('40.00'))
+        criar_produto(cls.higiene, 'Escova', preco_original=Decimal('120.00'), ativo=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(reverse('produtos:lista'), params)
+
+    def test_facetas_sem_filtro(self):
+        facetas = self.get().context['facetas']
+
+        self.assertEqual(facetas['total'], 4)
+        self.assertEqual(facetas['por_categoria'], {self.alimentos.pk: 3, self.higiene.pk: 1})
+        self.assertEqual(facetas['promocao'], 2)
+        self.assertEqual([f['total'] for f in facetas['faixas']], [2, 1, 0, 1])
+
+    def test_categoria_nao_zera_contagem_das_outras(self):
+        response = self.get(categoria=self.higiene.pk)
+        facetas = response.context['facetas']
+
+        self.assertEqual(facetas['total'], 1)
+        self.assertEqual(facetas['por_categoria'][self.alimentos.pk], 3)
+        self.assertEqual(response.context['paginator'].count, 1)
+
+    def test_filtros_combinados(self):
+        facetas = self.get(preco_max='100', em_promocao='1').context['facetas']
+
+        self.assertEqual(facetas['total'], 2)
+        # A faceta de preço ignora o próprio filtro, mas respeita a promoção
+        self.assertEqual([f['total'] for f in facetas['faixas']], [1, 1, 0, 0])
+        # A de promoção respeita o filtro de preço
+        self.assertEqual(facetas['promocao'], 2)
+
+    def test_link_da_faixa_lista_o_que_ela_conta(self):
+        criar_produto(self.higiene, 'Tapete', preco_original=Decimal('100.00'), preco_desconto=Decimal('90.00'))
+        faixas = {f['chave']: f for f in self.get(em_promocao='1').context['facetas']['faixas']}
+        self.assertEqual((faixas['50_100']['total'], faixas['100_200']['total']), (1, 1))
+
+        response = self.get(preco_min='50', preco_max='99.99', em_promocao='1')
+        self.assertEqual(response.context['paginator'].count, faixas['50_100']['total'])
+        # O link da faixa mantém a promoção ativa
+        self.assertContains(response, '?preco_min=50&preco_max=99.99&em_promocao=1')
+
+    def test_preco_maximo_informado_e_inclusivo(self):
+        response = self.get(preco_min='45', preco_max='45')
+        self.assertEqual([p.nome for p in response.context['produtos']], ['Shampoo'])
+
+    def test_categorias_recebem_total_da_faceta(self):
+        categorias = self.get(em_promocao='1').context['categorias']
+
+        self.assertEqual({c.nome: c.total_produtos for c in categorias}, {'Alimentos': 1, 'Higiene': 1})
+
+    def test_numero_fixo_de_consultas(self):
+        combinacoes = [
+            {'categoria': self.alimentos.pk},
+            {'preco_min': '10', 'preco_max': '100'},
+            {'em_promocao': '1', 'ordenar': 'menor_preco'},
+            {'categoria': self.higiene.pk, 'preco_min': '10', 'em_promocao': '1', 'ordenar': 'nome_za'},
+            {'page': '1', 'ordenar': 'melhor_avaliacao'},
+        ]
+        # A primeira requisição carrega as categorias no cache do processo
+        with self.assertNumQueries(3):
+            self.get()
+        for params in combinacoes:
+            with self.subTest(params=params):
+                # facetas + página
+                with self.assertNumQueries(2):
+                    self.get(**params)
+        # Página já vista vem do cache das listagens: só as facetas
+        with self.assertNumQueries(1):
+            self.get()
+
+    def test_busca_acrescenta_somente_a_consulta_ao_indice(self):
+        self.get()
+        with self.assertNumQueries(3):
+            response = self.get(busca='ração', categoria=self.alimentos.pk, em_promocao='1')
+
+        self.assertEqual(response.context['facetas']['total'], 1)
+
+
+class ReservaEstoqueTest(TestCase):
+    """Testes das reservas de estoque"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = CategoriaProduto.objects.create(nome='Caminhas')
+
+    def setUp(self):
+        self.cama = criar_produto(self.categoria, 'Caminha', estoque=5)
+        self.manta = criar_produto(self.categoria, 'Manta', estoque=2)
+
+    def _estoques(self):
+        return list(Produto.objects.order_by('pk').values_list('estoque', flat=True))
+
+    def test_reserva_baixa_e_liberacao_devolve(self):
+        estoque.reservar({self.cama.pk: 3, self.manta.pk: 2}, referencia='P1')
+        self.assertEqual(self._estoques(), [2, 0])
+
+        with self.assertNumQueries(5):
+            self.assertEqual(estoque.liberar_reservas(['P1']), 2)
+        self.assertEqual(self._estoques(), [5, 2])
+        self.assertFalse(ReservaEstoque.objects.exists())
+
+    def test_falta_de_um_produto_nao_reserva_nada(self):
+        with self.assertRaises(estoque.EstoqueInsuficiente) as erro:
+            estoque.reservar({self.cama.pk: 1, self.manta.pk: 3}, referencia='P2')
+
+        self.assertEqual([pk for pk, _, _ in erro.exception.produtos], [self.manta.pk])
+        self.assertEqual(self._estoques(), [5, 2])
+        self.assertFalse(ReservaEstoque.objects.exists())
+
+    def test_confirmacao_mantem_baixa(self):
+        estoque.reservar({self.cama.pk: 1}, referencia='P3')
+        estoque.confirmar_reservas(['P3'])
+        estoque.liberar_reservas(['P3'])
+        self.assertEqual(self._estoques(), [4, 2])
+
+    def test_comando_libera_so_as_expiradas(self):
+        estoque.reservar({self.cama.pk: 2}, referencia='VENCIDA', validade=timedelta(minutes=-1))
+        estoque.reservar({self.cama.pk: 1, self.manta.pk: 1}, referencia='VALIDA')
+
+        saida = StringIO()
+        call_command('liberar_reservas_expiradas', stdout=saida)
+
+        self.assertIn('1 reservas expiradas liberadas', saida.getvalue())
+        self.assertEqual(self._estoques(), [4, 1])
+        self.assertEqual(set(ReservaEstoque.objects.values_list('referencia', flat=True)), {'VALIDA'})
+
+    def test_reserva_expirada_nao_e_confirmada(self):
+        estoque.reservar({self.cama.pk: 2}, referencia='VENCIDA', validade=timedelta(minutes=-1))
+        estoque.reservar({self.manta.pk: 1}, referencia='VALIDA')
+        avisadas = []
+
+        def receber(sender, referencias, **kwargs):
+            avisadas.append(referencias)
+
+        estoque.reservas_expiradas.connect(receber)
+        self.addCleanup(estoque.reservas_expiradas.disconnect, receber)
+        estoque.liberar_reservas_expiradas()
+
+        self.assertEqual(avisadas, [{'VENCIDA'}])
+        # As unidades já voltaram ao estoque: confirmar não pode baixá-las de novo
+        self.assertEqual(estoque.confirmar_reservas(['VENCIDA', 'VALIDA']), {'VALIDA'})
+        self.assertEqual(self._estoques(), [5, 1])
+
+
+class ReservaConcorrenteTest(TransactionTestCase):
+    """Várias threads disputando as últimas unidades não podem vender a mais"""
+
+    THREADS = 8
+    TENTATIVAS_POR_THREAD = 10
+    ESTOQUE = 25
+
+    def test_sem_venda_acima_do_estoque(self):
+        categoria = CategoriaProduto.objects.create(nome='Disputados')
+        produto = criar_produto(categoria, 'Último lote', estoque=self.ESTOQUE)
+        barreira = threading.Barrier(self.THREADS)
+        resultados = []
+
+        def comprar(numero):
+            barreira.wait()
+            try:
+                for tentativa in range(self.TENTATIVAS_POR_THREAD):
+                    referencia = f'T{numero}-{tentativa}'
+                    while True:
+                        try:
+                            estoque.reservar({produto.pk: 1}, referencia=referencia)
+                            resultados.append(True)
+                        except estoque.EstoqueInsuficiente:
+                            resultados.append(False)
+                        except OperationalError:
+                            # SQLite: banco travado por outra escrita, tenta de novo
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=comprar, args=(n,)) for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        produto.refresh_from_db()
+        self.assertEqual(resultados.count(True), self.ESTOQUE)
+        self.assertEqual(len(resultados), self.THREADS * self.TENTATIVAS_POR_THREAD)
+        self.assertEqual(produto.estoque, 0)
+        self.assertEqual(ReservaEstoque.objects.count(), self.ESTOQUE)
+
+
+class ImportacaoCatalogoTest(TestCase):
+    """Testes da importação de planilhas do catálogo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alimentos = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.brinquedos = CategoriaProduto.objects.create(nome='Brinquedos', slug='brinquedos', tipo='brinquedos')
+
+    def importar_csv(self, texto, **kwargs):
+        return importacao.importar_catalogo(BytesIO(texto.encode('utf-8')), 'catalogo.csv', **kwargs)
+
+    def test_csv_cria_produtos_e_indexa(self):
+        resultado = self.importar_csv(
+            'Nome;Categoria;Preço Original;Estoque;Destaque\n'
+            'Ração Premium;alimentos;1.234,50;7;sim\n'
+            'Bolinha;brinquedos;19,90;;não\n'
+        )
+        self.assertEqual((resultado.gravadas, resultado.total_erros), (2, 0))
+        racao = Produto.objects.get(slug='racao-premium')
+        self.assertEqual(racao.preco_original, Decimal('1234.50'))
+        self.assertEqual((racao.estoque, racao.destaque, racao.categoria), (7, True, self.alimentos))
+        self.assertEqual(Produto.objects.get(slug='bolinha').estoque, 0)
+        self.assertEqual(busca.buscar('racao'), [racao.pk])
+
+    def test_upsert_pelo_slug_preserva_colunas_ausentes(self):
+        produto = criar_produto(self.alimentos, 'Petisco', slug='petisco', estoque=3, marca='Outra')
+        resultado = self.importar_csv(
+            'slug,nome,categoria,preco_original\n'
+            'petisco,Petisco Natural,brinquedos,12.00\n'
+            'petisco,Petisco Natural 2,brinquedos,13.00\n'
+        )
+        self.assertEqual(resultado.gravadas, 1)
+        produto.refresh_from_db()
+        self.assertEqual(produto.nome, 'Petisco Natural 2')
+        self.assertEqual(produto.categoria, self.brinquedos)
+        self.assertEqual((produto.estoque, produto.marca), (3, 'Outra'))
+        self.assertEqual(Produto.objects.count(), 1)
+
+    def test_slug_gerado_nao_sobrescreve_produto_existente(self):
+        produto = criar_produto(self.alimentos, 'Petisco', slug='petisco', estoque=3)
+        resultado = self.importar_csv(
+            'nome,categoria,preco_original\n'
+            'Petisco,brinquedos,12.00\n'
+            'Bolinha,brinquedos,5.00\n'
+            'Bolinha,brinquedos,6.00\n'
+        )
+        self.assertEqual((resultado.gravadas, resultado.total_erros), (1, 2))
+        erros = dict(resultado.erros)
+        self.assertIn('informe a coluna slug', erros[2][0])
+        self.assertIn('informe a coluna slug', erros[4][0])
+        produto.refresh_from_db()
+        self.assertEqual((produto.categoria, produto.preco_original), (self.alimentos, Decimal('50.00')))
+        self.assertEqual(Produto.objects.get(slug='bolinha').preco_original, Decimal('5.00'))
+
+    def test_linhas_invalidas_vao_para_o_relatorio(self):
+        rejeitadas = []
+        resultado = self.importar_csv(
+            'nome,categoria,preco_original,preco_desconto,ativo\n'
+            'Valido,alimentos,10,,1\n'
+            'Sem categoria,inexistente,10,,1\n'
+            ',alimentos,abc,,1\n'
+            'Desconto alto,alimentos,10,20,talvez\n',
+            relatorio=lambda numero, erros: rejeitadas.append(numero),
+        )
+        self.assertEqual((resultado.linhas, resultado.gravadas, resultado.total_erros), (4, 1, 3))
+        self.assertEqual(rejeitadas, [3, 4, 5])
+        erros = dict(resultado.erros)
+        self.assertIn('categoria', erros[3][0])
+        self.assertEqual(len(erros[4]), 2)
+        self.assertEqual(len(erros[5]), 2)
+
+    def test_lotes_e_progresso(self):
+        chamadas = []
+        linhas = ''.join(f'Produto {i},alimentos,{i + 1}\n' for i in range(25))
+        self.importar_csv(
+            'nome,categoria,preco_original\n' + linhas,
+            lote=10, progresso=lambda *totais: chamadas.append(totais),
+        )
+        self.assertEqual(Produto.objects.count(), 25)
+        self.assertEqual(chamadas, [(10, 10, 0), (20, 20, 0), (25, 25, 0)])
+
+    def test_somente_validar_nao_grava(self):
+        resultado = self.importar_csv('nome,categoria,preco_original\nRação,alimentos,10\n', somente_validar=True)
+        self.assertEqual(resultado.gravadas, 1)
+        self.assertFalse(Produto.objects.exists())
+
+    def test_xlsx(self):
+        from openpyxl import Workbook
+
+        planilha = Workbook()
+        planilha.active.append(['nome', 'categoria', 'preco_original', 'estoque'])
+        planilha.active.append(['Arranhador', 'brinquedos', 89.9, 4])
+        arquivo = BytesIO()
+        planilha.save(arquivo)
+        arquivo.seek(0)
+
+        resultado = importacao.importar_catalogo(arquivo, 'catalogo.xlsx')
+        self.assertEqual(resultado.gravadas, 1)
+        produto = Produto.objects.get(slug='arranhador')
+        self.assertEqual((produto.preco_original, produto.estoque), (Decimal('89.90'), 4))
+
+    def test_colunas_obrigatorias_e_formato(self):
+        with self.assertRaises(importacao.PlanilhaInvalida):
+            self.importar_csv('nome,preco_original\nRação,10\n')
+        with self.assertRaises(importacao.PlanilhaInvalida):
+            importacao.importar_catalogo(BytesIO(b''), 'catalogo.txt')
+
+    def test_comando_grava_relatorio(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            planilha = os.path.join(pasta, 'catalogo.csv')
+            relatorio = os.path.join(pasta, 'erros.csv')
+            with open(planilha, 'w', encoding='utf-8') as arquivo:
+                arquivo.write('nome,categoria,preco_original\nRação,alimentos,10\nBola,nenhuma,5\n')
+
+            saida = StringIO()
+            call_command('importar_catalogo', planilha, relatorio=relatorio, stdout=saida)
+            with open(relatorio, encoding='utf-8') as arquivo:
+                linhas_relatorio = arquivo.read().splitlines()
+
+        self.assertIn('1 produtos importados, 1 linhas rejeitadas', saida.getvalue())
+        self.assertEqual(linhas_relatorio[0], 'linha,erros')
+        self.assertTrue(linhas_relatorio[1].startswith('3,'))
+
+    def test_upload_pelo_admin(self):
+        admin = User.objects.create_superuser(email='admin@teste.com', username='admin', password='senha12345')
+        self.client.force_login(admin)
+        url = reverse('admin:produtos_produto_importar')
+
+        self.assertContains(self.client.get(reverse('admin:produtos_produto_changelist')), url)
+        resposta = self.client.post(url, {
+            'arquivo': SimpleUploadedFile('catalogo.csv', 'nome,categoria,preco_original\nRação,alimentos,10\n'.encode()),
+        })
+        self.assertContains(resposta, '1 produtos importados, 0 linhas rejeitadas')
+        self.assertTrue(Produto.objects.filter(slug='racao').exists())
+
+
+class ContadorCategoriasTest(TestCase):
+    """Testes do contador de produtos ativos e do cache de categorias"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alimentos = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.higiene = CategoriaProduto.objects.create(nome='Higiene', slug='higiene', tipo='higiene')
+
+    def setUp(self):
+        cache.clear()
+
+    def totais(self):
+        return dict(CategoriaProduto.objects.values_list('slug', 'total_produtos_ativos'))
+
+    def test_acompanha_criacao_ativacao_troca_e_remocao(self):
+        racao = criar_produto(self.alimentos, 'Ração')
+        criar_produto(self.alimentos, 'Petisco', ativo=False)
+        self.assertEqual(self.totais(), {'alimentos': 1, 'higiene': 0})
+
+        produto = Produto.objects.get(pk=racao.pk)
+        produto.ativo = False
+        produto.save()
+        self.assertEqual(self.totais(), {'alimentos': 0, 'higiene': 0})
+
+        produto.ativo = True
+        produto.categoria = self.higiene
+        produto.save()
+        self.assertEqual(self.totais(), {'alimentos': 0, 'higiene': 1})
+
+        Produto.objects.filter(slug='petisco').get().delete()
+        Produto.objects.get(pk=racao.pk).delete()
+        self.assertEqual(self.totais(), {'alimentos': 0, 'higiene': 0})
+
+    def test_salvar_sem_mudanca_nao_escreve_na_categoria(self):
+        produto = Produto.objects.get(pk=criar_produto(self.alimentos, 'Ração').pk)
+        produto.estoque = 3
+        with CaptureQueriesContext(connection) as consultas:
+            produto.save(update_fields=['estoque'])
+        self.assertFalse([c for c in consultas if 'UPDATE "produtos_categoriaproduto"' in c['sql']])
+
+    def test_instancia_sem_estado_reconta(self):
+        racao = criar_produto(self.alimentos, 'Ração')
+        # Com 'ativo' adiado não dá para saber o estado anterior
+        produto = Produto.objects.only('nome', 'categoria').get(pk=racao.pk)
+        produto.categoria = self.higiene
+        produto.save()
+        self.assertEqual(self.totais(), {'alimentos': 0, 'higiene': 1})
+
+    def test_cache_de_categorias_e_invalidacao(self):
+        from produtos import categorias
+
+        with self.assertNumQueries(1):
+            self.assertEqual([c.nome for c in categorias.ativas()], ['Alimentos', 'Higiene'])
+        with self.assertNumQueries(0):
+            categorias.ativas()
+
+        criar_produto(self.higiene, 'Shampoo')
+        self.assertEqual([c.total_produtos_ativos for c in categorias.ativas()], [0, 1])
+
+        self.higiene.ativo = False
+        self.higiene.save()
+        self.assertEqual([c.nome for c in categorias.ativas()], ['Alimentos'])
+
+    def test_admin_le_o_contador(self):
+        criar_produto(self.alimentos, 'Ração')
+        admin = User.objects.create_superuser(email='admin@teste.com', username='admin', password='senha12345')
+        self.client.force_login(admin)
+        criar_produto(self.higiene, 'Shampoo')
+        # usuário, contagens do changelist e a página (sessão no cache); nada por linha
+        with self.assertNumQueries(4):
+            resposta = self.client.get(reverse('admin:produtos_categoriaproduto_changelist'))
+        self.assertContains(resposta, '<td class="field-total_produtos_ativos">1</td>', html=True)
+
+    def test_importacao_e_verificacao(self):
+        importacao.importar_catalogo(
+            BytesIO('nome,categoria,preco_original\nRação,alimentos,10\nBola,alimentos,5\n'.encode()),
+            'catalogo.csv',
+        )
+        self.assertEqual(self.totais()['alimentos'], 2)
+
+        CategoriaProduto.objects.update(total_produtos_ativos=7)
+        saida = StringIO()
+        call_command('verificar_categorias', corrigir=True, stdout=saida)
+        self.assertIn('2 categorias corrigidas', saida.getvalue())
+        self.assertEqual(self.totais(), {'alimentos': 2, 'higiene': 0})
+
+
+class RecomendacoesTest(TestCase):
+    """Testes dos produtos relacionados calculados em lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from carrinho.models import ItemPedido, Pedido
+
+        cls.alimentos = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.brinquedos = CategoriaProduto.objects.create(nome='Brinquedos', slug='brinquedos', tipo='brinquedos')
+        cls.racao = criar_produto(cls.alimentos, 'Ração', preco_original=Decimal('100.00'))
+        cls.petisco = criar_produto(cls.alimentos, 'Petisco', preco_original=Decimal('20.00'))
+        cls.sache = criar_produto(cls.alimentos, 'Sachê', preco_original=Decimal('90.00'))
+        cls.bola = criar_produto(cls.brinquedos, 'Bola', preco_original=Decimal('15.00'))
+        cls.corda = criar_produto(cls.brinquedos, 'Corda', preco_original=Decimal('18.00'))
+
+        usuario = User.objects.create_user(username='cliente', email='cliente@teste.com', password='senha123')
+
+        def pedido(status, *produtos):
+            novo = Pedido.objects.create(
+                usuario=usuario, subtotal=Decimal('10.00'), frete=Decimal('0.00'), total=Decimal('10.00'),
+                endereco_entrega='Rua A, 1', forma_pagamento='pix', status=status,
+            )
+            ItemPedido.objects.bulk_create([
+                ItemPedido(
+                    pedido=novo, produto=produto, nome_produto=produto.nome, quantidade=1,
+                    preco_unitario=produto.preco_original, subtotal=produto.preco_original,
+                )
+                for produto in produtos
+            ])
+
+        # Ração e bola saem juntas 3 vezes; ração e petisco, 2
+        for _ in range(3):
+            pedido('pago', cls.racao, cls.bola)
+        pedido('pago', cls.racao, cls.petisco)
+        pedido('entregue', cls.racao, cls.petisco, cls.petisco)
+        # Cancelados não contam
+        for _ in range(3):
+            pedido('cancelado', cls.racao, cls.corda)
+
+    def ids(self, produto):
+        return [p.pk for p in recomendacoes.relacionados(produto, limite=12)]
+
+    def test_coocorrencias(self):
+        pares = np.array([[1, 10], [1, 20], [1, 20], [2, 10], [2, 20], [2, 30], [3, 30]])
+        ids, linha, coluna, juntos, frequencia = recomendacoes.coocorrencias(pares)
+        self.assertEqual(ids.tolist(), [10, 20, 30])
+        self.assertEqual(frequencia.tolist(), [2, 2, 2])
+        matriz = {(ids[a], ids[b]): c for a, b, c in zip(linha, coluna, juntos)}
+        self.assertEqual(matriz, {(10, 20): 2, (20, 10): 2, (10, 30): 1, (30, 10): 1, (20, 30): 1, (30, 20): 1})
+
+    def test_compra_primeiro_depois_categoria_e_preco(self):
+        recomendacoes.calcular()
+        # bola (3 pedidos juntos) antes de petisco (2); o resto por preço na categoria
+        self.assertEqual(self.ids(self.racao), [self.bola.pk, self.petisco.pk, self.sache.pk])
+        self.assertEqual(self.ids(self.corda), [self.bola.pk])
+        origens = dict(
+            ProdutoRelacionado.objects.filter(produto=self.racao).values_list('relacionado_id', 'origem')
+        )
+        self.assertEqual(origens[self.bola.pk], 'compra')
+        self.assertEqual(origens[self.sache.pk], 'categoria')
+
+    def test_minimo_de_pedidos_em_comum(self):
+        recomendacoes.calcular(minimo=3)
+        self.assertEqual(self.ids(self.racao), [self.bola.pk, self.sache.pk, self.petisco.pk])
+
+    def test_inativos_ficam_de_fora(self):
+        Produto.objects.filter(pk=self.bola.pk).update(ativo=False)
+        recomendacoes.calcular()
+        self.assertNotIn(self.bola.pk, self.ids(self.racao))
+        self.assertFalse(ProdutoRelacionado.objects.filter(produto=self.bola).exists())
+
+    def test_leitura_em_uma_consulta(self):
+        recomendacoes.calcular(vizinhos=2)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(recomendacoes.relacionados(self.racao)), 2)
+
+    def test_comando_substitui_o_calculo_anterior(self):
+        recomendacoes.calcular()
+        saida = StringIO()
+        call_command('calcular_recomendacoes', vizinhos=1, stdout=saida)
+        self.assertIn('5 produtos', saida.getvalue())
+        self.assertEqual(ProdutoRelacionado.objects.count(), 5)
+
+
+class AvaliacoesProdutoTest(TestCase):
+    """Testes das avaliações e dos agregados de avaliação do produto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = CategoriaProduto.objects.create(nome='Alimentos', slug='alimentos', tipo='alimentos')
+        cls.racao = criar_produto(cls.categoria, 'Ração')
+        cls.bola = criar_produto(cls.categoria, 'Bola')
+        cls.clientes = [
+            User.objects.create_user(username=f'cliente{i}', email=f'cliente{i}@teste.com', password='senha123')
+            for i in range(6)
+        ]
+
+    def avaliar(self, produto, cliente, nota, **kwargs):
+        return AvaliacaoProduto.objects.create(produto=produto, usuario=cliente, nota=nota, comentario='Muito bom!', **kwargs)
+
+    def agregados(self, produto):
+        return Produto.objects.values_list('avaliacao', 'numero_avaliacoes', 'soma_notas').get(pk=produto.pk)
+
+    def test_agregados_acompanham_as_avaliacoes(self):
+        self.assertEqual(self.agregados(self.racao), (Decimal('0.0'), 0, 0))
+        self.avaliar(self.racao, self.clientes[0], 5)
+        avaliacao = self.avaliar(self.racao, self.clientes[1], 2)
+        self.assertEqual(self.agregados(self.racao), (Decimal('3.5'), 2, 7))
+
+        avaliacao = AvaliacaoProduto.objects.get(pk=avaliacao.pk)
+        avaliacao.nota = 4
+        avaliacao.save()
+        self.assertEqual(self.agregados(self.racao), (Decimal('4.5'), 2, 9))
+
+        avaliacao.aprovado = False
+        avaliacao.save()
+        self.assertEqual(self.agregados(self.racao), (Decimal('5.0'), 1, 5))
+
+        avaliacao.produto = self.bola
+        avaliacao.aprovado = True
+        avaliacao.save()
+        self.assertEqual(self.agregados(self.bola), (Decimal('4.0'), 1, 4))
+
+        AvaliacaoProduto.objects.get(usuario=self.clientes[0]).delete()
+        self.assertEqual(self.agregados(self.racao), (Decimal('0.0'), 0, 0))
+
+    def test_nova_avaliacao_e_um_update(self):
+        # INSERT da avaliação + UPDATE atômico do produto, sem ler o produto
+        with self.assertNumQueries(2):
+            self.avaliar(self.racao, self.clientes[0], 5)
+
+    def test_media_bayesiana_ordena_a_listagem(self):
+        # Uma nota 5 não supera cinco notas 4
+        self.avaliar(self.bola, self.clientes[0], 5)
+        for cliente in self.clientes[1:]:
+            self.avaliar(self.racao, cliente, 4)
+        self.racao.refresh_from_db()
+        self.bola.refresh_from_db()
+        self.assertGreater(self.racao.pontuacao_avaliacao, self.bola.pontuacao_avaliacao)
+        media, peso = Produto.prior_avaliacao()
+        self.assertAlmostEqual(self.bola.pontuacao_avaliacao, (5 + media * peso) / (1 + peso))
+
+        resposta = self.client.get(reverse('produtos:lista'), {'ordenar': 'melhor_avaliacao'})
+        self.assertEqual([p.pk for p in resposta.context['produtos']], [self.racao.pk, self.bola.pk])
+
+    def test_view_cria_e_depois_atualiza(self):
+        self.client.force_login(self.clientes[0])
+        url = reverse('produtos:adicionar_avaliacao', kwargs={'produto_slug': self.racao.slug})
+        resposta = self.client.post(url, {'nota': 5, 'titulo': 'Excelente!', 'comentario': 'Meu cão adorou.'})
+        self.assertRedirects(resposta, reverse('produtos:detalhe', args=[self.racao.slug]), fetch_redirect_response=False)
+
+        self.client.post(url, {'nota': 3, 'comentario': 'Mudei de ideia.'})
+        self.assertEqual(AvaliacaoProduto.objects.get(produto=self.racao, usuario=self.clientes[0]).nota, 3)
+        self.assertEqual(self.agregados(self.racao), (Decimal('3.0'), 1, 3))
+
+    def test_comando_e_moderacao_em_lote(self):
+        for cliente in self.clientes[:3]:
+            self.avaliar(self.racao, cliente, 4)
+        AvaliacaoProduto.objects.filter(usuario=self.clientes[0]).update(aprovado=False)
+        saida = StringIO()
+        call_command('verificar_avaliacoes', corrigir=True, stdout=saida)
+        self.assertIn('1 produtos corrigidos', saida.getvalue())
+        self.assertEqual(self.agregados(self.racao), (Decimal('4.0'), 2, 8))
+
+        admin = User.objects.create_superuser(email='admin@teste.com', username='admin', password='senha12345')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:produtos_avaliacaoproduto_changelist'), {
+            'action': 'reprovar', '_selected_action': list(AvaliacaoProduto.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(self.agregados(self.racao), (Decimal('0.0'), 0, 0))
@@ -0,0 +1,369 @@
+# ==========================================
+# tests/test_views.py
+# ==========================================
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from carrinho.models import Carrinho
+from core import conteudo_home, replicas
+from core.models import Banner, Oferta
+from core.paginacao import CursorInvalido, PaginadorCursor
+from core.perfilamento import OrcamentoExcedido, impressao, orcamento_consultas, registro
+from produtos.models import CategoriaProduto, Produto
+
+User = get_user_model()
+
+
+class PaginacaoCursorTest(TestCase):
+    """Testes da paginação por chave"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = CategoriaProduto.objects.create(nome='Brinquedos')
+        # Preços repetidos para exercitar o desempate pela chave primária
+        for i in range(25):
+            Produto.objects.create(
+                nome=f'Produto {i:02d}',
+                categoria=cls.categoria,
+                descricao='',
+                preco_original=Decimal(10 + i % 5),
+                estoque=5,
+            )
+
+    def _esperado(self, *ordenacao):
+        return list(Produto.objects.order_by(*ordenacao).values_list('pk', flat=True))
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        paginador = PaginadorCursor(Produto.objects.all(), 10, ordenacao=['preco_original'])
+        vistos = []
+        pagina = paginador.pagina()
+        while True:
+            vistos.extend(p.pk for p in pagina)
+            if not pagina.has_next():
+                break
+            pagina = paginador.pagina(pagina.cursor_proximo)
+
+        self.assertEqual(vistos, self._esperado('preco_original', 'pk'))
+
+    def test_cursor_anterior_volta_para_a_mesma_pagina(self):
+        paginador = PaginadorCursor(Produto.objects.all(), 10, ordenacao=['-preco_original'])
+        primeira = paginador.pagina()
+        segunda = paginador.pagina(primeira.cursor_proximo)
+        volta = paginador.pagina(segunda.cursor_anterior)
+
+        self.assertEqual([p.pk for p in volta], [p.pk for p in primeira])
+        self.assertFalse(primeira.has_previous())
+        self.assertTrue(volta.has_next())
+
+    def test_cursor_de_outra_ordenacao_e_rejeitado(self):
+        por_preco = PaginadorCursor(Produto.objects.all(), 10, ordenacao=['preco_original'])
+        por_nome = PaginadorCursor(Produto.objects.all(), 10, ordenacao=['nome'])
+        cursor = por_preco.pagina().cursor_proximo
+
+        with self.assertRaises(CursorInvalido):
+            por_nome.pagina(cursor)
+        with self.assertRaises(CursorInvalido):
+            por_preco.pagina(cursor + 'x')
+
+    def test_listagem_sem_offset_e_cursor_invalido_404(self):
+        url = reverse('produtos:lista')
+        response = self.client.get(url, {'ordenar': 'menor_preco'})
+        pagina = response.context['page_obj']
+        self.assertEqual(len(pagina), 20)
+
+        response = self.client.get(url, {'ordenar': 'menor_preco', 'cursor': pagina.cursor_proximo})
+        segunda = response.context['page_obj']
+        self.assertEqual(len(segunda), 5)
+        precos = [produto.preco_original for produto in [*pagina, *segunda]]
+        self.assertEqual(precos, sorted(precos))
+
+        response = self.client.get(url, {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_carregar_mais_em_json(self):
+        url = reverse('produtos:carregar_mais')
+        dados = self.client.get(url).json()
+        self.assertEqual(len(dados['produtos']), 20)
+        self.assertTrue(dados['tem_mais'])
+
+        dados = self.client.get(url, {'cursor': dados['proximo_cursor']}).json()
+        self.assertEqual(len(dados['produtos']), 5)
+        self.assertFalse(dados['tem_mais'])
+        self.assertIsNone(dados['proximo_cursor'])
+
+    def test_listagens_de_pets_e_servicos(self):
+        for nome in ('pets:adocao', 'pets:carregar_mais', 'servicos:lista', 'servicos:carregar_mais'):
+            with self.subTest(url=nome):
+                self.assertEqual(self.client.get(reverse(nome)).status_code, 200)
+
+
+class HomeCacheTest(TestCase):
+    """Testes do cache de conteúdo da página inicial"""
+
+    def setUp(self):
+        cache.clear()
+        self.agora = timezone.now()
+        Banner.objects.create(titulo='Banner 1', imagem='banners/1.png')
+
+    def test_home_aquecida_nao_consulta_banco(self):
+        self.client.get(reverse('core:home'))
+
+        # Pela view inteira (middlewares, context processors e template)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([b.titulo for b in response.context['banners']], ['Banner 1'])
+
+    def test_salvar_ou_apagar_invalida(self):
+        self.client.get(reverse('core:home'))
+        banner = Banner.objects.create(titulo='Banner 2', imagem='banners/2.png', ordem=1)
+
+        response = self.client.get(reverse('core:home'))
+        self.assertEqual(len(response.context['banners']), 2)
+
+        banner.delete()
+        response = self.client.get(reverse('core:home'))
+        self.assertEqual(len(response.context['banners']), 1)
+
+    def test_versao_troca_de_novo_no_commit(self):
+        self.client.get(reverse('core:home'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            Banner.objects.create(titulo='Banner 2', imagem='banners/2.png', ordem=1)
+            # Outra requisição remonta os blocos antes do commit, sob a versão nova
+            chave = conteudo_home._chave('blocos')
+            cache.set(chave, {'banners': []}, conteudo_home.TEMPO_CACHE)
+        for callback in callbacks:
+            callback()
+
+        self.assertNotEqual(conteudo_home._chave('blocos'), chave)
+        self.assertEqual(len(self.client.get(reverse('core:home')).context['banners']), 2)
+
+    def test_oferta_escolhida_pelo_periodo(self):
+        Oferta.objects.create(
+            titulo='Vencida', imagem='o.png',
+            data_inicio=self.agora - timedelta(days=10), data_fim=self.agora - timedelta(days=1),
+        )
+        atual = Oferta.objects.create(
+            titulo='Atual', imagem='o.png',
+            data_inicio=self.agora - timedelta(days=1), data_fim=self.agora + timedelta(hours=2),
+        )
+        Oferta.objects.create(
+            titulo='Futura', imagem='o.png', data_inicio=self.agora + timedelta(hours=1),
+        )
+
+        oferta, validade = conteudo_home._buscar_oferta(self.agora)
+        self.assertEqual(oferta, atual)
+        # Vale até a próxima oferta começar (1h), antes do fim da atual (2h)
+        self.assertAlmostEqual(validade, 3600, delta=2)
+
+        self.assertEqual(self.client.get(reverse('core:home')).context['oferta'], atual)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:home'))
+        self.assertEqual(response.context['oferta'], atual)
+
+    def test_sem_oferta_tambem_fica_em_cache(self):
+        self.assertIsNone(self.client.get(reverse('core:home')).context['oferta'])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:home'))
+        self.assertIsNone(response.context['oferta'])
+
+
+class PerfilamentoSQLTest(TestCase):
+    """Testes do middleware de perfilamento e do orçamento de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='staff', email='staff@teste.com', password='senha123', is_staff=True
+        )
+        categoria = CategoriaProduto.objects.create(nome='Rações')
+        carrinho = Carrinho.objects.create(usuario=cls.staff)
+        for i in range(5):
+            produto = Produto.objects.create(
+                nome=f'Ração {i}', categoria=categoria, descricao='',
+                preco_original=Decimal(20 + i), estoque=5,
+            )
+            carrinho.itens.create(produto=produto, quantidade=1)
+
+    def setUp(self):
+        cache.clear()
+        registro.limpar()
+
+    def test_impressao_ignora_parametros(self):
+        self.assertEqual(
+            impressao('SELECT * FROM t WHERE id IN (%s, %s, %s)  AND nome = \'a\' LIMIT 21'),
+            impressao('SELECT * FROM t WHERE id IN (%s) AND nome = \'b\' LIMIT 1'),
+        )
+
+    @override_settings(PERFILAMENTO_SQL=True, PERFILAMENTO_AMOSTRAGEM=1.0)
+    def test_middleware_registra_e_expoe_so_para_staff(self):
+        cliente = Client()
+        cliente.force_login(self.staff)
+        cliente.get(reverse('carrinho:visualizar'))
+        cliente.get(reverse('core:home'))
+
+        amostras = registro.amostras()
+        self.assertEqual([a['view'] for a in amostras], ['core:home', 'carrinho:visualizar'])
+        self.assertGreater(amostras[1]['consultas'], 0)
+        self.assertEqual(amostras[1]['orcamento'], 6)
+        self.assertEqual(amostras[1]['duplicadas'], [])
+
+        dados = cliente.get(reverse('core:perfilamento_json')).json()
+        self.assertEqual(len(dados['amostras']), 2)
+        self.assertEqual({linha['view'] for linha in dados['resumo']}, {'core:home', 'carrinho:visualizar'})
+        self.assertContains(cliente.get(reverse('core:perfilamento')), 'carrinho:visualizar')
+
+        anonimo = Client()
+        self.assertEqual(anonimo.get(reverse('core:perfilamento_json')).status_code, 302)
+
+    @override_settings(PERFILAMENTO_SQL=True, PERFILAMENTO_AMOSTRAGEM=0)
+    def test_amostragem_zero_nao_registra(self):
+        Client().get(reverse('core:home'))
+        self.assertEqual(registro.amostras(), [])
+
+    def test_middleware_desligado_por_padrao(self):
+        Client().get(reverse('core:home'))
+        self.assertEqual(registro.amostras(), [])
+
+    def test_orcamento_estourado_falha_com_as_repetidas(self):
+        @orcamento_consultas(2)
+        def view(request):
+            for produto in Produto.objects.all():
+                produto.categoria.nome
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        with self.assertRaisesMessage(OrcamentoExcedido, '5x SELECT'):
+            view(request)
+
+        # Em desenvolvimento, só o aviso
+        with override_settings(ORCAMENTO_CONSULTAS_ESTRITO=False, DEBUG=True):
+            with self.assertLogs('core.perfilamento', 'WARNING'):
+                self.assertEqual(view(request).status_code, 200)
+
+    @override_settings(ORCAMENTO_CONSULTAS_ESTRITO=False, DEBUG=False, PERFILAMENTO_SQL=False)
+    def test_orcamento_em_producao_nao_mede(self):
+        wrappers = []
+
+        @orcamento_consultas(0)
+        def view(request):
+            wrappers.append(len(connection.execute_wrappers))
+            Produto.objects.count()
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        with self.assertNoLogs('core.perfilamento', 'WARNING'):
+            self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(wrappers, [0])
+        self.assertEqual(request.orcamento_consultas, 0)
+
+    def test_views_principais_dentro_do_orcamento(self):
+        # As views declaram @orcamento_consultas: nos testes, estourar falha
+        self.client.force_login(self.staff)
+        for nome in ('core:home', 'produtos:lista', 'pets:adocao', 'servicos:lista', 'carrinho:visualizar'):
+            with self.subTest(url=nome):
+                self.assertEqual(self.client.get(reverse(nome)).status_code, 200)
+
+
+class ReplicasLeituraTest(TransactionTestCase):
+    """
+    Leituras do catálogo na réplica (dois arquivos SQLite) e fixação no
+    primário. TransactionTestCase: a cópia para a réplica não enxerga uma
+    transação aberta.
+    """
+
+    ALIAS = 'replica_teste'
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('leitor', 'leitor@teste.com', 'senha123')
+        categoria = CategoriaProduto.objects.create(nome='Rações')
+        self.produto = Produto.objects.create(
+            nome='Ração Original', categoria=categoria, descricao='',
+            preco_original=Decimal('50.00'), estoque=10,
+        )
+
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        connections.settings[self.ALIAS] = dict(
+            connection.settings_dict, NAME=os.path.join(pasta, 'replica.sqlite3'),
+        )
+        self.addCleanup(connections.settings.pop, self.ALIAS)
+        self.addCleanup(connections.__delitem__, self.ALIAS)
+        self.addCleanup(lambda: connections[self.ALIAS].close())
+
+        configuracao = override_settings(BANCOS_REPLICA=[self.ALIAS])
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        # A réplica recebe o estado atual e fica para trás na alteração
+        replicas.copiar_sqlite()
+        Produto.objects.filter(pk=self.produto.pk).update(nome='Ração Renomeada')
+        # Conectada aqui: o teste só libera abrir conexões dos seus aliases
+        connections[self.ALIAS].connect()
+        self.cliente = Client()
+
+    def test_catalogo_le_da_replica(self):
+        def view(request):
+            return HttpResponse(Produto.objects.get(pk=self.produto.pk).nome)
+
+        response = replicas.ReplicasMiddleware(view)(RequestFactory().get('/produtos/'))
+        self.assertEqual(response.content.decode(), 'Ração Original')
+
+        def view_com_cache(request):
+            with replicas.lendo_do_primario():
+                nome = Produto.objects.get(pk=self.produto.pk).nome
+            return HttpResponse(nome + ' / ' + Produto.objects.get(pk=self.produto.pk).nome)
+
+        response = replicas.ReplicasMiddleware(view_com_cache)(RequestFactory().get('/produtos/'))
+        self.assertEqual(response.content.decode(), 'Ração Renomeada / Ração Original')
+
+    def test_caches_versionados_sao_montados_do_primario(self):
+        # A listagem em cache e as categorias seriam guardadas sob a versão
+        # atual com o conteúdo atrasado da réplica
+        cache.clear()
+        response = self.cliente.get(reverse('produtos:lista'))
+        self.assertContains(response, 'Ração Renomeada')
+        self.assertNotContains(response, 'Ração Original')
+
+    def test_fora_de_requisicao_le_do_primario(self):
+        self.assertEqual(Produto.objects.get(pk=self.produto.pk).nome, 'Ração Renomeada')
+        with replicas.lendo_das_replicas():
+            self.assertEqual(Produto.objects.get(pk=self.produto.pk).nome, 'Ração Original')
+
+    def test_escrita_fixa_o_cliente_no_primario(self):
+        self.cliente.force_login(self.usuario)
+        response = self.cliente.post(reverse('carrinho:adicionar', args=[self.produto.pk]))
+        self.assertIn(replicas.COOKIE, response.cookies)
+
+        response = self.cliente.get(reverse('produtos:lista'))
+        self.assertContains(response, 'Ração Renomeada')
+
+    def test_rotas_do_carrinho_leem_do_primario(self):
+        self.cliente.force_login(self.usuario)
+        self.cliente.cookies.pop(replicas.COOKIE, None)
+        roteador = replicas.RoteadorReplicas()
+        bancos = []
+
+        def view(request):
+            bancos.append(roteador.db_for_read(Produto))
+            return HttpResponse()
+
+        middleware = replicas.ReplicasMiddleware(view)
+        middleware(RequestFactory().get('/carrinho/'))
+        middleware(RequestFactory().get('/produtos/'))
+        self.assertEqual(bancos, ['default', self.ALIAS])
+        # Fora dos apps de catálogo, sempre o primário
+        with replicas.lendo_das_replicas():
+            self.assertEqual(roteador.db_for_read(Carrinho), 'default')